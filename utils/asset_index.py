@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+One-pass index of the images in a lesson source tree.
+
+``fix_image_paths`` used to build, resolve and stat a Path for every image
+reference in every file. The index scans the source tree once, then maps
+each reference (relative to the Markdown file, or project-rooted with a
+leading ``/``) to its file, size and content hash with plain string
+lookups. It also reports missing and unreferenced images in one summary,
+and gives the incremental PDF manifest the hashes of each file's images.
+
+Usage:
+    # Summary of missing and unreferenced images
+    python3 utils/asset_index.py other_formats/markdown_lessons
+
+    # In code
+    from asset_index import AssetIndex
+    index = AssetIndex(Path("other_formats/markdown_lessons"))
+    index.scan_references(markdown_files)
+    entry = index.resolve("drawio_assets/diagram_ab12.png", markdown_file)
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import re
+import sys
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp"}
+
+# Markdown images: ![alt](path "title") - the same pattern md_to_pdf uses
+IMAGE_PATTERN = re.compile(r'!\[([^\]]*)\]\(([^)\s]+)(?:\s+"([^"]*)")?\)')
+
+# References that are not local files
+EXTERNAL_PREFIXES = ("http://", "https://", "file://", "data:", "asset://")
+
+# Directories never worth scanning for lesson images
+SKIP_DIRS = {".git", ".build_cache", "__pycache__", "node_modules", ".venv", "venv"}
+
+
+@dataclass
+class AssetEntry:
+    """One image file found by the scan."""
+
+    path: Path
+    size: int
+    mtime_ns: int
+
+    @cached_property
+    def uri(self) -> str:
+        return self.path.as_uri()
+
+    @cached_property
+    def sha256(self) -> str:
+        """Content hash, computed on first use and then remembered."""
+        return hashlib.sha256(self.path.read_bytes()).hexdigest()
+
+
+@dataclass
+class IndexSummary:
+    """Missing and unreferenced images across the scanned Markdown files."""
+
+    images: int
+    references: int
+    missing: List[Tuple[Path, str]] = field(default_factory=list)
+    unreferenced: List[Path] = field(default_factory=list)
+
+
+class AssetIndex:
+    """Images under ``source_dir``, looked up without per-reference syscalls."""
+
+    def __init__(self, source_dir: Path, project_root: Optional[Path] = None):
+        self.source_dir = Path(os.path.abspath(source_dir))
+        self.project_root = Path(os.path.abspath(project_root or Path.cwd()))
+        # Normalised absolute path string -> entry (None = known missing)
+        self._entries: Dict[str, Optional[AssetEntry]] = {}
+        # (markdown directory, reference) -> entry, across every file
+        self._memo: Dict[Tuple[str, str], Optional[AssetEntry]] = {}
+        self._references: Dict[Path, List[str]] = {}
+        self._scan()
+
+    def _scan(self) -> None:
+        """Walk the source tree once, recording every image file."""
+        stack = [str(self.source_dir)]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in SKIP_DIRS:
+                                stack.append(entry.path)
+                        elif os.path.splitext(entry.name)[1].lower() in IMAGE_SUFFIXES:
+                            stat = entry.stat()
+                            self._entries[os.path.normpath(entry.path)] = AssetEntry(
+                                Path(entry.path), stat.st_size, stat.st_mtime_ns
+                            )
+            except OSError:
+                continue
+
+    def __len__(self) -> int:
+        return sum(1 for entry in self._entries.values() if entry is not None)
+
+    def _absolute(self, reference: str, markdown_file: Path) -> str:
+        reference = reference.split("#", 1)[0].split("?", 1)[0]
+        if reference.startswith("/"):
+            base = str(self.project_root)
+            reference = reference.lstrip("/")
+        else:
+            base = os.path.dirname(os.path.abspath(markdown_file))
+        return os.path.normpath(os.path.join(base, reference))
+
+    def resolve(self, reference: str, markdown_file: Path) -> Optional[AssetEntry]:
+        """Return the entry a Markdown image reference points at, or None.
+
+        Paths outside the scanned tree (for example project-rooted images)
+        are checked once each and remembered, found or not.
+        """
+        if reference.startswith(EXTERNAL_PREFIXES):
+            return None
+        key = (os.path.dirname(os.path.abspath(markdown_file)), reference)
+        if key in self._memo:
+            return self._memo[key]
+
+        absolute = self._absolute(reference, markdown_file)
+        if absolute not in self._entries:
+            try:
+                stat = os.stat(absolute)
+                self._entries[absolute] = AssetEntry(
+                    Path(absolute), stat.st_size, stat.st_mtime_ns
+                )
+            except OSError:
+                self._entries[absolute] = None
+        entry = self._entries[absolute]
+        self._memo[key] = entry
+        return entry
+
+    def scan_references(self, markdown_files: Iterable[Path]) -> None:
+        """Record the local image references made by each Markdown file."""
+        for markdown_file in markdown_files:
+            text = Path(markdown_file).read_text(encoding="utf-8")
+            self._references[Path(markdown_file)] = [
+                match.group(2)
+                for match in IMAGE_PATTERN.finditer(text)
+                if not match.group(2).startswith(EXTERNAL_PREFIXES)
+            ]
+
+    def assets_for(self, markdown_file: Path) -> List[AssetEntry]:
+        """Entries referenced by a scanned Markdown file (missing ones omitted)."""
+        entries = []
+        for reference in self._references.get(Path(markdown_file), []):
+            entry = self.resolve(reference, markdown_file)
+            if entry is not None:
+                entries.append(entry)
+        return entries
+
+    def summary(self) -> IndexSummary:
+        """Missing references and never-referenced images, in one pass."""
+        used: Set[str] = set()
+        result = IndexSummary(images=0, references=0)
+        for markdown_file, references in self._references.items():
+            for reference in references:
+                result.references += 1
+                entry = self.resolve(reference, markdown_file)
+                if entry is None:
+                    result.missing.append((markdown_file, reference))
+                else:
+                    used.add(str(entry.path))
+        scanned = [
+            entry
+            for path, entry in self._entries.items()
+            if entry is not None and path.startswith(str(self.source_dir) + os.sep)
+        ]
+        result.images = len(scanned)
+        result.unreferenced = sorted(e.path for e in scanned if str(e.path) not in used)
+        return result
+
+
+def print_summary(summary: IndexSummary, root: Path) -> None:
+    """Print the index summary in the same style as the converters."""
+    print(
+        f"🖼️  {summary.images} image(s), {summary.references} local reference(s), "
+        f"{len(summary.missing)} missing, {len(summary.unreferenced)} unreferenced"
+    )
+    for markdown_file, reference in summary.missing:
+        print(f"   ⚠️  {markdown_file.name}: missing {reference}")
+    for path in summary.unreferenced:
+        try:
+            shown = path.relative_to(root)
+        except ValueError:
+            shown = path
+        print(f"   ℹ️  unreferenced: {shown}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Report missing and unreferenced images in a lesson tree."
+    )
+    parser.add_argument(
+        "directory",
+        nargs="?",
+        default="other_formats/markdown_lessons",
+        type=Path,
+        help="Source tree to scan (default: other_formats/markdown_lessons)",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if not args.directory.is_dir():
+        print(f"❌ Directory does not exist: {args.directory}")
+        sys.exit(1)
+
+    index = AssetIndex(args.directory)
+    index.scan_references(sorted(args.directory.rglob("*.md")))
+    summary = index.summary()
+    print_summary(summary, index.source_dir)
+    sys.exit(1 if summary.missing else 0)
+
+
+if __name__ == "__main__":
+    main()
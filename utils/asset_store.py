@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+In-memory asset store served to WeasyPrint through ``asset://`` URLs.
+
+The PDF stage used to turn every image and rendered diagram into a
+``file://`` URI, which WeasyPrint then re-opened and re-read for every
+document in a batch. Assets now go into one in-process store, keyed by a
+hash of their bytes, and a custom URL fetcher serves ``asset://`` URLs
+straight from memory. Identical bytes always get the same URL, so
+WeasyPrint's image cache decodes each image once per batch.
+
+Usage:
+    from asset_store import AssetStore
+
+    store = AssetStore()
+    uri = store.put(png_bytes, "image/png")   # asset://<hash>.png
+    uri = store.put_file(Path("images/logo.png"))
+    HTML(string=html, url_fetcher=store.url_fetcher).write_pdf(...)
+
+Dependencies:
+    - weasyprint (for url_fetcher only); supports both the URLFetcher class
+      API (WeasyPrint 66+) and the older function API
+"""
+
+from __future__ import annotations
+
+import hashlib
+import mimetypes
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+ASSET_SCHEME = "asset://"
+
+
+class AssetStore:
+    """Bytes keyed by content hash, addressable as ``asset://`` URLs."""
+
+    def __init__(self):
+        # URI -> (bytes, MIME type)
+        self._assets: Dict[str, Tuple[bytes, str]] = {}
+        # (resolved path, mtime, size) -> URI, so unchanged files are read once
+        self._files: Dict[Tuple[Path, int, int], str] = {}
+        self._url_fetcher = None
+
+    def __len__(self) -> int:
+        return len(self._assets)
+
+    def __contains__(self, uri: str) -> bool:
+        return uri in self._assets
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(len(data) for data, _ in self._assets.values())
+
+    def put(self, data: bytes, mime_type: str = "application/octet-stream") -> str:
+        """Store ``data`` and return its ``asset://`` URL."""
+        digest = hashlib.sha256(data).hexdigest()[:32]
+        suffix = mimetypes.guess_extension(mime_type) or ""
+        uri = f"{ASSET_SCHEME}{digest}{suffix}"
+        self._assets.setdefault(uri, (data, mime_type))
+        return uri
+
+    def put_file(
+        self, path: Path, size: Optional[int] = None, mtime_ns: Optional[int] = None
+    ) -> str:
+        """Store a file's bytes (read once while it is unchanged).
+
+        Pass ``size`` and ``mtime_ns`` when they are already known (for
+        example from an AssetIndex, whose paths are already absolute) to
+        skip the resolve and stat calls.
+        """
+        resolved = path
+        if size is None or mtime_ns is None:
+            resolved = path.resolve()
+            stat = resolved.stat()
+            size, mtime_ns = stat.st_size, stat.st_mtime_ns
+        key = (resolved, mtime_ns, size)
+        uri = self._files.get(key)
+        if uri is None:
+            mime_type = (
+                mimetypes.guess_type(resolved.name)[0] or "application/octet-stream"
+            )
+            uri = self.put(resolved.read_bytes(), mime_type)
+            self._files[key] = uri
+        return uri
+
+    def get(self, uri: str) -> Optional[Tuple[bytes, str]]:
+        """Return (bytes, MIME type) for a stored URL, or None."""
+        return self._assets.get(uri)
+
+    def subset(self, uris: Iterable[str]) -> Dict[str, Tuple[bytes, str]]:
+        """The stored assets among ``uris``, e.g. to ship to another process."""
+        return {uri: self._assets[uri] for uri in uris if uri in self._assets}
+
+    def update(self, assets: Dict[str, Tuple[bytes, str]]) -> None:
+        """Add assets exported from another store by :meth:`subset`."""
+        for uri, asset in assets.items():
+            self._assets.setdefault(uri, asset)
+
+    @property
+    def url_fetcher(self):
+        """WeasyPrint URL fetcher serving this store, other URLs as usual."""
+        if self._url_fetcher is None:
+            self._url_fetcher = make_url_fetcher(self)
+        return self._url_fetcher
+
+
+def make_url_fetcher(store: AssetStore):
+    """Build a WeasyPrint URL fetcher that answers ``asset://`` from ``store``."""
+
+    def lookup(url: str) -> Optional[Tuple[bytes, str]]:
+        if not url.startswith(ASSET_SCHEME):
+            return None
+        asset = store.get(url)
+        if asset is None:
+            raise ValueError(f"Asset not in store: {url}")
+        return asset
+
+    try:
+        from weasyprint.urls import URLFetcher, URLFetcherResponse
+    except ImportError:
+        URLFetcher = None
+
+    if URLFetcher is not None:
+
+        class AssetURLFetcher(URLFetcher):
+            def fetch(self, url, headers=None):
+                asset = lookup(url)
+                if asset is None:
+                    return super().fetch(url, headers)
+                data, mime_type = asset
+                return URLFetcherResponse(url, data, {"Content-Type": mime_type})
+
+        return AssetURLFetcher()
+
+    from weasyprint import default_url_fetcher
+
+    def fetch(url, *args, **kwargs):
+        asset = lookup(url)
+        if asset is None:
+            return default_url_fetcher(url, *args, **kwargs)
+        data, mime_type = asset
+        return {"string": data, "mime_type": mime_type, "redirected_url": url}
+
+    return fetch
@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+"""
+Permutations and subset sum, measured - a companion to lesson 9's
+"Permutations" and "Subset Sum with Backtracking" sections.
+
+The lesson solves both problems with plain recursion, which is the right
+way to learn them and the wrong way to run them at any real size. This
+module puts the lesson's code next to faster designs, checks every one
+against a brute-force oracle and measures where each design overtakes
+another.
+
+Permutations (all n! arrangements):
+- lesson recursion         O(n!·n²)  (exactly the lesson's Permute pseudocode)
+- Heap's algorithm         O(n!)     (iterative, one swap per permutation)
+- lexicographic order      O(n!)     (next-permutation; repeated items appear once)
+- itertools.permutations   O(n!)     (the standard library, written in C)
+
+Subset sum (does any subset of non-negative numbers add up to target?):
+- lesson backtracking      O(2ⁿ)     (exactly the lesson's FindSubsetSum)
+- pruned backtracking      O(2ⁿ)     (largest first, remaining-sum bound, repeats skipped)
+- bitset dynamic programming  O(n·target/64)  (one big-int shift per number)
+- meet in the middle       O(2^(n/2)) (the sums of each half, matched in a set)
+
+Usage:
+    python3 utils/backtracking_variants.py --permute A,B,C
+    python3 utils/backtracking_variants.py --subset-sum 3,7,2,8 --target 10
+    python3 utils/backtracking_variants.py --check       # verify against the oracle
+    python3 utils/backtracking_variants.py --benchmark   # timings and crossovers
+
+Dependencies:
+    - None (stdlib only)
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import math
+import random
+import sys
+from collections import Counter, deque
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+# ---------------------------------------------------------------------------
+# Permutations
+# ---------------------------------------------------------------------------
+
+
+def permute_lesson(items: Sequence, current: Tuple = ()) -> List[Tuple]:
+    """The lesson's Permute(items, current), collecting instead of displaying."""
+    if len(items) == 0:
+        return [current]
+    results = []
+    for i in range(len(items)):
+        new_current = current + (items[i],)
+        remaining = items[:i] + items[i + 1 :]
+        results.extend(permute_lesson(remaining, new_current))
+    return results
+
+
+def permute_heap(items: Sequence) -> Iterator[Tuple]:
+    """Heap's algorithm without recursion: each permutation is one swap away
+    from the last, with ``counters`` standing in for the call stack."""
+    values = list(items)
+    n = len(values)
+    yield tuple(values)
+    counters = [0] * n
+    i = 1
+    while i < n:
+        if counters[i] < i:
+            j = counters[i] if i % 2 else 0
+            values[j], values[i] = values[i], values[j]
+            yield tuple(values)
+            counters[i] += 1
+            i = 1
+        else:
+            counters[i] = 0
+            i += 1
+
+
+def permute_lexicographic(items: Sequence) -> Iterator[Tuple]:
+    """Next-permutation in sorted order; repeated items give each arrangement once.
+
+    Find the rightmost ascent values[k] < values[k+1], swap values[k] with
+    the rightmost larger value after it, then reverse the tail.
+    """
+    values = sorted(items)
+    n = len(values)
+    while True:
+        yield tuple(values)
+        k = n - 2
+        while k >= 0 and values[k] >= values[k + 1]:
+            k -= 1
+        if k < 0:
+            return
+        j = n - 1
+        while values[j] <= values[k]:
+            j -= 1
+        values[k], values[j] = values[j], values[k]
+        values[k + 1 :] = reversed(values[k + 1 :])
+
+
+def permute_itertools(items: Sequence) -> Iterator[Tuple]:
+    return itertools.permutations(items)
+
+
+PERMUTATION_VARIANTS: Dict[str, Callable[[Sequence], Iterable[Tuple]]] = {
+    "Lesson recursion": permute_lesson,
+    "Heap's algorithm": permute_heap,
+    "Lexicographic": permute_lexicographic,
+    "itertools": permute_itertools,
+}
+
+
+# ---------------------------------------------------------------------------
+# Subset sum
+# ---------------------------------------------------------------------------
+
+
+def _lesson_find_subset_sum(numbers: Sequence[int], target: int, index: int) -> bool:
+    if target == 0:
+        return True
+    if index >= len(numbers) or target < 0:
+        return False
+    # Try including current number
+    if _lesson_find_subset_sum(numbers, target - numbers[index], index + 1):
+        return True
+    # Backtrack: try excluding current number
+    return _lesson_find_subset_sum(numbers, target, index + 1)
+
+
+def subset_sum_lesson(numbers: Sequence[int], target: int) -> bool:
+    """The lesson's FindSubsetSum(numbers, target, 0)."""
+    return _lesson_find_subset_sum(numbers, target, 0)
+
+
+def subset_sum_pruned(numbers: Sequence[int], target: int) -> bool:
+    """Backtracking that gives up on a branch as soon as it cannot succeed.
+
+    Numbers are tried largest first, so overshooting shows up early. A
+    branch stops when the numbers left add up to less than the target, and
+    after excluding a value every equal value is skipped too (choosing the
+    second 5 instead of the first finds nothing new).
+    """
+    values = sorted((n for n in numbers if 0 < n <= target), reverse=True)
+    remaining = [0] * (len(values) + 1)
+    for index in range(len(values) - 1, -1, -1):
+        remaining[index] = remaining[index + 1] + values[index]
+
+    def search(index: int, left: int) -> bool:
+        if left == 0:
+            return True
+        if index == len(values) or remaining[index] < left:
+            return False
+        if remaining[index] == left:
+            return True
+        value = values[index]
+        if value <= left and search(index + 1, left - value):
+            return True
+        following = index + 1
+        while following < len(values) and values[following] == value:
+            following += 1
+        return search(following, left)
+
+    return target == 0 or search(0, target)
+
+
+def subset_sum_bitset(numbers: Sequence[int], target: int) -> bool:
+    """Dynamic programming over reachable sums, held as the bits of one int.
+
+    Bit s of ``reachable`` is set when some subset adds up to s. Adding a
+    number x shifts every reachable sum up by x, so one ``|=`` of a shifted
+    copy handles all sums at once, 64 of them per machine word.
+    """
+    if target < 0:
+        return False
+    if any(n < 0 for n in numbers):
+        raise ValueError("the bitset variant needs non-negative numbers")
+    mask = (1 << (target + 1)) - 1
+    reachable = 1
+    for n in numbers:
+        if 0 < n <= target:
+            reachable = (reachable | (reachable << n)) & mask
+            if reachable >> target:
+                return True
+    return bool(reachable >> target & 1)
+
+
+def _subset_sums(numbers: Sequence[int]) -> List[int]:
+    sums = [0]
+    for n in numbers:
+        sums += [s + n for s in sums]
+    return sums
+
+
+def subset_sum_meet_in_middle(numbers: Sequence[int], target: int) -> bool:
+    """Every sum of the first half, looked up against every sum of the second.
+
+    2^(n/2) sums per half instead of 2ⁿ subsets, and it does not care how
+    large the numbers are (the bitset needs target bits).
+    """
+    half = len(numbers) // 2
+    right = set(_subset_sums(numbers[half:]))
+    return any(target - s in right for s in _subset_sums(numbers[:half]))
+
+
+SUBSET_SUM_VARIANTS: Dict[str, Callable[[Sequence[int], int], bool]] = {
+    "Lesson backtracking": subset_sum_lesson,
+    "Pruned backtracking": subset_sum_pruned,
+    "Bitset DP": subset_sum_bitset,
+    "Meet in the middle": subset_sum_meet_in_middle,
+}
+
+# Largest n each variant is sensible to run at (the rest grow exponentially)
+MAX_SENSIBLE_N = {
+    "Lesson recursion": 9,
+    "Lesson backtracking": 26,
+    "Pruned backtracking": 40,
+    "Meet in the middle": 44,
+}
+
+
+# ---------------------------------------------------------------------------
+# Shared test oracle
+# ---------------------------------------------------------------------------
+
+# The lesson's own examples
+LESSON_EXAMPLES: List[Tuple[List[int], int, bool]] = [
+    ([3, 7, 2, 8], 10, True),
+    ([1, 2, 3], 7, False),
+]
+
+
+def brute_force_subset_sum(numbers: Sequence[int], target: int) -> bool:
+    """Try every subset; independent of every implementation above."""
+    return any(
+        sum(combination) == target
+        for size in range(len(numbers) + 1)
+        for combination in itertools.combinations(numbers, size)
+    )
+
+
+def distinct_permutation_count(items: Sequence) -> int:
+    """n! divided by k! for each item repeated k times."""
+    count = math.factorial(len(items))
+    for repeats in Counter(items).values():
+        count //= math.factorial(repeats)
+    return count
+
+
+def check_permutations(
+    func: Callable[[Sequence], Iterable[Tuple]], max_n: int = 7
+) -> List[str]:
+    """Check one permutation variant; return a list of problems."""
+    problems: List[str] = []
+    for n in range(max_n + 1):
+        items = tuple("ABCDEFGHIJ"[:n])
+        produced = list(func(items))
+        if sorted(produced) != sorted(itertools.permutations(items)):
+            problems.append(f"wrong permutations of {n} item(s)")
+            break
+        if len(set(produced)) != math.factorial(n):
+            problems.append(f"repeated permutations of {n} item(s)")
+            break
+    if func is permute_lexicographic:
+        items = ("A", "B", "B", "C", "C", "C")
+        produced = list(func(items))
+        if produced != sorted(set(itertools.permutations(items))):
+            problems.append("not every distinct arrangement once, in sorted order")
+        elif len(produced) != distinct_permutation_count(items):
+            problems.append("wrong count with repeated items")
+    return problems
+
+
+def check_subset_sum(
+    func: Callable[[Sequence[int], int], bool], max_n: int = 12
+) -> List[str]:
+    """Check one subset-sum variant; return a list of problems."""
+    problems: List[str] = []
+    for numbers, target, expected in LESSON_EXAMPLES:
+        if func(numbers, target) != expected:
+            problems.append(f"FindSubsetSum({numbers}, {target}) should be {expected}")
+
+    rng = random.Random(9)
+    for trial in range(300):
+        n = rng.randint(0, max_n)
+        numbers = [rng.randint(0, 30) for _ in range(n)]
+        target = rng.randint(0, sum(numbers) + 5)
+        expected = brute_force_subset_sum(numbers, target)
+        if func(numbers, target) != expected:
+            problems.append(f"{numbers}, target {target}: expected {expected}")
+            break
+    return problems
+
+
+def check_all() -> Dict[str, List[str]]:
+    """Run the oracle over every variant."""
+    results = {
+        label: check_permutations(func) for label, func in PERMUTATION_VARIANTS.items()
+    }
+    results.update(
+        {label: check_subset_sum(func) for label, func in SUBSET_SUM_VARIANTS.items()}
+    )
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Benchmark and crossover points
+# ---------------------------------------------------------------------------
+
+
+def subset_sum_instance(n: int) -> Tuple[List[int], int]:
+    """A no-answer instance, so every variant has to finish its search.
+
+    All numbers are even and the target (about half their total) is odd.
+    """
+    rng = random.Random(n)
+    numbers = [rng.randrange(2, 200, 2) for _ in range(n)]
+    return numbers, (sum(numbers) // 2) | 1
+
+
+def consume(permutations: Iterable[Tuple]) -> None:
+    deque(permutations, maxlen=0)
+
+
+PERMUTATION_SIZES = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+SUBSET_SUM_SIZES = [4, 8, 12, 16, 20, 24, 28, 32, 36, 40, 44, 64, 128, 256, 512, 1024]
+
+
+def benchmark(
+    permutation_sizes: Sequence[int] = PERMUTATION_SIZES,
+    subset_sizes: Sequence[int] = SUBSET_SUM_SIZES,
+    budget: float = 1.0,
+):
+    """Time every variant; returns (permutation series, subset-sum series)."""
+    from benchmark_patterns import run_series
+
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 2 * max(subset_sizes) + 100))
+    permutations = {
+        label: run_series(
+            lambda items, func=func: consume(func(items)),
+            [n for n in permutation_sizes if n <= MAX_SENSIBLE_N.get(label, n)],
+            lambda n: tuple(range(n)),
+            budget,
+        )
+        for label, func in PERMUTATION_VARIANTS.items()
+    }
+    subset_sums = {
+        label: run_series(
+            lambda instance, func=func: func(*instance),
+            [n for n in subset_sizes if n <= MAX_SENSIBLE_N.get(label, n)],
+            subset_sum_instance,
+            budget,
+        )
+        for label, func in SUBSET_SUM_VARIANTS.items()
+    }
+    return permutations, subset_sums
+
+
+def parse_list(text: str) -> List[str]:
+    return [part.strip() for part in text.split(",") if part.strip()]
+
+
+def parse_numbers(text: str) -> List[int]:
+    """Comma-separated non-negative integers for --subset-sum."""
+    try:
+        numbers = [int(part) for part in parse_list(text)]
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(
+            f"expected whole numbers, e.g. 3,7,2,8, got {text!r}"
+        ) from e
+    if any(n < 0 for n in numbers):
+        raise argparse.ArgumentTypeError(
+            "subset sum here is defined for non-negative numbers only"
+        )
+    return numbers
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Compare the lesson's permutation and subset-sum recursion "
+        "with faster designs."
+    )
+    parser.add_argument(
+        "--permute",
+        type=parse_list,
+        metavar="ITEMS",
+        help="Permute ITEMS (e.g. A,B,C) with each variant",
+    )
+    parser.add_argument(
+        "--subset-sum",
+        type=parse_numbers,
+        metavar="NUMBERS",
+        help="Ask each variant whether a subset of NUMBERS (e.g. 3,7,2,8) adds up to --target",
+    )
+    parser.add_argument("--target", type=int, help="Target sum for --subset-sum")
+    parser.add_argument(
+        "--check", action="store_true", help="Verify every variant against the oracle"
+    )
+    parser.add_argument(
+        "--benchmark",
+        action="store_true",
+        help="Time the variants and report crossovers",
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=1.0,
+        help="Skip sizes predicted to take longer than this many seconds per call (default: 1)",
+    )
+    args = parser.parse_args()
+    if args.subset_sum is not None and args.target is None:
+        parser.error("--subset-sum needs --target")
+    return args
+
+
+def main() -> None:
+    args = parse_args()
+    if (
+        args.permute is None
+        and args.subset_sum is None
+        and not (args.check or args.benchmark)
+    ):
+        print(
+            "Nothing to do: give --permute, --subset-sum, --check or --benchmark (see --help)"
+        )
+        sys.exit(1)
+
+    if args.permute is not None:
+        for label, func in PERMUTATION_VARIANTS.items():
+            if len(args.permute) > MAX_SENSIBLE_N.get(label, len(args.permute)):
+                print(f"{label:>20}: skipped (too slow for {len(args.permute)} items)")
+                continue
+            produced = list(func(args.permute))
+            shown = ", ".join("".join(map(str, p)) for p in produced[:8])
+            more = f", … ({len(produced):,} in total)" if len(produced) > 8 else ""
+            print(f"{label:>20}: {shown}{more}")
+
+    if args.subset_sum is not None:
+        sys.setrecursionlimit(
+            max(sys.getrecursionlimit(), 2 * len(args.subset_sum) + 100)
+        )
+        for label, func in SUBSET_SUM_VARIANTS.items():
+            if len(args.subset_sum) > MAX_SENSIBLE_N.get(label, len(args.subset_sum)):
+                print(
+                    f"{label:>20}: skipped (too slow for {len(args.subset_sum)} numbers)"
+                )
+            else:
+                print(f"{label:>20}: {func(args.subset_sum, args.target)}")
+
+    if args.check:
+        failed = False
+        for label, problems in check_all().items():
+            print(f"{'✅' if not problems else '❌'} {label}")
+            for problem in problems:
+                print(f"   ⚠️  {problem}")
+            failed = failed or bool(problems)
+        if failed:
+            sys.exit(1)
+
+    if args.benchmark:
+        from benchmark_patterns import find_crossovers, markdown_table, print_crossovers
+
+        permutations, subset_sums = benchmark(budget=args.budget)
+        print("Permutations (all n! of n items):")
+        print(markdown_table(permutations, PERMUTATION_SIZES))
+        print()
+        print_crossovers(find_crossovers(permutations))
+        print()
+        print("Subset sum (no-answer instances, so every search runs to the end):")
+        print(markdown_table(subset_sums, SUBSET_SUM_SIZES))
+        print()
+        print_crossovers(find_crossovers(subset_sums))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,580 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmarks for the algorithm patterns taught in lessons 8 and 9.
+
+Times each pattern over geometric input sizes, fits an empirical complexity
+curve and writes a Markdown report with an embedded SVG chart, ready to be
+dropped next to the generated lesson Markdown.
+
+Benchmarked code:
+- Python translations of the six lesson 8 templates (Counter, Accumulator,
+  Flag, Best-So-Far, Filter, Transform)
+- Python "# Example solution" cells extracted from the lesson notebooks,
+  with their input list swapped for generated data of each size
+- Naive, memoised and iterative Fibonacci from lesson 9, side by side
+
+Usage:
+    python3 utils/benchmark_patterns.py
+    python3 utils/benchmark_patterns.py --max-size 100000 --output-dir /tmp/bench
+
+Dependencies:
+    - None (stdlib only)
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import json
+import math
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from fibonacci_variants import cold, fib_iterative, fib_memoised, fib_naive
+
+DEFAULT_NOTEBOOKS = [
+    Path("lessons/lesson8_algorithm_patterns.ipynb"),
+    Path("lessons/lesson9_advanced_patterns.ipynb"),
+]
+DEFAULT_OUTPUT_DIR = Path("other_formats/markdown_lessons/benchmarks")
+DEFAULT_MAX_SIZE = 10**6
+DEFAULT_TIME_BUDGET = 1.0  # seconds per call before larger sizes are skipped
+FIBONACCI_SIZES = [5, 10, 15, 20, 25, 30, 100, 500, 1000]
+
+# One benchmark series: label -> [(n, seconds per call), ...]
+Series = Dict[str, List[Tuple[int, float]]]
+
+
+# ---------------------------------------------------------------------------
+# Lesson 8 pattern kernels (counted loops, as in the HSC templates)
+# ---------------------------------------------------------------------------
+
+
+def counter_pattern(scores: Sequence[int]) -> int:
+    count = 0
+    for i in range(len(scores)):
+        if scores[i] >= 50:
+            count = count + 1
+    return count
+
+
+def accumulator_pattern(scores: Sequence[int]) -> int:
+    total = 0
+    for i in range(len(scores)):
+        total = total + scores[i]
+    return total
+
+
+def flag_pattern(scores: Sequence[int]) -> bool:
+    # Scans the whole collection, as the lesson template does (no early exit)
+    found = False
+    for i in range(len(scores)):
+        if scores[i] < 0:
+            found = True
+    return found
+
+
+def best_so_far_pattern(scores: Sequence[int]) -> int:
+    highest = scores[0]
+    for i in range(1, len(scores)):
+        if scores[i] > highest:
+            highest = scores[i]
+    return highest
+
+
+def filter_pattern(scores: Sequence[int]) -> List[int]:
+    passing = []
+    for i in range(len(scores)):
+        if scores[i] >= 50:
+            passing.append(scores[i])
+    return passing
+
+
+def transform_pattern(scores: Sequence[int]) -> List[float]:
+    discounted = []
+    for i in range(len(scores)):
+        discounted.append(scores[i] * 0.9)
+    return discounted
+
+
+PATTERN_KERNELS: Dict[str, Callable[[Sequence[int]], object]] = {
+    "Counter": counter_pattern,
+    "Accumulator": accumulator_pattern,
+    "Flag": flag_pattern,
+    "Best-So-Far": best_so_far_pattern,
+    "Filter": filter_pattern,
+    "Transform": transform_pattern,
+}
+
+
+# ---------------------------------------------------------------------------
+# Notebook solution extraction
+# ---------------------------------------------------------------------------
+
+
+class _InputSwapper(ast.NodeTransformer):
+    """Replace the first top-level ``name = [literal, ...]`` with ``__data__``."""
+
+    def __init__(self):
+        self.sample: Optional[list] = None
+
+    def visit_Module(self, node: ast.Module) -> ast.Module:
+        for stmt in node.body:
+            if (
+                self.sample is None
+                and isinstance(stmt, ast.Assign)
+                and isinstance(stmt.value, ast.List)
+            ):
+                try:
+                    self.sample = ast.literal_eval(stmt.value)
+                except ValueError:
+                    continue
+                stmt.value = ast.Name(id="__data__", ctx=ast.Load())
+        return node
+
+
+def extract_solution_cells(notebook_path: Path) -> List[Tuple[str, str]]:
+    """Return (title, source) for each runnable "# Example solution" cell.
+
+    The title is taken from the nearest preceding Markdown heading.
+    """
+    with open(notebook_path, "r", encoding="utf-8") as fh:
+        notebook = json.load(fh)
+
+    solutions: List[Tuple[str, str]] = []
+    heading = notebook_path.stem
+    for cell in notebook.get("cells", []):
+        source = cell.get("source", "")
+        if isinstance(source, list):
+            source = "".join(source)
+
+        if cell.get("cell_type") == "markdown":
+            for line in source.splitlines():
+                match = re.match(r"#{1,4}\s+(.*)", line)
+                if match:
+                    heading = re.sub(r"^[^\w]+", "", match.group(1)).strip()
+        elif cell.get("cell_type") == "code" and source.lstrip().startswith(
+            "# Example solution"
+        ):
+            try:
+                ast.parse(source)
+            except SyntaxError:
+                continue  # HSC pseudocode, not Python
+            solutions.append((heading, source))
+    return solutions
+
+
+def compile_solution(source: str) -> Optional[Tuple[Callable, list]]:
+    """Turn a solution cell into ``run(data)`` plus its original input sample.
+
+    Returns None if the cell has no list literal to scale.
+    """
+    tree = ast.parse(source)
+    swapper = _InputSwapper()
+    tree = ast.fix_missing_locations(swapper.visit(tree))
+    if not swapper.sample:
+        return None
+
+    code = compile(tree, "<solution>", "exec")
+
+    def run(data: list) -> None:
+        exec(code, {"__data__": data, "print": lambda *a, **k: None})
+
+    return run, swapper.sample
+
+
+# ---------------------------------------------------------------------------
+# Timing and curve fitting
+# ---------------------------------------------------------------------------
+
+
+def geometric_sizes(low: int, high: int, per_decade: int = 2) -> List[int]:
+    """Return sizes from ``low`` to ``high`` spaced evenly on a log scale."""
+    steps = round(math.log10(high / low) * per_decade)
+    sizes = {round(low * 10 ** (i / per_decade)) for i in range(steps + 1)}
+    return sorted(sizes)
+
+
+def time_call(func: Callable, arg, min_time: float = 0.02, repeat: int = 3) -> float:
+    """Return the best per-call time in seconds (timeit-style autorange)."""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func(arg)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2
+
+    best = elapsed / loops
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func(arg)
+        best = min(best, (time.perf_counter() - start) / loops)
+    return best
+
+
+def run_series(
+    func: Callable,
+    sizes: Sequence[int],
+    make_input: Callable[[int], object],
+    budget: float,
+) -> List[Tuple[int, float]]:
+    """Time ``func`` at each size, skipping sizes predicted to exceed ``budget``.
+
+    The prediction extrapolates the measured trend, so an exponential
+    algorithm stops before it reaches an input it cannot finish.
+    """
+    points: List[Tuple[int, float]] = []
+    for n in sizes:
+        if points and predict_seconds(points, n) > budget:
+            break
+        arg = make_input(n)
+        points.append((n, time_call(func, arg)))
+    return points
+
+
+COMPLEXITY_MODELS: Dict[str, Callable[[float], float]] = {
+    "O(1)": lambda n: 1.0,
+    "O(log n)": lambda n: math.log2(max(n, 2)),
+    "O(n)": lambda n: n,
+    "O(n log n)": lambda n: n * math.log2(max(n, 2)),
+    "O(n²)": lambda n: n * n,
+    "O(2^(n/2))": lambda n: 2.0 ** (n / 2),
+    "O(φⁿ)": lambda n: 1.618033988749895**n,
+    "O(2ⁿ)": lambda n: 2.0**n,
+    "O(n!)": lambda n: math.gamma(n + 1),
+}
+
+
+def _fit_models(points: Sequence[Tuple[int, float]]) -> List[Tuple[float, str, float]]:
+    """Return (relative error, model name, scale) for every model, best first.
+
+    Each model t = c·f(n) is fitted by least squares on relative error.
+    """
+    fits = []
+    for name, model in COMPLEXITY_MODELS.items():
+        try:
+            ratios = [model(n) / t for n, t in points]
+        except OverflowError:
+            continue
+        squares = sum(r * r for r in ratios)
+        if not 0 < squares < float("inf"):
+            continue  # model grows too fast to compare at these sizes
+        scale = sum(ratios) / squares
+        error = sum((scale * r - 1) ** 2 for r in ratios)
+        fits.append((error, name, 1 / scale))
+    return sorted(fits)
+
+
+def predict_seconds(points: Sequence[Tuple[int, float]], n: int) -> float:
+    """Extrapolate the time for size ``n`` along the last log-log segment.
+
+    The local slope grows with the true complexity, so an exponential
+    series predicts a huge time well before it is attempted.
+    """
+    last_n, last_t = points[-1]
+    slope = 1.0  # assume linear until there is a trend
+    if len(points) > 1:
+        prev_n, prev_t = points[-2]
+        slope = max(slope, math.log(last_t / prev_t) / math.log(last_n / prev_n))
+    return last_t * (n / last_n) ** slope
+
+
+def fit_complexity(points: Sequence[Tuple[int, float]]) -> Tuple[str, float]:
+    """Return (best model, log-log slope) for a series of (n, seconds)."""
+    if len(points) < 2:
+        return "n/a", float("nan")
+
+    best_name = _fit_models(points)[0][1]
+
+    xs = [math.log(n) for n, _ in points]
+    ys = [math.log(t) for _, t in points]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    spread = sum((x - mean_x) ** 2 for x in xs)
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / spread
+    return best_name, slope
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+
+def format_seconds(seconds: float) -> str:
+    """Format a duration with a readable unit."""
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds / 1e-9:.3g} ns"
+
+
+def markdown_table(series: Series, sizes: Sequence[int]) -> str:
+    """Render a series as a Markdown table with a fitted-complexity column."""
+    header = "| Variant | " + " | ".join(f"n={n:,}" for n in sizes)
+    header += " | Fitted | Slope |"
+    divider = "|" + "---|" * (len(sizes) + 3)
+    rows = [header, divider]
+    for label, points in series.items():
+        by_size = dict(points)
+        cells = [format_seconds(by_size[n]) if n in by_size else "—" for n in sizes]
+        model, slope = fit_complexity(points)
+        slope_text = "—" if math.isnan(slope) else f"{slope:.2f}"
+        rows.append(
+            f"| {label} | " + " | ".join(cells) + f" | {model} | {slope_text} |"
+        )
+    return "\n".join(rows)
+
+
+_CHART_COLOURS = ["#0366d6", "#d73a49", "#28a745", "#6f42c1", "#e36209", "#005cc5"]
+
+
+def find_crossovers(
+    series: Series,
+) -> List[Tuple[str, str, Optional[int]]]:
+    """Return (faster-at-small-n, other variant, crossover n) for each pair.
+
+    The crossover is the first measured size from which the other variant
+    stays faster at every larger size both were measured at, or None if it
+    never overtakes.
+    """
+    crossovers: List[Tuple[str, str, Optional[int]]] = []
+    labels = list(series)
+    for i, first in enumerate(labels):
+        for second in labels[i + 1 :]:
+            a, b = dict(series[first]), dict(series[second])
+            shared = sorted(set(a) & set(b))
+            if len(shared) < 2:
+                continue
+            # Order the pair so `fast` is the one that wins at the smallest n
+            fast, slow = first, second
+            if b[shared[0]] < a[shared[0]]:
+                fast, slow, a, b = second, first, b, a
+            point = None
+            for n in reversed(shared):
+                if b[n] < a[n]:
+                    point = n
+                else:
+                    break
+            crossovers.append((fast, slow, point))
+    return crossovers
+
+
+def print_crossovers(crossovers: List[Tuple[str, str, Optional[int]]]) -> None:
+    """Print the pairs from :func:`find_crossovers` as a bullet list."""
+    print("Crossover points:")
+    for fast, slow, point in crossovers:
+        if point is None:
+            print(f"  - {fast} stays faster than {slow} at every measured n")
+        else:
+            print(f"  - {slow} overtakes {fast} from n = {point:,}")
+
+
+def svg_chart(series: Series, title: str, width: int = 640, height: int = 360) -> str:
+    """Render a log-log line chart of seconds per call against n (stdlib only)."""
+    left, right, top, bottom = 70, 160, 30, 40
+    all_points = [p for points in series.values() for p in points]
+    if not all_points:
+        return f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}"/>'
+
+    min_x = math.log10(min(n for n, _ in all_points))
+    max_x = math.log10(max(n for n, _ in all_points))
+    min_y = math.floor(math.log10(min(t for _, t in all_points)))
+    max_y = math.ceil(math.log10(max(t for _, t in all_points)))
+    span_x = (max_x - min_x) or 1
+    span_y = (max_y - min_y) or 1
+    plot_w, plot_h = width - left - right, height - top - bottom
+
+    def to_xy(n: float, t: float) -> Tuple[float, float]:
+        x = left + (math.log10(n) - min_x) / span_x * plot_w
+        y = top + plot_h - (math.log10(t) - min_y) / span_y * plot_h
+        return round(x, 1), round(y, 1)
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'font-family="Arial, Helvetica, sans-serif" font-size="11">',
+        f'<rect width="{width}" height="{height}" fill="#ffffff"/>',
+        f'<text x="{width / 2}" y="18" text-anchor="middle" font-size="13" '
+        f'font-weight="bold">{title}</text>',
+        f'<rect x="{left}" y="{top}" width="{plot_w}" height="{plot_h}" '
+        f'fill="none" stroke="#d0d7de"/>',
+    ]
+    for decade in range(min_y, max_y + 1):
+        _, y = to_xy(10**min_x, 10.0**decade)
+        parts.append(
+            f'<line x1="{left}" y1="{y}" x2="{left + plot_w}" y2="{y}" stroke="#eaecef"/>'
+            f'<text x="{left - 6}" y="{y + 4}" text-anchor="end">'
+            f"{format_seconds(10.0 ** decade)}</text>"
+        )
+    for decade in range(math.ceil(min_x), math.floor(max_x) + 1):
+        x, _ = to_xy(10**decade, 10.0**min_y)
+        parts.append(
+            f'<text x="{x}" y="{top + plot_h + 16}" text-anchor="middle">'
+            f"10^{decade}</text>"
+        )
+    parts.append(
+        f'<text x="{left + plot_w / 2}" y="{height - 6}" text-anchor="middle">'
+        "input size n</text>"
+    )
+
+    for i, (label, points) in enumerate(series.items()):
+        colour = _CHART_COLOURS[i % len(_CHART_COLOURS)]
+        coords = " ".join(f"{x},{y}" for x, y in (to_xy(n, t) for n, t in points))
+        parts.append(
+            f'<polyline points="{coords}" fill="none" stroke="{colour}" stroke-width="2"/>'
+        )
+        legend_y = top + 14 + i * 16
+        parts.append(
+            f'<line x1="{width - right + 12}" y1="{legend_y - 4}" '
+            f'x2="{width - right + 32}" y2="{legend_y - 4}" stroke="{colour}" '
+            f'stroke-width="2"/><text x="{width - right + 38}" y="{legend_y}">'
+            f"{label}</text>"
+        )
+    parts.append("</svg>")
+    return "\n".join(parts)
+
+
+# ---------------------------------------------------------------------------
+# Benchmark runs
+# ---------------------------------------------------------------------------
+
+
+def benchmark_patterns(
+    sizes: Sequence[int], notebooks: Sequence[Path], budget: float, seed: int = 42
+) -> Series:
+    """Benchmark the lesson 8 kernels and any extracted solution cells."""
+    rng = random.Random(seed)
+    scores = [rng.randint(0, 100) for _ in range(max(sizes))]
+    series: Series = {}
+
+    for label, kernel in PATTERN_KERNELS.items():
+        series[label] = run_series(kernel, sizes, lambda n: scores[:n], budget)
+
+    for notebook_path in notebooks:
+        if not notebook_path.exists():
+            continue
+        for title, source in extract_solution_cells(notebook_path):
+            compiled = compile_solution(source)
+            if compiled is None:
+                continue
+            run, sample = compiled
+
+            def make_input(n: int, sample=sample) -> list:
+                return [sample[i % len(sample)] for i in range(n)]
+
+            label = f"{title} (notebook)"
+            series[label] = run_series(run, sizes, make_input, budget)
+
+    return series
+
+
+def benchmark_fibonacci(sizes: Sequence[int], budget: float) -> Series:
+    """Benchmark naive, memoised and iterative Fibonacci."""
+    # Memoised recursion still recurses n deep on a cold cache
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 2 * max(sizes) + 100))
+    variants = {
+        "Naive recursion": fib_naive,
+        "Memoised": cold(fib_memoised),
+        "Iterative": fib_iterative,
+    }
+    return {
+        label: run_series(func, sizes, lambda n: n, budget)
+        for label, func in variants.items()
+    }
+
+
+def write_report(
+    output_dir: Path, pattern_series: Series, sizes: Sequence[int], fib_series: Series
+) -> Path:
+    """Write the Markdown report and its SVG charts to ``output_dir``."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    (output_dir / "pattern_scaling.svg").write_text(
+        svg_chart(pattern_series, "Lesson 8 patterns: time per call"), encoding="utf-8"
+    )
+    (output_dir / "fibonacci_scaling.svg").write_text(
+        svg_chart(fib_series, "Lesson 9 Fibonacci: time per call"), encoding="utf-8"
+    )
+
+    fib_sizes = sorted({n for points in fib_series.values() for n, _ in points})
+    report = f"""# Measured Scaling of the Lesson Patterns
+
+_Generated by `utils/benchmark_patterns.py` on Python {sys.version.split()[0]}.
+Times are the best of three runs per call; "—" means the size was skipped
+because a smaller size already exceeded the time budget._
+
+## Lesson 8: Essential Algorithm Patterns
+
+![Pattern scaling chart](pattern_scaling.svg)
+
+{markdown_table(pattern_series, sizes)}
+
+## Lesson 9: Fibonacci Variants
+
+![Fibonacci scaling chart](fibonacci_scaling.svg)
+
+{markdown_table(fib_series, fib_sizes)}
+
+The fitted column is the complexity model with the smallest relative error;
+the slope is the gradient on a log-log plot (1 ≈ linear, 2 ≈ quadratic).
+"""
+    report_path = output_dir / "pattern_scaling.md"
+    report_path.write_text(report, encoding="utf-8")
+    return report_path
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the lesson 8 and 9 algorithm patterns."
+    )
+    parser.add_argument(
+        "--notebook",
+        type=Path,
+        action="append",
+        help="Notebook to extract solution cells from (repeatable)",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=DEFAULT_OUTPUT_DIR,
+        help=f"Where to write the report (default: {DEFAULT_OUTPUT_DIR.as_posix()})",
+    )
+    parser.add_argument(
+        "--max-size",
+        type=int,
+        default=DEFAULT_MAX_SIZE,
+        help=f"Largest input size for the patterns (default: {DEFAULT_MAX_SIZE:,})",
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=DEFAULT_TIME_BUDGET,
+        help="Skip larger sizes once one call takes longer than this (seconds)",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    sizes = geometric_sizes(10, args.max_size)
+    notebooks = args.notebook or DEFAULT_NOTEBOOKS
+
+    print(f"⏱️  Benchmarking patterns over n = {sizes[0]:,} … {sizes[-1]:,}")
+    pattern_series = benchmark_patterns(sizes, notebooks, args.budget)
+    print("⏱️  Benchmarking Fibonacci variants")
+    fib_series = benchmark_fibonacci(FIBONACCI_SIZES, args.budget)
+
+    report_path = write_report(args.output_dir, pattern_series, sizes, fib_series)
+    print()
+    print(markdown_table(pattern_series, sizes))
+    print()
+    print(f"📄 Report written to {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Shared on-disk build cache for the conversion utilities.
+
+Stores small JSON records under ``.build_cache/<namespace>/`` keyed by a
+content hash, so repeated builds can skip any work whose inputs have not
+changed since the last run.
+
+Usage:
+    from build_cache import JsonCache, content_hash
+
+    cache = JsonCache("cells")
+    key = content_hash(kernel_name, cell_source)
+    record = cache.get(key)
+    if record is None:
+        cache.put(key, {"outputs": outputs})
+
+Portable archives (seed CI runners and fresh Codespaces from a warm build):
+    python3 utils/build_cache.py export build-cache.tar.gz
+    python3 utils/build_cache.py import build-cache.tar.gz
+
+An archive holds the .build_cache/ records (executed cell outputs, exported
+cell Markdown, the PDF build manifest) and every drawio_assets/ diagram
+cache, with a SHA-256 per file. Import verifies the whole archive before
+writing anything and never replaces a local file that is newer.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+# Project-relative cache root (ignored by git)
+DEFAULT_CACHE_DIR = Path(".build_cache")
+
+ARCHIVE_FORMAT = "lesson-build-cache"
+ARCHIVE_VERSION = 1
+ARCHIVE_INDEX = "index.json"
+DEFAULT_ARCHIVE = Path("build-cache.tar.gz")
+# Searched for drawio_assets/ render caches
+DEFAULT_ASSET_ROOTS = (Path("other_formats"), Path("lessons"))
+# Merged key by key rather than replaced as a whole file
+MANIFEST_NAMES = ("pdf_manifest.json",)
+
+# Read once: os.umask can only be queried by setting it, which races threads
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def content_hash(*parts: Union[str, bytes]) -> str:
+    """Return a SHA-256 hex digest over one or more strings/bytes.
+
+    Each part is length-prefixed so ("ab", "c") and ("a", "bc") differ.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Write bytes via a temporary file and rename, so readers never see
+    a partially written file.
+
+    The file gets the usual ``0o666 & ~umask`` mode rather than the private
+    0600 of ``mkstemp``, so other users (web servers, node_exporter, other
+    build nodes on a shared mount) can read it.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.chmod(tmp_name, 0o666 & ~_UMASK)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+class JsonCache:
+    """A directory of JSON records addressed by content hash."""
+
+    def __init__(self, namespace: str, cache_dir: Optional[Path] = None):
+        self.namespace = namespace
+        self.directory = Path(cache_dir or DEFAULT_CACHE_DIR) / namespace
+
+    def path_for(self, key: str) -> Path:
+        """Return the file backing ``key`` (sharded by the first two hex digits)."""
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the stored record, or None if missing or unreadable."""
+        try:
+            with open(self.path_for(key), "r", encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, record: dict) -> None:
+        """Store a JSON-serialisable record under ``key``."""
+        payload = json.dumps(record, ensure_ascii=False, sort_keys=True)
+        atomic_write_bytes(self.path_for(key), payload.encode("utf-8"))
+
+
+# -- portable archives ------------------------------------------------------
+
+
+def find_asset_dirs(roots: Sequence[Path] = DEFAULT_ASSET_ROOTS) -> List[Path]:
+    """Return every drawio_assets/ directory under ``roots``."""
+    found = []
+    for root in roots:
+        if root.is_dir():
+            found.extend(path for path in root.rglob("drawio_assets") if path.is_dir())
+    return sorted(found)
+
+
+def _archive_sources(
+    cache_dir: Path, asset_dirs: Sequence[Path], root: Path = Path(".")
+) -> List[Tuple[str, Path]]:
+    """(archive name, local file) for everything worth carrying to a new machine.
+
+    Diagram caches are named relative to ``root`` (the repository), so an
+    archive never holds an absolute path; a directory outside it is an error.
+    """
+    sources = []
+    root = Path(root).resolve()
+    if cache_dir.is_dir():
+        for path in sorted(cache_dir.rglob("*")):
+            # Skip half-written temporaries from atomic_write_bytes
+            if path.is_file() and not path.name.startswith("."):
+                sources.append(
+                    ("cache/" + path.relative_to(cache_dir).as_posix(), path)
+                )
+    for directory in asset_dirs:
+        try:
+            relative = Path(directory).resolve().relative_to(root)
+        except ValueError:
+            raise ValueError(f"{directory} is outside {root}") from None
+        for path in sorted(Path(directory).iterdir()):
+            if path.is_file() and not path.name.startswith("."):
+                sources.append((f"assets/{relative.as_posix()}/{path.name}", path))
+    return sources
+
+
+def export_archive(
+    archive_path: Path,
+    cache_dir: Path = DEFAULT_CACHE_DIR,
+    asset_dirs: Optional[Sequence[Path]] = None,
+    root: Path = Path("."),
+) -> dict:
+    """Pack the build cache and diagram caches into one gzipped tar.
+
+    The first member, index.json, records the format version and the
+    size, mtime and SHA-256 of every file. Returns that index.
+    """
+    if asset_dirs is None:
+        asset_dirs = find_asset_dirs()
+    files = []
+    payloads = []
+    for name, path in _archive_sources(Path(cache_dir), asset_dirs, root):
+        data = path.read_bytes()
+        files.append(
+            {
+                "name": name,
+                "size": len(data),
+                "mtime": path.stat().st_mtime,
+                "sha256": hashlib.sha256(data).hexdigest(),
+            }
+        )
+        payloads.append(data)
+    index = {
+        "format": ARCHIVE_FORMAT,
+        "version": ARCHIVE_VERSION,
+        "created": time.time(),
+        "files": files,
+    }
+
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        members = [
+            (
+                ARCHIVE_INDEX,
+                json.dumps(index, indent=1).encode("utf-8"),
+                index["created"],
+            )
+        ]
+        members += [(f["name"], data, f["mtime"]) for f, data in zip(files, payloads)]
+        for name, data, mtime in members:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = int(mtime)
+            tar.addfile(info, io.BytesIO(data))
+    atomic_write_bytes(Path(archive_path), buffer.getvalue())
+    return index
+
+
+def _safe_name(name: str) -> bool:
+    """True for a plain relative ``cache/...`` or ``.../drawio_assets/...`` name.
+
+    The raw parts are checked, not a normalised path: ``PurePosixPath``
+    collapses ``//``, which would hide an absolute path after the prefix.
+    """
+    parts = name.split("/")
+    return (
+        len(parts) >= 2
+        and parts[0] in ("cache", "assets")
+        and all(
+            part not in ("", ".", "..") and "\\" not in part and ":" not in part
+            for part in parts
+        )
+        and (parts[0] == "cache" or "drawio_assets" in parts[1:-1])
+    )
+
+
+def _inside(target: Path, base: Path) -> bool:
+    """True when ``target`` resolves to a path under ``base``."""
+    base = base.resolve()
+    return base in target.resolve().parents
+
+
+def read_archive(archive_path: Path) -> Tuple[dict, Dict[str, bytes]]:
+    """Read and verify an archive; raises ValueError if anything is off."""
+    try:
+        with tarfile.open(archive_path, mode="r:gz") as tar:
+            contents = {}
+            for member in tar:
+                if member.isfile():
+                    contents[member.name] = tar.extractfile(member).read()
+    except (tarfile.TarError, EOFError, OSError) as e:
+        raise ValueError(f"unreadable archive: {e}") from e
+
+    try:
+        index = json.loads(contents.pop(ARCHIVE_INDEX))
+    except (KeyError, ValueError) as e:
+        raise ValueError("archive has no readable index.json") from e
+    if index.get("format") != ARCHIVE_FORMAT:
+        raise ValueError("not a build cache archive")
+    if index.get("version") != ARCHIVE_VERSION:
+        raise ValueError(
+            f"archive version {index.get('version')} is not supported "
+            f"(this tool reads version {ARCHIVE_VERSION})"
+        )
+
+    for entry in index["files"]:
+        name = entry["name"]
+        if not _safe_name(name):
+            raise ValueError(f"refusing unsafe path in archive: {name}")
+        data = contents.get(name)
+        if data is None:
+            raise ValueError(f"archive is missing {name}")
+        if (
+            len(data) != entry["size"]
+            or hashlib.sha256(data).hexdigest() != entry["sha256"]
+        ):
+            raise ValueError(f"integrity check failed for {name}")
+    return index, contents
+
+
+def _merge_manifest(local_path: Path, data: bytes) -> bool:
+    """Add manifest entries the local manifest lacks; local entries win."""
+    try:
+        incoming = json.loads(data)
+        local = json.loads(local_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+    merged = {**incoming, **local}
+    if merged == local:
+        return False
+    payload = json.dumps(merged, indent=2, sort_keys=True)
+    atomic_write_bytes(local_path, payload.encode("utf-8"))
+    return True
+
+
+def import_archive(
+    archive_path: Path,
+    cache_dir: Path = DEFAULT_CACHE_DIR,
+    root: Path = Path("."),
+    dry_run: bool = False,
+) -> Dict[str, int]:
+    """Merge an archive into the local caches.
+
+    Missing files are added; a differing local file is replaced only when
+    the archived copy is newer, so local work is never clobbered. Build
+    manifests are merged entry by entry. Returns counts per outcome.
+    """
+    index, contents = read_archive(Path(archive_path))
+    targets = []
+    for entry in index["files"]:
+        prefix, _, rest = entry["name"].partition("/")
+        base = Path(cache_dir) if prefix == "cache" else Path(root)
+        # Checked for every file before any is written; also catches names
+        # that would escape through a symlink
+        if not _inside(base / rest, base):
+            raise ValueError(
+                f"refusing path outside {base} in archive: {entry['name']}"
+            )
+        targets.append((prefix, base / rest))
+
+    counts = {"added": 0, "updated": 0, "merged": 0, "identical": 0, "kept": 0}
+    for entry, (prefix, target) in zip(index["files"], targets):
+        data = contents[entry["name"]]
+
+        if not target.exists():
+            outcome = "added"
+        elif hashlib.sha256(target.read_bytes()).hexdigest() == entry["sha256"]:
+            outcome = "identical"
+        elif prefix == "cache" and target.name in MANIFEST_NAMES:
+            if dry_run or _merge_manifest(target, data):
+                counts["merged"] += 1
+            else:
+                counts["kept"] += 1
+            continue
+        elif target.stat().st_mtime < entry["mtime"]:
+            outcome = "updated"
+        else:
+            outcome = "kept"
+
+        counts[outcome] += 1
+        if outcome in ("added", "updated") and not dry_run:
+            atomic_write_bytes(target, data)
+            os.utime(target, (entry["mtime"], entry["mtime"]))
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Export or import a portable archive of the build caches."
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=DEFAULT_CACHE_DIR,
+        help=f"Build cache directory (default: {DEFAULT_CACHE_DIR})",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_cmd = commands.add_parser("export", help="Pack the caches into an archive")
+    export_cmd.add_argument("archive", type=Path, nargs="?", default=DEFAULT_ARCHIVE)
+    export_cmd.add_argument(
+        "--assets",
+        type=Path,
+        nargs="+",
+        help="drawio_assets directories to include (default: every one under "
+        + ", ".join(root.as_posix() for root in DEFAULT_ASSET_ROOTS)
+        + ")",
+    )
+
+    import_cmd = commands.add_parser(
+        "import", help="Merge an archive into the local caches"
+    )
+    import_cmd.add_argument("archive", type=Path, nargs="?", default=DEFAULT_ARCHIVE)
+    import_cmd.add_argument(
+        "--dry-run", action="store_true", help="Verify and report without writing"
+    )
+    args = parser.parse_args()
+
+    if args.command == "export":
+        try:
+            index = export_archive(args.archive, args.cache_dir, args.assets)
+        except (OSError, ValueError) as e:
+            print(f"❌ Cannot export {args.archive}: {e}")
+            sys.exit(1)
+        total = sum(entry["size"] for entry in index["files"])
+        print(
+            f"📦 Packed {len(index['files'])} file(s) ({total / 1024:.0f} KB) "
+            f"into {args.archive} ({args.archive.stat().st_size / 1024:.0f} KB)"
+        )
+        return
+
+    try:
+        counts = import_archive(args.archive, args.cache_dir, dry_run=args.dry_run)
+    except (OSError, ValueError) as e:
+        print(f"❌ Cannot import {args.archive}: {e}")
+        sys.exit(1)
+    summary = ", ".join(
+        f"{count} {outcome}" for outcome, count in counts.items() if count
+    )
+    verb = "Would import" if args.dry_run else "Imported"
+    print(f"📥 {verb} {args.archive}: {summary or 'nothing to do'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Prometheus metrics for the conversion utilities.
+
+Counts documents converted and failed, diagrams rendered against cache
+hits, bytes written and browser launches, and times each build stage. The
+conversion scripts write everything to a textfile in the Prometheus text
+exposition format when given ``--metrics-file``. node_exporter's textfile
+collector then picks it up, so nightly builds can be graphed over weeks.
+
+Values cover one run of one tool, so give each tool its own file:
+
+    python3 utils/ipynb_to_md.py --metrics-file /var/lib/node_exporter/textfile/lessons_ipynb.prom
+    python3 utils/md_to_pdf.py --directory other_formats/markdown_lessons \\
+        --metrics-file /var/lib/node_exporter/textfile/lessons_pdf.prom
+
+Usage:
+    import build_metrics
+
+    build_metrics.DOCUMENTS.inc(tool="md_to_pdf", status="converted")
+    with build_metrics.timed("md_to_pdf", "layout"):
+        ...
+    build_metrics.write_textfile(Path("lessons.prom"))
+
+Dependencies:
+    - None (stdlib only)
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from build_cache import atomic_write_bytes
+
+PREFIX = "lesson_build"
+
+# Stage durations run from a cached diagram (milliseconds) to a full
+# directory layout (minutes)
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[Tuple[str, LabelValues, Sequence[str], float]]:
+        raise NotImplementedError
+
+    def exposition(self) -> str:
+        samples = self.samples()
+        if not samples:
+            return ""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for name, values, names, value in samples:
+            lines.append(f"{name}{_label_text(names, values)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class Counter(_Metric):
+    """A value that only goes up during a run."""
+
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            return [
+                (self.name, key, self.labelnames, value)
+                for key, value in sorted(self._values.items())
+            ]
+
+
+class Gauge(Counter):
+    """A value that is set rather than accumulated."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative ``le`` buckets, plus sum and count."""
+
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * len(self.buckets))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def samples(self):
+        names = self.labelnames + ("le",)
+        samples = []
+        with self._lock:
+            for key in sorted(self._counts):
+                for bound, count in zip(self.buckets, self._counts[key]):
+                    samples.append(
+                        (
+                            f"{self.name}_bucket",
+                            key + (_format_value(bound),),
+                            names,
+                            count,
+                        )
+                    )
+                samples.append(
+                    (f"{self.name}_sum", key, self.labelnames, self._sums[key])
+                )
+                samples.append(
+                    (f"{self.name}_count", key, self.labelnames, self._counts[key][-1])
+                )
+        return samples
+
+
+class Registry:
+    """The metrics one process exports."""
+
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def exposition(self) -> str:
+        return "".join(metric.exposition() for metric in self.metrics)
+
+
+REGISTRY = Registry()
+
+DOCUMENTS = REGISTRY.register(
+    Counter(
+        f"{PREFIX}_documents_total",
+        "Documents processed, by tool and outcome (converted, failed, skipped).",
+        ("tool", "status"),
+    )
+)
+DIAGRAMS = REGISTRY.register(
+    Counter(
+        f"{PREFIX}_diagrams_total",
+        "draw.io diagrams, by outcome (rendered, cache_hit, failed) and renderer.",
+        ("result", "renderer"),
+    )
+)
+CELLS = REGISTRY.register(
+    Counter(
+        f"{PREFIX}_cells_total",
+        "Notebook cells exported to Markdown, by outcome (exported, cache_hit).",
+        ("result",),
+    )
+)
+BYTES_WRITTEN = REGISTRY.register(
+    Counter(
+        f"{PREFIX}_bytes_written_total",
+        "Bytes of output written, by tool and kind of file.",
+        ("tool", "kind"),
+    )
+)
+BROWSER_LAUNCHES = REGISTRY.register(
+    Counter(
+        f"{PREFIX}_browser_launches_total",
+        "Headless Chromium launches, by outcome (ok, failed).",
+        ("result",),
+    )
+)
+STAGE_SECONDS = REGISTRY.register(
+    Histogram(
+        f"{PREFIX}_stage_duration_seconds",
+        "Time spent in each build stage, per document or diagram.",
+        ("tool", "stage"),
+    )
+)
+RUN_SECONDS = REGISTRY.register(
+    Gauge(
+        f"{PREFIX}_run_duration_seconds",
+        "Wall time of the last run.",
+        ("tool",),
+    )
+)
+LAST_RUN = REGISTRY.register(
+    Gauge(
+        f"{PREFIX}_last_run_timestamp_seconds",
+        "Unix time the last run finished.",
+        ("tool",),
+    )
+)
+LAST_SUCCESS = REGISTRY.register(
+    Gauge(
+        f"{PREFIX}_last_run_success",
+        "1 if the last run converted everything it was asked to, else 0.",
+        ("tool",),
+    )
+)
+
+
+@contextmanager
+def timed(tool: str, stage: str) -> Iterator[None]:
+    """Observe the duration of the ``with`` block as one stage sample."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, tool=tool, stage=stage)
+
+
+def record_file(tool: str, kind: str, path: Path) -> None:
+    """Count an output file's size towards bytes written."""
+    try:
+        BYTES_WRITTEN.inc(path.stat().st_size, tool=tool, kind=kind)
+    except OSError:
+        pass
+
+
+def record_run(tool: str, seconds: float, success: bool) -> None:
+    RUN_SECONDS.set(seconds, tool=tool)
+    LAST_RUN.set(time.time(), tool=tool)
+    LAST_SUCCESS.set(1 if success else 0, tool=tool)
+
+
+def write_textfile(path: Path) -> None:
+    """Write every metric to ``path`` atomically, as node_exporter expects."""
+    atomic_write_bytes(Path(path), REGISTRY.exposition().encode("utf-8"))
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Stage-pipelined PDF build: diagram renders overlap WeasyPrint layout.
+
+``md_to_pdf.py`` converts one file at a time, and each file runs its stages
+in series: read, render draw.io diagrams (browser and network bound),
+preprocess and parse the Markdown, then lay out the PDF (CPU bound). This
+scheduler runs each stage on its own, joined by bounded queues:
+
+    read -> render (asyncio, --render-jobs pages) -> parse (1 thread)
+         -> layout (process pool, --jobs workers)
+
+So the diagrams for lesson N+1 render while lesson N is being laid out,
+and wall time approaches the slowest stage rather than the sum of all of
+them. A full queue blocks the stage feeding it (backpressure), so at most
+``queue_size`` parsed documents wait in memory for a layout worker.
+
+Output is deterministic. Every document is parsed in input order, each PDF
+depends only on its own document, and results are reported in input order
+whichever worker finishes first.
+
+Usage:
+    python3 utils/md_to_pdf.py --directory "other_formats/markdown_lessons" --jobs 4
+    python3 utils/md_to_pdf.py --directory "other_formats/markdown_lessons" --jobs 4 --render-jobs 8
+
+    # In code
+    from build_pipeline import BuildPipeline
+    results = BuildPipeline(converter, layout_jobs=4).run(jobs)
+
+Dependencies:
+    - weasyprint (layout workers), playwright (optional, diagram renders)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import build_metrics
+from drawio_to_png import (
+    IFRAME_PATTERN,
+    iframe_cache_name,
+    render_drawio_python,
+    renderer_choice,
+    store_render,
+)
+from md_to_pdf import MarkdownToPdfConverter
+from render_service import (
+    RenderService,
+    default_socket_path,
+    health,
+    render_via_service,
+)
+
+DEFAULT_RENDER_JOBS = 4
+DEFAULT_QUEUE_SIZE = 2
+
+ASSET_URL_PATTERN = re.compile(r"asset://[0-9a-f]+(?:\.\w+)?")
+
+# Layout worker state: one converter per process, so its decoded-image cache
+# is shared by every document that worker lays out
+_worker_converter: Optional[MarkdownToPdfConverter] = None
+
+
+def _init_layout_worker(settings: dict) -> None:
+    global _worker_converter
+    _worker_converter = MarkdownToPdfConverter(**settings)
+
+
+def _layout(html_body: str, mode: str, output_file: Path, assets: dict) -> float:
+    """Lay out one parsed document in a worker; returns seconds spent."""
+    started = time.perf_counter()
+    _worker_converter.asset_store.update(assets)
+    _worker_converter.write_variant(html_body, mode, output_file)
+    return time.perf_counter() - started
+
+
+@dataclass
+class DocumentResult:
+    """Outcome of one input file, reported in input order."""
+
+    input_file: Path
+    written: List[Path] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class _Document:
+    index: int
+    input_file: Path
+    outputs: Dict[str, Path]
+    markdown: str = ""
+    pending: Dict[str, tuple] = field(default_factory=dict)
+    html_body: str = ""
+    assets: dict = field(default_factory=dict)
+
+
+class BuildPipeline:
+    """Runs read, render, parse and layout as overlapping stages."""
+
+    def __init__(
+        self,
+        converter: MarkdownToPdfConverter,
+        layout_jobs: int = os.cpu_count() or 1,
+        render_jobs: int = DEFAULT_RENDER_JOBS,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+    ):
+        self.converter = converter
+        self.layout_jobs = max(1, layout_jobs)
+        self.render_jobs = max(1, render_jobs)
+        self.queue_size = max(1, queue_size)
+        # Seconds each stage spent working, to compare with the wall time
+        self.busy: Dict[str, float] = {"render": 0.0, "parse": 0.0, "layout": 0.0}
+        self.wall = 0.0
+        self._service = None
+        self._playwright = None
+
+    def run(self, jobs: List[Tuple[Path, Dict[str, Path]]]) -> List[DocumentResult]:
+        """Build ``[(input_file, {mode: output_file})]``; results in input order."""
+        started = time.perf_counter()
+        try:
+            return asyncio.run(self._run(jobs))
+        finally:
+            self.wall = time.perf_counter() - started
+
+    def worker_settings(self) -> dict:
+        converter = self.converter
+        return {
+            "verbose": converter.verbose,
+            "page_break_mode": converter.page_break_mode,
+            "pdf_profile": converter.pdf_profile,
+            "chunk_kb": converter.chunk_kb,
+        }
+
+    async def _run(
+        self, jobs: List[Tuple[Path, Dict[str, Path]]]
+    ) -> List[DocumentResult]:
+        results = [DocumentResult(input_file) for input_file, _ in jobs]
+        to_render: asyncio.Queue = asyncio.Queue(self.queue_size)
+        to_parse: asyncio.Queue = asyncio.Queue(self.queue_size)
+        to_layout: asyncio.Queue = asyncio.Queue(self.queue_size)
+
+        # Spawned (not forked) workers, as the render stage may own browser threads
+        layout_pool = ProcessPoolExecutor(
+            max_workers=self.layout_jobs,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_layout_worker,
+            initargs=(self.worker_settings(),),
+        )
+        # Parsing touches the converter's asset store, so it stays on one
+        # thread; that thread can also use the sync Playwright fallback
+        parse_thread = ThreadPoolExecutor(max_workers=1)
+        try:
+            await asyncio.gather(
+                self._read_stage(jobs, to_render, results),
+                self._render_stage(to_render, to_parse, results),
+                self._parse_stage(to_parse, to_layout, parse_thread, results),
+                self._layout_stage(to_layout, layout_pool, results),
+            )
+        finally:
+            await self._close_renderer()
+            parse_thread.shutdown()
+            layout_pool.shutdown()
+        return results
+
+    # -- stages -------------------------------------------------------------
+
+    async def _read_stage(self, jobs, to_render: asyncio.Queue, results) -> None:
+        for index, (input_file, outputs) in enumerate(jobs):
+            document = _Document(index, input_file, outputs)
+            try:
+                document.markdown = await asyncio.to_thread(
+                    input_file.read_text, encoding="utf-8"
+                )
+                document.pending = self.converter.pending_outputs(
+                    input_file, document.markdown, outputs
+                )
+            except Exception as e:
+                results[index].error = str(e)
+                continue
+            if document.pending:
+                await to_render.put(document)
+        await to_render.put(None)
+
+    async def _render_stage(self, to_render, to_parse, results) -> None:
+        """Fill each document's diagram cache, rendering concurrently."""
+        limit = asyncio.Semaphore(self.render_jobs)
+        while (document := await to_render.get()) is not None:
+            started = time.perf_counter()
+            cache_dir = document.input_file.parent / "drawio_assets"
+            urls = list(dict.fromkeys(IFRAME_PATTERN.findall(document.markdown)))
+            missing = [
+                url for url in urls if not (cache_dir / iframe_cache_name(url)).exists()
+            ]
+            hits = len(urls) - len(missing)
+            if hits:
+                build_metrics.DIAGRAMS.inc(hits, result="cache_hit", renderer="cache")
+            if missing:
+                if self._service is None:
+                    self._service = await self._open_renderer()
+                await asyncio.gather(
+                    *(self._render_one(url, cache_dir, limit) for url in missing)
+                )
+            elapsed = time.perf_counter() - started
+            self.busy["render"] += elapsed
+            build_metrics.STAGE_SECONDS.observe(
+                elapsed, tool="md_to_pdf", stage="render"
+            )
+            await to_parse.put(document)
+        await to_parse.put(None)
+
+    async def _render_one(
+        self, url: str, cache_dir: Path, limit: asyncio.Semaphore
+    ) -> None:
+        async with limit:
+            try:
+                png = await self._render_png(url)
+            except Exception as e:
+                # The parse stage retries and falls back to a link
+                self.converter.log(f"⚠️  Failed to render draw.io diagram: {e}")
+                build_metrics.DIAGRAMS.inc(
+                    result="failed", renderer=self._renderer_label()
+                )
+                return
+        if png is not None:
+            cache_dir.mkdir(exist_ok=True)
+            store_render(cache_dir, url, png, self._renderer_label())
+
+    async def _parse_stage(self, to_parse, to_layout, parse_thread, results) -> None:
+        loop = asyncio.get_running_loop()
+        while (document := await to_parse.get()) is not None:
+            started = time.perf_counter()
+            try:
+                document.html_body = await loop.run_in_executor(
+                    parse_thread,
+                    self.converter.render_markdown_body,
+                    document.markdown,
+                    document.input_file,
+                )
+            except Exception as e:
+                results[document.index].error = str(e)
+                continue
+            finally:
+                elapsed = time.perf_counter() - started
+                self.busy["parse"] += elapsed
+                build_metrics.STAGE_SECONDS.observe(
+                    elapsed, tool="md_to_pdf", stage="parse"
+                )
+            document.assets = self.converter.asset_store.subset(
+                set(ASSET_URL_PATTERN.findall(document.html_body))
+            )
+            document.markdown = ""
+            await to_layout.put(document)
+        await to_layout.put(None)
+
+    async def _layout_stage(self, to_layout, layout_pool, results) -> None:
+        """Hand documents to the process pool, at most one per free worker."""
+        loop = asyncio.get_running_loop()
+        free = asyncio.Semaphore(self.layout_jobs)
+        in_flight = []
+
+        async def layout(
+            document: _Document, mode: str, output_file: Path, fingerprint
+        ):
+            try:
+                html_body = document.html_body
+                seconds = await loop.run_in_executor(
+                    layout_pool, _layout, html_body, mode, output_file, document.assets
+                )
+                self.busy["layout"] += seconds
+                build_metrics.STAGE_SECONDS.observe(
+                    seconds, tool="md_to_pdf", stage="layout"
+                )
+                results[document.index].written.append(output_file)
+                self.converter.record_output(
+                    document.input_file, mode, output_file, fingerprint
+                )
+            except Exception as e:
+                results[document.index].error = str(e)
+            finally:
+                free.release()
+
+        while (document := await to_layout.get()) is not None:
+            for mode, (output_file, fingerprint) in document.pending.items():
+                # Waiting here stops this stage taking more work: backpressure
+                await free.acquire()
+                in_flight.append(
+                    asyncio.create_task(
+                        layout(document, mode, output_file, fingerprint)
+                    )
+                )
+        await asyncio.gather(*in_flight)
+
+    # -- diagram rendering --------------------------------------------------
+
+    async def _render_png(self, url: str) -> Optional[bytes]:
+        """PNG via the render service when it is up, else an in-process pool."""
+        if self._service == "external":
+            return await asyncio.to_thread(render_via_service, url)
+        if self._service is False:
+            return await asyncio.to_thread(render_drawio_python, url)
+        return await self._service.render({"url": url})
+
+    def _renderer_label(self) -> str:
+        if self._service is False:
+            return "python"
+        return "service" if self._service == "external" else "browser"
+
+    async def _open_renderer(self):
+        """Use the running render service, else start an in-process page pool.
+
+        Returns "external", a RenderService, or False for the pure-Python
+        renderer (asked for, or no Playwright).
+        """
+        if renderer_choice() == "python":
+            return False
+        if await asyncio.to_thread(health):
+            return "external"
+        try:
+            from playwright.async_api import async_playwright
+        except ImportError:
+            return False
+
+        self._playwright = await async_playwright().start()
+        service = RenderService(default_socket_path(), self.render_jobs, idle_timeout=0)
+        try:
+            await service.open(self._playwright)
+        except Exception:
+            # Playwright without its Chromium download
+            build_metrics.BROWSER_LAUNCHES.inc(result="failed")
+            await self._playwright.stop()
+            self._playwright = None
+            return False
+        build_metrics.BROWSER_LAUNCHES.inc(result="ok")
+        return service
+
+    async def _close_renderer(self) -> None:
+        if self._service not in (None, False, "external"):
+            await self._service.browser.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+
+
+def print_timings(pipeline: BuildPipeline) -> None:
+    """Print stage busy time against wall time."""
+    busy = ", ".join(
+        f"{stage} {seconds:.1f}s" for stage, seconds in pipeline.busy.items()
+    )
+    print(f"⏱️  Wall time {pipeline.wall:.1f}s (stage time: {busy})")
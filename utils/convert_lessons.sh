@@ -41,12 +41,19 @@ if [ "$(basename "$PWD")" = "utils" ]; then
     cd ..
 fi
 
+# Seed the caches from a warm build if an archive was provided
+if [ -f "build-cache.tar.gz" ]; then
+    echo "📥 Importing build cache archive..."
+    python3 utils/build_cache.py import build-cache.tar.gz || echo "⚠️  Archive not imported - building cold"
+fi
+
 # Convert notebooks to markdown first
 echo "➡️  Converting notebooks (.ipynb) to markdown..."
 python3 utils/ipynb_to_md.py --input-dir "lessons" --output-dir "other_formats/markdown_lessons" --verbose
 
 # Run the markdown to PDF conversion
-python3 utils/md_to_pdf.py --directory "other_formats/markdown_lessons" --output-dir "other_formats/pdf_lessons" --verbose
+python3 utils/md_to_pdf.py --directory "other_formats/markdown_lessons" --output-dir "other_formats/pdf_lessons" \
+    --search-index "other_formats/search_index.bin" --verbose
 
 echo ""
 echo "=================================================="
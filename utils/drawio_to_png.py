@@ -16,28 +16,92 @@ Usage:
 
     # From XML
     png_bytes = render_drawio_to_png(xml_string, is_xml=True)
+
+    # Many diagrams from one loaded viewer page (PNG or SVG bytes per diagram)
+    images = render_drawio_batch([url1, url2, url3], fmt="png")
+
+Command line:
+    python3 utils/drawio_to_png.py diagram.xml output.png
+
+    # Re-render every iframe diagram in the lessons into an assets cache
+    python3 utils/drawio_to_png.py --batch other_formats/markdown_lessons/drawio_assets lessons/*.ipynb
+
+When the render service is running (python3 utils/render_service.py start)
+renders go through its warm browser; otherwise Chromium is launched in this
+process. When the viewer bundle is vendored (python3 utils/drawio_viewer.py
+fetch) diagrams render from local files with no network access.
+
+Renders, cache hits, failures and browser launches are counted in
+build_metrics.py (``--metrics-file`` writes them out).
+
+Without Playwright (or with DRAWIO_RENDERER=python) diagrams are drawn by
+drawio_to_svg.py and rasterised by svg_raster.py instead: no browser, about
+50-250 ms per lesson diagram. The same happens, with a warning, when
+Playwright is installed but Chromium will not launch; DRAWIO_RENDERER=browser
+makes that an error instead. Python renders are 2x scale rather than an
+800x600 screenshot, so ``--batch`` never replaces a cached image with one.
 """
 
 from __future__ import annotations
 
 import hashlib
+import json
+import os
+import re
+import sys
 import urllib.parse
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, List, Optional, Sequence, Set
+
+import build_metrics
+from build_cache import atomic_write_bytes
+from drawio_viewer import (
+    export_xml_on_page,
+    install_local_viewer,
+    open_viewer_page,
+    render_xml_on_page,
+    offline_ready,
+    viewer_bundle_available,
+    wants_nav,
+    xml_from_viewer_url,
+)
+from render_service import render_via_service
+from svg_raster import drawio_xml_to_png
+
+RENDERER_ENV = "DRAWIO_RENDERER"  # "python", "browser" or "auto" (default)
+PYTHON_RENDER_SCALE = 2.0  # pixels per diagram unit, for crisp text in print
 
 # Lazy import Playwright to avoid startup cost if not needed
 _playwright = None
 _browser = None
+_launch_error: Optional[Exception] = None
+_fallback_warned = False
+
+# Cache files this process rendered, so reading them back is not a cache hit
+_fresh_renders: Set[Path] = set()
 
 
 def _get_browser():
-    """Lazy-load and cache the Playwright browser instance."""
-    global _playwright, _browser
-    if _browser is None:
-        from playwright.sync_api import sync_playwright
+    """Lazy-load and cache the Playwright browser instance.
 
-        _playwright = sync_playwright().start()
-        _browser = _playwright.chromium.launch()
+    A failed launch (Playwright or its Chromium not installed) is remembered,
+    so later diagrams go straight to the fallback instead of retrying.
+    """
+    global _playwright, _browser, _launch_error
+    if _launch_error is not None:
+        raise _launch_error
+    if _browser is None:
+        try:
+            from playwright.sync_api import sync_playwright
+
+            _playwright = sync_playwright().start()
+            _browser = _playwright.chromium.launch()
+        except Exception as e:
+            _close_browser()
+            _launch_error = e
+            build_metrics.BROWSER_LAUNCHES.inc(result="failed")
+            raise
+        build_metrics.BROWSER_LAUNCHES.inc(result="ok")
     return _browser
 
 
@@ -52,6 +116,68 @@ def _close_browser():
         _playwright = None
 
 
+def _warn_fallback(error: Exception) -> None:
+    """Say (once per process) that Chromium would not launch."""
+    global _fallback_warned
+    if not _fallback_warned:
+        _fallback_warned = True
+        print(
+            f"⚠️  Chromium could not be launched ({str(error).splitlines()[0]}) - "
+            f"drawing diagrams with the Python renderer "
+            f"(set {RENDERER_ENV}=browser to fail instead)",
+            file=sys.stderr,
+        )
+
+
+def browser_launches() -> bool:
+    """True when Chromium can be (or already has been) launched."""
+    try:
+        _get_browser()
+    except Exception as e:
+        _warn_fallback(e)
+        return False
+    return True
+
+
+def playwright_available() -> bool:
+    try:
+        import playwright.sync_api  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def renderer_choice() -> str:
+    """The renderer asked for in DRAWIO_RENDERER: "python", "browser" or "auto"."""
+    choice = os.environ.get(RENDERER_ENV, "auto").strip().lower()
+    return choice if choice in ("python", "browser") else "auto"
+
+
+def use_python_renderer() -> bool:
+    """True when diagrams should be drawn without a browser."""
+    choice = renderer_choice()
+    return choice == "python" or (choice == "auto" and not playwright_available())
+
+
+def render_drawio_python(
+    source: str, is_xml: bool = False, scale: float = PYTHON_RENDER_SCALE
+) -> bytes:
+    """Render a diagram to PNG with the pure-Python SVG rasteriser."""
+    xml = source if is_xml else xml_from_viewer_url(source)
+    if xml is None:
+        raise ValueError(
+            "The pure-Python renderer needs inline diagram XML (#R...) in the URL"
+        )
+    return drawio_xml_to_png(xml, scale)
+
+
+def _save(png_data: bytes, output_path: Optional[Path], renderer: str) -> bytes:
+    build_metrics.DIAGRAMS.inc(result="rendered", renderer=renderer)
+    if output_path:
+        output_path.write_bytes(png_data)
+    return png_data
+
+
 def xml_to_viewer_url(xml: str) -> str:
     """Convert mxGraphModel XML to a viewer.diagrams.net URL."""
     encoded = urllib.parse.quote(xml)
@@ -65,6 +191,8 @@ def render_drawio_to_png(
     height: int = 600,
     wait_ms: int = 2000,
     output_path: Optional[Path] = None,
+    use_service: bool = True,
+    offline: Optional[bool] = None,
 ) -> bytes:
     """Render a draw.io diagram to PNG.
 
@@ -75,30 +203,151 @@ def render_drawio_to_png(
         height: Viewport height in pixels
         wait_ms: Time to wait for diagram to render (ms)
         output_path: Optional path to save the PNG file
+        use_service: Try the shared render service before launching Chromium
+        offline: Render with the vendored viewer instead of viewer.diagrams.net
+            (default: when the XML is inline and ``drawio_viewer.py check``
+            has passed on the vendored bundle)
 
     Returns:
         PNG image data as bytes
     """
+    xml = source if is_xml else xml_from_viewer_url(source)
+    if renderer_choice() == "python":
+        return _save(render_drawio_python(source, is_xml), output_path, "python")
+
     if is_xml:
         url = xml_to_viewer_url(source)
     else:
         url = source
 
-    browser = _get_browser()
+    if use_service:
+        png_data = render_via_service(url, width, height, wait_ms)
+        if png_data is not None:
+            return _save(png_data, output_path, "service")
+
+    if offline is None:
+        offline = xml is not None and offline_ready()
+    elif offline and (xml is None or not viewer_bundle_available()):
+        raise ValueError(
+            "Offline render needs inline #R XML and the vendored viewer bundle "
+            "(python3 utils/drawio_viewer.py fetch)"
+        )
+
+    try:
+        browser = _get_browser()
+    except Exception as e:
+        # No Playwright, or Playwright without its Chromium download
+        if xml is None or renderer_choice() == "browser":
+            raise
+        _warn_fallback(e)
+        return _save(render_drawio_python(xml, is_xml=True), output_path, "python")
     page = browser.new_page(viewport={"width": width, "height": height})
 
     try:
-        page.goto(url, wait_until="networkidle", timeout=30000)
-        page.wait_for_timeout(wait_ms)
+        if offline:
+            # The diagram is drawn once its SVG exists - no CDN wait needed
+            install_local_viewer(page)
+            render_xml_on_page(page, xml, nav=wants_nav(url))
+        else:
+            page.goto(url, wait_until="networkidle", timeout=30000)
+            page.wait_for_timeout(wait_ms)
+
+        return _save(page.screenshot(), output_path, "browser")
+    finally:
+        page.close()
 
-        png_data = page.screenshot()
 
-        if output_path:
-            output_path.write_bytes(png_data)
+def render_drawio_batch(
+    sources: Sequence[str],
+    is_xml: bool = False,
+    fmt: str = "png",
+    scale: float = 1.0,
+    border: int = 10,
+    offline: Optional[bool] = None,
+) -> List[bytes]:
+    """Export many diagrams from a single loaded viewer page.
+
+    The viewer is loaded once; each diagram is then exported through the
+    viewer's own SVG exporter (PNG is drawn from that SVG), so per-diagram
+    cost is just the graph render. URLs without inline ``#R`` XML fall back
+    to a full :func:`render_drawio_to_png` screenshot.
+
+    Args:
+        sources: viewer.diagrams.net URLs or raw mxGraphModel XML strings
+        is_xml: If True, treat sources as XML; if False, as URLs
+        fmt: "png" or "svg"
+        scale: Export scale (2.0 for high-DPI PNGs)
+        border: Blank border around each diagram in pixels
+        offline: Use the vendored viewer (default: once ``drawio_viewer.py
+            check`` has passed on it)
 
-        return png_data
+    Returns:
+        Image bytes per source, in the same order
+    """
+    xmls = [source if is_xml else xml_from_viewer_url(source) for source in sources]
+    drawable = fmt == "png" and all(xml is not None for xml in xmls)
+    if drawable and use_python_renderer():
+        return _render_batch_python(xmls, scale)
+    if offline is None:
+        offline = offline_ready()
+
+    try:
+        browser = _get_browser()
+    except Exception as e:
+        if not drawable or renderer_choice() == "browser":
+            raise
+        _warn_fallback(e)
+        return _render_batch_python(xmls, scale)
+    page = browser.new_page()
+    results: List[bytes] = []
+    try:
+        if any(xml is not None for xml in xmls):
+            open_viewer_page(page, offline)
+        for source, xml in zip(sources, xmls):
+            if xml is not None:
+                results.append(export_xml_on_page(page, xml, fmt, scale, border))
+                build_metrics.DIAGRAMS.inc(result="rendered", renderer="browser")
+            elif fmt == "png":
+                results.append(render_drawio_to_png(source, is_xml=False))
+            else:
+                raise ValueError(f"SVG export needs inline diagram XML: {source[:80]}")
     finally:
         page.close()
+    return results
+
+
+def _render_batch_python(xmls: Sequence[str], scale: float) -> List[bytes]:
+    results = []
+    for xml in xmls:
+        results.append(drawio_xml_to_png(xml, scale * PYTHON_RENDER_SCALE))
+        build_metrics.DIAGRAMS.inc(result="rendered", renderer="python")
+    return results
+
+
+def iframe_cache_name(iframe_url: str, suffix: str = ".png") -> str:
+    """File name used to cache the rendered image of an iframe URL."""
+    digest = hashlib.sha1(iframe_url.encode("utf-8")).hexdigest()[:16]
+    return f"diagram_{digest}{suffix}"
+
+
+IFRAME_PATTERN = re.compile(
+    r'<iframe[^>]+src="([^" ]*viewer\.diagrams\.net[^"]+)"[^>]*></iframe>',
+    re.IGNORECASE,
+)
+
+
+def find_iframe_urls(paths: Iterable[Path]) -> List[str]:
+    """Collect unique draw.io iframe URLs from Markdown or notebook files."""
+    urls: List[str] = []
+    for path in paths:
+        text = path.read_text(encoding="utf-8")
+        if path.suffix == ".ipynb":
+            cells = json.loads(text).get("cells", [])
+            text = "\n".join("".join(cell.get("source", [])) for cell in cells)
+        for url in IFRAME_PATTERN.findall(text):
+            if url not in urls:
+                urls.append(url)
+    return urls
 
 
 def render_iframe_url_to_png(
@@ -114,39 +363,86 @@ def render_iframe_url_to_png(
     Returns:
         Tuple of (png_bytes, cache_file_path)
     """
-    # Create hash for caching
-    digest = hashlib.sha1(iframe_url.encode("utf-8")).hexdigest()[:16]
-
     if cache_dir:
-        cache_dir.mkdir(exist_ok=True)
-        cache_file = cache_dir / f"diagram_{digest}.png"
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        cache_file = cache_dir / iframe_cache_name(iframe_url)
 
         if cache_file.exists():
+            if cache_file not in _fresh_renders:
+                build_metrics.DIAGRAMS.inc(result="cache_hit", renderer="cache")
             return cache_file.read_bytes(), cache_file
     else:
-        cache_file = Path(f"/tmp/diagram_{digest}.png")
-
-    png_data = render_drawio_to_png(iframe_url, is_xml=False)
+        cache_file = Path("/tmp") / iframe_cache_name(iframe_url)
+
+    with build_metrics.timed("drawio_to_png", "diagram_render"):
+        try:
+            png_data = render_drawio_to_png(iframe_url, is_xml=False)
+        except Exception:
+            build_metrics.DIAGRAMS.inc(result="failed", renderer="none")
+            raise
     cache_file.write_bytes(png_data)
+    _note_written(cache_file, png_data)
 
     return png_data, cache_file
 
 
+def _note_written(cache_file: Path, png_data: bytes) -> None:
+    _fresh_renders.add(cache_file)
+    build_metrics.BYTES_WRITTEN.inc(len(png_data), tool="drawio_to_png", kind="png")
+
+
+def store_render(
+    cache_dir: Path, iframe_url: str, png_data: bytes, renderer: str
+) -> Path:
+    """Cache a PNG rendered outside :func:`render_iframe_url_to_png` (and count it)."""
+    cache_file = cache_dir / iframe_cache_name(iframe_url)
+    atomic_write_bytes(cache_file, png_data)
+    build_metrics.DIAGRAMS.inc(result="rendered", renderer=renderer)
+    _note_written(cache_file, png_data)
+    return cache_file
+
+
 # Cleanup on module unload
 import atexit
 
 atexit.register(_close_browser)
 
 
-if __name__ == "__main__":
-    import sys
-
-    if len(sys.argv) < 2:
-        print("Usage: python drawio_to_png.py <url_or_xml_file> [output.png]")
+def _cli(argv: List[str]) -> None:
+    if len(argv) >= 2 and argv[0] == "--batch":
+        # Corpus-wide re-render: overwrite the cached image of every iframe.
+        # Python renders only fill gaps - they are a different size from the
+        # browser screenshots the cache (and the committed assets) hold.
+        cache_dir = Path(argv[1])
+        urls = find_iframe_urls(Path(arg) for arg in argv[2:])
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        python_render = use_python_renderer() or (
+            renderer_choice() == "auto" and not browser_launches()
+        )
+        if python_render:
+            urls = [
+                url for url in urls if not (cache_dir / iframe_cache_name(url)).exists()
+            ]
+        with build_metrics.timed("drawio_to_png", "batch_render"):
+            images = render_drawio_batch(urls)
+        for url, png in zip(urls, images):
+            (cache_dir / iframe_cache_name(url)).write_bytes(png)
+            build_metrics.BYTES_WRITTEN.inc(len(png), tool="drawio_to_png", kind="png")
+        print(f"Rendered {len(urls)} diagram(s) into {cache_dir}")
+        if python_render:
+            print("   (Python renderer: existing images were kept)")
+        return
+
+    if not argv:
+        print(
+            "Usage: python drawio_to_png.py <url_or_xml_file> [output.png] [--metrics-file PATH]"
+        )
+        print(
+            "       python drawio_to_png.py --batch <cache_dir> <file.md|file.ipynb>..."
+        )
         sys.exit(1)
-
-    source = sys.argv[1]
-    out_path = Path(sys.argv[2]) if len(sys.argv) > 2 else Path("output.png")
+    source = argv[0]
+    out_path = Path(argv[1]) if len(argv) > 1 else Path("output.png")
 
     # Check if it's a file
     if Path(source).exists():
@@ -154,5 +450,29 @@ if __name__ == "__main__":
         png = render_drawio_to_png(xml, is_xml=True, output_path=out_path)
     else:
         png = render_drawio_to_png(source, is_xml=False, output_path=out_path)
+    build_metrics.BYTES_WRITTEN.inc(len(png), tool="drawio_to_png", kind="png")
 
     print(f"Saved {len(png)} bytes to {out_path}")
+
+
+if __name__ == "__main__":
+    import time
+
+    args = sys.argv[1:]
+    metrics_file = None
+    if "--metrics-file" in args:
+        index = args.index("--metrics-file")
+        metrics_file = Path(args[index + 1])
+        del args[index : index + 2]
+
+    started = time.perf_counter()
+    success = False
+    try:
+        _cli(args)
+        success = True
+    finally:
+        if metrics_file:
+            build_metrics.record_run(
+                "drawio_to_png", time.perf_counter() - started, success
+            )
+            build_metrics.write_textfile(metrics_file)
@@ -6,29 +6,69 @@ Converts the subset of mxGraphModel XML used in the lesson flowcharts
 to standalone SVG images.  Zero external dependencies – stdlib only.
 
 Supported shapes: terminal (rounded rect), rectangle, diamond (rhombus),
-parallelogram, ellipse, rounded_rect, and text labels.
-Supported edges: straight polylines with arrowheads, waypoints, and labels.
+parallelogram, ellipse, double ellipse, rounded_rect, hexagon, triangle,
+cylinder, process, text labels and invisible groups.
+Supported edges: straight, orthogonal/elbow and curved routes, dashed
+lines, arrowheads at either end (classic, block, open, oval, diamond,
+filled or hollow), perimeter-clipped endpoints, waypoints and positioned
+labels.
+Supported text: fontSize, fontColor, fontStyle (bold/italic/underline),
+fontFamily, align/verticalAlign, spacing, label backgrounds and simple
+HTML labels (line breaks and whole-label bold/italic).
+Cells inside groups (parent-relative geometry) are placed absolutely.
+
+Text is measured with the Helvetica advance widths (the metrics Arial
+shares), so node labels wrap inside their shapes and edge-label
+backgrounds fit their text the way the browser viewer lays them out.
+
+Anything else is drawn with the nearest supported equivalent and listed
+by :func:`unsupported_styles` (or ``--coverage`` on the command line), so
+it is clear which diagrams still need the browser render.
 
 Usage
 -----
     from drawio_to_svg import mxgraph_xml_to_svg
 
     svg_string = mxgraph_xml_to_svg(xml_string)
+
+Command line
+------------
+    python3 utils/drawio_to_svg.py diagram.xml [diagram.svg]
+
+    # Which styles in the lesson diagrams the converter cannot draw yet
+    python3 utils/drawio_to_svg.py --coverage lessons/*.ipynb
 """
 
 from __future__ import annotations
 
+import argparse
 import html
 import math
 import re
+import sys
+import unicodedata
 import xml.etree.ElementTree as ET
-from typing import Dict, List, Optional, Tuple
-
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
 
 # ---------------------------------------------------------------------------
 # Style parser
 # ---------------------------------------------------------------------------
 
+# Defaults that draw.io's stylesheet attaches to bare style names. Explicit
+# keys in a cell's style always win.
+_NAMED_STYLES: Dict[str, Dict[str, str]] = {
+    "text": {
+        "fillColor": "none",
+        "strokeColor": "none",
+        "align": "left",
+        "verticalAlign": "top",
+    },
+    "edgeLabel": {"labelBackgroundColor": "#ffffff"},
+    "group": {"fillColor": "none", "strokeColor": "none"},
+}
+
 
 def _parse_style(style_str: str) -> Dict[str, str]:
     """Parse an mxGraph style string like 'rounded=1;fillColor=#fff;shape=rhombus'."""
@@ -42,6 +82,8 @@ def _parse_style(style_str: str) -> Dict[str, str]:
             result[key.strip()] = val.strip()
         elif part:
             # Bare token like "rhombus" → treat as shape
+            for key, val in _NAMED_STYLES.get(part, {}).items():
+                result.setdefault(key, val)
             result[part] = "1"
     return result
 
@@ -50,6 +92,21 @@ def _parse_style(style_str: str) -> Dict[str, str]:
 # Shape classification
 # ---------------------------------------------------------------------------
 
+# mxGraph shape names (style "shape=..." or a bare token) → canonical shape
+_SHAPE_ALIASES = {
+    "rectangle": "rectangle",
+    "label": "rectangle",
+    "rhombus": "diamond",
+    "ellipse": "ellipse",
+    "doubleEllipse": "double_ellipse",
+    "parallelogram": "parallelogram",
+    "hexagon": "hexagon",
+    "triangle": "triangle",
+    "cylinder": "cylinder",
+    "cylinder3": "cylinder",
+    "process": "process",
+}
+
 
 def _classify_shape(style: Dict[str, str]) -> str:
     """Return a canonical shape name from the mxGraph style dict."""
@@ -58,12 +115,17 @@ def _classify_shape(style: Dict[str, str]) -> str:
         "perimeter", ""
     ):
         return "parallelogram"
-    if "rhombus" in style or shape == "rhombus":
-        return "diamond"
-    if "ellipse" in style or shape == "ellipse":
-        return "ellipse"
+    if "group" in style:
+        return "group"
+    if shape in _SHAPE_ALIASES:
+        canonical = _SHAPE_ALIASES[shape]
+        if canonical != "rectangle":
+            return canonical
+    for token, canonical in _SHAPE_ALIASES.items():
+        if token in style and canonical != "rectangle":
+            return canonical
     rounded = style.get("rounded", "0")
-    arc = int(style.get("arcSize", "0") or "0")
+    arc = int(float(style.get("arcSize", "0") or "0"))
     if rounded == "1" and arc >= 40:
         return "terminal"  # Start/End pill shape
     if rounded == "1":
@@ -71,17 +133,354 @@ def _classify_shape(style: Dict[str, str]) -> str:
     return "rectangle"
 
 
+# ---------------------------------------------------------------------------
+# Style coverage
+# ---------------------------------------------------------------------------
+
+# Style keys the converter draws (or that cannot change the picture)
+SUPPORTED_STYLE_KEYS = {
+    # Shapes
+    "shape",
+    "rounded",
+    "arcSize",
+    "perimeter",
+    "fixedSize",
+    "whiteSpace",
+    "html",
+    "group",
+    "text",
+    "edgeLabel",
+    "ellipse",
+    "rhombus",
+    "triangle",
+    "hexagon",
+    "doubleEllipse",
+    "cylinder",
+    "cylinder3",
+    "process",
+    "label",
+    "container",
+    "collapsible",
+    "connectable",
+    "points",
+    "aspect",
+    "resizable",
+    "rotatable",
+    "deletable",
+    "editable",
+    "movable",
+    "cloneable",
+    "metaEdit",
+    # Colours and lines
+    "fillColor",
+    "strokeColor",
+    "strokeWidth",
+    "dashed",
+    "dashPattern",
+    "opacity",
+    "fillOpacity",
+    "strokeOpacity",
+    "gradientColor",
+    # Text
+    "fontColor",
+    "fontSize",
+    "fontStyle",
+    "fontFamily",
+    "align",
+    "verticalAlign",
+    "spacing",
+    "spacingLeft",
+    "spacingRight",
+    "spacingTop",
+    "spacingBottom",
+    "labelBackgroundColor",
+    "noLabel",
+    # Edges
+    "endArrow",
+    "startArrow",
+    "endFill",
+    "startFill",
+    "edgeStyle",
+    "curved",
+    "orthogonalLoop",
+    "jettySize",
+    "exitX",
+    "exitY",
+    "exitDx",
+    "exitDy",
+    "entryX",
+    "entryY",
+    "entryDx",
+    "entryDy",
+    "exitPerimeter",
+    "entryPerimeter",
+}
+
+# Values the converter handles for keys where only some values are drawn
+SUPPORTED_STYLE_VALUES = {
+    "shape": set(_SHAPE_ALIASES) | {"text"},
+    "perimeter": {
+        "rectanglePerimeter",
+        "ellipsePerimeter",
+        "rhombusPerimeter",
+        "parallelogramPerimeter",
+        "hexagonPerimeter2",
+        "trianglePerimeter",
+    },
+    "edgeStyle": {"none", "orthogonalEdgeStyle", "elbowEdgeStyle"},
+    "endArrow": {
+        "none",
+        "classic",
+        "classicThin",
+        "block",
+        "blockThin",
+        "open",
+        "openThin",
+        "oval",
+        "diamond",
+        "diamondThin",
+    },
+    "gradientColor": {"none", ""},
+}
+SUPPORTED_STYLE_VALUES["startArrow"] = SUPPORTED_STYLE_VALUES["endArrow"]
+
+# Tags a label may use; others are stripped and reported
+_SUPPORTED_HTML_TAGS = {"br", "div", "p", "b", "strong", "i", "em", "u", "span", "font"}
+_TAG_PATTERN = re.compile(r"</?([A-Za-z][A-Za-z0-9]*)\b[^<>]*>")
+
+
+def _unsupported_in_cell(cell: ET.Element) -> Set[str]:
+    """Style keys (or key=value pairs and HTML tags) this cell uses but we
+    don't draw."""
+    found: Set[str] = set()
+    style = _parse_style(cell.get("style", ""))
+    for key, value in style.items():
+        if key not in SUPPORTED_STYLE_KEYS and key not in _NAMED_STYLES:
+            found.add(key)
+        elif key in SUPPORTED_STYLE_VALUES and value not in SUPPORTED_STYLE_VALUES[key]:
+            found.add(f"{key}={value}")
+    value = cell.get("value", "")
+    if style.get("html") == "1" and "<" in value:
+        for tag in _TAG_PATTERN.findall(value):
+            if tag.lower() not in _SUPPORTED_HTML_TAGS:
+                found.add(f"html:<{tag.lower()}>")
+        if _label_format(value)[1]:
+            found.add("html:inline-formatting")
+    return found
+
+
+def unsupported_styles(xml_str: str) -> Dict[str, List[str]]:
+    """Map each unsupported style feature in a diagram to the cell ids using it.
+
+    An empty result means the pure-Python SVG matches the browser render as
+    far as this converter can tell.
+    """
+    root = ET.fromstring(xml_str.strip())
+    report: Dict[str, List[str]] = {}
+    for cell in root.iter("mxCell"):
+        for feature in sorted(_unsupported_in_cell(cell)):
+            report.setdefault(feature, []).append(cell.get("id", "?"))
+    return report
+
+
+# ---------------------------------------------------------------------------
+# Font metrics
+# ---------------------------------------------------------------------------
+
+# Advance widths (1/1000 em) of printable ASCII, from the Adobe Helvetica and
+# Helvetica-Bold AFM files. Arial was designed to the same widths, so these
+# also match the "Arial, Helvetica, sans-serif" stack the SVG asks for.
+# fmt: off
+_HELVETICA_WIDTHS = (
+    # 32-47  ' '..'/'
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    # 48-63  '0'..'?'
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    # 64-79  '@'..'O'
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    # 80-95  'P'..'_'
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    # 96-111  '`'..'o'
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    # 112-126  'p'..'~'
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+)
+_HELVETICA_BOLD_WIDTHS = (
+    # 32-47  ' '..'/'
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    # 48-63  '0'..'?'
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    # 64-79  '@'..'O'
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    # 80-95  'P'..'_'
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    # 96-111  '`'..'o'
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    # 112-126  'p'..'~'
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+)
+# fmt: on
+
+_LINE_HEIGHT = 1.2  # draw.io's default line height, in ems
+_LABEL_SPACING = 4  # px kept clear between a wrapped label and its shape edge
+_MIN_FONT_SIZE = 8
+_DEFAULT_FONT_FAMILY = "Arial, Helvetica, sans-serif"
+
+
+@lru_cache(maxsize=None)
+def _char_width(char: str, bold: bool) -> int:
+    """Advance width of one character in 1/1000 em."""
+    code = ord(char)
+    if 32 <= code <= 126:
+        table = _HELVETICA_BOLD_WIDTHS if bold else _HELVETICA_WIDTHS
+        return table[code - 32]
+    if unicodedata.east_asian_width(char) in ("W", "F"):
+        return 1000  # emoji and CJK are drawn a full em wide
+    if unicodedata.combining(char):
+        return 0
+    # Accented Latin letters take the width of their base letter
+    base = unicodedata.normalize("NFKD", char)[:1]
+    if base and base != char and 32 <= ord(base) <= 126:
+        return _char_width(base, bold)
+    return 556  # the most common Helvetica width
+
+
+@lru_cache(maxsize=4096)
+def text_width(text: str, font_size: float, bold: bool = False) -> float:
+    """Width in px of one line of text set in Helvetica/Arial."""
+    return sum(_char_width(char, bold) for char in text) * font_size / 1000
+
+
+def wrap_text(
+    text: str, max_width: float, font_size: float, bold: bool = False
+) -> List[str]:
+    """Break text into lines no wider than ``max_width`` at word boundaries.
+
+    Explicit newlines are kept; a single word wider than the line is split
+    between characters, as the browser does with ``word-wrap: break-word``.
+    """
+    lines: List[str] = []
+    for paragraph in text.split("\n"):
+        line = ""
+        for word in paragraph.split():
+            candidate = f"{line} {word}" if line else word
+            if text_width(candidate, font_size, bold) <= max_width:
+                line = candidate
+                continue
+            if line:
+                lines.append(line)
+            line = word
+            while len(line) > 1 and text_width(line, font_size, bold) > max_width:
+                cut = len(line) - 1
+                while cut > 1 and text_width(line[:cut], font_size, bold) > max_width:
+                    cut -= 1
+                lines.append(line[:cut])
+                line = line[cut:]
+        lines.append(line)
+    return lines
+
+
+def _label_text(value: str) -> str:
+    """Plain text of a draw.io label, with ``<br>`` and block tags as newlines.
+
+    Only real tags are removed, so comparisons such as ``age < 0 OR age > 120``
+    survive intact.
+    """
+    text = re.sub(r"<br\s*/?>|</(?:div|p)>", "\n", value, flags=re.IGNORECASE)
+    text = html.unescape(_TAG_PATTERN.sub("", text))
+    return "\n".join(line.strip() for line in text.strip().split("\n"))
+
+
+def _label_format(value: str) -> Tuple[Dict[str, str], bool]:
+    """Formatting an HTML label applies to all of its text.
+
+    Returns (style overrides, has_inline_formatting). Bold, italic,
+    underline and font colour are honoured when they wrap the whole label;
+    formatting of only part of it is reported as inline formatting.
+    """
+    overrides: Dict[str, str] = {}
+    inline = False
+    flags = 0
+    for tag, bit in (("b|strong", 1), ("i|em", 2), ("u", 4)):
+        spans = re.findall(rf"<(?:{tag})\b[^>]*>(.*?)</(?:{tag})>", value, re.I | re.S)
+        if not spans:
+            continue
+        if _label_text("".join(spans)) == _label_text(value):
+            flags |= bit
+        else:
+            inline = True
+    if flags:
+        overrides["fontStyle"] = str(flags)
+    colours = re.findall(
+        r'<font\b[^>]*color="([^"]+)"[^>]*>(.*?)</font>', value, re.I | re.S
+    )
+    if colours:
+        if len(colours) == 1 and _label_text(colours[0][1]) == _label_text(value):
+            overrides["fontColor"] = colours[0][0]
+        else:
+            inline = True
+    return overrides, inline
+
+
+def _label_box(shape: str, w: float, h: float) -> Tuple[float, float]:
+    """Width and height available to a label inside a shape."""
+    if shape == "diamond":
+        # Text sits in the middle of the rhombus, clear of its slanted sides
+        return w * 0.6, h * 0.6
+    if shape in ("ellipse", "double_ellipse"):
+        return w * 0.7, h * 0.7  # the inscribed rectangle (1/sqrt 2 each way)
+    if shape == "parallelogram":
+        return w - 2 * min(h * 0.4, w * 0.15), h
+    if shape == "hexagon":
+        return w * 0.75, h
+    if shape == "triangle":
+        return w * 0.5, h * 0.5
+    if shape == "process":
+        return w * 0.8, h
+    return w, h
+
+
+def _fit_label(
+    label: str, shape: str, w: float, h: float, font_size: float, bold: bool = False
+) -> Tuple[List[str], float]:
+    """Wrap a node label to its shape, shrinking the font only if it still overflows."""
+    box_w, box_h = _label_box(shape, w, h)
+    box_w = max(box_w - 2 * _LABEL_SPACING, 1)
+    box_h = max(box_h - 2 * _LABEL_SPACING, 1)
+    size = font_size
+    while True:
+        lines = wrap_text(label, box_w, size, bold)
+        fits = len(lines) * size * _LINE_HEIGHT <= box_h and all(
+            text_width(line, size, bold) <= box_w for line in lines
+        )
+        if fits or size <= _MIN_FONT_SIZE:
+            return lines, size
+        size = max(_MIN_FONT_SIZE, size - 0.5)
+
+
 # ---------------------------------------------------------------------------
 # SVG primitives
 # ---------------------------------------------------------------------------
 
 _SVG_NS = 'xmlns="http://www.w3.org/2000/svg"'
-_ARROW_MARKER = (
-    '<marker id="arrowhead" markerWidth="10" markerHeight="7" '
-    'refX="10" refY="3.5" orient="auto" markerUnits="strokeWidth">'
-    '<polygon points="0 0, 10 3.5, 0 7" fill="#000"/>'
-    "</marker>"
-)
+
+
+def _stroke_attrs(style: Dict[str, str], default_width: str = "2") -> str:
+    """stroke, stroke-width, dash pattern and opacity attributes from a style."""
+    stroke = style.get("strokeColor", "#000000")
+    sw = float(style.get("strokeWidth", default_width))
+    attrs = f'stroke="{stroke}" stroke-width="{sw}"'
+    if style.get("dashed") == "1":
+        pattern = style.get("dashPattern", "3 3")
+        dashes = " ".join(str(float(part) * sw) for part in pattern.split())
+        attrs += f' stroke-dasharray="{dashes}"'
+    if "opacity" in style:
+        attrs += f' opacity="{float(style["opacity"]) / 100}"'
+    if "strokeOpacity" in style:
+        attrs += f' stroke-opacity="{float(style["strokeOpacity"]) / 100}"'
+    if "fillOpacity" in style:
+        attrs += f' fill-opacity="{float(style["fillOpacity"]) / 100}"'
+    return attrs
 
 
 def _rect_svg(
@@ -94,14 +493,23 @@ def _rect_svg(
     fill: str = "#ffffff",
     stroke: str = "#000000",
     stroke_width: float = 2,
+    extra: str = "",
 ) -> str:
+    stroke_attrs = extra or f'stroke="{stroke}" stroke-width="{stroke_width}"'
     return (
         f'<rect x="{x}" y="{y}" width="{w}" height="{h}" '
         f'rx="{rx}" ry="{ry}" '
-        f'fill="{fill}" stroke="{stroke}" stroke-width="{stroke_width}"/>'
+        f'fill="{fill}" {stroke_attrs}/>'
     )
 
 
+def _polygon_svg(
+    points: List[Tuple[float, float]], fill: str, stroke_attrs: str
+) -> str:
+    pts = " ".join(f"{px:g},{py:g}" for px, py in points)
+    return f'<polygon points="{pts}" fill="{fill}" {stroke_attrs}/>'
+
+
 def _diamond_svg(
     cx: float,
     cy: float,
@@ -110,13 +518,13 @@ def _diamond_svg(
     fill: str = "#ffffff",
     stroke: str = "#000000",
     stroke_width: float = 2,
+    extra: str = "",
 ) -> str:
     """Render a diamond (rhombus) centred at (cx, cy)."""
     hw, hh = w / 2, h / 2
-    pts = f"{cx},{cy - hh} {cx + hw},{cy} {cx},{cy + hh} {cx - hw},{cy}"
-    return (
-        f'<polygon points="{pts}" '
-        f'fill="{fill}" stroke="{stroke}" stroke-width="{stroke_width}"/>'
+    stroke_attrs = extra or f'stroke="{stroke}" stroke-width="{stroke_width}"'
+    return _polygon_svg(
+        [(cx, cy - hh), (cx + hw, cy), (cx, cy + hh), (cx - hw, cy)], fill, stroke_attrs
     )
 
 
@@ -128,13 +536,15 @@ def _parallelogram_svg(
     fill: str = "#ffffff",
     stroke: str = "#000000",
     stroke_width: float = 2,
+    extra: str = "",
 ) -> str:
     """Render a parallelogram with a fixed skew offset."""
     skew = min(h * 0.4, w * 0.15)
-    pts = f"{x + skew},{y} {x + w},{y} " f"{x + w - skew},{y + h} {x},{y + h}"
-    return (
-        f'<polygon points="{pts}" '
-        f'fill="{fill}" stroke="{stroke}" stroke-width="{stroke_width}"/>'
+    stroke_attrs = extra or f'stroke="{stroke}" stroke-width="{stroke_width}"'
+    return _polygon_svg(
+        [(x + skew, y), (x + w, y), (x + w - skew, y + h), (x, y + h)],
+        fill,
+        stroke_attrs,
     )
 
 
@@ -146,10 +556,12 @@ def _ellipse_svg(
     fill: str = "#ffffff",
     stroke: str = "#000000",
     stroke_width: float = 2,
+    extra: str = "",
 ) -> str:
+    stroke_attrs = extra or f'stroke="{stroke}" stroke-width="{stroke_width}"'
     return (
         f'<ellipse cx="{cx}" cy="{cy}" rx="{rx}" ry="{ry}" '
-        f'fill="{fill}" stroke="{stroke}" stroke-width="{stroke_width}"/>'
+        f'fill="{fill}" {stroke_attrs}/>'
     )
 
 
@@ -161,33 +573,39 @@ def _text_svg(
     anchor: str = "middle",
     dominant_baseline: str = "central",
     font_weight: str = "normal",
+    fill: str = "#000",
+    font_family: str = _DEFAULT_FONT_FAMILY,
+    font_style: str = "normal",
+    decoration: str = "",
 ) -> str:
-    """Render one or more lines of text centred at (x, y)."""
-    # Strip HTML tags that draw.io sometimes includes
-    clean = re.sub(r"<[^>]+>", "", text)
-    clean = html.unescape(clean).strip()
+    """Render one or more lines of plain text centred vertically at y."""
+    clean = text.strip()
     if not clean:
         return ""
 
+    font_attrs = (
+        f'font-family="{_escape_xml(font_family)}" font-size="{font_size}" '
+        f'font-weight="{font_weight}" fill="{fill}"'
+    )
+    if font_style != "normal":
+        font_attrs += f' font-style="{font_style}"'
+    if decoration:
+        font_attrs += f' text-decoration="{decoration}"'
+
     lines = clean.split("\n")
     if len(lines) == 1:
         escaped = _escape_xml(lines[0])
         return (
             f'<text x="{x}" y="{y}" text-anchor="{anchor}" '
             f'dominant-baseline="{dominant_baseline}" '
-            f'font-family="Arial, Helvetica, sans-serif" font-size="{font_size}" '
-            f'font-weight="{font_weight}" fill="#000">{escaped}</text>'
+            f"{font_attrs}>{escaped}</text>"
         )
 
     # Multi-line: use tspans
-    parts = [
-        f'<text x="{x}" text-anchor="{anchor}" '
-        f'font-family="Arial, Helvetica, sans-serif" font-size="{font_size}" '
-        f'font-weight="{font_weight}" fill="#000">'
-    ]
-    start_y = y - (len(lines) - 1) * font_size * 0.6
+    parts = [f'<text x="{x}" text-anchor="{anchor}" {font_attrs}>']
+    start_y = y - (len(lines) - 1) * font_size * _LINE_HEIGHT / 2
     for i, line in enumerate(lines):
-        ly = start_y + i * font_size * 1.2
+        ly = start_y + i * font_size * _LINE_HEIGHT
         escaped = _escape_xml(line)
         parts.append(
             f'<tspan x="{x}" y="{ly}" dominant-baseline="{dominant_baseline}">'
@@ -207,6 +625,88 @@ def _escape_xml(s: str) -> str:
     )
 
 
+def _font_attrs(style: Dict[str, str], default_size: float = 12) -> dict:
+    """Keyword arguments for :func:`_text_svg` from fontSize/fontStyle/... keys."""
+    flags = int(float(style.get("fontStyle", "0") or "0"))
+    family = style.get("fontFamily")
+    return {
+        "font_size": float(style.get("fontSize", default_size)),
+        "font_weight": "bold" if flags & 1 else "normal",
+        "font_style": "italic" if flags & 2 else "normal",
+        "decoration": "underline" if flags & 4 else "",
+        "fill": style.get("fontColor", "#000"),
+        "font_family": (
+            f"{family}, {_DEFAULT_FONT_FAMILY}" if family else _DEFAULT_FONT_FAMILY
+        ),
+    }
+
+
+def _label_svg(
+    x: float,
+    y: float,
+    w: float,
+    h: float,
+    label: str,
+    shape: str,
+    style: Dict[str, str],
+) -> str:
+    """Lay out a vertex label inside its bounds, honouring align and spacing."""
+    if not label or style.get("noLabel") == "1":
+        return ""
+    if style.get("html") == "1":
+        overrides, _ = _label_format(label)
+        style = {**style, **overrides}
+    text = _label_text(label)
+    if not text:
+        return ""
+
+    font = _font_attrs(style)
+    bold = font["font_weight"] == "bold"
+    spacing = float(style.get("spacing", "2"))
+    left = spacing + float(style.get("spacingLeft", "0"))
+    right = spacing + float(style.get("spacingRight", "0"))
+    top = spacing + float(style.get("spacingTop", "0"))
+    bottom = spacing + float(style.get("spacingBottom", "0"))
+    lines, font["font_size"] = _fit_label(
+        text,
+        shape,
+        w - left - right + 2 * spacing,
+        h - top - bottom + 2 * spacing,
+        font["font_size"],
+        bold,
+    )
+    size = font["font_size"]
+    block_h = len(lines) * size * _LINE_HEIGHT
+
+    align = style.get("align", "center")
+    if align == "left":
+        tx, anchor = x + left, "start"
+    elif align == "right":
+        tx, anchor = x + w - right, "end"
+    else:
+        tx, anchor = x + w / 2, "middle"
+
+    valign = style.get("verticalAlign", "middle")
+    if valign == "top":
+        ty = y + top + block_h / 2
+    elif valign == "bottom":
+        ty = y + h - bottom - block_h / 2
+    else:
+        ty = y + h / 2
+
+    parts = []
+    background = style.get("labelBackgroundColor", "none")
+    if background not in ("none", "default"):
+        tw = max(text_width(line, size, bold) for line in lines) + 4
+        bx = {"start": tx, "end": tx - tw}.get(anchor, tx - tw / 2)
+        parts.append(
+            f'<rect x="{bx:.1f}" y="{ty - block_h / 2 - 1:.1f}" width="{tw:.1f}" '
+            f'height="{block_h + 2:.1f}" fill="{background}" stroke="none"/>'
+        )
+    parts.append(_text_svg(tx, ty, "\n".join(lines), anchor=anchor, **font))
+    return "\n".join(parts)
+
+
 # ---------------------------------------------------------------------------
 # Node rendering
 # ---------------------------------------------------------------------------
@@ -223,55 +723,93 @@ def _render_node(
 ) -> str:
     """Return SVG elements for a single flowchart node."""
     fill = style.get("fillColor", "#ffffff")
-    stroke = style.get("strokeColor", "#000000")
-    sw = float(style.get("strokeWidth", "2"))
+    if fill == "default":
+        fill = "#ffffff"
+    stroke_attrs = _stroke_attrs(style)
 
     parts: List[str] = []
 
-    if shape == "terminal":
+    if shape == "group":
+        pass  # containers are invisible; only their children are drawn
+    elif shape == "terminal":
         # Pill-shaped rounded rect
         rx = h / 2
+        parts.append(_rect_svg(x, y, w, h, rx=rx, ry=rx, fill=fill, extra=stroke_attrs))
+    elif shape == "diamond":
+        parts.append(
+            _diamond_svg(x + w / 2, y + h / 2, w, h, fill=fill, extra=stroke_attrs)
+        )
+    elif shape == "parallelogram":
+        parts.append(_parallelogram_svg(x, y, w, h, fill=fill, extra=stroke_attrs))
+    elif shape in ("ellipse", "double_ellipse"):
         parts.append(
-            _rect_svg(
-                x, y, w, h, rx=rx, ry=rx, fill=fill, stroke=stroke, stroke_width=sw
+            _ellipse_svg(
+                x + w / 2, y + h / 2, w / 2, h / 2, fill=fill, extra=stroke_attrs
             )
         )
-    elif shape == "diamond":
+        if shape == "double_ellipse":
+            inset = min(w, h) * 0.1
+            parts.append(
+                _ellipse_svg(
+                    x + w / 2,
+                    y + h / 2,
+                    w / 2 - inset,
+                    h / 2 - inset,
+                    fill="none",
+                    extra=stroke_attrs,
+                )
+            )
+    elif shape == "hexagon":
+        dx = min(w * 0.25, h * 0.5)
         parts.append(
-            _diamond_svg(
-                x + w / 2, y + h / 2, w, h, fill=fill, stroke=stroke, stroke_width=sw
+            _polygon_svg(
+                [
+                    (x + dx, y),
+                    (x + w - dx, y),
+                    (x + w, y + h / 2),
+                    (x + w - dx, y + h),
+                    (x + dx, y + h),
+                    (x, y + h / 2),
+                ],
+                fill,
+                stroke_attrs,
             )
         )
-    elif shape == "parallelogram":
+    elif shape == "triangle":
+        # draw.io's default triangle points east
         parts.append(
-            _parallelogram_svg(x, y, w, h, fill=fill, stroke=stroke, stroke_width=sw)
+            _polygon_svg([(x, y), (x + w, y + h / 2), (x, y + h)], fill, stroke_attrs)
         )
-    elif shape == "ellipse":
+    elif shape == "cylinder":
+        ry = min(h * 0.15, 15)
         parts.append(
-            _ellipse_svg(
-                x + w / 2,
-                y + h / 2,
-                w / 2,
-                h / 2,
-                fill=fill,
-                stroke=stroke,
-                stroke_width=sw,
-            )
+            f'<path d="M {x} {y + ry} A {w / 2} {ry} 0 0 1 {x + w} {y + ry} '
+            f'L {x + w} {y + h - ry} A {w / 2} {ry} 0 0 1 {x} {y + h - ry} Z" '
+            f'fill="{fill}" {stroke_attrs}/>'
         )
-    elif shape == "rounded_rect":
         parts.append(
-            _rect_svg(x, y, w, h, rx=6, ry=6, fill=fill, stroke=stroke, stroke_width=sw)
+            f'<path d="M {x} {y + ry} A {w / 2} {ry} 0 0 0 {x + w} {y + ry}" '
+            f'fill="none" {stroke_attrs}/>'
+        )
+    elif shape == "process":
+        inset = w * 0.1
+        parts.append(_rect_svg(x, y, w, h, fill=fill, extra=stroke_attrs))
+        parts.append(
+            f'<path d="M {x + inset} {y} L {x + inset} {y + h} '
+            f'M {x + w - inset} {y} L {x + w - inset} {y + h}" '
+            f'fill="none" {stroke_attrs}/>'
         )
+    elif shape == "rounded_rect":
+        arc = float(style.get("arcSize", "0") or "0")
+        r = min(w, h) * arc / 100 if arc else 6
+        parts.append(_rect_svg(x, y, w, h, rx=r, ry=r, fill=fill, extra=stroke_attrs))
     else:  # rectangle / default
-        parts.append(_rect_svg(x, y, w, h, fill=fill, stroke=stroke, stroke_width=sw))
+        parts.append(_rect_svg(x, y, w, h, fill=fill, extra=stroke_attrs))
 
-    # Label inside the shape
-    if label:
-        font_size = min(12, h * 0.35, w * 0.12)
-        font_size = max(9, font_size)
-        parts.append(_text_svg(x + w / 2, y + h / 2, label, font_size=font_size))
+    # Label inside the shape, wrapped to fit it
+    parts.append(_label_svg(x, y, w, h, label, shape, style))
 
-    return "\n".join(parts)
+    return "\n".join(part for part in parts if part)
 
 
 # ---------------------------------------------------------------------------
@@ -289,77 +827,263 @@ def _connection_point(node: dict, px: float, py: float) -> Tuple[float, float]:
     return x, y
 
 
-def _render_edge(edge: dict, nodes: Dict[str, dict]) -> str:
-    """Return SVG elements for an edge (polyline + optional label)."""
-    style = edge["style"]
-    source_id = edge.get("source")
-    target_id = edge.get("target")
+def _centre(node: dict) -> Tuple[float, float]:
+    return node["x"] + node["w"] / 2, node["y"] + node["h"] / 2
 
-    # Connection point fractions
-    ex_x = float(style.get("exitX", "0.5"))
-    ex_y = float(style.get("exitY", "1"))
-    en_x = float(style.get("entryX", "0.5"))
-    en_y = float(style.get("entryY", "0"))
 
-    points: List[Tuple[float, float]] = []
+def _perimeter_point(node: dict, toward: Tuple[float, float]) -> Tuple[float, float]:
+    """Where the line from a node's centre toward ``toward`` leaves its outline."""
+    cx, cy = _centre(node)
+    dx, dy = toward[0] - cx, toward[1] - cy
+    if dx == 0 and dy == 0:
+        return cx, cy
+    hw, hh = node["w"] / 2, node["h"] / 2
+    shape = node["shape"]
+    if shape in ("ellipse", "double_ellipse"):
+        t = 1 / math.sqrt((dx / hw) ** 2 + (dy / hh) ** 2) if hw and hh else 0
+    elif shape == "diamond":
+        t = 1 / (abs(dx) / hw + abs(dy) / hh) if hw and hh else 0
+    else:
+        tx = hw / abs(dx) if dx else math.inf
+        ty = hh / abs(dy) if dy else math.inf
+        t = min(tx, ty)
+    return cx + dx * t, cy + dy * t
+
+
+def _endpoint(
+    node: dict, style: Dict[str, str], prefix: str, toward: Tuple[float, float]
+) -> Tuple[float, float]:
+    """Fixed exit/entry point when the style gives one, else the perimeter point."""
+    if f"{prefix}X" in style and f"{prefix}Y" in style:
+        px, py = _connection_point(
+            node, float(style[f"{prefix}X"]), float(style[f"{prefix}Y"])
+        )
+        return px + float(style.get(f"{prefix}Dx", "0")), py + float(
+            style.get(f"{prefix}Dy", "0")
+        )
+    return _perimeter_point(node, toward)
+
+
+def _orthogonal(
+    points: List[Tuple[float, float]], vertical_first: bool
+) -> List[Tuple[float, float]]:
+    """Insert elbows so every segment is horizontal or vertical."""
+    routed = [points[0]]
+    for (x1, y1), (x2, y2) in zip(points, points[1:]):
+        if x1 != x2 and y1 != y2:
+            if vertical_first:
+                midy = (y1 + y2) / 2
+                routed.extend([(x1, midy), (x2, midy)])
+            else:
+                midx = (x1 + x2) / 2
+                routed.extend([(midx, y1), (midx, y2)])
+        routed.append((x2, y2))
+    return routed
+
+
+def _path_data(points: List[Tuple[float, float]], curved: bool) -> str:
+    """SVG path data through the points, smoothed through waypoints if curved."""
+    d = f"M {points[0][0]:g} {points[0][1]:g}"
+    if curved and len(points) > 2:
+        for (x1, y1), (x2, y2) in zip(points[1:-1], points[2:]):
+            d += f" Q {x1:g} {y1:g} {(x1 + x2) / 2:g} {(y1 + y2) / 2:g}"
+        d += f" L {points[-1][0]:g} {points[-1][1]:g}"
+        return d
+    for px, py in points[1:]:
+        d += f" L {px:g} {py:g}"
+    return d
+
+
+# Arrowhead outlines in a 10x7 marker box pointing right (+x)
+_ARROW_SHAPES = {
+    "classic": "M 0 0 L 10 3.5 L 0 7 L 3 3.5 Z",
+    "classicThin": "M 0 1 L 10 3.5 L 0 6 L 3 3.5 Z",
+    "block": "M 0 0 L 10 3.5 L 0 7 Z",
+    "blockThin": "M 0 1 L 10 3.5 L 0 6 Z",
+    "open": "M 0 0 L 10 3.5 L 0 7",
+    "openThin": "M 0 1 L 10 3.5 L 0 6",
+    "diamond": "M 0 3.5 L 5 0 L 10 3.5 L 5 7 Z",
+    "diamondThin": "M 0 3.5 L 5 1.5 L 10 3.5 L 5 5.5 Z",
+}
+
+
+def _marker_id(
+    kind: str, colour: str, filled: bool, markers: Dict[Tuple[str, str, bool], str]
+) -> Optional[str]:
+    """Id of a marker definition for this arrow kind, registering it if new."""
+    if kind == "none":
+        return None
+    if kind not in _ARROW_SHAPES and kind != "oval":
+        kind = "classic"
+    key = (kind, colour, filled)
+    if key not in markers:
+        markers[key] = f"arrow{len(markers)}"
+    return markers[key]
+
+
+def _marker_defs(markers: Dict[Tuple[str, str, bool], str]) -> List[str]:
+    defs = []
+    for (kind, colour, filled), marker_id in markers.items():
+        fill = colour if filled and not kind.startswith("open") else "#ffffff"
+        if kind.startswith("open"):
+            fill = "none"
+        if kind == "oval":
+            body = f'<circle cx="5" cy="3.5" r="3" fill="{fill}" stroke="{colour}"/>'
+        else:
+            body = (
+                f'<path d="{_ARROW_SHAPES[kind]}" fill="{fill}" stroke="{colour}" '
+                f'stroke-width="1" stroke-linejoin="miter"/>'
+            )
+        defs.append(
+            f'<marker id="{marker_id}" markerWidth="10" markerHeight="7" '
+            f'refX="10" refY="3.5" orient="auto-start-reverse" '
+            f'markerUnits="strokeWidth">'
+            f"{body}</marker>"
+        )
+    return defs
 
-    # Start point
-    if source_id and source_id in nodes:
-        points.append(_connection_point(nodes[source_id], ex_x, ex_y))
-    elif edge.get("source_point"):
-        points.append(edge["source_point"])
 
-    # Waypoints
-    for wp in edge.get("waypoints", []):
-        points.append(wp)
+def _point_along(
+    points: List[Tuple[float, float]], fraction: float
+) -> Tuple[float, float, float, float]:
+    """Point at ``fraction`` (0–1) of a polyline's length, plus the unit direction."""
+    lengths = [
+        math.hypot(x2 - x1, y2 - y1) for (x1, y1), (x2, y2) in zip(points, points[1:])
+    ]
+    remaining = max(0.0, min(1.0, fraction)) * sum(lengths)
+    for ((x1, y1), (x2, y2)), length in zip(zip(points, points[1:]), lengths):
+        if remaining <= length and length:
+            t = remaining / length
+            return (
+                x1 + (x2 - x1) * t,
+                y1 + (y2 - y1) * t,
+                (x2 - x1) / length,
+                (y2 - y1) / length,
+            )
+        remaining -= length
+    (x1, y1), (x2, y2) = points[-2], points[-1]
+    length = math.hypot(x2 - x1, y2 - y1) or 1
+    return x2, y2, (x2 - x1) / length, (y2 - y1) / length
+
+
+def _edge_label_svg(
+    points: List[Tuple[float, float]], text: str, style: Dict[str, str], position: dict
+) -> List[str]:
+    """Edge label centred on the path, with a background sized to its text."""
+    if style.get("html") == "1":
+        overrides, _ = _label_format(text)
+        style = {**style, **overrides}
+    label = _label_text(text)
+    if not label or style.get("noLabel") == "1":
+        return []
+
+    # Geometry x runs from -1 (source) to 1 (target); y is a perpendicular shift
+    mx, my, ux, uy = _point_along(points, (position.get("x", 0.0) + 1) / 2)
+    mx += -uy * position.get("y", 0.0) + position.get("dx", 0.0)
+    my += ux * position.get("y", 0.0) + position.get("dy", 0.0)
+
+    font = _font_attrs(style, default_size=11)
+    if "fontStyle" not in style:
+        font["font_weight"] = "bold"
+    size = font["font_size"]
+    bold = font["font_weight"] == "bold"
+    lines = label.split("\n")
+    parts = []
+    background = style.get("labelBackgroundColor", "#ffffff")
+    if background == "default":
+        background = "#ffffff"
+    if background != "none":
+        # Background for readability, sized to the measured text
+        tw = max(text_width(line, size, bold) for line in lines) + 6
+        th = len(lines) * size * _LINE_HEIGHT + 3
+        parts.append(
+            f'<rect x="{mx - tw / 2:.1f}" y="{my - th / 2:.1f}" '
+            f'width="{tw:.1f}" height="{th:.1f}" fill="{background}" rx="2" ry="2" '
+            f'stroke="none"/>'
+        )
+    parts.append(_text_svg(mx, my, label, **font))
+    return parts
+
 
-    # End point
-    if target_id and target_id in nodes:
-        points.append(_connection_point(nodes[target_id], en_x, en_y))
+def _render_edge(
+    edge: dict, nodes: Dict[str, dict], markers: Dict[Tuple[str, str, bool], str]
+) -> str:
+    """Return SVG elements for an edge (path, arrowheads and labels)."""
+    style = edge["style"]
+    source = nodes.get(edge.get("source") or "")
+    target = nodes.get(edge.get("target") or "")
+    waypoints = list(edge.get("waypoints", []))
+
+    # Each end aims at the nearest neighbouring point along the route
+    after_source = (
+        waypoints[0]
+        if waypoints
+        else (_centre(target) if target else edge.get("target_point"))
+    )
+    before_target = (
+        waypoints[-1]
+        if waypoints
+        else (_centre(source) if source else edge.get("source_point"))
+    )
+
+    points: List[Tuple[float, float]] = []
+    if source and after_source:
+        points.append(_endpoint(source, style, "exit", after_source))
+    elif edge.get("source_point"):
+        points.append(edge["source_point"])
+    points.extend(waypoints)
+    if target and before_target:
+        points.append(_endpoint(target, style, "entry", before_target))
     elif edge.get("target_point"):
         points.append(edge["target_point"])
 
     if len(points) < 2:
         return ""
 
-    # Build polyline
-    pts_str = " ".join(f"{p[0]},{p[1]}" for p in points)
-    stroke = style.get("strokeColor", "#000000")
-    sw = float(style.get("strokeWidth", "2"))
-
-    parts: List[str] = [
-        f'<polyline points="{pts_str}" fill="none" '
-        f'stroke="{stroke}" stroke-width="{sw}" '
-        f'marker-end="url(#arrowhead)"/>'
-    ]
-
-    # Edge label (e.g. "True" / "False")
-    label = edge.get("label", "")
-    if label:
-        # Place label at the midpoint of the first segment
-        mid_idx = len(points) // 2
-        mx = (points[mid_idx - 1][0] + points[mid_idx][0]) / 2
-        my = (points[mid_idx - 1][1] + points[mid_idx][1]) / 2
-
-        # Offset the label slightly away from the line
-        dx = points[mid_idx][0] - points[mid_idx - 1][0]
-        dy = points[mid_idx][1] - points[mid_idx - 1][1]
-        length = math.hypot(dx, dy) or 1
-        # Perpendicular offset (to the right of travel direction)
-        offset = 10
-        ox = -dy / length * offset
-        oy = dx / length * offset
-
-        # Background for readability
-        tw = len(label) * 7 + 6
-        parts.append(
-            f'<rect x="{mx + ox - tw / 2}" y="{my + oy - 8}" '
-            f'width="{tw}" height="16" fill="#ffffff" rx="2" ry="2" '
-            f'stroke="none"/>'
+    edge_style = style.get("edgeStyle", "none")
+    if edge_style in ("orthogonalEdgeStyle", "elbowEdgeStyle"):
+        exit_y = style.get("exitY")
+        vertical_first = (
+            exit_y in ("0", "1")
+            if exit_y is not None
+            else abs(points[-1][1] - points[0][1]) >= abs(points[-1][0] - points[0][0])
         )
-        parts.append(
-            _text_svg(mx + ox, my + oy, label, font_size=11, font_weight="bold")
+        if style.get("elbow") == "vertical":
+            vertical_first = True
+        points = _orthogonal(points, vertical_first)
+
+    colour = style.get("strokeColor", "#000000")
+    attrs = _stroke_attrs(style)
+    end_id = _marker_id(
+        style.get("endArrow", "classic"),
+        colour,
+        style.get("endFill", "1") != "0",
+        markers,
+    )
+    start_id = _marker_id(
+        style.get("startArrow", "none"),
+        colour,
+        style.get("startFill", "1") != "0",
+        markers,
+    )
+    if end_id:
+        attrs += f' marker-end="url(#{end_id})"'
+    if start_id:
+        attrs += f' marker-start="url(#{start_id})"'
+    if style.get("rounded") == "1":
+        attrs += ' stroke-linejoin="round"'
+
+    path_data = _path_data(points, style.get("curved") == "1")
+    parts: List[str] = [f'<path d="{path_data}" fill="none" {attrs}/>']
+
+    # Edge label (e.g. "True" / "False"), then any child label cells
+    parts.extend(
+        _edge_label_svg(
+            points, edge.get("label", ""), style, edge.get("label_position", {})
         )
+    )
+    for child_label, child_style, position in edge.get("child_labels", []):
+        parts.extend(_edge_label_svg(points, child_label, child_style, position))
 
     return "\n".join(parts)
 
@@ -369,6 +1093,21 @@ def _render_edge(edge: dict, nodes: Dict[str, dict]) -> str:
 # ---------------------------------------------------------------------------
 
 
+def _point(element: ET.Element) -> Tuple[float, float]:
+    return float(element.get("x", "0")), float(element.get("y", "0"))
+
+
+def _label_position(geom: Optional[ET.Element]) -> dict:
+    """Relative label position stored on an edge (or edge-label) geometry."""
+    if geom is None:
+        return {}
+    position = {"x": float(geom.get("x", "0")), "y": float(geom.get("y", "0"))}
+    offset = geom.find("mxPoint[@as='offset']")
+    if offset is not None:
+        position["dx"], position["dy"] = _point(offset)
+    return position
+
+
 def mxgraph_xml_to_svg(xml_str: str, padding: int = 20) -> str:
     """Convert an mxGraphModel XML string to a standalone SVG string.
 
@@ -388,9 +1127,12 @@ def mxgraph_xml_to_svg(xml_str: str, padding: int = 20) -> str:
 
     # Collect all mxCell elements
     cells = root.findall(".//mxCell")
+    parents = {cell.get("id", ""): cell.get("parent") for cell in cells}
+    edge_ids = {cell.get("id", "") for cell in cells if cell.get("edge") == "1"}
 
     nodes: Dict[str, dict] = {}
     edges: List[dict] = []
+    edge_labels: List[Tuple[str, str, Dict[str, str], dict]] = []
 
     for cell in cells:
         cell_id = cell.get("id", "")
@@ -402,7 +1144,12 @@ def mxgraph_xml_to_svg(xml_str: str, padding: int = 20) -> str:
 
         geom = cell.find("mxGeometry")
 
-        if is_vertex and geom is not None:
+        if is_vertex and cell.get("parent") in edge_ids:
+            # A label cell attached to an edge, positioned along it
+            edge_labels.append(
+                (cell.get("parent"), value, style, _label_position(geom))
+            )
+        elif is_vertex and geom is not None:
             x = float(geom.get("x", "0"))
             y = float(geom.get("y", "0"))
             w = float(geom.get("width", "0"))
@@ -416,6 +1163,7 @@ def mxgraph_xml_to_svg(xml_str: str, padding: int = 20) -> str:
                 "label": value,
                 "shape": shape,
                 "style": style,
+                "parent": cell.get("parent"),
             }
         elif is_edge:
             waypoints: List[Tuple[float, float]] = []
@@ -427,22 +1175,19 @@ def mxgraph_xml_to_svg(xml_str: str, padding: int = 20) -> str:
                 arr = geom.find("Array")
                 if arr is not None:
                     for pt in arr.findall("mxPoint"):
-                        px = float(pt.get("x", "0"))
-                        py = float(pt.get("y", "0"))
-                        waypoints.append((px, py))
+                        waypoints.append(_point(pt))
 
                 # Explicit source/target points (when no connected node)
                 for pt in geom.findall("mxPoint"):
                     as_attr = pt.get("as", "")
-                    px = float(pt.get("x", "0"))
-                    py = float(pt.get("y", "0"))
                     if as_attr == "sourcePoint":
-                        source_point = (px, py)
+                        source_point = _point(pt)
                     elif as_attr == "targetPoint":
-                        target_point = (px, py)
+                        target_point = _point(pt)
 
             edges.append(
                 {
+                    "id": cell_id,
                     "source": cell.get("source"),
                     "target": cell.get("target"),
                     "label": value,
@@ -450,9 +1195,40 @@ def mxgraph_xml_to_svg(xml_str: str, padding: int = 20) -> str:
                     "waypoints": waypoints,
                     "source_point": source_point,
                     "target_point": target_point,
+                    "label_position": _label_position(geom),
+                    "parent": cell.get("parent"),
+                    "child_labels": [],
                 }
             )
 
+    # ---- Resolve parent-relative geometry (cells inside groups) ----
+    def origin(
+        parent_id: Optional[str], seen: Tuple[str, ...] = ()
+    ) -> Tuple[float, float]:
+        parent = nodes.get(parent_id or "")
+        if parent is None or parent_id in seen:
+            return 0.0, 0.0
+        ox, oy = origin(parents.get(parent_id), seen + (parent_id,))
+        return ox + parent["x"], oy + parent["y"]
+
+    offsets = {node_id: origin(node["parent"]) for node_id, node in nodes.items()}
+    for node_id, (ox, oy) in offsets.items():
+        nodes[node_id]["x"] += ox
+        nodes[node_id]["y"] += oy
+    for edge in edges:
+        ox, oy = origin(edge["parent"])
+        if ox or oy:
+            edge["waypoints"] = [(px + ox, py + oy) for px, py in edge["waypoints"]]
+            for key in ("source_point", "target_point"):
+                if edge[key]:
+                    edge[key] = (edge[key][0] + ox, edge[key][1] + oy)
+
+    edges_by_id = {edge["id"]: edge for edge in edges}
+    for edge_id, value, style, position in edge_labels:
+        edge = edges_by_id[edge_id]
+        merged = {**edge["style"], **style}
+        edge["child_labels"].append((value, merged, position))
+
     # ---- Calculate bounding box ----
     all_x: List[float] = []
     all_y: List[float] = []
@@ -480,21 +1256,22 @@ def mxgraph_xml_to_svg(xml_str: str, padding: int = 20) -> str:
     vw = max_x - min_x
     vh = max_y - min_y
 
+    # Render edges first (behind nodes); arrowhead markers are collected as used
+    markers: Dict[Tuple[str, str, bool], str] = {}
+    edge_parts = [_render_edge(edge, nodes, markers) for edge in edges]
+
     # ---- Assemble SVG ----
     svg_parts: List[str] = [
         f'<svg {_SVG_NS} viewBox="{min_x} {min_y} {vw} {vh}" '
         f'width="{vw}" height="{vh}" '
         f'style="background:#ffffff">',
         "<defs>",
-        _ARROW_MARKER,
+        *_marker_defs(markers),
         "</defs>",
+        *edge_parts,
     ]
 
-    # Render edges first (behind nodes)
-    for edge in edges:
-        svg_parts.append(_render_edge(edge, nodes))
-
-    # Render nodes
+    # Render nodes (containers before their children, as listed in the XML)
     for node in nodes.values():
         svg_parts.append(
             _render_node(
@@ -509,24 +1286,80 @@ def mxgraph_xml_to_svg(xml_str: str, padding: int = 20) -> str:
         )
 
     svg_parts.append("</svg>")
-    return "\n".join(svg_parts)
+    return "\n".join(part for part in svg_parts if part)
 
 
 # ---------------------------------------------------------------------------
 # CLI helper
 # ---------------------------------------------------------------------------
 
-if __name__ == "__main__":
-    import sys
-
-    if len(sys.argv) < 2:
-        print("Usage: python drawio_to_svg.py <input.xml> [output.svg]")
-        sys.exit(1)
-    in_path = sys.argv[1]
-    out_path = sys.argv[2] if len(sys.argv) > 2 else in_path.rsplit(".", 1)[0] + ".svg"
-    with open(in_path, "r", encoding="utf-8") as f:
-        xml_data = f.read()
-    svg = mxgraph_xml_to_svg(xml_data)
-    with open(out_path, "w", encoding="utf-8") as f:
-        f.write(svg)
+
+def _diagrams_in(path: Path) -> List[Tuple[str, str]]:
+    """(name, XML) for each diagram in an .xml/.drawio file, notebook or Markdown."""
+    if path.suffix in (".xml", ".drawio"):
+        return [(path.name, path.read_text(encoding="utf-8"))]
+
+    from drawio_to_png import find_iframe_urls, iframe_cache_name
+    from drawio_viewer import xml_from_viewer_url
+
+    diagrams = []
+    for url in find_iframe_urls([path]):
+        xml = xml_from_viewer_url(url)
+        if xml is not None:
+            diagrams.append((f"{path.name} {iframe_cache_name(url, '')}", xml))
+    return diagrams
+
+
+def print_coverage(paths: List[Path]) -> int:
+    """Print unsupported style features per diagram.
+
+    Returns how many diagrams need the browser renderer.
+    """
+    total = needs_browser = 0
+    for path in paths:
+        for name, xml in _diagrams_in(path):
+            total += 1
+            report = unsupported_styles(xml)
+            if not report:
+                print(f"✅ {name}")
+                continue
+            needs_browser += 1
+            print(f"⚠️  {name}")
+            for feature, cell_ids in sorted(report.items()):
+                print(f"   {feature} (cells: {', '.join(cell_ids)})")
+    print(f"📊 {total - needs_browser}/{total} diagram(s) fully supported offline")
+    return needs_browser
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Convert draw.io XML to SVG without a browser."
+    )
+    parser.add_argument(
+        "--coverage",
+        action="store_true",
+        help="Report unsupported style keys per diagram instead of converting",
+    )
+    parser.add_argument(
+        "paths",
+        nargs="+",
+        type=Path,
+        help="input.xml [output.svg], or with --coverage: .xml/.ipynb/.md files",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.coverage:
+        sys.exit(1 if print_coverage(args.paths) else 0)
+
+    in_path = args.paths[0]
+    out_path = args.paths[1] if len(args.paths) > 1 else in_path.with_suffix(".svg")
+    svg = mxgraph_xml_to_svg(in_path.read_text(encoding="utf-8"))
+    out_path.write_text(svg, encoding="utf-8")
     print(f"Wrote {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+"""
+Serve a vendored copy of the draw.io viewer so browser renders stay offline.
+
+``render_drawio_to_png`` normally navigates to https://viewer.diagrams.net
+and waits for the network to go idle, so every render depends on CDN latency
+and on the service being up. With the viewer bundle vendored into
+``utils/vendor/drawio/``, Playwright request routing answers every
+viewer.diagrams.net request from local files and blocks everything else.
+A small local page then renders a diagram from XML handed in directly.
+
+The viewer script loads more than itself - stencils, images and resource
+files, depending on the shapes in a diagram. ``fetch`` therefore renders
+every lesson diagram through the online viewer, records each file the
+viewer requests and vendors those too; ``check`` renders them all again
+offline and fails if any request could not be answered locally.
+
+Renders only switch to the vendored viewer on their own once ``check`` has
+passed on exactly the vendored files (recorded in MANIFEST.json); until
+then they keep using viewer.diagrams.net.
+
+Usage:
+    # Download (or update) the vendored viewer bundle and the resources
+    # the lesson diagrams need
+    python3 utils/drawio_viewer.py fetch
+
+    # Show what is vendored
+    python3 utils/drawio_viewer.py status
+
+    # Render every lesson diagram offline; exit 1 if anything is missing
+    python3 utils/drawio_viewer.py check
+
+    # In code (sync Playwright page)
+    from drawio_viewer import install_local_viewer, render_xml_on_page
+    install_local_viewer(page)
+    render_xml_on_page(page, xml)
+
+    # Batch export: load the viewer once, then export each diagram
+    open_viewer_page(page, offline=True)
+    png_bytes = export_xml_on_page(page, xml, fmt="png")
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import json
+import mimetypes
+import re
+import sys
+import time
+import urllib.parse
+import urllib.request
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+VIEWER_ORIGIN = "https://viewer.diagrams.net"
+VENDOR_DIR = Path(__file__).resolve().parent / "vendor" / "drawio"
+# Always vendored; the stencils, images and resources it loads in turn are
+# recorded while rendering the lesson diagrams and listed in the manifest
+BUNDLE_FILES = ["js/viewer-static.min.js"]
+MANIFEST_NAME = "MANIFEST.json"
+# Notebooks whose diagrams decide which viewer resources are vendored
+DEFAULT_DIAGRAM_SOURCES = Path(__file__).resolve().parent.parent / "lessons"
+
+# Served by the route handler itself rather than from VENDOR_DIR
+LOCAL_PAGE_PATH = "/__local__/render.html"
+LOCAL_PAGE_URL = VIEWER_ORIGIN + LOCAL_PAGE_PATH
+DIAGRAM_SELECTOR = "#diagram svg"
+
+LOCAL_PAGE_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<style>html, body { margin: 0; background: #ffffff; }</style>
+<script src="%s/js/viewer-static.min.js"></script>
+</head>
+<body>
+<div id="diagram"></div>
+<div id="export" style="position: absolute; left: -10000px;"></div>
+<script>
+// Replace the current diagram with one built from raw mxGraphModel XML
+window.renderXml = function (xml, nav) {
+  var container = document.getElementById("diagram");
+  container.innerHTML = "";
+  var element = document.createElement("div");
+  element.className = "mxgraph";
+  element.setAttribute("data-mxgraph", JSON.stringify({
+    xml: xml,
+    nav: !!nav,
+    toolbar: nav ? "zoom layers" : "",
+    resize: true
+  }));
+  container.appendChild(element);
+  GraphViewer.processElements();
+  return true;
+};
+
+// Export one diagram with the viewer's own SVG exporter; PNG is drawn from
+// that SVG onto a canvas, so no screenshot is involved
+window.exportXml = function (xml, format, scale, border) {
+  var container = document.getElementById("export");
+  container.innerHTML = "";
+  var graph = new Graph(container);
+  graph.setEnabled(false);
+  var doc = mxUtils.parseXml(xml);
+  new mxCodec(doc).decode(doc.documentElement, graph.getModel());
+  var svg = new XMLSerializer().serializeToString(graph.getSvg("#ffffff", scale, border));
+  graph.destroy();
+  if (format === "svg") {
+    return Promise.resolve(svg);
+  }
+  return new Promise(function (resolve, reject) {
+    var image = new Image();
+    image.onload = function () {
+      var canvas = document.createElement("canvas");
+      canvas.width = image.width;
+      canvas.height = image.height;
+      var context = canvas.getContext("2d");
+      context.fillStyle = "#ffffff";
+      context.fillRect(0, 0, canvas.width, canvas.height);
+      context.drawImage(image, 0, 0);
+      try {
+        resolve(canvas.toDataURL("image/png"));
+      } catch (err) {
+        reject(err);  // canvas tainted by foreignObject labels
+      }
+    };
+    image.onerror = function () { reject(new Error("SVG failed to load")); };
+    image.src = "data:image/svg+xml;base64," + btoa(unescape(encodeURIComponent(svg)));
+  });
+};
+</script>
+</body>
+</html>
+""" % VIEWER_ORIGIN
+
+
+def read_manifest(vendor_dir: Path = VENDOR_DIR) -> dict:
+    """Return the vendored bundle's manifest, or {} if there is none."""
+    try:
+        return json.loads((vendor_dir / MANIFEST_NAME).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def viewer_bundle_available(vendor_dir: Path = VENDOR_DIR) -> bool:
+    """True when every bundle file, and every resource listed in the
+    manifest, has been vendored."""
+    names = set(BUNDLE_FILES) | set(read_manifest(vendor_dir).get("files", {}))
+    return all((vendor_dir / name).is_file() for name in names)
+
+
+def bundle_fingerprint(manifest: dict) -> str:
+    """One hash over the checksums of every vendored file."""
+    files = manifest.get("files", {})
+    digest = hashlib.sha256()
+    for name in sorted(files):
+        digest.update(f"{name}\0{files[name].get('sha256', '')}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def offline_ready(vendor_dir: Path = VENDOR_DIR) -> bool:
+    """True when the vendored bundle is complete and ``check`` has passed on
+    exactly these files, so renders may use it without being asked to."""
+    if not viewer_bundle_available(vendor_dir):
+        return False
+    manifest = read_manifest(vendor_dir)
+    return manifest.get("checked", {}).get("bundle") == bundle_fingerprint(manifest)
+
+
+def xml_from_viewer_url(url: str) -> Optional[str]:
+    """Return the raw XML embedded in a ``viewer.diagrams.net/...#R<xml>`` URL.
+
+    Returns None for other URL forms (for example ``#U`` remote files),
+    which can only be rendered by the online viewer.
+    """
+    fragment = urllib.parse.urlsplit(url).fragment
+    if not fragment.startswith("R"):
+        return None
+    return urllib.parse.unquote(fragment[1:])
+
+
+def _resolve_request(url: str, vendor_dir: Path) -> Tuple[int, bytes, str]:
+    """Map a request URL to (status, body, content type) without the network."""
+    parts = urllib.parse.urlsplit(url)
+    if f"{parts.scheme}://{parts.netloc}" != VIEWER_ORIGIN:
+        return 0, b"", ""  # any other host is blocked
+    if parts.path == LOCAL_PAGE_PATH:
+        return 200, LOCAL_PAGE_HTML.encode("utf-8"), "text/html; charset=utf-8"
+
+    relative = parts.path.lstrip("/")
+    candidate = (vendor_dir / relative).resolve()
+    if vendor_dir.resolve() not in candidate.parents or not candidate.is_file():
+        return 404, b"", "text/plain"
+    content_type = mimetypes.guess_type(candidate.name)[0] or "application/octet-stream"
+    return 200, candidate.read_bytes(), content_type
+
+
+def install_local_viewer(
+    page, vendor_dir: Path = VENDOR_DIR, misses: Optional[List[str]] = None
+) -> None:
+    """Route a sync Playwright page's requests to the vendored viewer.
+
+    URLs that could not be served (not vendored, or another host) are
+    appended to ``misses`` when it is given.
+    """
+
+    def handle(route):
+        status, body, content_type = _resolve_request(route.request.url, vendor_dir)
+        if status != 200 and misses is not None:
+            misses.append(route.request.url)
+        if not status:
+            route.abort()
+        else:
+            route.fulfill(status=status, body=body, content_type=content_type)
+
+    page.route("**/*", handle)
+
+
+async def install_local_viewer_async(page, vendor_dir: Path = VENDOR_DIR) -> None:
+    """Route an async Playwright page's requests to the vendored viewer."""
+
+    async def handle(route):
+        status, body, content_type = _resolve_request(route.request.url, vendor_dir)
+        if not status:
+            await route.abort()
+        else:
+            await route.fulfill(status=status, body=body, content_type=content_type)
+
+    await page.route("**/*", handle)
+
+
+def open_viewer_page(
+    page, offline: bool, timeout_ms: int = 30000, misses: Optional[List[str]] = None
+) -> None:
+    """Load the local viewer page once, from vendored files or the CDN."""
+    if offline:
+        install_local_viewer(page, misses=misses)
+        page.goto(LOCAL_PAGE_URL, wait_until="load", timeout=timeout_ms)
+    else:
+        page.set_content(LOCAL_PAGE_HTML, wait_until="networkidle", timeout=timeout_ms)
+    page.wait_for_function("() => typeof Graph !== 'undefined'", timeout=timeout_ms)
+
+
+def export_xml_on_page(
+    page, xml: str, fmt: str = "png", scale: float = 1.0, border: int = 10
+) -> bytes:
+    """Export one diagram from a page opened with :func:`open_viewer_page`.
+
+    Uses the viewer's SVG exporter; PNG falls back to an element screenshot
+    when the browser refuses to read back the canvas.
+    """
+    if fmt not in ("png", "svg"):
+        raise ValueError(f"Unsupported export format: {fmt}")
+    try:
+        data = page.evaluate(
+            "([xml, fmt, scale, border]) => window.exportXml(xml, fmt, scale, border)",
+            [xml, fmt, scale, border],
+        )
+    except Exception:
+        if fmt == "svg":
+            raise
+        page.evaluate("([xml]) => window.renderXml(xml, false)", [xml])
+        page.wait_for_selector(DIAGRAM_SELECTOR)
+        return page.locator(DIAGRAM_SELECTOR).first.screenshot()
+    if fmt == "svg":
+        return data.encode("utf-8")
+    return base64.b64decode(data.split(",", 1)[1])
+
+
+def render_xml_on_page(
+    page, xml: str, nav: bool = True, timeout_ms: int = 30000
+) -> None:
+    """Draw ``xml`` on a routed sync page, loading the local page only once."""
+    if page.url != LOCAL_PAGE_URL:
+        page.goto(LOCAL_PAGE_URL, wait_until="load", timeout=timeout_ms)
+    page.evaluate("([xml, nav]) => window.renderXml(xml, nav)", [xml, nav])
+    page.wait_for_selector(DIAGRAM_SELECTOR, timeout=timeout_ms)
+
+
+async def render_xml_on_page_async(
+    page, xml: str, nav: bool = True, timeout_ms: int = 30000
+) -> None:
+    """Async twin of :func:`render_xml_on_page`."""
+    if page.url != LOCAL_PAGE_URL:
+        await page.goto(LOCAL_PAGE_URL, wait_until="load", timeout=timeout_ms)
+    await page.evaluate("([xml, nav]) => window.renderXml(xml, nav)", [xml, nav])
+    await page.wait_for_selector(DIAGRAM_SELECTOR, timeout=timeout_ms)
+
+
+def wants_nav(url: str) -> bool:
+    """True when a viewer URL asks for the navigation toolbar (``nav=1``)."""
+    query = urllib.parse.parse_qs(urllib.parse.urlsplit(url).query)
+    return query.get("nav", ["0"])[0] == "1"
+
+
+def lesson_diagram_xmls(paths: Iterable[Path]) -> List[str]:
+    """Inline XML of every draw.io iframe in the given notebooks/Markdown."""
+    from drawio_to_png import find_iframe_urls  # drawio_to_png imports this module
+
+    xmls = [xml_from_viewer_url(url) for url in find_iframe_urls(paths)]
+    return [xml for xml in xmls if xml is not None]
+
+
+def _exercise_viewer(page, xmls: Iterable[str], timeout_ms: int) -> None:
+    """Draw and export each diagram the way the converters do."""
+    for xml in xmls:
+        page.evaluate("([xml]) => window.renderXml(xml, true)", [xml])
+        page.wait_for_selector(DIAGRAM_SELECTOR, timeout=timeout_ms)
+        try:
+            export_xml_on_page(page, xml, "png")
+        except Exception:
+            pass  # the screenshot fallback loads nothing new
+    page.wait_for_load_state("networkidle", timeout=timeout_ms)
+
+
+def record_viewer_resources(xmls: List[str], timeout_ms: int = 30000) -> List[str]:
+    """Paths on the viewer origin that the online viewer loads for ``xmls``."""
+    from playwright.sync_api import sync_playwright
+
+    paths: List[str] = []
+
+    def note(request):
+        parts = urllib.parse.urlsplit(request.url)
+        path = parts.path.lstrip("/")
+        if f"{parts.scheme}://{parts.netloc}" == VIEWER_ORIGIN and path not in paths:
+            paths.append(path)
+
+    with sync_playwright() as playwright:
+        browser = playwright.chromium.launch()
+        try:
+            page = browser.new_page()
+            page.on("request", note)
+            open_viewer_page(page, offline=False, timeout_ms=timeout_ms)
+            _exercise_viewer(page, xmls, timeout_ms)
+        finally:
+            browser.close()
+    return [path for path in paths if path and path not in BUNDLE_FILES]
+
+
+def check_offline(
+    xmls: List[str], vendor_dir: Path = VENDOR_DIR, timeout_ms: int = 30000
+) -> List[str]:
+    """Render ``xmls`` with the vendored viewer; return the URLs it could not serve."""
+    from playwright.sync_api import sync_playwright
+
+    misses: List[str] = []
+    with sync_playwright() as playwright:
+        browser = playwright.chromium.launch()
+        try:
+            page = browser.new_page()
+            install_local_viewer(page, vendor_dir, misses)
+            page.goto(LOCAL_PAGE_URL, wait_until="load", timeout=timeout_ms)
+            page.wait_for_function(
+                "() => typeof Graph !== 'undefined'", timeout=timeout_ms
+            )
+            _exercise_viewer(page, xmls, timeout_ms)
+        finally:
+            browser.close()
+    return sorted(set(misses))
+
+
+def fetch_bundle(
+    vendor_dir: Path = VENDOR_DIR,
+    origin: str = VIEWER_ORIGIN,
+    resources: Iterable[str] = (),
+) -> dict:
+    """Download the viewer bundle and ``resources`` (paths on the viewer
+    origin) into ``vendor_dir`` and write a manifest."""
+    manifest = {"origin": origin, "fetched": time.strftime("%Y-%m-%d"), "files": {}}
+    for name in [*BUNDLE_FILES, *resources]:
+        with urllib.request.urlopen(f"{origin}/{name}", timeout=60) as response:
+            data = response.read()
+        target = vendor_dir / name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+        manifest["files"][name] = {
+            "bytes": len(data),
+            "sha256": hashlib.sha256(data).hexdigest(),
+        }
+        version = re.search(rb'VERSION\s*=\s*"([\d.]+)"', data)
+        if version and name in BUNDLE_FILES:
+            manifest["version"] = version.group(1).decode("ascii")
+    (vendor_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2) + "\n")
+    return manifest
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Vendor the draw.io viewer bundle for offline renders."
+    )
+    parser.add_argument("command", choices=["fetch", "status", "check"])
+    parser.add_argument(
+        "--vendor-dir",
+        type=Path,
+        default=VENDOR_DIR,
+        help=f"Where the bundle lives (default: {VENDOR_DIR})",
+    )
+    parser.add_argument(
+        "--diagrams",
+        nargs="*",
+        type=Path,
+        default=sorted(DEFAULT_DIAGRAM_SOURCES.glob("*.ipynb")),
+        help="Notebooks or Markdown files whose diagrams must render offline "
+        "(default: every lesson notebook)",
+    )
+    parser.add_argument(
+        "--bundle-only",
+        action="store_true",
+        help="fetch: skip recording the resources the lesson diagrams load",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    if args.command == "fetch":
+        resources: List[str] = []
+        if not args.bundle_only:
+            xmls = lesson_diagram_xmls(args.diagrams)
+            print(f"🔍 Recording the viewer resources {len(xmls)} diagram(s) load...")
+            try:
+                resources = record_viewer_resources(xmls)
+            except Exception as err:
+                print(f"❌ Could not render the diagrams online: {err}")
+                print(
+                    "   Install Playwright, or use --bundle-only for the script alone"
+                )
+                sys.exit(1)
+        print(f"⬇️  Fetching draw.io viewer bundle from {VIEWER_ORIGIN}")
+        try:
+            manifest = fetch_bundle(args.vendor_dir, resources=resources)
+        except OSError as err:
+            print(f"❌ Download failed: {err}")
+            sys.exit(1)
+        for name, info in manifest["files"].items():
+            print(f"✅ {name}: {info['bytes']:,} bytes (sha256 {info['sha256'][:12]}…)")
+        if "version" in manifest:
+            print(f"📦 Viewer version {manifest['version']}")
+        return
+
+    if not viewer_bundle_available(args.vendor_dir):
+        print("⚪ Viewer bundle not vendored - renders use the online viewer")
+        print("   Run: python3 utils/drawio_viewer.py fetch")
+        sys.exit(1)
+    manifest = read_manifest(args.vendor_dir)
+
+    if args.command == "check":
+        xmls = lesson_diagram_xmls(args.diagrams)
+        print(f"🔌 Rendering {len(xmls)} diagram(s) with the vendored viewer...")
+        try:
+            misses = check_offline(xmls, args.vendor_dir)
+        except Exception as err:
+            print(f"❌ Offline render failed: {err}")
+            sys.exit(1)
+        if misses:
+            print(f"❌ {len(misses)} request(s) could not be served offline:")
+            for url in misses:
+                print(f"   {url}")
+            print("   Run: python3 utils/drawio_viewer.py fetch")
+            sys.exit(1)
+        manifest["checked"] = {
+            "date": time.strftime("%Y-%m-%d"),
+            "diagrams": len(xmls),
+            "bundle": bundle_fingerprint(manifest),
+        }
+        (args.vendor_dir / MANIFEST_NAME).write_text(
+            json.dumps(manifest, indent=2) + "\n"
+        )
+        print("✅ Every diagram rendered without leaving the vendored files")
+        print("   Renders now use the vendored viewer by default")
+        return
+
+    print(
+        f"✅ Viewer bundle vendored in {args.vendor_dir} "
+        f"(version {manifest.get('version', 'unknown')}, fetched {manifest.get('fetched', '?')}, "
+        f"{len(manifest.get('files', {}))} file(s))"
+    )
+    if offline_ready(args.vendor_dir):
+        print(f"🔌 Offline renders checked on {manifest['checked']['date']}")
+    else:
+        print("⚠️  Not checked yet - renders stay online until this passes:")
+        print("   python3 utils/drawio_viewer.py check")
+
+
+if __name__ == "__main__":
+    main()
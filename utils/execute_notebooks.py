@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Execute lesson notebook code cells before export, in parallel and cached.
+
+Each notebook runs in its own Jupyter kernel, with a bounded pool of worker
+processes working across notebooks and a per-cell timeout. Cell outputs are
+cached by a hash of the cell source plus every preceding code cell source,
+so a notebook whose code has not changed is restored from the cache without
+starting a kernel at all.
+
+Cells that cannot run unattended are skipped rather than failed:
+- HSC pseudocode kept in code cells (``BEGIN ... END`` is not Python)
+- interactive cells that call ``input()``
+
+Usage:
+    # Validate every lesson (exit code 1 if any cell fails)
+    python3 utils/execute_notebooks.py --input-dir lessons --jobs 4
+
+    # Execute, then export the fresh outputs to Markdown
+    python3 utils/ipynb_to_md.py --execute --jobs 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import nbformat
+    from nbclient import NotebookClient
+    from nbclient.exceptions import CellTimeoutError, DeadKernelError
+
+    NBCLIENT_AVAILABLE = True
+except ImportError:
+    NBCLIENT_AVAILABLE = False
+
+from build_cache import DEFAULT_CACHE_DIR, JsonCache, content_hash
+
+DEFAULT_CELL_TIMEOUT = 30  # seconds
+DEFAULT_JOBS = min(4, os.cpu_count() or 1)
+CACHE_NAMESPACE = "cell_outputs"
+
+
+@dataclass
+class CellFailure:
+    """A code cell that raised, timed out or was cut short by a dead kernel."""
+
+    cell_index: int
+    error: str
+
+
+@dataclass
+class ExecutionResult:
+    """Outcome of executing one notebook."""
+
+    path: Path
+    notebook_json: str
+    executed: int = 0
+    cached: int = 0
+    skipped: int = 0
+    failures: List[CellFailure] = field(default_factory=list)
+    duration: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.failures
+
+    @property
+    def notebook(self):
+        """The executed notebook as an nbformat NotebookNode."""
+        return nbformat.reads(self.notebook_json, as_version=4)
+
+
+def classify_cell(source: str) -> str:
+    """Return "python", "pseudocode" or "interactive" for a code cell source."""
+    # IPython magics and shell escapes are not plain Python syntax
+    lines = [
+        "" if line.lstrip().startswith(("%", "!")) else line
+        for line in source.splitlines()
+    ]
+    try:
+        tree = ast.parse("\n".join(lines))
+    except SyntaxError:
+        return "pseudocode"
+
+    for node in ast.walk(tree):
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Name)
+            and node.func.id == "input"
+        ):
+            return "interactive"
+    return "python"
+
+
+def cell_cache_keys(nb_node, kernel_name: str) -> Dict[int, str]:
+    """Map each code cell index to a hash of its source and all earlier code."""
+    keys: Dict[int, str] = {}
+    running = content_hash(kernel_name)
+    for index, cell in enumerate(nb_node.cells):
+        if cell.cell_type != "code":
+            continue
+        running = content_hash(running, cell.source)
+        keys[index] = running
+    return keys
+
+
+def _error_summary(outputs: Iterable[dict]) -> Optional[str]:
+    """Return "EName: message" for the first error output, if any."""
+    for output in outputs:
+        if output.get("output_type") == "error":
+            return f"{output.get('ename', 'Error')}: {output.get('evalue', '')}"
+    return None
+
+
+def execute_notebook(
+    notebook_path: Path,
+    cell_timeout: int = DEFAULT_CELL_TIMEOUT,
+    kernel_name: str = "python3",
+    cache_dir: Optional[Path] = None,
+    use_cache: bool = True,
+) -> ExecutionResult:
+    """Execute the runnable code cells of one notebook.
+
+    Outputs come from the cache when every runnable cell hits; otherwise the
+    whole notebook is executed (later cells depend on earlier kernel state)
+    and the fresh outputs are stored.
+    """
+    # Imported here: ipynb_to_md imports this module for its --execute flag
+    from ipynb_to_md import load_notebook
+
+    started = time.perf_counter()
+    nb_node = load_notebook(notebook_path, verbose=False)
+    cache = JsonCache(CACHE_NAMESPACE, cache_dir or DEFAULT_CACHE_DIR)
+    keys = cell_cache_keys(nb_node, kernel_name)
+    result = ExecutionResult(path=notebook_path, notebook_json="")
+
+    runnable = [
+        index
+        for index in keys
+        if classify_cell(nb_node.cells[index].source) == "python"
+    ]
+    result.skipped = len(keys) - len(runnable)
+
+    records = {index: cache.get(keys[index]) for index in runnable} if use_cache else {}
+    if use_cache and all(record is not None for record in records.values()):
+        for index, record in records.items():
+            cell = nb_node.cells[index]
+            cell.outputs = [nbformat.from_dict(o) for o in record["outputs"]]
+            cell.execution_count = record.get("execution_count")
+            error = _error_summary(record["outputs"])
+            if error:
+                result.failures.append(CellFailure(index, error))
+        result.cached = len(records)
+    else:
+        client = NotebookClient(
+            nb_node,
+            timeout=cell_timeout,
+            kernel_name=kernel_name,
+            allow_errors=True,
+            resources={"metadata": {"path": str(notebook_path.parent)}},
+        )
+        with client.setup_kernel():
+            for index in runnable:
+                cell = nb_node.cells[index]
+                try:
+                    client.execute_cell(cell, index)
+                except CellTimeoutError:
+                    result.failures.append(
+                        CellFailure(index, f"Timed out after {cell_timeout}s")
+                    )
+                    break
+                except DeadKernelError as err:
+                    result.failures.append(CellFailure(index, f"Kernel died: {err}"))
+                    break
+
+                result.executed += 1
+                outputs = [dict(o) for o in cell.outputs]
+                error = _error_summary(outputs)
+                if error:
+                    result.failures.append(CellFailure(index, error))
+                cache.put(
+                    keys[index],
+                    {"outputs": outputs, "execution_count": cell.execution_count},
+                )
+
+    result.notebook_json = nbformat.writes(nb_node)
+    result.duration = time.perf_counter() - started
+    return result
+
+
+def execute_notebooks(
+    notebooks: Iterable[Path],
+    jobs: int = DEFAULT_JOBS,
+    cell_timeout: int = DEFAULT_CELL_TIMEOUT,
+    kernel_name: str = "python3",
+    cache_dir: Optional[Path] = None,
+    use_cache: bool = True,
+) -> List[ExecutionResult]:
+    """Execute notebooks across a bounded process pool.
+
+    Results are returned in the same order as ``notebooks``.
+    """
+    notebooks = list(notebooks)
+    if jobs <= 1 or len(notebooks) <= 1:
+        return [
+            execute_notebook(path, cell_timeout, kernel_name, cache_dir, use_cache)
+            for path in notebooks
+        ]
+
+    with ProcessPoolExecutor(max_workers=min(jobs, len(notebooks))) as pool:
+        futures = [
+            pool.submit(
+                execute_notebook, path, cell_timeout, kernel_name, cache_dir, use_cache
+            )
+            for path in notebooks
+        ]
+        return [future.result() for future in futures]
+
+
+def print_summary(results: List[ExecutionResult]) -> None:
+    """Print one line per notebook plus any failing cells."""
+    for result in results:
+        status = "✅" if result.ok else "❌"
+        print(
+            f"{status} {result.path.name}: {result.executed} executed, "
+            f"{result.cached} cached, {result.skipped} skipped "
+            f"({result.duration:.2f}s)"
+        )
+        for failure in result.failures:
+            print(f"   ⚠️  cell {failure.cell_index}: {failure.error}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Execute notebook code cells in parallel with output caching."
+    )
+    parser.add_argument(
+        "--input-dir",
+        default="lessons",
+        type=Path,
+        help="Directory containing .ipynb files",
+    )
+    parser.add_argument(
+        "--pattern",
+        default="*.ipynb",
+        help="Glob pattern for notebooks inside input-dir",
+    )
+    parser.add_argument(
+        "--file",
+        type=Path,
+        help="Execute a single notebook instead of scanning input-dir",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        help=f"Notebooks executed in parallel (default: {DEFAULT_JOBS})",
+    )
+    parser.add_argument(
+        "--cell-timeout",
+        type=int,
+        default=DEFAULT_CELL_TIMEOUT,
+        help=f"Per-cell timeout in seconds (default: {DEFAULT_CELL_TIMEOUT})",
+    )
+    parser.add_argument(
+        "--kernel", default="python3", help="Jupyter kernel name (default: python3)"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=DEFAULT_CACHE_DIR,
+        help=f"Build cache directory (default: {DEFAULT_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Ignore cached outputs and re-run"
+    )
+    parser.add_argument(
+        "--write",
+        action="store_true",
+        help="Save executed outputs back into the source notebooks",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    if not NBCLIENT_AVAILABLE:
+        print(
+            "❌ nbclient not available. Install dependencies with: bash utils/install_dependencies.sh"
+        )
+        sys.exit(1)
+
+    if args.file:
+        notebooks = [args.file]
+    else:
+        notebooks = sorted(args.input_dir.glob(args.pattern))
+
+    if not notebooks:
+        print("No notebooks found to execute.")
+        return
+
+    started = time.perf_counter()
+    results = execute_notebooks(
+        notebooks,
+        jobs=args.jobs,
+        cell_timeout=args.cell_timeout,
+        kernel_name=args.kernel,
+        cache_dir=args.cache_dir,
+        use_cache=not args.no_cache,
+    )
+    print_summary(results)
+
+    if args.write:
+        for result in results:
+            nbformat.write(result.notebook, result.path)
+
+    failed = sum(1 for result in results if not result.ok)
+    print(
+        f"📊 {len(results)} notebook(s) in {time.perf_counter() - started:.2f}s, "
+        f"{failed} with failures"
+    )
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
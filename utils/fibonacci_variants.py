@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Fibonacci five ways - a measured companion to lesson 9's recursion section.
+
+Lesson 9 introduces recursion with the naive Fibonacci subprogram. This
+module puts that version next to four faster designs of the same algorithm,
+checks them all against one shared oracle, and measures the input size at
+which each design overtakes another.
+
+Variants:
+- naive recursion      O(φⁿ)  (exactly the lesson pseudocode)
+- memoised recursion   O(n)   (functools.lru_cache remembers earlier answers)
+- bottom-up iterative  O(n)   (two variables, no recursion)
+- fast doubling        O(log n) big-int multiplications
+- NumPy matrix power   O(log n) 2×2 matrix products (optional NumPy)
+
+Usage:
+    python3 utils/fibonacci_variants.py 30            # F(30) from every variant
+    python3 utils/fibonacci_variants.py --check       # verify against the oracle
+    python3 utils/fibonacci_variants.py --benchmark   # timings and crossovers
+
+Dependencies:
+    - numpy (optional): enables the matrix-power variant
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from functools import lru_cache
+from typing import Callable, Dict, List, Sequence
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+# ---------------------------------------------------------------------------
+# Variants
+# ---------------------------------------------------------------------------
+
+
+def fib_naive(n: int) -> int:
+    """Naive recursion, matching the lesson's Fibonacci(n) pseudocode."""
+    if n == 0:
+        return 0
+    if n == 1:
+        return 1
+    return fib_naive(n - 1) + fib_naive(n - 2)
+
+
+@lru_cache(maxsize=None)
+def fib_memoised(n: int) -> int:
+    """Naive recursion plus a cache: each F(k) is computed only once.
+
+    Still recurses n levels deep on a cold cache, so very large n needs a
+    higher recursion limit.
+    """
+    if n < 2:
+        return n
+    return fib_memoised(n - 1) + fib_memoised(n - 2)
+
+
+def fib_iterative(n: int) -> int:
+    """Bottom-up: keep only the last two values while counting up to n."""
+    previous, current = 0, 1
+    for _ in range(n):
+        previous, current = current, previous + current
+    return previous
+
+
+def fib_fast_doubling(n: int) -> int:
+    """Fast doubling, using F(2k) = F(k)·(2F(k+1) − F(k)) and
+    F(2k+1) = F(k)² + F(k+1)², walking the bits of n from the top."""
+    a, b = 0, 1  # F(k), F(k+1) with k = 0
+    for bit in bin(n)[2:]:
+        c = a * (2 * b - a)  # F(2k)
+        d = a * a + b * b  # F(2k+1)
+        if bit == "1":
+            a, b = d, c + d
+        else:
+            a, b = c, d
+    return a
+
+
+def fib_matrix(n: int) -> int:
+    """[[1, 1], [1, 0]]ⁿ = [[F(n+1), F(n)], [F(n), F(n−1)]] via NumPy.
+
+    Uses an object-dtype matrix so entries are exact Python integers rather
+    than int64 values that overflow after F(92).
+    """
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("NumPy not available - install with: pip install numpy")
+    base = np.array([[1, 1], [1, 0]], dtype=object)
+    return int(np.linalg.matrix_power(base, n)[0, 1])
+
+
+VARIANTS: Dict[str, Callable[[int], int]] = {
+    "Naive recursion": fib_naive,
+    "Memoised": fib_memoised,
+    "Iterative": fib_iterative,
+    "Fast doubling": fib_fast_doubling,
+}
+if NUMPY_AVAILABLE:
+    VARIANTS["NumPy matrix power"] = fib_matrix
+
+# Largest n each variant is sensible to run at (naive recursion is exponential)
+MAX_SENSIBLE_N = {"Naive recursion": 30}
+
+
+# ---------------------------------------------------------------------------
+# Shared test oracle
+# ---------------------------------------------------------------------------
+
+# Published values, independent of every implementation above
+KNOWN_VALUES: Dict[int, int] = {
+    0: 0,
+    1: 1,
+    2: 1,
+    3: 2,
+    4: 3,
+    5: 5,
+    6: 8,
+    7: 13,
+    10: 55,
+    20: 6765,
+    30: 832040,
+    50: 12586269025,
+    92: 7540113804746346429,
+    93: 12200160415121876738,
+    100: 354224848179261915075,
+}
+
+
+def check_variant(func: Callable[[int], int], max_n: int = 300) -> List[str]:
+    """Check one variant against the oracle; return a list of problems.
+
+    Checks the published values, the defining recurrence and Cassini's
+    identity F(n−1)·F(n+1) − F(n)² = (−1)ⁿ up to ``max_n``.
+    """
+    problems: List[str] = []
+    for n, expected in KNOWN_VALUES.items():
+        if n <= max_n and func(n) != expected:
+            problems.append(f"F({n}) = {func(n)}, expected {expected}")
+
+    values = [func(n) for n in range(max_n + 1)]
+    for n in range(2, max_n + 1):
+        if values[n] != values[n - 1] + values[n - 2]:
+            problems.append(f"F({n}) != F({n - 1}) + F({n - 2})")
+            break
+    for n in range(1, max_n):
+        if values[n - 1] * values[n + 1] - values[n] ** 2 != (-1) ** n:
+            problems.append(f"Cassini's identity fails at n = {n}")
+            break
+    return problems
+
+
+def check_all() -> Dict[str, List[str]]:
+    """Run the oracle over every available variant."""
+    return {
+        label: check_variant(func, MAX_SENSIBLE_N.get(label, 300))
+        for label, func in VARIANTS.items()
+    }
+
+
+# ---------------------------------------------------------------------------
+# Benchmark and crossover points
+# ---------------------------------------------------------------------------
+
+
+def cold(func: Callable[[int], int]) -> Callable[[int], int]:
+    """Wrap a variant so every timed call starts from an empty cache."""
+    if not hasattr(func, "cache_clear"):
+        return func
+
+    def run(n: int) -> int:
+        func.cache_clear()
+        return func(n)
+
+    return run
+
+
+def benchmark(sizes: Sequence[int], budget: float = 1.0):
+    """Time every variant over ``sizes`` and return (series, crossovers)."""
+    from benchmark_patterns import find_crossovers, run_series
+
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 2 * max(sizes) + 100))
+    series = {
+        label: run_series(
+            cold(func),
+            [n for n in sizes if n <= MAX_SENSIBLE_N.get(label, n)],
+            lambda n: n,
+            budget,
+        )
+        for label, func in VARIANTS.items()
+    }
+    return series, find_crossovers(series)
+
+
+DEFAULT_SIZES = [1, 2, 5, 10, 15, 20, 25, 30, 50, 100, 200, 500, 1000, 2000, 5000]
+
+
+def parse_n(text: str) -> int:
+    """A non-negative n for argparse (F(n) is only defined from F(0))."""
+    try:
+        n = int(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(
+            f"expected a whole number, got {text!r}"
+        ) from e
+    if n < 0:
+        raise argparse.ArgumentTypeError(f"n must be 0 or more, got {n}")
+    return n
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Compare naive, memoised, iterative, fast-doubling and "
+        "matrix-power Fibonacci."
+    )
+    parser.add_argument(
+        "n", nargs="?", type=parse_n, help="Compute F(n) with each variant"
+    )
+    parser.add_argument(
+        "--check", action="store_true", help="Verify every variant against the oracle"
+    )
+    parser.add_argument(
+        "--benchmark",
+        action="store_true",
+        help="Time the variants and report crossovers",
+    )
+    parser.add_argument(
+        "--sizes",
+        type=lambda text: [parse_n(part) for part in text.split(",")],
+        default=DEFAULT_SIZES,
+        help="Comma-separated n values for --benchmark",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.n is None and not (args.check or args.benchmark):
+        print("Nothing to do: give n, --check or --benchmark (see --help)")
+        sys.exit(1)
+
+    if not NUMPY_AVAILABLE:
+        print("ℹ️  NumPy not available - skipping the matrix-power variant")
+
+    if args.n is not None:
+        sys.setrecursionlimit(max(sys.getrecursionlimit(), 2 * args.n + 100))
+        for label, func in VARIANTS.items():
+            if args.n > MAX_SENSIBLE_N.get(label, args.n):
+                print(f"{label:>20}: skipped (too slow for n = {args.n})")
+            else:
+                print(f"{label:>20}: {func(args.n)}")
+
+    if args.check:
+        failed = False
+        for label, problems in check_all().items():
+            print(f"{'✅' if not problems else '❌'} {label}")
+            for problem in problems:
+                print(f"   ⚠️  {problem}")
+            failed = failed or bool(problems)
+        if failed:
+            sys.exit(1)
+
+    if args.benchmark:
+        from benchmark_patterns import markdown_table, print_crossovers
+
+        series, crossovers = benchmark(args.sizes)
+        print(markdown_table(series, args.sizes))
+        print()
+        print_crossovers(crossovers)
+
+
+if __name__ == "__main__":
+    main()
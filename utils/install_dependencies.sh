@@ -49,7 +49,7 @@ echo ""
 # Install Python packages
 echo "🐍 Installing Python packages..."
 pip install --quiet --upgrade pip
-pip install --quiet markdown weasyprint pygments beautifulsoup4 nbconvert nbformat
+pip install --quiet markdown weasyprint pygments beautifulsoup4 nbconvert nbformat pypdf brotli
 
 echo "✓ Python packages installed"
 echo ""
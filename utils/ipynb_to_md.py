@@ -1,17 +1,54 @@
 #!/usr/bin/env python3
-"""Convert Jupyter notebooks to Markdown files."""
+"""Convert Jupyter notebooks to Markdown files.
+
+Each cell's exported Markdown (after diagram and link clean-up) is cached
+under .build_cache/export_cells/, keyed by the cell's type, source, outputs
+and metadata. Only cells without a cached fragment go through nbconvert, in
+one pass per notebook, so re-exporting after an edit costs about as much as
+the edit.
+
+Code cells tagged ``trace-table`` are run under a line tracer and followed
+by a generated trace table (see trace_tables.py).
+
+With --search-index, each exported lesson is also (re)indexed for
+full-text search (see search_index.py).
+"""
 
 import argparse
+import base64
+import copy
 import hashlib
 import json
+import os
 import re
 import sys
+import time
 from pathlib import Path
-from typing import Iterable, List
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import build_metrics
+from build_cache import DEFAULT_CACHE_DIR, JsonCache, content_hash
+from search_index import MARKDOWN_AVAILABLE, SearchIndexWriter
+from trace_tables import (
+    CACHE_NAMESPACE as TRACE_CACHE_NAMESPACE,
+    cell_options,
+    is_traced_cell,
+    trace_cached,
+    trace_table_markdown,
+)
+from work_queue import (
+    DEFAULT_LEASE_SECONDS,
+    WorkQueue,
+    parse_shard,
+    print_summary as print_queue_summary,
+    shard_items,
+)
 
 try:
+    import nbconvert
     import nbformat
     from nbconvert import MarkdownExporter
+    from nbconvert.filters import path2url
     from nbformat import ValidationError
 except ImportError:
     print(
@@ -21,12 +58,47 @@ except ImportError:
 
 # Playwright-based PNG renderer for draw.io diagrams
 try:
-    from drawio_to_png import render_iframe_url_to_png
+    from drawio_to_png import iframe_cache_name, render_iframe_url_to_png
 
     PLAYWRIGHT_AVAILABLE = True
 except ImportError:
     PLAYWRIGHT_AVAILABLE = False
 
+# Optional execution stage (needs nbclient and a Jupyter kernel)
+try:
+    from execute_notebooks import (
+        DEFAULT_CELL_TIMEOUT,
+        DEFAULT_JOBS,
+        NBCLIENT_AVAILABLE,
+        execute_notebooks,
+        print_summary,
+    )
+
+    EXECUTION_AVAILABLE = NBCLIENT_AVAILABLE
+except ImportError:
+    EXECUTION_AVAILABLE = False
+    DEFAULT_CELL_TIMEOUT, DEFAULT_JOBS = 30, 1
+
+EXPORT_CACHE_NAMESPACE = "export_cells"
+
+IFRAME_PATTERN = re.compile(
+    r'<iframe[^>]+src="([^" ]*viewer\.diagrams\.net[^"]+)"[^>]*></iframe>',
+    re.IGNORECASE,
+)
+CLICK_HINT_PATTERN = re.compile(r"_Click the diagram to open in full editor_\n?")
+# Markdown links (not images) to a relative path, e.g. [text](../utils/x.py#L3)
+RELATIVE_LINK_PATTERN = re.compile(
+    r"(?<!!)(\[[^\]\n]*\]\()([^)\s#:]+)((?:#[^)\s]*)?\))"
+)
+
+# Changed cells are exported together with this markdown cell between them,
+# and the body split back into one fragment per cell
+CELL_BOUNDARY = "<!-- ipynb_to_md cell boundary 5f0c -->"
+# Output files are named {unique_key}_{cell_index}_{n}; the cell index is
+# swapped for a placeholder so a fragment stays valid when cells move
+BATCH_OUTPUT_KEY = "ipynbcell5f0c"
+CELL_PLACEHOLDER = "\x00cell\x00"
+
 
 def log(message: str, verbose: bool) -> None:
     if verbose:
@@ -37,8 +109,13 @@ def find_notebooks(input_dir: Path, pattern: str) -> List[Path]:
     return sorted(input_dir.glob(pattern))
 
 
-def replace_iframes_with_png(content: str, output_dir: Path, verbose: bool) -> str:
-    """Replace draw.io iframes with PNG image references."""
+def replace_iframes_with_png(
+    content: str, output_dir: Path, verbose: bool, rendered: Optional[List[str]] = None
+) -> str:
+    """Replace draw.io iframes with PNG image references.
+
+    The URL of each diagram that was replaced is appended to ``rendered``.
+    """
     if not PLAYWRIGHT_AVAILABLE:
         log("⚠️  Playwright not available - iframes will remain as-is", verbose)
         return content
@@ -54,6 +131,8 @@ def replace_iframes_with_png(content: str, output_dir: Path, verbose: bool) -> s
             _, png_path = render_iframe_url_to_png(src, cache_dir=assets_dir)
             # Use relative path for markdown
             rel_path = png_path.relative_to(output_dir)
+            if rendered is not None:
+                rendered.append(src)
 
             return f"![Flowchart diagram]({rel_path})"
 
@@ -61,48 +140,283 @@ def replace_iframes_with_png(content: str, output_dir: Path, verbose: bool) -> s
             log(f"  ⚠️  Failed to render diagram: {e}", verbose)
             return match.group(0)  # Keep original iframe
 
-    iframe_pattern = (
-        r'<iframe[^>]+src="([^" ]*viewer\.diagrams\.net[^"]+)"[^>]*></iframe>'
+    return IFRAME_PATTERN.sub(repl, content)
+
+
+def clean_markdown(content: str, output_dir: Path, verbose: bool, rendered=None) -> str:
+    """Swap diagrams for PNGs and drop the "click the diagram" hints."""
+    # Replace draw.io iframes with PNG images
+    content = replace_iframes_with_png(content, output_dir, verbose, rendered)
+
+    # Remove "_Click the diagram to open in full editor_" lines
+    return CLICK_HINT_PATTERN.sub("", content)
+
+
+def rewrite_relative_links(content: str, notebook_dir: Path, output_dir: Path) -> str:
+    """Point links to repository files at them from the output directory.
+
+    Lessons link to files such as ``../utils/fibonacci_variants.py`` relative
+    to the notebook; the Markdown lives elsewhere, so each link that resolves
+    to an existing file is rewritten relative to ``output_dir``.
+    """
+
+    def repl(match):
+        target = notebook_dir / match.group(2)
+        if not target.exists():
+            return match.group(0)
+        relative = Path(
+            os.path.relpath(target.resolve(), output_dir.resolve())
+        ).as_posix()
+        return f"{match.group(1)}{relative}{match.group(3)}"
+
+    return RELATIVE_LINK_PATTERN.sub(repl, content)
+
+
+def cell_cache_key(cell, language: str, files_dir: str) -> str:
+    """Hash everything the exported fragment of ``cell`` depends on."""
+    fields = {
+        name: cell.get(name)
+        for name in ("cell_type", "source", "outputs", "attachments", "metadata")
+    }
+    return content_hash(
+        nbconvert.__version__,
+        language,
+        # Only output files carry the notebook's name
+        files_dir if cell.get("outputs") else "",
+        json.dumps(fields, sort_keys=True, default=str),
+    )
+
+
+def export_cells(
+    nb_node,
+    cells: List,
+    exporter: MarkdownExporter,
+    files_dir: str,
+    output_dir: Path,
+    verbose: bool,
+) -> List[Tuple[dict, bool]]:
+    """Export ``cells`` in one nbconvert pass; return (record, cacheable) per cell.
+
+    A record holds the cleaned Markdown fragment, its extracted output files
+    (base64) and the diagram URLs it links to. Fragments whose diagrams could
+    not all be rendered still hold an iframe and are not cacheable.
+    """
+    batch = copy.copy(nb_node)
+    batch.cells = []
+    boundary = nbformat.from_dict(
+        {"cell_type": "markdown", "metadata": {}, "source": CELL_BOUNDARY}
     )
-    return re.sub(iframe_pattern, repl, content, flags=re.IGNORECASE)
+    if nb_node.get("nbformat_minor", 0) >= 5:
+        boundary.id = "ipynb-to-md-boundary"
+    for cell in cells:
+        batch.cells += [boundary, cell]
+    batch.cells.append(boundary)
+
+    resources = {"output_files_dir": files_dir, "unique_key": BATCH_OUTPUT_KEY}
+    body, resources = exporter.from_notebook_node(batch, resources=resources)
+    outputs = resources.get("outputs", {})
+
+    # Each cell renders as "\n<cell>\n"-framed text between boundary cells
+    segments = body.split(CELL_BOUNDARY)[1:-1]
+    if len(segments) != len(cells):
+        raise ValueError("cell boundary marker found inside notebook content")
+
+    results = []
+    for position, segment in enumerate(segments):
+        fragment = segment[1:-1]
+        batch_prefix = f"{BATCH_OUTPUT_KEY}_{2 * position + 1}_"
+        cell_outputs = {
+            name.replace(batch_prefix, CELL_PLACEHOLDER): base64.b64encode(data).decode(
+                "ascii"
+            )
+            for name, data in outputs.items()
+            if path2url(name) in fragment
+        }
+        rendered: List[str] = []
+        fragment = clean_markdown(fragment, output_dir, verbose, rendered)
+        record = {
+            "markdown": fragment.replace(batch_prefix, CELL_PLACEHOLDER),
+            "outputs": cell_outputs,
+            "diagrams": rendered,
+        }
+        results.append((record, not IFRAME_PATTERN.search(fragment)))
+    return results
+
+
+def restore_diagrams(urls: List[str], output_dir: Path, verbose: bool) -> None:
+    """Re-render diagrams a cached fragment links to if their PNG is gone."""
+    assets_dir = output_dir / "drawio_assets"
+    for url in urls:
+        if not (assets_dir / iframe_cache_name(url)).exists():
+            try:
+                render_iframe_url_to_png(url, cache_dir=assets_dir)
+            except Exception as e:
+                log(f"  ⚠️  Failed to render diagram: {e}", verbose)
+
+
+def export_notebook(
+    nb_node,
+    exporter: MarkdownExporter,
+    files_dir: str,
+    output_dir: Path,
+    verbose: bool,
+    cache: Optional[JsonCache],
+) -> Tuple[str, Dict[str, bytes]]:
+    """Return the notebook's Markdown and output files, reusing cached cells."""
+    if cache is None:
+        resources = {"output_files_dir": files_dir}
+        body, resources = exporter.from_notebook_node(nb_node, resources=resources)
+        return clean_markdown(body, output_dir, verbose), resources.get("outputs", {})
+
+    language = nb_node.metadata.get("language_info", {}).get("name", "")
+    keys = [cell_cache_key(cell, language, files_dir) for cell in nb_node.cells]
+    records = [cache.get(key) for key in keys]
+    missing = [index for index, record in enumerate(records) if record is None]
+    hits = len(records) - len(missing)
+    if hits:
+        build_metrics.CELLS.inc(hits, result="cache_hit")
+
+    if missing:
+        fresh = export_cells(
+            nb_node,
+            [nb_node.cells[index] for index in missing],
+            exporter,
+            files_dir,
+            output_dir,
+            verbose,
+        )
+        for index, (record, cacheable) in zip(missing, fresh):
+            records[index] = record
+            if cacheable:
+                cache.put(keys[index], record)
+        build_metrics.CELLS.inc(len(missing), result="exported")
+        log(f"  exported {len(missing)} changed cell(s), {hits} from cache", verbose)
+
+    fresh_indexes = set(missing)
+    fragments = []
+    outputs = {}
+    for index, record in enumerate(records):
+        # Output files keep nbconvert's output_<cell>_<n> names
+        prefix = f"output_{index}_"
+        fragments.append(record["markdown"].replace(CELL_PLACEHOLDER, prefix))
+        for name, data in record["outputs"].items():
+            outputs[name.replace(CELL_PLACEHOLDER, prefix)] = base64.b64decode(data)
+        if index not in fresh_indexes:
+            restore_diagrams(record["diagrams"], output_dir, verbose)
+
+    # nbconvert strips the whitespace that leads the first cell
+    return "".join(fragments).lstrip(), outputs
+
+
+def add_trace_tables(nb_node, cache: Optional[JsonCache], verbose: bool):
+    """Return ``nb_node`` with a trace table cell after each tagged code cell."""
+    tagged = [index for index, cell in enumerate(nb_node.cells) if is_traced_cell(cell)]
+    if not tagged:
+        return nb_node
+
+    nb_node = copy.deepcopy(nb_node)
+    for index in reversed(tagged):
+        cell = nb_node.cells[index]
+        try:
+            result = trace_cached(cell.source, cell_options(cell), cache)
+        except (SyntaxError, ValueError) as e:
+            print(f"⚠️  Cannot trace cell {index}: {e}")
+            continue
+        log(
+            f"  traced cell {index}: {len(result.rows)} step(s) with {result.tracer}",
+            verbose,
+        )
+        table = nbformat.v4.new_markdown_cell(trace_table_markdown(result))
+        if nb_node.get("nbformat_minor", 0) >= 5:
+            table.id = f"{cell.get('id', index)}-trace"
+        else:
+            del table["id"]
+        nb_node.cells.insert(index + 1, table)
+    return nb_node
 
 
 def convert_notebook(
-    notebook_path: Path, output_dir: Path, exporter: MarkdownExporter, verbose: bool
+    notebook_path: Path,
+    output_dir: Path,
+    exporter: MarkdownExporter,
+    verbose: bool,
+    nb_node=None,
+    cache: Optional[JsonCache] = None,
+    search_index: Optional[SearchIndexWriter] = None,
+    trace_cache: Optional[JsonCache] = None,
 ) -> Path:
     log(f"Converting {notebook_path} -> Markdown", verbose)
-    nb_node = load_notebook(notebook_path, verbose)
-
-    resources = {"output_files_dir": f"{notebook_path.stem}_files"}
-    body, resources = exporter.from_notebook_node(nb_node, resources=resources)
-
-    # Replace draw.io iframes with PNG images
-    body = replace_iframes_with_png(body, output_dir, verbose)
+    if nb_node is None:
+        nb_node = load_notebook(notebook_path, verbose)
+    nb_node = add_trace_tables(nb_node, trace_cache, verbose)
 
-    # Remove "_Click the diagram to open in full editor_" lines
-    body = re.sub(r"_Click the diagram to open in full editor_\n?", "", body)
+    files_dir = f"{notebook_path.stem}_files"
+    body, outputs = export_notebook(
+        nb_node, exporter, files_dir, output_dir, verbose, cache
+    )
 
     output_dir.mkdir(parents=True, exist_ok=True)
+    body = rewrite_relative_links(body, notebook_path.parent, output_dir)
     md_path = output_dir / f"{notebook_path.stem}.md"
     md_path.write_text(body, encoding="utf-8")
+    build_metrics.record_file("ipynb_to_md", "markdown", md_path)
+
+    if search_index is not None:
+        with build_metrics.timed("ipynb_to_md", "index"):
+            search_index.add_markdown(md_path.name, body)
 
-    outputs = resources.get("outputs", {})
     for name, data in outputs.items():
         asset_path = output_dir / name
         asset_path.parent.mkdir(parents=True, exist_ok=True)
         with open(asset_path, "wb") as asset_file:
             asset_file.write(data)
+        build_metrics.BYTES_WRITTEN.inc(len(data), tool="ipynb_to_md", kind="asset")
         log(f"  wrote asset {asset_path}", verbose)
 
     return md_path
 
 
-def convert_all(notebooks: Iterable[Path], output_dir: Path, verbose: bool) -> int:
+def convert_all(
+    notebooks: Iterable[Path],
+    output_dir: Path,
+    verbose: bool,
+    executed: Optional[Dict[Path, object]] = None,
+    use_cache: bool = True,
+    cache_dir: Optional[Path] = None,
+    search_index: Optional[SearchIndexWriter] = None,
+) -> int:
+    """Export notebooks, using already-executed notebook nodes where given."""
     exporter = MarkdownExporter()
+    executed = executed or {}
+    cache = (
+        JsonCache(EXPORT_CACHE_NAMESPACE, cache_dir or DEFAULT_CACHE_DIR)
+        if use_cache
+        else None
+    )
+    trace_cache = (
+        JsonCache(TRACE_CACHE_NAMESPACE, cache_dir or DEFAULT_CACHE_DIR)
+        if use_cache
+        else None
+    )
     count = 0
 
     for notebook_path in notebooks:
-        convert_notebook(notebook_path, output_dir, exporter, verbose)
+        try:
+            with build_metrics.timed("ipynb_to_md", "export"):
+                convert_notebook(
+                    notebook_path,
+                    output_dir,
+                    exporter,
+                    verbose,
+                    nb_node=executed.get(notebook_path),
+                    cache=cache,
+                    search_index=search_index,
+                    trace_cache=trace_cache,
+                )
+        except Exception:
+            build_metrics.DOCUMENTS.inc(tool="ipynb_to_md", status="failed")
+            raise
+        build_metrics.DOCUMENTS.inc(tool="ipynb_to_md", status="converted")
         count += 1
 
     return count
@@ -195,24 +509,187 @@ def parse_args() -> argparse.Namespace:
         type=Path,
         help="Convert a single notebook instead of scanning input-dir",
     )
+    parser.add_argument(
+        "--execute",
+        action="store_true",
+        help="Run code cells first so the export carries fresh outputs",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        help=f"Notebooks executed in parallel with --execute (default: {DEFAULT_JOBS})",
+    )
+    parser.add_argument(
+        "--cell-timeout",
+        type=int,
+        default=DEFAULT_CELL_TIMEOUT,
+        help=f"Per-cell timeout in seconds with --execute (default: {DEFAULT_CELL_TIMEOUT})",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore cached cell outputs (--execute), exported cell Markdown and trace tables",
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        metavar="i/N",
+        help="Convert only this node's share (every N-th notebook, starting at the i-th)",
+    )
+    parser.add_argument(
+        "--queue",
+        type=Path,
+        metavar="DIR",
+        help="Share the notebooks with other nodes through lock files in DIR (see work_queue.py)",
+    )
+    parser.add_argument(
+        "--lease",
+        type=float,
+        default=DEFAULT_LEASE_SECONDS,
+        help=f"Seconds a --queue claim lasts without renewal (default: {DEFAULT_LEASE_SECONDS})",
+    )
+    parser.add_argument(
+        "--search-index",
+        type=Path,
+        metavar="PATH",
+        help="Update the full-text search index at PATH with each exported lesson",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=Path,
+        help="Write Prometheus metrics for this run to this textfile",
+    )
     parser.add_argument("--verbose", action="store_true", help="Enable verbose logging")
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
+    started = time.perf_counter()
+    success = False
+    try:
+        run(args)
+        success = True
+    finally:
+        if args.metrics_file:
+            build_metrics.record_run(
+                "ipynb_to_md", time.perf_counter() - started, success
+            )
+            build_metrics.write_textfile(args.metrics_file)
+
 
+def run(args: argparse.Namespace) -> None:
     if args.file:
         notebooks = [args.file]
     else:
         notebooks = find_notebooks(args.input_dir, args.pattern)
 
+    if args.shard:
+        notebooks = shard_items(notebooks, args.shard)
+
     if not notebooks:
         print("No notebooks found to convert.")
         return
 
-    converted = convert_all(notebooks, args.output_dir, args.verbose)
+    if args.queue:
+        if args.search_index:
+            print("⚠️  --search-index needs the whole build - ignored with --queue")
+        run_queued(notebooks, args)
+        return
+
+    executed = {}
+    failed: List[Path] = []
+    if args.execute:
+        if not EXECUTION_AVAILABLE:
+            print("❌ nbclient not available - cannot execute notebooks")
+            sys.exit(1)
+        with build_metrics.timed("ipynb_to_md", "execute"):
+            results = execute_notebooks(
+                notebooks,
+                jobs=args.jobs,
+                cell_timeout=args.cell_timeout,
+                use_cache=not args.no_cache,
+            )
+        print_summary(results)
+        # A failed cell's traceback must not reach the exported lesson
+        failed = [result.path for result in results if not result.ok]
+        for path in failed:
+            print(f"⏭️  Not exporting {path} (cells failed - see above)")
+        notebooks = [path for path in notebooks if path not in failed]
+        executed = {result.path: result.notebook for result in results if result.ok}
+
+    search_index = None
+    if args.search_index:
+        if args.shard:
+            print("⚠️  --search-index needs the whole build - ignored with --shard")
+        elif not MARKDOWN_AVAILABLE:
+            print(
+                "⚠️  markdown not available - search index not updated (pip install markdown)"
+            )
+        else:
+            search_index = SearchIndexWriter(args.search_index)
+
+    converted = convert_all(
+        notebooks,
+        args.output_dir,
+        args.verbose,
+        executed,
+        use_cache=not args.no_cache,
+        search_index=search_index,
+    )
     print(f"Converted {converted} notebook(s) to Markdown in {args.output_dir}")
+    if search_index is not None and search_index.save():
+        print(
+            f"🔎 Search index: {args.search_index} ({len(search_index.changed)} document(s) updated)"
+        )
+    if failed:
+        sys.exit(1)
+
+
+def run_queued(notebooks: List[Path], args: argparse.Namespace) -> None:
+    """Convert notebooks claimed one at a time from the shared --queue."""
+    if args.execute and not EXECUTION_AVAILABLE:
+        print("❌ nbclient not available - cannot execute notebooks")
+        sys.exit(1)
+
+    def queue_key(path: Path) -> str:
+        try:
+            return path.relative_to(args.input_dir).as_posix()
+        except ValueError:
+            return path.as_posix()
+
+    by_key = {queue_key(path): path for path in notebooks}
+
+    def work(key: str) -> List[Path]:
+        notebook_path = by_key[key]
+        executed = {}
+        if args.execute:
+            with build_metrics.timed("ipynb_to_md", "execute"):
+                results = execute_notebooks(
+                    [notebook_path],
+                    cell_timeout=args.cell_timeout,
+                    use_cache=not args.no_cache,
+                )
+            print_summary(results)
+            if not all(result.ok for result in results):
+                # Marks the document failed in the queue; nothing is exported
+                raise RuntimeError(f"cells failed while executing {notebook_path}")
+            executed = {result.path: result.notebook for result in results}
+        convert_all(
+            [notebook_path],
+            args.output_dir,
+            args.verbose,
+            executed,
+            use_cache=not args.no_cache,
+        )
+        return [args.output_dir / f"{notebook_path.stem}.md"]
+
+    queue = WorkQueue(args.queue, args.lease)
+    summary = queue.run(list(by_key), work)
+    print_queue_summary(queue, summary)
+    if summary.failed:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
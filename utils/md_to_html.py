@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Static HTML export of the Markdown lessons for student-facing delivery.
+
+``md_to_pdf.py`` already builds a complete HTML document per lesson, then
+hands it to WeasyPrint and throws it away. This exporter reuses the same
+preprocessing and Markdown parse, and writes a small static site that
+loads quickly on school devices and slow networks:
+
+- One shared stylesheet, ``assets/lessons.<hash>.css``, linked from every
+  page instead of inlining the CSS into each one
+- Images and rendered diagrams are copied to ``assets/<hash>.<ext>``, so
+  their URLs change whenever their bytes do and can be cached forever
+- Every ``<img>`` gets ``loading="lazy"``, ``decoding="async"`` and its real
+  ``width``/``height``, so the page does not shift as images arrive
+- Text files (HTML, CSS, SVG) get precompressed ``.gz`` and ``.br``
+  siblings that a web server can send as-is
+
+Lesson pages keep their stable names (``lesson3_selection.html``) so links
+and bookmarks survive a rebuild; only the assets they point at are hashed.
+
+Usage:
+    python3 utils/md_to_html.py --directory "other_formats/markdown_lessons" --output-dir "other_formats/html_lessons"
+    python3 utils/md_to_html.py --file "other_formats/markdown_lessons/lesson3_selection.md"
+
+Dependencies:
+    - markdown, pygments (as for md_to_pdf.py; WeasyPrint is not needed)
+    - brotli (optional): .br siblings are skipped without it
+"""
+
+import argparse
+import gzip
+import hashlib
+import html
+import os
+import re
+import struct
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from asset_index import AssetIndex, print_summary as print_asset_summary
+from asset_store import ASSET_SCHEME
+from build_cache import atomic_write_bytes
+from md_to_pdf import DEFAULT_SOURCE_DIR, MarkdownToPdfConverter
+
+try:
+    import brotli
+
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+DEFAULT_HTML_OUTPUT_DIR = Path("other_formats/html_lessons")
+ASSETS_DIRNAME = "assets"
+
+# Served with a precompressed .gz/.br sibling (images are already compressed)
+COMPRESSIBLE_SUFFIXES = {".html", ".css", ".svg", ".js", ".json"}
+
+# Screen layout on top of the shared GitHub CSS: a readable column width and
+# images that scale down with the viewport while keeping their aspect ratio
+SCREEN_CSS = """
+        body {
+            max-width: 52rem;
+            margin: 0 auto;
+            padding: 1.5rem 1rem 3rem;
+        }
+
+        img {
+            max-width: 100%;
+            height: auto;
+        }
+
+        nav.lesson-nav {
+            margin-bottom: 1.5rem;
+            font-size: 0.9em;
+        }
+"""
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en-GB">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>{title}</title>
+<link rel="stylesheet" href="{stylesheet}">
+</head>
+<body>
+{nav}{body}
+</body>
+</html>
+"""
+
+IMG_TAG_PATTERN = re.compile(r"<img\b([^>]*?)\s*/?>", re.IGNORECASE)
+# name="value", name='value', name=value or a bare boolean name
+ATTRIBUTE_PATTERN = re.compile(
+    r"""([^\s"'=<>/]+)(\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'=<>`]+)))?"""
+)
+TITLE_PATTERN = re.compile(r"<title>(.*?)</title>", re.DOTALL)
+LOCAL_MD_LINK_PATTERN = re.compile(
+    r'href="(?![a-z][\w+.-]*:|#|/)([^"#]+)\.md(#[^"]*)?"'
+)
+
+
+def image_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """Return (width, height) from a PNG, GIF, JPEG or SVG header, or None."""
+    if data[:8] == b"\x89PNG\r\n\x1a\n" and len(data) >= 24:
+        return struct.unpack(">II", data[16:24])
+    if data[:6] in (b"GIF87a", b"GIF89a") and len(data) >= 10:
+        return struct.unpack("<HH", data[6:10])
+    if data[:2] == b"\xff\xd8":
+        # Walk the JPEG segments to the first start-of-frame marker
+        position = 2
+        while position + 9 < len(data):
+            if data[position] != 0xFF:
+                position += 1
+                continue
+            marker = data[position + 1]
+            if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+                position += 2
+                continue
+            length = struct.unpack(">H", data[position + 2 : position + 4])[0]
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                height, width = struct.unpack(">HH", data[position + 5 : position + 9])
+                return width, height
+            position += 2 + length
+        return None
+    head = data[:2048].decode("utf-8", "ignore")
+    if "<svg" in head:
+        tag = head[head.index("<svg") :].split(">", 1)[0]
+        width = re.search(r'\swidth="([\d.]+)(?:px)?"', tag)
+        height = re.search(r'\sheight="([\d.]+)(?:px)?"', tag)
+        if width and height:
+            return round(float(width.group(1))), round(float(height.group(1)))
+        view_box = re.search(
+            r'viewBox="[\d.-]+[\s,]+[\d.-]+[\s,]+([\d.]+)[\s,]+([\d.]+)"', tag
+        )
+        if view_box:
+            return round(float(view_box.group(1))), round(float(view_box.group(2)))
+    return None
+
+
+def hashed_name(stem: str, data: bytes, suffix: str) -> str:
+    """``<stem>.<first 10 hex of sha256><suffix>`` (stem may be empty)."""
+    digest = hashlib.sha256(data).hexdigest()[:10]
+    return f"{stem}.{digest}{suffix}" if stem else f"{digest}{suffix}"
+
+
+def precompress(path: Path, data: bytes) -> List[Path]:
+    """Write ``.gz`` (and ``.br`` when brotli is installed) next to ``path``.
+
+    The gzip header carries no timestamp or filename, so unchanged input
+    gives byte-identical output and rebuilds do not churn the files.
+    """
+    written = []
+    gz_path = path.with_name(path.name + ".gz")
+    atomic_write_bytes(gz_path, gzip.compress(data, compresslevel=9, mtime=0))
+    written.append(gz_path)
+    if BROTLI_AVAILABLE:
+        br_path = path.with_name(path.name + ".br")
+        atomic_write_bytes(br_path, brotli.compress(data, quality=11))
+        written.append(br_path)
+    return written
+
+
+class MarkdownToHtmlExporter(MarkdownToPdfConverter):
+    """Writes lessons as a static site, reusing the PDF converter's parse."""
+
+    requires_weasyprint = False
+
+    def __init__(self, output_dir: Path, verbose: bool = False, compress: bool = True):
+        super().__init__(verbose=verbose, page_break_mode="continuous")
+        self.output_dir = output_dir
+        self.assets_dir = output_dir / ASSETS_DIRNAME
+        self.compress = compress
+        # Asset file names written this run (everything else in assets/ is stale)
+        self.written_assets: Dict[str, int] = {}
+        self.bytes_written = 0
+        self.pages: List[Tuple[Path, str]] = []
+        self._stylesheet: Optional[Path] = None
+
+    def write_output(self, path: Path, data: bytes) -> None:
+        """Write one output file plus its precompressed siblings."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_bytes(path, data)
+        self.bytes_written += len(data)
+        if self.compress and path.suffix in COMPRESSIBLE_SUFFIXES:
+            precompress(path, data)
+
+    def write_asset(self, name: str, data: bytes) -> Path:
+        """Write a content-hashed asset once per run (same name = same bytes)."""
+        path = self.assets_dir / name
+        if name not in self.written_assets:
+            if not path.exists() or path.stat().st_size != len(data):
+                self.write_output(path, data)
+            self.written_assets[name] = len(data)
+        return path
+
+    @property
+    def stylesheet(self) -> Path:
+        """The shared stylesheet, written on first use."""
+        if self._stylesheet is None:
+            css = (self.get_github_css("continuous") + SCREEN_CSS).encode("utf-8")
+            self._stylesheet = self.write_asset(
+                hashed_name("lessons", css, ".css"), css
+            )
+            self.log(f"🎨 Shared stylesheet: {self._stylesheet.name}")
+        return self._stylesheet
+
+    def rewrite_images(self, html_body: str, page_dir: Path) -> str:
+        """Point ``asset://`` images at hashed files and add lazy-load hints."""
+
+        def replace(match):
+            # Values are unescaped here and escaped once on the way out;
+            # boolean attributes keep a value of None
+            attributes: Dict[str, Optional[str]] = {}
+            for name, assigned, double, single, bare in ATTRIBUTE_PATTERN.findall(
+                match.group(1)
+            ):
+                value = html.unescape(double or single or bare) if assigned else None
+                attributes[name.lower()] = value
+            src = attributes.get("src") or ""
+            if src.startswith(ASSET_SCHEME):
+                asset = self.asset_store.get(src)
+                if asset is not None:
+                    data, _ = asset
+                    path = self.write_asset(src[len(ASSET_SCHEME) :], data)
+                    attributes["src"] = Path(os.path.relpath(path, page_dir)).as_posix()
+                    size = image_size(data)
+                    if size and "width" not in attributes:
+                        attributes["width"], attributes["height"] = map(str, size)
+            attributes.setdefault("loading", "lazy")
+            attributes.setdefault("decoding", "async")
+            rendered = " ".join(
+                key if value is None else f'{key}="{html.escape(value, quote=True)}"'
+                for key, value in attributes.items()
+            )
+            return f"<img {rendered}>"
+
+        return IMG_TAG_PATTERN.sub(replace, html_body)
+
+    def page_title(self, html_body: str, fallback: str) -> str:
+        """Plain text of the first ``<h1>``, else ``fallback``."""
+        match = re.search(r"<h1\b[^>]*>(.*?)</h1>", html_body, re.DOTALL)
+        if not match:
+            return fallback
+        return html.unescape(re.sub(r"<[^>]+>", "", match.group(1))).strip() or fallback
+
+    def render_page(
+        self, title: str, body: str, page_dir: Path, nav: str = ""
+    ) -> bytes:
+        stylesheet = Path(os.path.relpath(self.stylesheet, page_dir)).as_posix()
+        page = PAGE_TEMPLATE.format(
+            title=html.escape(title), stylesheet=stylesheet, nav=nav, body=body
+        )
+        return page.encode("utf-8")
+
+    def export_file(self, input_file: Path, output_file: Path) -> bool:
+        """Export one Markdown lesson as an HTML page."""
+        try:
+            self.log(f"Exporting {input_file.name} to HTML...")
+            markdown_content = input_file.read_text(encoding="utf-8")
+            html_body = self.render_markdown_body(markdown_content, input_file)
+
+            page_dir = output_file.parent
+            html_body = self.rewrite_images(html_body, page_dir)
+            # Links between lessons point at the exported pages
+            html_body = LOCAL_MD_LINK_PATTERN.sub(
+                lambda m: f'href="{m.group(1)}.html{m.group(2) or ""}"', html_body
+            )
+
+            index_link = Path(os.path.relpath(self.output_dir / "index.html", page_dir))
+            nav = f'<nav class="lesson-nav"><a href="{index_link.as_posix()}">← All lessons</a></nav>\n'
+            title = self.page_title(html_body, input_file.stem.replace("_", " "))
+            self.write_output(
+                output_file, self.render_page(title, html_body, page_dir, nav)
+            )
+            self.pages.append((output_file, title))
+
+            self.log(f"✅ Exported {input_file.name} -> {output_file.name}")
+            self.converted_count += 1
+            return True
+        except Exception as e:
+            print(f"❌ Failed to export {input_file}: {e}")
+            return False
+
+    def existing_pages(self) -> List[Tuple[Path, str]]:
+        """Pages already in the output directory, with their ``<title>``."""
+        pages = []
+        for path in sorted(self.output_dir.rglob("*.html")):
+            if path.name == "index.html" or self.assets_dir in path.parents:
+                continue
+            match = TITLE_PATTERN.search(
+                path.read_text(encoding="utf-8", errors="replace")
+            )
+            title = html.unescape(match.group(1)).strip() if match else path.stem
+            pages.append((path, title))
+        return pages
+
+    def write_index(self, include_existing: bool = False) -> None:
+        """Write ``index.html`` listing every exported page.
+
+        With ``include_existing`` (single-file exports) pages left in the
+        output directory by earlier runs are listed too.
+        """
+        pages = dict(self.existing_pages()) if include_existing else {}
+        pages.update(self.pages)
+        items = "\n".join(
+            f'<li><a href="{path.relative_to(self.output_dir).as_posix()}">{html.escape(title)}</a></li>'
+            for path, title in sorted(pages.items())
+        )
+        body = f"<h1>Lessons</h1>\n<ul>\n{items}\n</ul>"
+        self.write_output(
+            self.output_dir / "index.html",
+            self.render_page("Lessons", body, self.output_dir),
+        )
+
+    def prune_assets(self) -> int:
+        """Delete hashed assets (and siblings) no page referenced this run."""
+        if not self.assets_dir.is_dir():
+            return 0
+        removed = 0
+        for path in self.assets_dir.iterdir():
+            name = path.name
+            for suffix in (".gz", ".br"):
+                if name.endswith(suffix):
+                    name = name[: -len(suffix)]
+            if path.is_file() and name not in self.written_assets:
+                path.unlink()
+                removed += 1
+        return removed
+
+    def export_directory(self, input_dir: Path) -> None:
+        """Export every Markdown file under ``input_dir``, then the index."""
+        markdown_files = self.find_markdown_files(input_dir)
+        if not markdown_files:
+            print(f"ℹ️  No markdown files found in {input_dir}")
+            return
+
+        print(f"📄 Found {len(markdown_files)} markdown files to export")
+        index = AssetIndex(input_dir)
+        index.scan_references(markdown_files)
+        self.asset_indexes.insert(0, index)
+        print_asset_summary(index.summary(), index.source_dir)
+
+        for md_file in markdown_files:
+            relative_path = md_file.relative_to(input_dir).with_suffix(".html")
+            self.export_file(md_file, self.output_dir / relative_path)
+
+        self.write_index()
+        removed = self.prune_assets()
+        if removed:
+            self.log(f"🧹 Removed {removed} stale asset file(s)")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Export Markdown lessons as a fast-loading static HTML site."
+    )
+    input_group = parser.add_mutually_exclusive_group()
+    input_group.add_argument(
+        "--directory",
+        type=Path,
+        default=DEFAULT_SOURCE_DIR,
+        help=f"Export every markdown file in a directory (default: {DEFAULT_SOURCE_DIR.as_posix()})",
+    )
+    input_group.add_argument("--file", type=Path, help="Export a single markdown file")
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=DEFAULT_HTML_OUTPUT_DIR,
+        help=f"Output directory (default: {DEFAULT_HTML_OUTPUT_DIR.as_posix()})",
+    )
+    parser.add_argument(
+        "--no-compress",
+        action="store_true",
+        help="Skip the precompressed .gz/.br siblings",
+    )
+    parser.add_argument("--verbose", action="store_true", help="Enable verbose output")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    exporter = MarkdownToHtmlExporter(
+        args.output_dir, verbose=args.verbose, compress=not args.no_compress
+    )
+
+    print("🌐 MD to HTML Exporter - static lesson site")
+    print(f"📁 Output directory: {args.output_dir.absolute()}")
+    if not args.no_compress and not BROTLI_AVAILABLE:
+        print(
+            "ℹ️  brotli not installed - writing .gz siblings only (pip install brotli)"
+        )
+
+    if args.file:
+        if not args.file.is_file():
+            print(f"❌ File does not exist: {args.file}")
+            sys.exit(1)
+        if exporter.export_file(
+            args.file, args.output_dir / args.file.with_suffix(".html").name
+        ):
+            # The page links back to the index, so keep it present and current
+            exporter.write_index(include_existing=True)
+    else:
+        if not args.directory.is_dir():
+            print(f"❌ Directory does not exist: {args.directory}")
+            sys.exit(1)
+        exporter.export_directory(args.directory)
+
+    print("✅ Export complete!")
+    print(f"📊 Pages exported: {exporter.converted_count}")
+    print(
+        f"📦 {exporter.bytes_written / 1024:.0f} KB written, "
+        f"{len(exporter.written_assets)} shared asset(s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
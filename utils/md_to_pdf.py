@@ -39,11 +39,37 @@ Dependencies:
 
 import sys
 import argparse
+import gc
+import json
 import re
+import tempfile
 import urllib.parse
 import hashlib
+import time
+from io import BytesIO
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional
+
+import build_metrics
+from asset_index import AssetIndex, print_summary as print_asset_summary
+from asset_store import ASSET_SCHEME, AssetStore
+from build_cache import DEFAULT_CACHE_DIR, atomic_write_bytes, content_hash
+from search_index import SearchIndexWriter
+from supervisor import (
+    DEFAULT_RETRY_ON,
+    Limits,
+    Supervisor,
+    parse_retry_on,
+    print_failures,
+    supervision_available,
+)
+from work_queue import (
+    DEFAULT_LEASE_SECONDS,
+    WorkQueue,
+    parse_shard,
+    print_summary as print_queue_summary,
+    shard_items,
+)
 
 # Playwright-based PNG renderer for draw.io diagrams
 try:
@@ -57,6 +83,53 @@ except ImportError:
 DEFAULT_SOURCE_DIR = Path("other_formats/markdown_lessons")
 DEFAULT_OUTPUT_DIR = Path("other_formats/pdf_lessons")
 
+# Chunked rendering (--chunked): HTML budget per WeasyPrint layout, and the
+# placeholder scheme that carries internal links across chunk boundaries
+DEFAULT_CHUNK_KB = 512
+CHUNK_LINK_PREFIX = "https://chunk-link.invalid/"
+PAGE_BREAK_DIV = '<div class="page-break"></div>'
+
+# Page break modes; several can be built from one parse with --variants
+PAGE_BREAK_MODES = ("sections", "continuous")
+
+# Only these emojis trigger section page breaks (major activities)
+MAJOR_ACTIVITY_EMOJIS = ("📺", "✍️", "📝", "✅")
+
+# Output PDF -> fingerprint of everything it was built from (--incremental)
+DEFAULT_MANIFEST = DEFAULT_CACHE_DIR / "pdf_manifest.json"
+
+# Named PDF output profiles, passed straight through to WeasyPrint's
+# ``write_pdf`` (WeasyPrint 59+ option names).
+#   print   - lossless image optimisation (JPEG quality untouched; only
+#             images above the 300 DPI cap are resampled), subset fonts
+#   screen  - re-encoded JPEGs, 150 DPI cap, subset fonts (smallest files)
+#   archive - untouched images, full fonts, PDF/A-3b for long-term storage
+PDF_PROFILES = {
+    "print": {
+        "optimize_images": True,
+        "jpeg_quality": None,
+        "dpi": 300,
+        "full_fonts": False,
+        "hinting": True,
+    },
+    "screen": {
+        "optimize_images": True,
+        "jpeg_quality": 70,
+        "dpi": 150,
+        "full_fonts": False,
+        "hinting": False,
+    },
+    "archive": {
+        "optimize_images": False,
+        "jpeg_quality": None,
+        "dpi": None,
+        "full_fonts": True,
+        "hinting": True,
+        "pdf_variant": "pdf/a-3b",
+    },
+}
+DEFAULT_PDF_PROFILE = "print"
+
 # Attempt to import required dependencies with graceful failure
 try:
     from weasyprint import HTML, CSS
@@ -82,6 +155,21 @@ except ImportError:
     and GitHub-like formatting.
 """
 
+# pypdf stitches chunk PDFs together (only needed for --chunked)
+try:
+    from pypdf import PdfReader, PdfWriter
+    from pypdf.generic import (
+        ArrayObject,
+        DictionaryObject,
+        FloatObject,
+        NameObject,
+        NullObject,
+    )
+
+    PYPDF_AVAILABLE = True
+except ImportError:
+    PYPDF_AVAILABLE = False
+
 try:
     import markdown
     import markdown.extensions.extra
@@ -94,17 +182,100 @@ except ImportError as e:
 class MarkdownToPdfConverter:
     """Converts Markdown documents to PDF with GitHub-style formatting."""
 
-    def __init__(self, verbose: bool = False, page_break_mode: str = "sections"):
+    # Subclasses that only reuse the Markdown/HTML stages can opt out
+    requires_weasyprint = True
+
+    def __init__(
+        self,
+        verbose: bool = False,
+        page_break_mode: str = "sections",
+        pdf_profile: str = DEFAULT_PDF_PROFILE,
+        incremental: bool = False,
+        manifest_path: Path = DEFAULT_MANIFEST,
+        chunk_kb: int = 0,
+        variants: Optional[List[str]] = None,
+        layout_jobs: int = 1,
+        render_jobs: int = 4,
+        shard: Optional[tuple] = None,
+        work_queue: Optional[WorkQueue] = None,
+        limits: Optional[Limits] = None,
+        search_index: Optional[SearchIndexWriter] = None,
+    ):
         self.verbose = verbose
         self.converted_count = 0
+        self.skipped_count = 0
         self.page_break_mode = page_break_mode  # "sections" or "continuous"
+        self.pdf_profile = pdf_profile  # key into PDF_PROFILES
 
         # Validate page break mode
-        if page_break_mode not in ["sections", "continuous"]:
+        if page_break_mode not in PAGE_BREAK_MODES:
             raise ValueError("page_break_mode must be 'sections' or 'continuous'")
 
+        # Editions built from each parse; the default is just page_break_mode
+        self.variants = list(variants or [page_break_mode])
+        for variant in self.variants:
+            if variant not in PAGE_BREAK_MODES:
+                raise ValueError(
+                    f"Unknown variant {variant!r} (use sections, continuous)"
+                )
+
+        # Validate output profile
+        if pdf_profile not in PDF_PROFILES:
+            raise ValueError(
+                f"pdf_profile must be one of: {', '.join(sorted(PDF_PROFILES))}"
+            )
+
+        # Decoded images shared by every document written in this batch, so a
+        # diagram used in several lessons is only loaded and optimised once
+        self.image_cache: Dict[str, object] = {}
+
+        # Images and rendered diagrams held in memory as asset:// URLs keyed
+        # by content, so identical bytes are read and embedded only once
+        self.asset_store = AssetStore()
+
+        # One AssetIndex per source tree, built by a single directory scan and
+        # shared by image resolution and the incremental manifest
+        self.asset_indexes: List[AssetIndex] = []
+
+        # Skip PDFs whose sources, images, CSS and settings are unchanged
+        self.incremental = incremental
+        self.manifest_path = manifest_path
+        self.manifest: Dict[str, str] = self.load_manifest() if incremental else {}
+
+        # Lay out long documents in chunks of at most this much HTML (0 = off)
+        self.chunk_kb = chunk_kb
+        if chunk_kb and not PYPDF_AVAILABLE:
+            print(
+                "⚠️  pypdf not available - rendering whole documents (pip install pypdf)"
+            )
+            self.chunk_kb = 0
+
+        # More than one layout worker switches directory builds to the
+        # stage pipeline (build_pipeline.py)
+        self.layout_jobs = layout_jobs
+        self.render_jobs = render_jobs
+
+        # Multi-node directory builds: a static (i, N) share of the files,
+        # and/or files claimed one at a time from a shared lock-file queue
+        self.shard = shard
+        self.work_queue = work_queue
+
+        # Per-document time/memory caps: each file converts in its own
+        # supervised worker process (supervisor.py)
+        self.limits = limits
+        if limits and not supervision_available():
+            print("⚠️  Worker supervision needs fork() - converting without limits")
+            self.limits = None
+        # Supervised workers hand manifest updates back instead of saving
+        self.autosave_manifest = True
+
+        # Full-text search index fed from each parse (search_index.py); keys
+        # are paths relative to the directory being converted
+        self.search_index = search_index
+        self.search_root: Optional[Path] = None
+
         # Check for WeasyPrint availability
-        if not WEASYPRINT_AVAILABLE:
+        if self.requires_weasyprint and not WEASYPRINT_AVAILABLE:
             print(weasyprint_error)
             print(
                 "❌ Cannot proceed without WeasyPrint. "
@@ -117,10 +288,10 @@ class MarkdownToPdfConverter:
         if self.verbose:
             print(f"🔧 {message}")
 
-    def get_github_css(self) -> str:
+    def get_github_css(self, mode: Optional[str] = None) -> str:
         """Return CSS styles that mimic GitHub's markdown rendering for A4 pages."""
         # Adjust spacing for continuous mode
-        compact = self.page_break_mode == "continuous"
+        compact = (mode or self.page_break_mode) == "continuous"
 
         margin = "1.5cm" if compact else "2cm"
         font_size = "10pt" if compact else "11pt"
@@ -478,34 +649,6 @@ class MarkdownToPdfConverter:
         # Convert A), B), C), D) style multiple choice to proper markdown lists
         content = re.sub(r"^([A-D])\) ", r"- **\1)** ", content, flags=re.MULTILINE)
 
-        # Add page breaks before major activity sections only
-        # Skip quizzes (🧪) as they're frequent - only break before videos/exercises
-        if self.page_break_mode == "sections":
-            lines = content.split("\n")
-            processed_lines = []
-            # Only these emojis trigger page breaks (major activities)
-            major_emojis = ("📺", "✍️", "📝", "✅")
-
-            for i, line in enumerate(lines):
-                # Add page break before ## headings with major activity emojis
-                if line.startswith("## ") and i > 0:
-                    has_major_emoji = any(emoji in line for emoji in major_emojis)
-                    if has_major_emoji:
-                        page_break_div = '<div class="page-break"></div>'
-                        if (
-                            processed_lines
-                            and not processed_lines[-1].strip() == page_break_div
-                        ):
-                            processed_lines.append(page_break_div)
-                            processed_lines.append("")
-
-                processed_lines.append(line)
-
-            content = "\n".join(processed_lines)
-            self.log("📄 Applied section page breaks (Mode 1: Major activities)")
-        else:
-            self.log("📄 Continuous layout mode (Mode 2: No section breaks)")
-
         return content
 
     def replace_drawio_iframes(self, content: str, input_file: Path) -> str:
@@ -532,10 +675,10 @@ class MarkdownToPdfConverter:
                 digest = hashlib.sha1(src.encode("utf-8")).hexdigest()[:16]
                 self.log(f"🎨 Rendering draw.io diagram via Playwright [{digest[:8]}]")
 
-                _, png_path = render_iframe_url_to_png(src, cache_dir=assets_dir)
-                file_url = png_path.resolve().as_uri()
+                png_data, _ = render_iframe_url_to_png(src, cache_dir=assets_dir)
+                asset_url = self.asset_store.put(png_data, "image/png")
 
-                return f"![Flowchart diagram]({file_url})"
+                return f"![Flowchart diagram]({asset_url})"
 
             except Exception as e:
                 self.log(f"⚠️  Failed to render draw.io diagram: {e}")
@@ -548,83 +691,139 @@ class MarkdownToPdfConverter:
         return replaced
 
     def fix_image_paths(self, content: str, input_file: Path) -> str:
-        """Fix relative image paths to be absolute paths for PDF generation."""
+        """Point local image references at in-memory assets for PDF generation.
+
+        References are looked up in the source tree's AssetIndex, so repeated
+        images cost a dictionary lookup rather than a resolve/stat chain.
+        """
+        index = self.get_asset_index(input_file)
 
         def replace_image_path(match):
             alt_text = match.group(1)
             image_path = match.group(2)
             title = match.group(3) if match.group(3) else ""
 
-            # Base directory for resolving and caching assets
-            input_dir = input_file.parent
-
-            self.log(f"🖼️  Processing image: {image_path}")
-
-            # Skip HTTP/HTTPS or file:// URLs (draw.io diagrams are now
-            # handled earlier by replace_drawio_iframes as local SVGs)
-            if image_path.startswith(("http://", "https://", "file://")):
-                self.log(f"📌 Skipping (web/file URL): {image_path}")
+            # Skip HTTP/HTTPS, file:// and asset:// URLs (draw.io diagrams are
+            # handled earlier by replace_drawio_iframes as in-memory PNGs)
+            if image_path.startswith(("http://", "https://", "file://", ASSET_SCHEME)):
                 return match.group(0)
 
-            # Calculate absolute path relative to the input file
-            input_dir = input_file.parent
+            entry = index.resolve(image_path, input_file)
+            if entry is None:
+                self.log(f"⚠️  Image not found: {image_path}")
+                return match.group(0)  # Return original if not found
 
-            # Handle different relative path formats
-            if image_path.startswith("/"):
-                # Project-relative path (starts with / but relative to project root)
-                absolute_path = Path.cwd() / image_path.lstrip("/")
-                self.log(f"📁 Project root path: {absolute_path}")
-            else:
-                # Relative path from current file
-                absolute_path = input_dir / image_path
-                self.log(f"📁 Relative path: {absolute_path}")
-
-            # Resolve to get canonical path
-            try:
-                resolved_path = absolute_path.resolve()
-                self.log(f"🔍 Resolved to: {resolved_path}")
-                if resolved_path.exists():
-                    # Convert to file:// URL for WeasyPrint
-                    file_url = resolved_path.as_uri()
-                    self.log(f"🔗 File URL: {file_url}")
-                    if title:
-                        result = f"![{alt_text}]({file_url} {title})"
-                    else:
-                        result = f"![{alt_text}]({file_url})"
-                    self.log(f"✅ Image path converted: {result}")
-                    return result
-                else:
-                    self.log(f"⚠️  Image not found: {absolute_path}")
-                    return match.group(0)  # Return original if not found
-            except Exception as e:
-                self.log(f"⚠️  Error resolving image path {image_path}: {e}")
-                return match.group(0)  # Return original on error
+            # Serve from the in-memory store (identical images share one URL
+            # so they are embedded once)
+            asset_url = self.asset_store.put_file(
+                entry.path, entry.size, entry.mtime_ns
+            )
+            self.log(f"🖼️  {image_path} -> {asset_url}")
+            if title:
+                return f"![{alt_text}]({asset_url} {title})"
+            return f"![{alt_text}]({asset_url})"
 
         # Pattern to match markdown images: ![alt](path "title")
         pattern = r'!\[([^\]]*)\]\(([^)\s]+)(?:\s+"([^"]*)")?\)'
-        original_content = content
-        processed_content = re.sub(pattern, replace_image_path, content)
+        return re.sub(pattern, replace_image_path, content)
+
+    def get_asset_index(self, input_file: Path) -> AssetIndex:
+        """Return the index covering ``input_file``, building one if needed."""
+        absolute = input_file.absolute()
+        for index in self.asset_indexes:
+            if index.source_dir in absolute.parents:
+                return index
+        index = AssetIndex(input_file.parent)
+        index.scan_references([input_file])
+        self.asset_indexes.append(index)
+        return index
+
+    def load_manifest(self) -> Dict[str, str]:
+        """Read the incremental build manifest (empty if missing or corrupt)."""
+        try:
+            return json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def save_manifest(self) -> None:
+        """Write the incremental build manifest atomically."""
+        payload = json.dumps(self.manifest, indent=2, sort_keys=True)
+        atomic_write_bytes(self.manifest_path, payload.encode("utf-8"))
+
+    def build_fingerprint(
+        self, input_file: Path, markdown_content: str, mode: Optional[str] = None
+    ) -> str:
+        """Hash everything a PDF depends on: text, images, CSS and settings."""
+        mode = mode or self.page_break_mode
+        index = self.get_asset_index(input_file)
+        image_hashes = [entry.sha256 for entry in index.assets_for(input_file)]
+        return content_hash(
+            markdown_content,
+            mode,
+            self.pdf_profile,
+            self.get_github_css(mode),
+            *image_hashes,
+        )
 
-        if original_content != processed_content:
-            self.log("📝 Image paths were modified in the content")
-        else:
-            self.log("📝 No image paths were found or modified")
+    def get_pdf_options(self) -> dict:
+        """Return the WeasyPrint ``write_pdf`` options for the active profile."""
+        options = dict(PDF_PROFILES[self.pdf_profile])
+        options["cache"] = self.image_cache
+        return options
 
-        return processed_content
+    def render_markdown_body(self, markdown_content: str, input_file: Path) -> str:
+        """Preprocess and parse markdown, returning the HTML body content.
 
-    def convert_markdown_to_html(self, markdown_content: str, input_file: Path) -> str:
-        """Convert markdown content to HTML with GitHub-style formatting."""
+        The result is the same for every page break mode; the mode-specific
+        page breaks are added afterwards by apply_page_breaks.
+        """
         # Preprocess the markdown (now includes image path fixing)
         processed_content = self.preprocess_markdown(markdown_content, input_file)
 
-        # Setup markdown parser
+        # Setup markdown parser and convert to HTML
         md_parser = self.setup_markdown_parser()
+        html_body = md_parser.convert(processed_content)
 
-        # Convert to HTML
-        html_content = md_parser.convert(processed_content)
+        if self.search_index is not None:
+            with build_metrics.timed("md_to_pdf", "index"):
+                self.search_index.add_html(self.search_key(input_file), html_body)
+        return html_body
 
-        # Wrap in full HTML document
-        full_html = f"""
+    def search_key(self, input_file: Path) -> str:
+        """Document key in the search index, e.g. ``lesson3_selection.md``."""
+        if self.search_root is not None:
+            try:
+                return input_file.relative_to(self.search_root).as_posix()
+            except ValueError:
+                pass
+        return input_file.name
+
+    def apply_page_breaks(self, html_body: str, mode: Optional[str] = None) -> str:
+        """Add page breaks before major activity headings (sections mode).
+
+        Skips quizzes (🧪) as they're frequent - only breaks before
+        videos/exercises, and never before the first element of the page.
+        """
+        if (mode or self.page_break_mode) != "sections":
+            self.log("📄 Continuous layout mode (Mode 2: No section breaks)")
+            return html_body
+
+        def add_break(match):
+            preceding = html_body[: match.start()].rstrip()
+            if (
+                not preceding
+                or preceding.endswith(PAGE_BREAK_DIV)
+                or not any(emoji in match.group(0) for emoji in MAJOR_ACTIVITY_EMOJIS)
+            ):
+                return match.group(0)
+            return f"{PAGE_BREAK_DIV}\n{match.group(0)}"
+
+        self.log("📄 Applied section page breaks (Mode 1: Major activities)")
+        return re.sub(r"<h2\b[^>]*>.*?</h2>", add_break, html_body, flags=re.DOTALL)
+
+    def wrap_html(self, html_content: str, mode: Optional[str] = None) -> str:
+        """Wrap HTML body content in a full document with the GitHub CSS."""
+        return f"""
         <!DOCTYPE html>
         <html lang="en-GB">
         <head>
@@ -632,7 +831,7 @@ class MarkdownToPdfConverter:
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
         <title>Converted Document</title>
             <style>
-                {self.get_github_css()}
+                {self.get_github_css(mode)}
             </style>
         </head>
         <body>
@@ -641,40 +840,251 @@ class MarkdownToPdfConverter:
         </html>
         """
 
-        return full_html
+    def convert_markdown_to_html(self, markdown_content: str, input_file: Path) -> str:
+        """Convert markdown content to HTML with GitHub-style formatting."""
+        html_body = self.render_markdown_body(markdown_content, input_file)
+        return self.wrap_html(self.apply_page_breaks(html_body))
+
+    def split_into_chunks(self, html_body: str) -> List[str]:
+        """Group page-break-separated sections into chunks within the budget.
+
+        Chunks only ever end at an existing page break, so each one starts on
+        a fresh page exactly as it would in a single-pass render.
+        """
+        budget = self.chunk_kb * 1024
+        chunks: List[str] = []
+        current = ""
+        for section in html_body.split(PAGE_BREAK_DIV):
+            if current and len(current) + len(section) > budget:
+                chunks.append(current)
+                current = section
+            else:
+                current = current + PAGE_BREAK_DIV + section if current else section
+        chunks.append(current)
+        return chunks
+
+    def write_pdf_chunked(
+        self, html_body: str, output_file: Path, mode: Optional[str] = None
+    ) -> int:
+        """Render ``html_body`` chunk by chunk and stitch one PDF together.
+
+        Each chunk is laid out on its own, so peak memory follows the largest
+        chunk rather than the whole document. "Page X of Y" footers are
+        stamped afterwards from a cheap overlay of empty pages, and internal
+        links are pointed at their targets once every chunk's page offset is
+        known. Returns the number of chunks.
+        """
+        css = self.get_github_css(mode)
+        options = self.get_pdf_options()
+        no_footer = CSS(string="@page { @bottom-center { content: none; } }")
+        chunks = self.split_into_chunks(html_body)
+
+        # Same-document links would break across chunks, so each becomes a
+        # placeholder URL that relink_chunks resolves after stitching
+        def to_placeholder(match):
+            return f'href="{CHUNK_LINK_PREFIX}{urllib.parse.quote(match.group(1))}"'
+
+        destinations: Dict[str, tuple] = {}
+        page_offset = 0
+        with tempfile.TemporaryDirectory() as tmp:
+            chunk_files = []
+            for number, chunk in enumerate(chunks):
+                chunk_file = Path(tmp) / f"chunk_{number:04d}.pdf"
+                chunk_html = re.sub(r'href="#([^"]+)"', to_placeholder, chunk)
+                HTML(
+                    string=self.wrap_html(chunk_html, mode),
+                    url_fetcher=self.asset_store.url_fetcher,
+                ).write_pdf(
+                    str(chunk_file),
+                    stylesheets=[CSS(string=css), no_footer],
+                    **options,
+                )
+                reader = PdfReader(str(chunk_file))
+                for name, destination in reader.named_destinations.items():
+                    page_index = reader.get_destination_page_number(destination)
+                    destinations.setdefault(
+                        str(name).lstrip("/"),
+                        (page_offset + page_index, destination.left, destination.top),
+                    )
+                page_offset += len(reader.pages)
+                chunk_files.append(chunk_file)
+                self.log(
+                    f"🧩 Chunk {number + 1}/{len(chunks)}: "
+                    f"{len(chunk) // 1024} KB HTML, {len(reader.pages)} page(s)"
+                )
+                del reader
+                gc.collect()
+
+            # Empty pages that only carry the footer, numbered for the whole PDF
+            overlay_body = '<div style="break-before: page"></div>'.join(
+                ["<div></div>"] * page_offset
+            )
+            overlay = PdfReader(
+                BytesIO(
+                    HTML(string=self.wrap_html(overlay_body, mode)).write_pdf(
+                        stylesheets=[CSS(string=css)]
+                    )
+                )
+            )
+
+            writer = PdfWriter()
+            for chunk_file in chunk_files:
+                writer.append(str(chunk_file))
+            for page, footer in zip(writer.pages, overlay.pages):
+                page.merge_page(footer)
+            self.relink_chunks(writer, destinations)
+            with open(output_file, "wb") as fh:
+                writer.write(fh)
+        return len(chunks)
+
+    def relink_chunks(self, writer, destinations: Dict[str, tuple]) -> None:
+        """Turn placeholder links into GoTo actions on the stitched pages."""
+        for page in writer.pages:
+            for annotation_ref in page.get("/Annots") or []:
+                annotation = annotation_ref.get_object()
+                action = annotation.get("/A")
+                if action is None:
+                    continue
+                action = action.get_object()
+                uri = str(action.get("/URI", ""))
+                if not uri.startswith(CHUNK_LINK_PREFIX):
+                    continue
+
+                name = urllib.parse.unquote(uri[len(CHUNK_LINK_PREFIX) :])
+                target = destinations.get(name)
+                if target is None:
+                    self.log(f"⚠️  Internal link target not found: #{name}")
+                    del annotation["/A"]
+                    continue
+
+                page_index, left, top = target
+                annotation[NameObject("/A")] = DictionaryObject(
+                    {
+                        NameObject("/S"): NameObject("/GoTo"),
+                        NameObject("/D"): ArrayObject(
+                            [
+                                writer.pages[page_index].indirect_reference,
+                                NameObject("/XYZ"),
+                                NullObject() if left is None else FloatObject(left),
+                                NullObject() if top is None else FloatObject(top),
+                                NullObject(),
+                            ]
+                        ),
+                    }
+                )
 
     def convert_file_to_pdf(self, input_file: Path, output_file: Path) -> bool:
         """Convert a single markdown file to PDF."""
+        return self.convert_file_variants(
+            input_file, {self.page_break_mode: output_file}
+        )
+
+    def convert_file_variants(self, input_file: Path, outputs: Dict[str, Path]) -> bool:
+        """Convert one markdown file to a PDF per page break mode.
+
+        Reading, preprocessing, iframe rendering, markdown parsing and image
+        resolution run once; only page breaks, CSS and layout differ.
+        """
         try:
-            mode_desc = (
-                "sections" if self.page_break_mode == "sections" else "continuous"
+            self.log(
+                f"Converting {input_file.name} to PDF "
+                f"(mode: {', '.join(outputs)}, profile: {self.pdf_profile})..."
             )
-            self.log(f"Converting {input_file.name} to PDF " f"(mode: {mode_desc})...")
 
             # Read markdown content
             with open(input_file, "r", encoding="utf-8") as f:
                 markdown_content = f.read()
 
-            # Convert to HTML (now includes image path fixing)
-            html_content = self.convert_markdown_to_html(markdown_content, input_file)
-
-            # Create output directory if it doesn't exist
-            output_file.parent.mkdir(parents=True, exist_ok=True)
+            pending = self.pending_outputs(input_file, markdown_content, outputs)
+            if not pending:
+                return True
 
-            # Convert HTML to PDF using WeasyPrint
-            html_doc = HTML(string=html_content)
-            html_doc.write_pdf(
-                str(output_file), stylesheets=[CSS(string=self.get_github_css())]
-            )
+            # Convert to HTML once (now includes image path fixing)
+            with build_metrics.timed("md_to_pdf", "parse"):
+                html_body = self.render_markdown_body(markdown_content, input_file)
 
-            self.log(f"✅ Successfully converted {input_file.name}")
-            self.converted_count += 1
+            for mode, (output_file, fingerprint) in pending.items():
+                with build_metrics.timed("md_to_pdf", "layout"):
+                    self.write_variant(html_body, mode, output_file)
+                self.record_output(input_file, mode, output_file, fingerprint)
             return True
 
         except Exception as e:
             print(f"❌ Failed to convert {input_file}: {e}")
+            build_metrics.DOCUMENTS.inc(tool="md_to_pdf", status="failed")
             return False
 
+    def pending_outputs(
+        self, input_file: Path, markdown_content: str, outputs: Dict[str, Path]
+    ) -> Dict[str, tuple]:
+        """Return ``{mode: (output_file, fingerprint)}`` for outputs to build.
+
+        With --incremental, outputs whose fingerprint matches the manifest are
+        skipped (and counted); otherwise the fingerprint is None.
+        """
+        pending = {}
+        for mode, output_file in outputs.items():
+            fingerprint = None
+            if self.incremental:
+                fingerprint = self.build_fingerprint(input_file, markdown_content, mode)
+                if (
+                    output_file.exists()
+                    and self.manifest.get(str(output_file)) == fingerprint
+                ):
+                    self.log(f"⏭️  {input_file.name} ({mode}) unchanged - skipping")
+                    self.skipped_count += 1
+                    build_metrics.DOCUMENTS.inc(tool="md_to_pdf", status="skipped")
+                    continue
+            pending[mode] = (output_file, fingerprint)
+        return pending
+
+    def record_output(
+        self, input_file: Path, mode: str, output_file: Path, fingerprint: Optional[str]
+    ) -> None:
+        """Count a written PDF and remember its fingerprint for --incremental."""
+        if fingerprint:
+            self.manifest[str(output_file)] = fingerprint
+            if self.autosave_manifest:
+                self.save_manifest()
+
+        self.log(f"✅ Successfully converted {input_file.name} ({mode})")
+        self.converted_count += 1
+        build_metrics.DOCUMENTS.inc(tool="md_to_pdf", status="converted")
+        build_metrics.record_file("md_to_pdf", "pdf", output_file)
+
+    def write_variant(self, html_body: str, mode: str, output_file: Path) -> None:
+        """Lay out one page break mode of a parsed document as a PDF."""
+        html_body = self.apply_page_breaks(html_body, mode)
+
+        # Create output directory if it doesn't exist
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+
+        if (
+            self.chunk_kb
+            and len(html_body) > self.chunk_kb * 1024
+            and PAGE_BREAK_DIV in html_body
+        ):
+            # Long document: lay out one chunk at a time
+            chunk_count = self.write_pdf_chunked(html_body, output_file, mode)
+            self.log(f"🧩 Stitched {chunk_count} chunk(s) into {output_file.name}")
+        else:
+            # Convert HTML to PDF using WeasyPrint
+            html_doc = HTML(
+                string=self.wrap_html(html_body, mode),
+                url_fetcher=self.asset_store.url_fetcher,
+            )
+            html_doc.write_pdf(
+                str(output_file),
+                stylesheets=[CSS(string=self.get_github_css(mode))],
+                **self.get_pdf_options(),
+            )
+
+    def variant_outputs(self, output_dir: Path, relative_path: Path) -> Dict[str, Path]:
+        """Output path per variant: ``output_dir/<mode>/...`` when several."""
+        if len(self.variants) == 1:
+            return {self.variants[0]: output_dir / relative_path}
+        return {mode: output_dir / mode / relative_path for mode in self.variants}
+
     def find_markdown_files(self, directory: Path) -> List[Path]:
         """Find all markdown files in a directory and its subdirectories."""
         markdown_files = []
@@ -699,15 +1109,141 @@ class MarkdownToPdfConverter:
             return
 
         print(f"📄 Found {len(markdown_files)} markdown files to convert")
+        self.search_root = input_dir
 
+        # Index every image in the tree once, then report problems together
+        index = AssetIndex(input_dir)
+        index.scan_references(markdown_files)
+        self.asset_indexes.insert(0, index)
+        print_asset_summary(index.summary(), index.source_dir)
+
+        jobs = []
         for md_file in markdown_files:
             # Calculate relative path to maintain directory structure
             relative_path = md_file.relative_to(input_dir)
 
-            # Create output path with .pdf extension
-            output_path = output_dir / relative_path.with_suffix(".pdf")
+            # Create output paths with .pdf extension (one per variant)
+            outputs = self.variant_outputs(
+                output_dir, relative_path.with_suffix(".pdf")
+            )
+            jobs.append((md_file, outputs))
+
+        if self.shard:
+            jobs = shard_items(jobs, self.shard)
+            print(
+                f"🧩 Shard {self.shard[0]}/{self.shard[1]}: {len(jobs)} of {len(markdown_files)} files"
+            )
+
+        if self.work_queue is not None:
+            self.convert_queued(jobs, input_dir)
+            return
+
+        if self.limits:
+            self.convert_supervised(jobs)
+        elif self.layout_jobs > 1 and len(jobs) > 1:
+            # Overlap diagram renders, parsing and layout across files
+            from build_pipeline import BuildPipeline, print_timings
+
+            pipeline = BuildPipeline(self, self.layout_jobs, self.render_jobs)
+            for result in pipeline.run(jobs):
+                if not result.ok:
+                    print(f"❌ Failed to convert {result.input_file}: {result.error}")
+                    build_metrics.DOCUMENTS.inc(tool="md_to_pdf", status="failed")
+            print_timings(pipeline)
+        else:
+            for md_file, outputs in jobs:
+                self.convert_file_variants(md_file, outputs)
+
+        if self.search_index is not None and not self.shard:
+            self.update_search_index(markdown_files)
+
+    def update_search_index(self, markdown_files: List[Path]) -> None:
+        """Index files that were skipped unparsed and drop deleted ones."""
+        for md_file in markdown_files:
+            if not self.search_index.has(self.search_key(md_file)):
+                # Unchanged PDF, but the index has never seen it
+                try:
+                    self.render_markdown_body(
+                        md_file.read_text(encoding="utf-8"), md_file
+                    )
+                except Exception as e:
+                    print(f"⚠️  Could not index {md_file}: {e}")
+        dropped = self.search_index.retain(
+            self.search_key(md_file) for md_file in markdown_files
+        )
+        for key in dropped:
+            self.log(f"🔎 Removed {key} from the search index")
+
+    def convert_queued(self, jobs: List[tuple], input_dir: Path) -> None:
+        """Convert files claimed one at a time from the shared work queue."""
+        by_key = {
+            md_file.relative_to(input_dir).as_posix(): (md_file, outputs)
+            for md_file, outputs in jobs
+        }
 
-            self.convert_file_to_pdf(md_file, output_path)
+        def work(key: str) -> List[Path]:
+            md_file, outputs = by_key[key]
+            if self.limits:
+                ok = self.convert_supervised([(md_file, outputs)])
+            else:
+                ok = self.convert_file_variants(md_file, outputs)
+            if not ok:
+                raise RuntimeError(f"could not convert {md_file.name}")
+            return list(outputs.values())
+
+        summary = self.work_queue.run(list(by_key), work)
+        print_queue_summary(self.work_queue, summary)
+
+    def convert_supervised(self, jobs: List[tuple]) -> bool:
+        """Convert each file in a capped worker process; True if all succeeded.
+
+        Up to --jobs files convert at once. A worker that overruns its time
+        or memory cap is killed, its partial PDFs are removed and the other
+        workers carry on.
+        """
+        supervisor = Supervisor(self.limits, jobs=self.layout_jobs)
+        tasks = [
+            (md_file.name, _convert_in_worker, (self, md_file, outputs))
+            for md_file, outputs in jobs
+        ]
+        outputs_by_name = {md_file.name: outputs for md_file, outputs in jobs}
+        results = []
+        for result in supervisor.run(tasks):
+            results.append(result)
+            build_metrics.STAGE_SECONDS.observe(
+                result.seconds, tool="md_to_pdf", stage="document"
+            )
+            if result.ok:
+                self._apply_worker_result(result.value)
+                continue
+            build_metrics.DOCUMENTS.inc(tool="md_to_pdf", status="failed")
+            for output_file in outputs_by_name[result.name].values():
+                # Written (or half written) by the attempt that failed
+                if (
+                    output_file.exists()
+                    and output_file.stat().st_mtime >= result.started
+                ):
+                    output_file.unlink()
+
+        print_failures(results)
+        return all(result.ok for result in results)
+
+    def _apply_worker_result(self, value: dict) -> None:
+        """Fold a worker's counts, metrics and manifest entries into this run."""
+        self.converted_count += len(value["written"])
+        self.skipped_count += value["skipped"]
+        for output_file in value["written"]:
+            build_metrics.DOCUMENTS.inc(tool="md_to_pdf", status="converted")
+            build_metrics.record_file("md_to_pdf", "pdf", Path(output_file))
+        if value["skipped"]:
+            build_metrics.DOCUMENTS.inc(
+                value["skipped"], tool="md_to_pdf", status="skipped"
+            )
+        if value["manifest"]:
+            self.manifest.update(value["manifest"])
+            self.save_manifest()
+        if value["search"] and self.search_index is not None:
+            self.search_index.update(value["search"])
 
     def convert_single_file(self, input_file: Path, output_dir: Path) -> None:
         """Convert a single markdown file to PDF."""
@@ -719,10 +1255,54 @@ class MarkdownToPdfConverter:
             print(f"❌ File is not a markdown file: {input_file}")
             return
 
-        # Create output filename
-        output_file = output_dir / input_file.with_suffix(".pdf").name
+        # Create output filenames (one per variant)
+        outputs = self.variant_outputs(
+            output_dir, Path(input_file.with_suffix(".pdf").name)
+        )
 
-        self.convert_file_to_pdf(input_file, output_file)
+        if self.limits:
+            self.convert_supervised([(input_file, outputs)])
+        else:
+            self.convert_file_variants(input_file, outputs)
+
+
+def _convert_in_worker(
+    converter: MarkdownToPdfConverter, md_file: Path, outputs: Dict[str, Path]
+) -> dict:
+    """Supervised worker body: convert one file and report what changed."""
+    converter.autosave_manifest = False
+    manifest_before = dict(converter.manifest)
+    indexed_before = (
+        set(converter.search_index.changed) if converter.search_index else set()
+    )
+    skipped_before = converter.skipped_count
+    written = []
+    record_output = converter.record_output
+
+    def record_and_remember(input_file, mode, output_file, fingerprint):
+        written.append(str(output_file))
+        record_output(input_file, mode, output_file, fingerprint)
+
+    # This process is a throwaway fork, so patching the instance is fine
+    converter.record_output = record_and_remember
+    if not converter.convert_file_variants(md_file, outputs):
+        raise RuntimeError("conversion failed (see the message above)")
+    return {
+        "written": written,
+        "skipped": converter.skipped_count - skipped_before,
+        "manifest": {
+            path: fingerprint
+            for path, fingerprint in converter.manifest.items()
+            if manifest_before.get(path) != fingerprint
+        },
+        "search": (
+            converter.search_index.changed_records(
+                converter.search_index.changed - indexed_before
+            )
+            if converter.search_index
+            else {}
+        ),
+    }
 
 
 def main():
@@ -738,6 +1318,14 @@ Examples:
   %(prog)s --file docs/setup-guide.md --verbose    # Verbose output
   %(prog)s --file README.md --page-break-mode sections     # Mode 1 (default)
   %(prog)s --file README.md --page-break-mode continuous   # Mode 2
+  %(prog)s --all --variants sections,continuous  # Both editions, one parse
+  %(prog)s --all --profile screen  # Smaller PDFs for download
+  %(prog)s --all --jobs 4          # Pipelined build, 4 layout workers
+
+Output Profiles:
+  print (default): Lossless image optimisation, 300 DPI cap, subset fonts
+  screen: Re-encoded JPEGs at 150 DPI - smallest files for slow networks
+  archive: Original images, full fonts, PDF/A-3b
 
 Page Break Modes:
   Mode 1 (sections): Each ## heading starts a new page - good for exercises
@@ -779,6 +1367,128 @@ educational content styling.
     # Utility options
     parser.add_argument("--verbose", action="store_true", help="Enable verbose output")
 
+    parser.add_argument(
+        "--chunked",
+        nargs="?",
+        type=int,
+        const=DEFAULT_CHUNK_KB,
+        default=0,
+        metavar="KB",
+        help=(
+            "Bound memory on long documents: lay out at most KB of HTML at a "
+            "time, split at section page breaks, and stitch the PDF together "
+            f"(default budget when given: {DEFAULT_CHUNK_KB} KB; needs pypdf)"
+        ),
+    )
+
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help=(
+            "Layout worker processes; above 1, directory builds run as a "
+            "pipeline that renders diagrams for the next file while earlier "
+            "files are laid out (default: 1)"
+        ),
+    )
+
+    parser.add_argument(
+        "--render-jobs",
+        type=int,
+        default=4,
+        help="Concurrent draw.io renders in pipeline builds (default: 4)",
+    )
+
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        metavar="i/N",
+        help="Directory builds: convert only this node's share (every N-th file from the i-th)",
+    )
+
+    parser.add_argument(
+        "--queue",
+        type=Path,
+        metavar="DIR",
+        help=(
+            "Directory builds: share the files with other nodes through lock "
+            "files in DIR on a shared filesystem (see work_queue.py)"
+        ),
+    )
+
+    parser.add_argument(
+        "--lease",
+        type=float,
+        default=DEFAULT_LEASE_SECONDS,
+        help=f"Seconds a --queue claim lasts without renewal (default: {DEFAULT_LEASE_SECONDS})",
+    )
+
+    parser.add_argument(
+        "--doc-timeout",
+        type=float,
+        metavar="SECONDS",
+        help=(
+            "Convert each file in a supervised worker process and kill it "
+            "(and any browser it started) after SECONDS of wall time"
+        ),
+    )
+
+    parser.add_argument(
+        "--max-memory",
+        type=int,
+        metavar="MB",
+        help="Cap each supervised worker's memory at MB megabytes (implies supervised workers)",
+    )
+
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=0,
+        help="Times to re-run a supervised file that failed in a --retry-on way (default: 0)",
+    )
+
+    parser.add_argument(
+        "--retry-on",
+        type=parse_retry_on,
+        default=DEFAULT_RETRY_ON,
+        metavar="KINDS",
+        help=(
+            "Comma-separated failures worth a retry: timeout, memory, crash, "
+            f"error (default: {','.join(DEFAULT_RETRY_ON)})"
+        ),
+    )
+
+    parser.add_argument(
+        "--metrics-file",
+        type=Path,
+        metavar="PATH",
+        help=(
+            "Write Prometheus metrics for this run (documents, diagram cache "
+            "hits, stage timings) to PATH, e.g. for node_exporter's textfile "
+            "collector"
+        ),
+    )
+
+    parser.add_argument(
+        "--search-index",
+        type=Path,
+        metavar="PATH",
+        help=(
+            "Keep the full-text search index at PATH (e.g. "
+            "other_formats/search_index.bin) up to date from the parsed lessons; "
+            "query it with search_index.py"
+        ),
+    )
+
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help=(
+            "Skip files whose markdown, images, CSS and settings are unchanged "
+            f"since the last build (manifest: {DEFAULT_MANIFEST.as_posix()})"
+        ),
+    )
+
     parser.add_argument(
         "--page-break-mode",
         type=str,
@@ -790,11 +1500,64 @@ educational content styling.
         ),
     )
 
+    parser.add_argument(
+        "--variants",
+        type=lambda text: [part.strip() for part in text.split(",") if part.strip()],
+        help=(
+            "Comma-separated page break modes to build from one parse, e.g. "
+            '"sections,continuous"; each goes to OUTPUT_DIR/<mode>/ '
+            "(overrides --page-break-mode)"
+        ),
+    )
+
+    parser.add_argument(
+        "--profile",
+        type=str,
+        choices=sorted(PDF_PROFILES),
+        default=DEFAULT_PDF_PROFILE,
+        help=(
+            "PDF output profile controlling image optimisation, JPEG quality, "
+            f"DPI cap and font subsetting (default: {DEFAULT_PDF_PROFILE})"
+        ),
+    )
+
     args = parser.parse_args()
+    started = time.perf_counter()
+
+    if args.variants:
+        unknown = [mode for mode in args.variants if mode not in PAGE_BREAK_MODES]
+        if unknown:
+            parser.error(f"unknown variant(s): {', '.join(unknown)}")
+        args.page_break_mode = args.variants[0]
+
+    search_index = None
+    if args.search_index:
+        if args.shard or args.queue:
+            print(
+                "⚠️  --search-index covers a whole build, not one node's share - "
+                "run search_index.py build once every node has finished"
+            )
+        else:
+            search_index = SearchIndexWriter(args.search_index)
 
-    # Initialize converter with page break mode
+    # Initialize converter with page break mode and output profile
     converter = MarkdownToPdfConverter(
-        verbose=args.verbose, page_break_mode=args.page_break_mode
+        verbose=args.verbose,
+        page_break_mode=args.page_break_mode,
+        pdf_profile=args.profile,
+        incremental=args.incremental,
+        chunk_kb=args.chunked,
+        variants=args.variants,
+        layout_jobs=args.jobs,
+        render_jobs=args.render_jobs,
+        shard=args.shard,
+        work_queue=WorkQueue(args.queue, args.lease) if args.queue else None,
+        limits=(
+            Limits(args.doc_timeout, args.max_memory, args.retries, args.retry_on)
+            if args.doc_timeout or args.max_memory
+            else None
+        ),
+        search_index=search_index,
     )
 
     # Create output directory
@@ -815,7 +1578,11 @@ educational content styling.
         if args.page_break_mode == "sections"
         else "No page breaks between sections"
     )
-    print(f"📄 Page break mode: {mode_name} ({mode_desc})")
+    if args.variants and len(args.variants) > 1:
+        print(f"📄 Variants: {', '.join(args.variants)} (one parse, one layout each)")
+    else:
+        print(f"📄 Page break mode: {mode_name} ({mode_desc})")
+    print(f"🗜️  Output profile: {args.profile}")
     print()
 
     # Process based on arguments
@@ -846,6 +1613,8 @@ educational content styling.
     # Summary
     print("✅ Conversion complete!")
     print(f"📊 Files converted: {converter.converted_count}")
+    if converter.skipped_count:
+        print(f"⏭️  Files unchanged (skipped): {converter.skipped_count}")
     print(f"📁 Output location: {output_dir.absolute()}")
 
     if converter.converted_count > 0:
@@ -854,6 +1623,18 @@ educational content styling.
             "GitHub-style markdown rendering"
         )
 
+    if search_index is not None and search_index.save():
+        print(
+            f"🔎 Search index: {args.search_index} "
+            f"({len(search_index.changed)} of {len(search_index.documents)} document(s) updated)"
+        )
+
+    if args.metrics_file:
+        failed = build_metrics.DOCUMENTS.value(tool="md_to_pdf", status="failed")
+        build_metrics.record_run("md_to_pdf", time.perf_counter() - started, not failed)
+        build_metrics.write_textfile(args.metrics_file)
+        print(f"📈 Metrics written to {args.metrics_file}")
+
 
 if __name__ == "__main__":
     main()
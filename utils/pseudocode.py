@@ -0,0 +1,742 @@
+#!/usr/bin/env python3
+"""
+Executable HSC pseudocode with per-line operation counting.
+
+Runs the ``BEGIN ... END`` pseudocode blocks from the lesson Markdown, such
+as the Counter, Accumulator and Flag examples in lesson 8, and counts how
+many times each line executes. Profiling a block over growing inputs turns
+the pseudocode into something we can measure.
+
+Supported dialect (NESA HSC course specifications):
+- BEGIN Name / BEGIN Name(params) ... END Name
+- SET x TO expr, x = expr, INPUT x, OUTPUT expr, DISPLAY expr, RETURN expr
+- IF cond THEN / ELSEIF cond THEN / ELSE / ENDIF
+- WHILE cond / ENDWHILE, REPEAT / UNTIL cond
+- FOR i = a TO b [STEP s] / NEXT i, FOR EACH x IN list / NEXT
+- CASEWHERE x / value: statement / OTHERWISE: statement / ENDCASE
+- APPEND item TO list, calls to other subprograms, recursion
+- Operators AND, OR, NOT, MOD, DIV, =, <>, ≠, ≤, ≥, × and LENGTH(...)
+- Comments starting with ' or //
+
+Parsed programs and compiled expressions are cached, so re-running a block
+inside a benchmark loop only pays for execution.
+
+Usage:
+    # List the runnable blocks in a lesson
+    python3 utils/pseudocode.py other_formats/markdown_lessons/lesson8_algorithm_patterns.md --list
+
+    # Run one block and show its per-line operation counts
+    python3 utils/pseudocode.py other_formats/markdown_lessons/lesson8_algorithm_patterns.md --run CountPassing
+
+    # Operation-count profile as the input list grows
+    python3 utils/pseudocode.py other_formats/markdown_lessons/lesson8_algorithm_patterns.md \\
+        --profile CountPassing --bind scores --sizes 10,100,1000,10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import random
+import re
+import sys
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_MAX_STEPS = 10_000_000
+
+
+class PseudocodeError(Exception):
+    """A parse or runtime error, tagged with the pseudocode line number."""
+
+    def __init__(self, message: str, line: int = 0):
+        super().__init__(f"line {line}: {message}" if line else message)
+        self.line = line
+
+
+# ---------------------------------------------------------------------------
+# Expressions
+# ---------------------------------------------------------------------------
+
+_STRING_RE = re.compile(r'("[^"]*")')
+_WORD_OPERATORS = [
+    (re.compile(r"\bAND\b"), " and "),
+    (re.compile(r"\bOR\b"), " or "),
+    (re.compile(r"\bNOT\b"), " not "),
+    (re.compile(r"\bMOD\b"), " % "),
+    (re.compile(r"\bDIV\b"), " // "),
+    (re.compile(r"\bTRUE\b"), "True"),
+    (re.compile(r"\bFALSE\b"), "False"),
+    (re.compile(r"\bLENGTH\s*\("), "len("),
+]
+_SYMBOL_OPERATORS = [
+    ("≠", "!="),
+    ("<>", "!="),
+    ("≤", "<="),
+    ("≥", ">="),
+    ("×", "*"),
+    ("÷", "/"),
+]
+_EQUALS_RE = re.compile(r"(?<![<>!=])=(?!=)")
+
+
+def _hsc_add(left, right):
+    """``+`` joins text when either side is a string, as in OUTPUT "x: " + x."""
+    if isinstance(left, str) or isinstance(right, str):
+        return f"{left}{right}"
+    return left + right
+
+
+class _AddRewriter(ast.NodeTransformer):
+    def visit_BinOp(self, node: ast.BinOp) -> ast.AST:
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Add):
+            return ast.copy_location(
+                ast.Call(
+                    func=ast.Name(id="_hsc_add", ctx=ast.Load()),
+                    args=[node.left, node.right],
+                    keywords=[],
+                ),
+                node,
+            )
+        return node
+
+
+def translate_expression(text: str) -> str:
+    """Translate an HSC expression into Python source (strings untouched)."""
+    parts = _STRING_RE.split(text)
+    for i in range(0, len(parts), 2):  # even indices are outside strings
+        segment = parts[i]
+        for symbol, python in _SYMBOL_OPERATORS:
+            segment = segment.replace(symbol, python)
+        for pattern, python in _WORD_OPERATORS:
+            segment = pattern.sub(python, segment)
+        parts[i] = _EQUALS_RE.sub("==", segment)
+    return "".join(parts).strip()
+
+
+@lru_cache(maxsize=4096)
+def compile_expression(text: str, line: int = 0):
+    """Compile an HSC expression to a Python code object (cached)."""
+    source = translate_expression(text)
+    try:
+        tree = ast.parse(source, mode="eval")
+    except SyntaxError as err:
+        raise PseudocodeError(f"cannot understand expression {text!r}", line) from err
+    tree = ast.fix_missing_locations(_AddRewriter().visit(tree))
+    return compile(tree, f"<pseudocode line {line}>", "eval")
+
+
+# ---------------------------------------------------------------------------
+# Statements
+# ---------------------------------------------------------------------------
+
+
+class Stmt:
+    """One executable statement; ``kind`` selects the interpreter branch."""
+
+    __slots__ = ("kind", "line", "text", "args")
+
+    def __init__(self, kind: str, line: int, text: str, *args):
+        self.kind = kind
+        self.line = line
+        self.text = text
+        self.args = args
+
+
+@dataclass
+class Subprogram:
+    name: str
+    params: List[str]
+    body: List[Stmt]
+    line: int
+
+
+@dataclass
+class Program:
+    subprograms: Dict[str, Subprogram]
+    main: str
+
+
+@dataclass
+class RunResult:
+    """Outputs, return value and per-line execution counts of one run."""
+
+    outputs: List[str] = field(default_factory=list)
+    return_value: object = None
+    line_counts: Dict[int, int] = field(default_factory=dict)
+
+    @property
+    def steps(self) -> int:
+        return sum(self.line_counts.values())
+
+
+def _strip_comment(line: str) -> str:
+    """Remove ' and // comments that are outside double-quoted strings."""
+    parts = _STRING_RE.split(line)
+    for i in range(0, len(parts), 2):
+        for marker in ("//", "'"):
+            cut = parts[i].find(marker)
+            if cut != -1:
+                return ("".join(parts[:i]) + parts[i][:cut]).rstrip()
+    return line.rstrip()
+
+
+def _source_lines(source: str) -> List[Tuple[int, str]]:
+    lines = []
+    for number, raw in enumerate(source.splitlines(), start=1):
+        text = _strip_comment(raw).strip()
+        if text and not text.startswith(("#", '"""')):
+            lines.append((number, text))
+    return lines
+
+
+_BEGIN_RE = re.compile(r"BEGIN\s+(\w+)\s*(?:\((.*)\))?$")
+_SET_RE = re.compile(r"SET\s+(.+?)\s+TO\s+(.+)$")
+_FOR_RE = re.compile(r"FOR\s+(\w+)\s*=\s*(.+?)\s+TO\s+(.+?)(?:\s+STEP\s+(.+))?$")
+_FOR_EACH_RE = re.compile(r"FOR\s+EACH\s+(\w+)\s+IN\s+(.+)$")
+_APPEND_RE = re.compile(r"APPEND\s+(.+)\s+TO\s+(.+)$")
+_ASSIGN_RE = re.compile(r"([A-Za-z_]\w*(?:\[.+\])?)\s*=(?!=)\s*(.+)$")
+_CASE_RE = re.compile(r"(.+?)\s*:\s*(.+)$")
+
+
+class _Parser:
+    def __init__(self, lines: List[Tuple[int, str]]):
+        self.lines = lines
+        self.pos = 0
+
+    def parse_program(self) -> Program:
+        subprograms: Dict[str, Subprogram] = {}
+        while self.pos < len(self.lines):
+            line, text = self.lines[self.pos]
+            match = _BEGIN_RE.match(text)
+            if not match:
+                raise PseudocodeError(f"expected BEGIN, found {text!r}", line)
+            self.pos += 1
+            name = match.group(1)
+            params = [p.strip() for p in (match.group(2) or "").split(",") if p.strip()]
+            body, _ = self.parse_block(("END",))
+            subprograms[name] = Subprogram(name, params, body, line)
+        if not subprograms:
+            raise PseudocodeError("no BEGIN ... END block found")
+        return Program(subprograms, main=next(iter(subprograms)))
+
+    def parse_block(self, terminators: Tuple[str, ...]) -> Tuple[List[Stmt], str]:
+        """Parse statements until a line starting with one of ``terminators``."""
+        body: List[Stmt] = []
+        while self.pos < len(self.lines):
+            line, text = self.lines[self.pos]
+            word = text.split()[0]
+            if word in terminators:
+                self.pos += 1
+                return body, text
+            self.pos += 1
+            body.append(self.parse_statement(line, text, word))
+        raise PseudocodeError(f"missing {' or '.join(terminators)}")
+
+    def parse_statement(self, line: int, text: str, word: str) -> Stmt:
+        expr = compile_expression
+        if word == "SET":
+            match = _SET_RE.match(text)
+            if not match:
+                raise PseudocodeError(f"expected SET x TO value: {text!r}", line)
+            return self._assignment(line, text, match.group(1), match.group(2))
+        if word in ("OUTPUT", "DISPLAY", "Display", "PRINT"):
+            rest = text[len(word) :].strip()
+            return Stmt("output", line, text, expr(rest, line))
+        if word == "INPUT":
+            return Stmt("input", line, text, text[len(word) :].strip())
+        if word == "RETURN":
+            rest = text[len(word) :].strip()
+            return Stmt("return", line, text, expr(rest, line) if rest else None)
+        if word == "IF":
+            return self._if(line, text)
+        if word == "WHILE":
+            cond = expr(text[len(word) :].strip(), line)
+            body, _ = self.parse_block(("ENDWHILE",))
+            return Stmt("while", line, text, cond, body)
+        if word == "REPEAT":
+            body, end = self.parse_block(("UNTIL",))
+            return Stmt(
+                "repeat", line, text, body, expr(end[len("UNTIL") :].strip(), line)
+            )
+        if word == "FOR":
+            return self._for(line, text)
+        if word == "CASEWHERE":
+            return self._case(line, text)
+        if word == "APPEND":
+            match = _APPEND_RE.match(text)
+            if not match:
+                raise PseudocodeError(f"expected APPEND item TO list: {text!r}", line)
+            return Stmt(
+                "append",
+                line,
+                text,
+                expr(match.group(1), line),
+                expr(match.group(2), line),
+            )
+        match = _ASSIGN_RE.match(text)
+        if match:
+            return self._assignment(line, text, match.group(1), match.group(2))
+        return Stmt("expr", line, text, expr(text, line))
+
+    def _assignment(self, line: int, text: str, target: str, value: str) -> Stmt:
+        target = target.strip()
+        value_code = compile_expression(value, line)
+        if re.fullmatch(r"[A-Za-z_]\w*", target):
+            return Stmt("set", line, text, target, value_code, value)
+        # Indexed target such as scores[i]: compile "target = value" once
+        python_target = translate_expression(target)
+        try:
+            code = compile(f"{python_target} = __value__", f"<line {line}>", "exec")
+        except SyntaxError as err:
+            raise PseudocodeError(f"cannot assign to {target!r}", line) from err
+        return Stmt("set_item", line, text, code, value_code)
+
+    def _if(self, line: int, text: str) -> Stmt:
+        branches = []
+        cond_text = re.sub(r"\s+THEN$", "", text[len("IF") :].strip())
+        while True:
+            body, end = self.parse_block(("ELSEIF", "ELSE", "ENDIF"))
+            branches.append((compile_expression(cond_text, line), body))
+            if end.startswith("ELSEIF"):
+                cond_text = re.sub(r"\s+THEN$", "", end[len("ELSEIF") :].strip())
+                continue
+            else_body: List[Stmt] = []
+            if end.split()[0] == "ELSE":
+                else_body, _ = self.parse_block(("ENDIF",))
+            return Stmt("if", line, text, branches, else_body)
+
+    def _for(self, line: int, text: str) -> Stmt:
+        match = _FOR_EACH_RE.match(text)
+        if match:
+            body, _ = self.parse_block(("NEXT",))
+            return Stmt(
+                "for_each",
+                line,
+                text,
+                match.group(1),
+                compile_expression(match.group(2), line),
+                body,
+            )
+        match = _FOR_RE.match(text)
+        if not match:
+            raise PseudocodeError(f"expected FOR i = a TO b: {text!r}", line)
+        var, start, stop, step = match.groups()
+        body, _ = self.parse_block(("NEXT",))
+        return Stmt(
+            "for",
+            line,
+            text,
+            var,
+            compile_expression(start, line),
+            compile_expression(stop, line),
+            compile_expression(step or "1", line),
+            body,
+        )
+
+    def _case(self, line: int, text: str) -> Stmt:
+        subject = compile_expression(text[len("CASEWHERE") :].strip(), line)
+        cases = []
+        otherwise: List[Stmt] = []
+        while self.pos < len(self.lines):
+            case_line, case_text = self.lines[self.pos]
+            self.pos += 1
+            if case_text.split()[0] in ("ENDCASE", "ENDCASEWHERE"):
+                return Stmt("case", line, text, subject, cases, otherwise)
+            match = _CASE_RE.match(case_text)
+            if not match:
+                raise PseudocodeError(
+                    f"expected value: statement, found {case_text!r}", case_line
+                )
+            label, statement = match.groups()
+            stmt = self.parse_statement(case_line, statement, statement.split()[0])
+            if label.strip() == "OTHERWISE":
+                otherwise = [stmt]
+            else:
+                cases.append((compile_expression(label, case_line), [stmt]))
+        raise PseudocodeError("missing ENDCASE", line)
+
+
+@lru_cache(maxsize=256)
+def parse_pseudocode(source: str) -> Program:
+    """Parse pseudocode source into a Program (cached by source text)."""
+    return _Parser(_source_lines(source)).parse_program()
+
+
+# ---------------------------------------------------------------------------
+# Interpreter
+# ---------------------------------------------------------------------------
+
+
+class _Return:
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
+def _parse_input(text: str):
+    for convert in (int, float):
+        try:
+            return convert(text)
+        except ValueError:
+            pass
+    return text
+
+
+class Interpreter:
+    """Executes a parsed Program while counting executed lines."""
+
+    def __init__(
+        self,
+        program: Program,
+        inputs: Iterable[str] = (),
+        max_steps: int = DEFAULT_MAX_STEPS,
+    ):
+        self.program = program
+        self.inputs = iter(inputs)
+        self.max_steps = max_steps
+        self.result = RunResult()
+        self.counts = self.result.line_counts
+        self.steps = 0
+        self.globals: Dict[str, object] = {"len": len, "_hsc_add": _hsc_add}
+        for name, sub in program.subprograms.items():
+            self.globals[name] = self._callable(sub)
+
+    def _callable(self, sub: Subprogram):
+        def call(*args):
+            return self.call(sub, args)
+
+        return call
+
+    def call(self, sub: Subprogram, args: Sequence = (), frozen: Optional[Dict] = None):
+        if len(args) != len(sub.params):
+            raise PseudocodeError(
+                f"{sub.name} expects {len(sub.params)} argument(s), got {len(args)}",
+                sub.line,
+            )
+        frame = dict(zip(sub.params, args))
+        frozen_names = set()
+        if frozen:
+            frame.update(frozen)
+            frozen_names = set(frozen)
+        outcome = self._block(sub.body, frame, frozen_names)
+        return outcome.value if outcome is not None else None
+
+    def _tick(self, stmt: Stmt) -> None:
+        self.counts[stmt.line] = self.counts.get(stmt.line, 0) + 1
+        self.steps += 1
+        if self.steps > self.max_steps:
+            raise PseudocodeError(f"stopped after {self.max_steps:,} steps", stmt.line)
+
+    def _eval(self, code, frame: dict, stmt: Stmt):
+        try:
+            return eval(code, self.globals, frame)
+        except PseudocodeError:
+            raise
+        except Exception as err:
+            raise PseudocodeError(f"{type(err).__name__}: {err}", stmt.line) from err
+
+    def _block(self, body: List[Stmt], frame: dict, frozen: set) -> Optional[_Return]:
+        for stmt in body:
+            self._tick(stmt)
+            kind, args = stmt.kind, stmt.args
+
+            if kind == "set":
+                if args[0] not in frozen:
+                    frame[args[0]] = self._eval(args[1], frame, stmt)
+            elif kind == "set_item":
+                frame["__value__"] = self._eval(args[1], frame, stmt)
+                try:
+                    exec(args[0], self.globals, frame)
+                except Exception as err:
+                    raise PseudocodeError(
+                        f"{type(err).__name__}: {err}", stmt.line
+                    ) from err
+                del frame["__value__"]
+            elif kind == "output":
+                self.result.outputs.append(str(self._eval(args[0], frame, stmt)))
+            elif kind == "input":
+                try:
+                    frame[args[0]] = _parse_input(next(self.inputs))
+                except StopIteration:
+                    raise PseudocodeError(
+                        "INPUT with no input left", stmt.line
+                    ) from None
+            elif kind == "if":
+                branches, else_body = args
+                chosen = else_body
+                for cond, body_ in branches:
+                    if self._eval(cond, frame, stmt):
+                        chosen = body_
+                        break
+                outcome = self._block(chosen, frame, frozen)
+                if outcome is not None:
+                    return outcome
+            elif kind == "while":
+                cond, body_ = args
+                while self._eval(cond, frame, stmt):
+                    outcome = self._block(body_, frame, frozen)
+                    if outcome is not None:
+                        return outcome
+                    self._tick(stmt)
+            elif kind == "repeat":
+                body_, cond = args
+                while True:
+                    outcome = self._block(body_, frame, frozen)
+                    if outcome is not None:
+                        return outcome
+                    if self._eval(cond, frame, stmt):
+                        break
+                    self._tick(stmt)
+            elif kind == "for":
+                var, start, stop, step, body_ = args
+                value = self._eval(start, frame, stmt)
+                limit = self._eval(stop, frame, stmt)
+                increment = self._eval(step, frame, stmt)
+                while (value <= limit) if increment > 0 else (value >= limit):
+                    frame[var] = value
+                    outcome = self._block(body_, frame, frozen)
+                    if outcome is not None:
+                        return outcome
+                    value += increment
+                    self._tick(stmt)
+            elif kind == "for_each":
+                var, iterable, body_ = args
+                for item in self._eval(iterable, frame, stmt):
+                    frame[var] = item
+                    outcome = self._block(body_, frame, frozen)
+                    if outcome is not None:
+                        return outcome
+                    self._tick(stmt)
+            elif kind == "case":
+                subject, cases, otherwise = args
+                value = self._eval(subject, frame, stmt)
+                chosen = otherwise
+                for label, body_ in cases:
+                    if self._eval(label, frame, stmt) == value:
+                        chosen = body_
+                        break
+                outcome = self._block(chosen, frame, frozen)
+                if outcome is not None:
+                    return outcome
+            elif kind == "append":
+                self._eval(args[1], frame, stmt).append(
+                    self._eval(args[0], frame, stmt)
+                )
+            elif kind == "return":
+                return _Return(self._eval(args[0], frame, stmt) if args[0] else None)
+            else:  # bare call such as Permute(remaining, current)
+                self._eval(args[0], frame, stmt)
+        return None
+
+
+def run_pseudocode(
+    source: str,
+    name: Optional[str] = None,
+    args: Sequence = (),
+    inputs: Iterable[str] = (),
+    bindings: Optional[Dict[str, object]] = None,
+    max_steps: int = DEFAULT_MAX_STEPS,
+) -> RunResult:
+    """Run one subprogram and return its outputs and per-line counts.
+
+    ``bindings`` pre-set variables in the subprogram and make any SET of
+    those names a no-op, so a block's hard-coded list can be swapped for
+    generated data of any size.
+    """
+    program = parse_pseudocode(source)
+    sub_name = name or program.main
+    if sub_name not in program.subprograms:
+        raise PseudocodeError(f"no subprogram called {sub_name!r}")
+
+    interpreter = Interpreter(program, inputs, max_steps)
+    previous_limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(previous_limit, 10_000))
+    try:
+        interpreter.result.return_value = interpreter.call(
+            program.subprograms[sub_name], args, frozen=bindings
+        )
+    finally:
+        sys.setrecursionlimit(previous_limit)
+    return interpreter.result
+
+
+# ---------------------------------------------------------------------------
+# Markdown extraction and profiling
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class PseudocodeBlock:
+    """A fenced ``BEGIN ... END`` block found in a Markdown file."""
+
+    heading: str
+    source: str
+    start_line: int
+
+    @property
+    def names(self) -> List[str]:
+        return re.findall(r"^\s*BEGIN\s+(\w+)", self.source, flags=re.MULTILINE)
+
+
+def extract_blocks(markdown_text: str) -> List[PseudocodeBlock]:
+    """Return every fenced code block that contains BEGIN ... END."""
+    blocks: List[PseudocodeBlock] = []
+    heading = ""
+    lines = markdown_text.splitlines()
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if line.startswith("#"):
+            heading = line.lstrip("#").strip()
+        if line.startswith("```"):
+            start = i + 1
+            i += 1
+            while i < len(lines) and not lines[i].startswith("```"):
+                i += 1
+            source = "\n".join(lines[start:i])
+            if re.search(r"^\s*BEGIN\s+\w+", source, flags=re.MULTILINE):
+                blocks.append(PseudocodeBlock(heading, source, start + 1))
+        i += 1
+    return blocks
+
+
+def find_block(blocks: Sequence[PseudocodeBlock], name: str) -> PseudocodeBlock:
+    """Return the last block defining subprogram ``name`` (example solutions
+    come after the starter code in the lessons)."""
+    matches = [block for block in blocks if name in block.names]
+    if not matches:
+        raise PseudocodeError(f"no block defines {name!r}")
+    return matches[-1]
+
+
+def _sample_for(source: str, name: str, variable: str) -> Optional[list]:
+    """Return the literal list a block assigns to ``variable``, if any."""
+    program = parse_pseudocode(source)
+    for stmt in program.subprograms[name].body:
+        if stmt.kind == "set" and stmt.args[0] == variable:
+            try:
+                value = ast.literal_eval(translate_expression(stmt.args[2]))
+            except (ValueError, SyntaxError):
+                return None
+            return value if isinstance(value, list) and value else None
+    return None
+
+
+def profile_pseudocode(
+    source: str,
+    name: str,
+    variable: str,
+    sizes: Sequence[int],
+    seed: int = 42,
+) -> List[Tuple[int, RunResult]]:
+    """Run a block once per size with ``variable`` bound to a list of that size.
+
+    The generated list cycles through the block's own literal when it has
+    one, otherwise it holds random integers from 0 to 100.
+    """
+    sample = _sample_for(source, name, variable)
+    rng = random.Random(seed)
+    results = []
+    for n in sizes:
+        if sample:
+            data = [sample[i % len(sample)] for i in range(n)]
+        else:
+            data = [rng.randint(0, 100) for _ in range(n)]
+        results.append((n, run_pseudocode(source, name, bindings={variable: data})))
+    return results
+
+
+def format_line_counts(source: str, result: RunResult) -> str:
+    """Render per-line counts next to the pseudocode source."""
+    rows = []
+    for number, text in enumerate(source.splitlines(), start=1):
+        count = result.line_counts.get(number)
+        rows.append(f"{count if count else '':>10}  {text}")
+    return "\n".join(rows)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Run HSC pseudocode from lesson Markdown and count operations."
+    )
+    parser.add_argument("markdown", type=Path, help="Lesson Markdown file")
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument("--list", action="store_true", help="List pseudocode blocks")
+    action.add_argument("--run", metavar="NAME", help="Run one subprogram")
+    action.add_argument("--profile", metavar="NAME", help="Profile one subprogram")
+    parser.add_argument(
+        "--input",
+        action="append",
+        default=[],
+        help="Value fed to INPUT statements (repeatable)",
+    )
+    parser.add_argument(
+        "--arg",
+        action="append",
+        default=[],
+        help="Argument passed to the subprogram (Python literal, repeatable)",
+    )
+    parser.add_argument("--bind", help="Variable to replace with generated data")
+    parser.add_argument(
+        "--sizes",
+        type=lambda text: [int(part) for part in text.split(",")],
+        default=[10, 100, 1000, 10000],
+        help="Comma-separated list sizes for --profile",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    blocks = extract_blocks(args.markdown.read_text(encoding="utf-8"))
+
+    if args.list:
+        for block in blocks:
+            try:
+                parse_pseudocode(block.source)
+                status = "✅"
+            except PseudocodeError as err:
+                status = f"⚠️  not runnable ({err})"
+            print(f"{block.start_line:>5}  {', '.join(block.names):<28} {status}")
+        return
+
+    try:
+        if args.run:
+            block = find_block(blocks, args.run)
+            call_args = [ast.literal_eval(value) for value in args.arg]
+            result = run_pseudocode(block.source, args.run, call_args, args.input)
+            for line in result.outputs:
+                print(line)
+            if result.return_value is not None:
+                print(f"RETURN {result.return_value!r}")
+            print()
+            print(f"📊 {result.steps:,} operations")
+            print(format_line_counts(block.source, result))
+        else:
+            from benchmark_patterns import fit_complexity
+
+            if not args.bind:
+                print("❌ --profile needs --bind VARIABLE")
+                sys.exit(1)
+            block = find_block(blocks, args.profile)
+            runs = profile_pseudocode(block.source, args.profile, args.bind, args.sizes)
+            print(f"{'n':>10} {'operations':>14} {'ops / n':>10}")
+            for n, result in runs:
+                print(f"{n:>10,} {result.steps:>14,} {result.steps / n:>10.2f}")
+            model, slope = fit_complexity([(n, result.steps) for n, result in runs])
+            print(f"📈 Operation count grows as {model} (log-log slope {slope:.2f})")
+            print()
+            print(f"Per-line counts at n = {runs[-1][0]:,}:")
+            print(format_line_counts(block.source, runs[-1][1]))
+    except PseudocodeError as err:
+        print(f"❌ {err}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Long-lived draw.io render service that keeps Chromium warm between commands.
+
+Every ``ipynb_to_md.py`` or ``md_to_pdf.py`` run normally launches its own
+headless Chromium, so each command pays a full browser cold start. This
+service owns one browser plus a pool of open pages and listens on a Unix
+socket. ``drawio_to_png.render_drawio_to_png`` uses it whenever it is
+running and falls back to in-process rendering otherwise, so the cold start
+is paid once per working session instead of once per command.
+
+The service shuts itself down after ``--idle-timeout`` seconds without a
+request.
+
+Protocol: one JSON request line per connection, one JSON response line back.
+    {"op": "health"}                       -> {"ok": true, "pid": ..., ...}
+    {"op": "render", "url": ..., "width": ..., "height": ..., "wait_ms": ...}
+                                           -> {"ok": true, "png": "<base64>"}
+    {"op": "shutdown"}                     -> {"ok": true}
+
+Usage:
+    python3 utils/render_service.py start      # start in the background
+    python3 utils/render_service.py status     # health check
+    python3 utils/render_service.py stop
+    python3 utils/render_service.py serve      # run in the foreground
+
+Dependencies:
+    - playwright (plus: python3 -m playwright install chromium)
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+from build_cache import DEFAULT_CACHE_DIR
+from drawio_viewer import (
+    install_local_viewer_async,
+    render_xml_on_page_async,
+    offline_ready,
+    wants_nav,
+    xml_from_viewer_url,
+)
+
+SOCKET_ENV_VAR = "DRAWIO_RENDER_SOCKET"
+DEFAULT_PAGES = 4
+DEFAULT_IDLE_TIMEOUT = 15 * 60  # seconds
+RENDER_TIMEOUT = 60  # seconds a client waits for one render
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+
+def default_socket_path() -> Path:
+    """Socket path: $DRAWIO_RENDER_SOCKET, else inside the build cache."""
+    override = os.environ.get(SOCKET_ENV_VAR)
+    return Path(override) if override else DEFAULT_CACHE_DIR / "render_service.sock"
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+
+
+def _request(
+    payload: dict, socket_path: Optional[Path] = None, timeout: float = 5.0
+) -> Optional[dict]:
+    """Send one request; return the response, or None if nothing is listening."""
+    path = socket_path or default_socket_path()
+    if not path.exists():
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(path))
+            sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as stream:
+                line = stream.readline(MAX_MESSAGE_BYTES)
+    except OSError:
+        return None
+    if not line:
+        return None
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+def health(socket_path: Optional[Path] = None) -> Optional[dict]:
+    """Return the service's health report, or None if it is not running."""
+    response = _request({"op": "health"}, socket_path)
+    return response if response and response.get("ok") else None
+
+
+def render_via_service(
+    url: str,
+    width: int = 800,
+    height: int = 600,
+    wait_ms: int = 2000,
+    socket_path: Optional[Path] = None,
+) -> Optional[bytes]:
+    """Render a viewer URL to PNG through the service.
+
+    Returns None when the service is not running or the render failed, so
+    the caller can fall back to rendering in-process.
+    """
+    response = _request(
+        {
+            "op": "render",
+            "url": url,
+            "width": width,
+            "height": height,
+            "wait_ms": wait_ms,
+        },
+        socket_path,
+        timeout=RENDER_TIMEOUT,
+    )
+    if not response or not response.get("ok"):
+        return None
+    return base64.b64decode(response["png"])
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+
+class RenderService:
+    """Owns one Chromium instance and a pool of reusable pages."""
+
+    def __init__(self, socket_path: Path, pages: int, idle_timeout: float):
+        self.socket_path = socket_path
+        self.page_count = pages
+        self.idle_timeout = idle_timeout
+        self.started = time.time()
+        self.last_activity = time.monotonic()
+        self.active = 0
+        self.renders = 0
+        self.failures = 0
+        self.browser = None
+        self.offline = offline_ready()
+        self.pages: Optional[asyncio.Queue] = None
+        self.stopping: Optional[asyncio.Event] = None
+
+    async def _new_page(self):
+        page = await self.browser.new_page()
+        if self.offline:
+            await install_local_viewer_async(page)
+        return page
+
+    async def open(self, playwright) -> None:
+        """Launch Chromium and fill the page pool."""
+        self.pages = asyncio.Queue()
+        self.browser = await playwright.chromium.launch()
+        for _ in range(self.page_count):
+            self.pages.put_nowait(await self._new_page())
+
+    async def render(self, request: dict) -> bytes:
+        """Render one request on a pooled page and return the PNG bytes."""
+        url = request["url"]
+        xml = xml_from_viewer_url(url) if self.offline else None
+        page = await self.pages.get()
+        try:
+            await page.set_viewport_size(
+                {
+                    "width": int(request.get("width", 800)),
+                    "height": int(request.get("height", 600)),
+                }
+            )
+            if xml is not None:
+                # Pages stay on the local viewer page between renders
+                await render_xml_on_page_async(page, xml, nav=wants_nav(url))
+            else:
+                await page.goto(url, wait_until="networkidle", timeout=30000)
+                await page.wait_for_timeout(int(request.get("wait_ms", 2000)))
+            return await page.screenshot()
+        except Exception:
+            # A page that failed mid-render may be in any state: replace it
+            await page.close()
+            page = await self._new_page()
+            raise
+        finally:
+            self.pages.put_nowait(page)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.active += 1
+        self.last_activity = time.monotonic()
+        try:
+            request = json.loads(await reader.readline())
+            op = request.get("op")
+            if op == "health":
+                response = {
+                    "ok": True,
+                    "pid": os.getpid(),
+                    "uptime": round(time.time() - self.started, 1),
+                    "pages": self.page_count,
+                    "renders": self.renders,
+                    "failures": self.failures,
+                    "offline": self.offline,
+                    "idle_timeout": self.idle_timeout,
+                }
+            elif op == "render":
+                png = await self.render(request)
+                self.renders += 1
+                response = {"ok": True, "png": base64.b64encode(png).decode("ascii")}
+            elif op == "shutdown":
+                self.stopping.set()
+                response = {"ok": True}
+            else:
+                response = {"ok": False, "error": f"unknown op {op!r}"}
+        except Exception as err:
+            self.failures += 1
+            response = {"ok": False, "error": f"{type(err).__name__}: {err}"}
+        finally:
+            self.active -= 1
+            self.last_activity = time.monotonic()
+
+        try:
+            writer.write(json.dumps(response).encode("utf-8") + b"\n")
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _watch_idle(self):
+        while not self.stopping.is_set():
+            await asyncio.sleep(min(5.0, self.idle_timeout))
+            idle = time.monotonic() - self.last_activity
+            if self.active == 0 and idle >= self.idle_timeout:
+                print(f"💤 Idle for {idle:.0f}s, shutting down")
+                self.stopping.set()
+
+    async def run(self):
+        from playwright.async_api import async_playwright
+
+        self.stopping = asyncio.Event()
+        async with async_playwright() as playwright:
+            await self.open(playwright)
+
+            self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+            server = await asyncio.start_unix_server(
+                self._handle, path=str(self.socket_path), limit=MAX_MESSAGE_BYTES
+            )
+            print(
+                f"🚀 Render service listening on {self.socket_path} (pid {os.getpid()})"
+            )
+            watcher = asyncio.create_task(self._watch_idle())
+            try:
+                await self.stopping.wait()
+            finally:
+                watcher.cancel()
+                server.close()
+                await server.wait_closed()
+                await self.browser.close()
+                self.socket_path.unlink(missing_ok=True)
+
+
+def serve(
+    socket_path: Path,
+    pages: int = DEFAULT_PAGES,
+    idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+):
+    """Run the service in the foreground until idle or told to stop."""
+    if health(socket_path):
+        print(f"ℹ️  Render service already running on {socket_path}")
+        return
+    # A socket file nobody answers on is left over from a crashed service
+    socket_path.unlink(missing_ok=True)
+    asyncio.run(RenderService(socket_path, pages, idle_timeout).run())
+
+
+def start_background(
+    socket_path: Path,
+    pages: int = DEFAULT_PAGES,
+    idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+    wait_seconds: float = 30.0,
+) -> Optional[dict]:
+    """Start the service as a detached process and wait until it is healthy."""
+    report = health(socket_path)
+    if report:
+        return report
+
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    log_path = socket_path.with_suffix(".log")
+    with open(log_path, "ab") as log:
+        subprocess.Popen(
+            [
+                sys.executable,
+                str(Path(__file__).resolve()),
+                "serve",
+                "--socket",
+                str(socket_path),
+                "--pages",
+                str(pages),
+                "--idle-timeout",
+                str(idle_timeout),
+            ],
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+
+    deadline = time.monotonic() + wait_seconds
+    while time.monotonic() < deadline:
+        report = health(socket_path)
+        if report:
+            return report
+        time.sleep(0.2)
+    return None
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Keep a headless Chromium warm for draw.io renders."
+    )
+    parser.add_argument("command", choices=["start", "serve", "status", "stop"])
+    parser.add_argument(
+        "--socket",
+        type=Path,
+        default=default_socket_path(),
+        help=f"Unix socket path (default: ${SOCKET_ENV_VAR} or {default_socket_path()})",
+    )
+    parser.add_argument(
+        "--pages",
+        type=int,
+        default=DEFAULT_PAGES,
+        help=f"Browser pages kept open for concurrent renders (default: {DEFAULT_PAGES})",
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=DEFAULT_IDLE_TIMEOUT,
+        help=f"Seconds without requests before shutting down (default: {DEFAULT_IDLE_TIMEOUT})",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    if args.command == "serve":
+        serve(args.socket, args.pages, args.idle_timeout)
+    elif args.command == "start":
+        report = start_background(args.socket, args.pages, args.idle_timeout)
+        if not report:
+            print(
+                f"❌ Render service did not start - see {args.socket.with_suffix('.log')}"
+            )
+            sys.exit(1)
+        print(f"✅ Render service running (pid {report['pid']}) on {args.socket}")
+    elif args.command == "status":
+        report = health(args.socket)
+        if not report:
+            print("⚪ Render service not running")
+            sys.exit(1)
+        print(
+            f"✅ pid {report['pid']}, up {report['uptime']:.0f}s, "
+            f"{report['renders']} renders, {report['failures']} failures, "
+            f"{report['pages']} pages"
+        )
+    elif args.command == "stop":
+        if _request({"op": "shutdown"}, args.socket):
+            print("🛑 Render service stopped")
+        else:
+            print("⚪ Render service not running")
+
+
+if __name__ == "__main__":
+    main()
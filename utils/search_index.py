@@ -0,0 +1,785 @@
+#!/usr/bin/env python3
+"""
+Full-text search over the lessons, built while they are converted.
+
+An inverted index over every lesson's headings, prose and code blocks. Each
+posting keeps the word positions, so quoted phrases can be matched. Each hit
+is reported against the section it falls in, using the heading anchor the
+Markdown ``toc`` extension generates. ``md_to_pdf.py`` and ``ipynb_to_md.py``
+update it from the Markdown they already parse (``--search-index``), so
+only lessons that changed are re-indexed.
+
+Query syntax:
+- ``while loop``      sections containing both words
+- ``"linear search"`` the exact phrase
+- ``iter*``           any word starting with ``iter``
+- ``--in code``       only match inside code blocks (or ``heading``, ``prose``)
+
+Usage:
+    python3 utils/search_index.py build other_formats/markdown_lessons
+    python3 utils/search_index.py query "while loop"
+    python3 utils/search_index.py query 'append*' --in code
+    python3 utils/search_index.py stats
+
+    # Or keep it current as part of a build
+    python3 utils/md_to_pdf.py --directory other_formats/markdown_lessons \\
+        --search-index other_formats/search_index.bin
+
+    from search_index import SearchIndex
+
+    index = SearchIndex.open(Path("other_formats/search_index.bin"))
+    for hit in index.search('"nested loop"'):
+        print(hit.location, hit.section)
+
+File layout (integers are LEB128 varints unless noted):
+    b"LSIX", format version (1 byte)
+    JSON document table: key, title, sections (anchor, title, first
+        position, end of heading), code block spans
+    term count, block count, block offsets (uint32 little-endian)
+    term dictionary: terms in UTF-8 byte order, in blocks of 16. The first
+        term of a block is stored whole, and the rest store only the length
+        of the prefix they share with the previous term plus the new
+        suffix. Each term is followed by its postings offset (a delta within
+        the block) and its document frequency.
+    postings: per document, a doc id delta, then a position count, then
+        position deltas
+
+Lookups bisect the block heads, scan one block and decode one posting
+list, so they do not depend on the size of the index.
+
+Dependencies:
+    - markdown (only to index Markdown files directly, as ``build`` does)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import re
+import struct
+import sys
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from build_cache import atomic_write_bytes, content_hash
+
+try:
+    import markdown
+
+    MARKDOWN_AVAILABLE = True
+except ImportError:
+    MARKDOWN_AVAILABLE = False
+
+MAGIC = b"LSIX"
+FORMAT_VERSION = 1
+BLOCK_SIZE = 16
+
+DEFAULT_INDEX = Path("other_formats/search_index.bin")
+
+FIELDS = ("heading", "prose", "code")
+FIELD_WEIGHTS = {"heading": 3.0, "prose": 1.0, "code": 1.0}
+
+# A prefix query expands to at most this many terms
+MAX_PREFIX_TERMS = 64
+
+TOKEN_PATTERN = re.compile(r"\w+")
+QUERY_PATTERN = re.compile(r'"([^"]*)"|(\S+)')
+
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+# Phrases never run across the end of one of these
+BLOCK_TAGS = {
+    "p",
+    "li",
+    "dt",
+    "dd",
+    "td",
+    "th",
+    "tr",
+    "blockquote",
+    "div",
+    "br",
+    "ul",
+    "ol",
+    "table",
+    "details",
+    "summary",
+}
+SKIPPED_TAGS = {"style", "script"}
+
+Postings = List[Tuple[int, List[int]]]
+
+
+def tokenize(text: str) -> List[str]:
+    return [token.casefold() for token in TOKEN_PATTERN.findall(text)]
+
+
+def encode_varint(value: int, out: bytearray) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    """Return ``(value, offset after it)``."""
+    result = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, offset
+        shift += 7
+
+
+# -- extracting a document ---------------------------------------------------
+
+
+class _LessonParser(HTMLParser):
+    """Split a lesson's HTML into positioned terms, sections and code spans."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.terms: Dict[str, List[int]] = {}
+        # [anchor, title, first position, end of heading]
+        self.sections: List[list] = [["", "", 0, 0]]
+        self.code: List[List[int]] = []
+        self.position = 0
+        self._heading: Optional[List[str]] = None
+        self._code_depth = 0
+        self._code_start = 0
+        self._skip_depth = 0
+        self._at_break = True
+
+    def _break(self) -> None:
+        # Leave a gap in the positions so phrases stay inside one block
+        if not self._at_break:
+            self.position += 1
+            self._at_break = True
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag in HEADING_TAGS:
+            self._break()
+            self._heading = []
+            anchor = dict(attrs).get("id") or ""
+            self.sections.append([anchor, "", self.position, self.position])
+        elif tag in ("pre", "code"):
+            if tag == "pre":
+                self._break()
+            if self._code_depth == 0:
+                self._code_start = self.position
+            self._code_depth += 1
+        elif tag in BLOCK_TAGS:
+            self._break()
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in HEADING_TAGS and self._heading is not None:
+            section = self.sections[-1]
+            section[1] = " ".join("".join(self._heading).split())
+            section[3] = self.position
+            self._heading = None
+            self._break()
+        elif tag in ("pre", "code") and self._code_depth:
+            self._code_depth -= 1
+            if self._code_depth == 0 and self.position > self._code_start:
+                self.code.append([self._code_start, self.position])
+            if tag == "pre":
+                self._break()
+        elif tag in BLOCK_TAGS:
+            self._break()
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._heading is not None:
+            self._heading.append(data)
+        for token in tokenize(data):
+            self.terms.setdefault(token, []).append(self.position)
+            self.position += 1
+            self._at_break = False
+
+    def record(self, key: str) -> dict:
+        # Drop sections with no words (an empty preamble, a blank heading)
+        sections = [
+            section
+            for number, section in enumerate(self.sections)
+            if number + 1 == len(self.sections)
+            or self.sections[number + 1][2] > section[2]
+        ]
+        headed = [section for section in sections if section[1]]
+        title = headed[0][1] if headed else key
+        return {
+            "title": title,
+            "sections": sections,
+            "code": self.code,
+            "terms": self.terms,
+        }
+
+
+def extract_document(key: str, html_text: str) -> dict:
+    """Index record (terms with positions, sections, code spans) for one page."""
+    parser = _LessonParser()
+    parser.feed(html_text)
+    parser.close()
+    return parser.record(key)
+
+
+def markdown_to_html(text: str) -> str:
+    """Render Markdown with the extensions md_to_pdf uses, for the same anchors."""
+    if not MARKDOWN_AVAILABLE:
+        raise RuntimeError("markdown not available (pip install markdown)")
+    return markdown.Markdown(
+        extensions=["extra", "toc", "tables", "fenced_code"],
+        output_format="html5",
+    ).convert(text)
+
+
+# -- the index file ----------------------------------------------------------
+
+
+def encode_index(documents: Dict[str, dict]) -> bytes:
+    """Serialise ``{key: record}`` into the compact index format."""
+    keys = sorted(documents)
+    by_term: Dict[bytes, Postings] = {}
+    for doc_id, key in enumerate(keys):
+        for term, positions in documents[key]["terms"].items():
+            by_term.setdefault(term.encode("utf-8"), []).append((doc_id, positions))
+    terms = sorted(by_term)
+
+    postings = bytearray()
+    offsets = []
+    for term in terms:
+        offsets.append(len(postings))
+        previous_doc = 0
+        for doc_id, positions in by_term[term]:
+            encode_varint(doc_id - previous_doc, postings)
+            previous_doc = doc_id
+            encode_varint(len(positions), postings)
+            previous_position = 0
+            for position in positions:
+                encode_varint(position - previous_position, postings)
+                previous_position = position
+
+    dictionary = bytearray()
+    block_offsets = []
+    previous = b""
+    for number, term in enumerate(terms):
+        if number % BLOCK_SIZE == 0:
+            block_offsets.append(len(dictionary))
+            encode_varint(len(term), dictionary)
+            dictionary += term
+            encode_varint(offsets[number], dictionary)
+        else:
+            shared = 0
+            limit = min(len(previous), len(term))
+            while shared < limit and previous[shared] == term[shared]:
+                shared += 1
+            encode_varint(shared, dictionary)
+            encode_varint(len(term) - shared, dictionary)
+            dictionary += term[shared:]
+            encode_varint(offsets[number] - offsets[number - 1], dictionary)
+        encode_varint(len(by_term[term]), dictionary)
+        previous = term
+
+    table = [
+        {
+            "key": key,
+            "title": documents[key]["title"],
+            "hash": documents[key]["hash"],
+            "sections": documents[key]["sections"],
+            "code": documents[key]["code"],
+        }
+        for key in keys
+    ]
+    meta = json.dumps(
+        {"documents": table}, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+    out = bytearray(MAGIC)
+    out.append(FORMAT_VERSION)
+    encode_varint(len(meta), out)
+    out += meta
+    encode_varint(len(terms), out)
+    encode_varint(len(block_offsets), out)
+    out += struct.pack(f"<{len(block_offsets)}I", *block_offsets)
+    encode_varint(len(dictionary), out)
+    out += dictionary
+    out += postings
+    return bytes(out)
+
+
+@dataclass
+class SearchHit:
+    key: str
+    title: str
+    anchor: str
+    section: str
+    score: float
+    matches: int
+    fields: List[str] = field(default_factory=list)
+
+    @property
+    def location(self) -> str:
+        return f"{self.key}#{self.anchor}" if self.anchor else self.key
+
+
+class SearchIndex:
+    """Read-only view of an index file; terms and postings decode on demand."""
+
+    def __init__(self, data: bytes):
+        if data[:4] != MAGIC:
+            raise ValueError("not a lesson search index")
+        if data[4] != FORMAT_VERSION:
+            raise ValueError(
+                f"search index format {data[4]} (expected {FORMAT_VERSION})"
+            )
+        self.data = data
+        length, offset = decode_varint(data, 5)
+        self.documents: List[dict] = json.loads(data[offset : offset + length])[
+            "documents"
+        ]
+        offset += length
+        self.term_count, offset = decode_varint(data, offset)
+        block_count, offset = decode_varint(data, offset)
+        self._block_offsets = struct.unpack_from(f"<{block_count}I", data, offset)
+        offset += 4 * block_count
+        dictionary_length, offset = decode_varint(data, offset)
+        self._dictionary = offset
+        self._postings = offset + dictionary_length
+
+        self._heads = []
+        for block_offset in self._block_offsets:
+            position = self._dictionary + block_offset
+            size, position = decode_varint(data, position)
+            self._heads.append(bytes(data[position : position + size]))
+
+        for document in self.documents:
+            document["starts"] = [section[2] for section in document["sections"]]
+            document["code_starts"] = [span[0] for span in document["code"]]
+
+    @classmethod
+    def open(cls, path: Path) -> "SearchIndex":
+        return cls(Path(path).read_bytes())
+
+    # -- terms ----------------------------------------------------------------
+
+    def _block(self, number: int) -> Iterator[Tuple[bytes, int, int]]:
+        """Yield ``(term, postings offset, document frequency)`` for one block."""
+        data = self.data
+        position = self._dictionary + self._block_offsets[number]
+        count = min(BLOCK_SIZE, self.term_count - number * BLOCK_SIZE)
+        term = b""
+        postings_offset = 0
+        for index in range(count):
+            if index == 0:
+                size, position = decode_varint(data, position)
+                term = bytes(data[position : position + size])
+                position += size
+                postings_offset, position = decode_varint(data, position)
+            else:
+                shared, position = decode_varint(data, position)
+                size, position = decode_varint(data, position)
+                term = term[:shared] + bytes(data[position : position + size])
+                position += size
+                delta, position = decode_varint(data, position)
+                postings_offset += delta
+            frequency, position = decode_varint(data, position)
+            yield term, postings_offset, frequency
+
+    def _find(self, term: bytes) -> Optional[Tuple[int, int]]:
+        number = bisect_right(self._heads, term) - 1
+        if number < 0:
+            return None
+        for candidate, offset, frequency in self._block(number):
+            if candidate == term:
+                return offset, frequency
+            if candidate > term:
+                break
+        return None
+
+    def _decode_postings(self, offset: int, frequency: int) -> Postings:
+        data = self.data
+        position = self._postings + offset
+        postings = []
+        doc_id = 0
+        for _ in range(frequency):
+            delta, position = decode_varint(data, position)
+            doc_id += delta
+            count, position = decode_varint(data, position)
+            positions = []
+            current = 0
+            for _ in range(count):
+                delta, position = decode_varint(data, position)
+                current += delta
+                positions.append(current)
+            postings.append((doc_id, positions))
+        return postings
+
+    def lookup(self, term: str) -> Postings:
+        """``[(doc id, positions), ...]`` for one exact (case-folded) term."""
+        found = self._find(term.casefold().encode("utf-8"))
+        return self._decode_postings(*found) if found else []
+
+    def iter_terms(self, prefix: str = "") -> Iterator[Tuple[str, int, int]]:
+        """Yield ``(term, postings offset, document frequency)`` in term order."""
+        wanted = prefix.casefold().encode("utf-8")
+        first = max(0, bisect_left(self._heads, wanted) - 1)
+        for number in range(first, len(self._heads)):
+            for term, offset, frequency in self._block(number):
+                if term.startswith(wanted):
+                    yield term.decode("utf-8"), offset, frequency
+                elif term > wanted:
+                    return
+
+    def terms_with_prefix(
+        self, prefix: str, limit: int = MAX_PREFIX_TERMS
+    ) -> List[str]:
+        terms = []
+        for term, _, _ in self.iter_terms(prefix):
+            terms.append(term)
+            if len(terms) >= limit:
+                break
+        return terms
+
+    def records(self) -> Dict[str, dict]:
+        """Decode everything back into ``{key: record}`` (for incremental updates)."""
+        records = {
+            document["key"]: {
+                "title": document["title"],
+                "hash": document["hash"],
+                "sections": document["sections"],
+                "code": document["code"],
+                "terms": {},
+            }
+            for document in self.documents
+        }
+        for term, offset, frequency in self.iter_terms():
+            for doc_id, positions in self._decode_postings(offset, frequency):
+                records[self.documents[doc_id]["key"]]["terms"][term] = positions
+        return records
+
+    # -- queries --------------------------------------------------------------
+
+    def field_at(self, doc_id: int, position: int) -> str:
+        document = self.documents[doc_id]
+        section = document["sections"][bisect_right(document["starts"], position) - 1]
+        if position < section[3]:
+            return "heading"
+        span = bisect_right(document["code_starts"], position) - 1
+        if span >= 0 and position < document["code"][span][1]:
+            return "code"
+        return "prose"
+
+    def section_at(self, doc_id: int, position: int) -> int:
+        return bisect_right(self.documents[doc_id]["starts"], position) - 1
+
+    def _phrase(self, tokens: Sequence[str]) -> Dict[int, List[int]]:
+        """Start positions of ``tokens`` in sequence, per document."""
+        matches = {doc_id: positions for doc_id, positions in self.lookup(tokens[0])}
+        for offset, token in enumerate(tokens[1:], start=1):
+            if not matches:
+                break
+            following = dict(self.lookup(token))
+            narrowed = {}
+            for doc_id, starts in matches.items():
+                if doc_id in following:
+                    present = set(following[doc_id])
+                    kept = [start for start in starts if start + offset in present]
+                    if kept:
+                        narrowed[doc_id] = kept
+            matches = narrowed
+        return matches
+
+    def _prefix(self, prefix: str) -> Dict[int, List[int]]:
+        matches: Dict[int, List[int]] = {}
+        for count, (_, offset, frequency) in enumerate(self.iter_terms(prefix)):
+            if count >= MAX_PREFIX_TERMS:
+                break
+            for doc_id, positions in self._decode_postings(offset, frequency):
+                matches.setdefault(doc_id, []).extend(positions)
+        return matches
+
+    def parse_query(self, query: str) -> List[Dict[int, List[int]]]:
+        """One ``{doc id: match positions}`` per query part (all must match)."""
+        parts = []
+        for phrase, word in QUERY_PATTERN.findall(query):
+            if word.endswith("*") and TOKEN_PATTERN.fullmatch(word[:-1]):
+                parts.append(self._prefix(word[:-1]))
+                continue
+            tokens = tokenize(phrase or word)
+            if tokens:
+                parts.append(self._phrase(tokens))
+        return parts
+
+    def search(
+        self, query: str, fields: Optional[Iterable[str]] = None, limit: int = 10
+    ) -> List[SearchHit]:
+        """Sections matching every part of ``query``, best first."""
+        parts = self.parse_query(query)
+        if not parts:
+            return []
+        wanted = set(fields or FIELDS)
+
+        # (doc id, section) -> per part: [weight sum, matches, fields seen]
+        found: Optional[Dict[Tuple[int, int], list]] = None
+        for part in parts:
+            sections: Dict[Tuple[int, int], list] = {}
+            for doc_id, positions in part.items():
+                for position in positions:
+                    kind = self.field_at(doc_id, position)
+                    if kind not in wanted:
+                        continue
+                    entry = sections.setdefault(
+                        (doc_id, self.section_at(doc_id, position)), [0.0, 0, set()]
+                    )
+                    entry[0] += FIELD_WEIGHTS[kind]
+                    entry[1] += 1
+                    entry[2].add(kind)
+            documents = len({doc_id for doc_id, _ in sections})
+            idf = math.log(1 + len(self.documents) / documents) if documents else 0.0
+            if found is None:
+                found = {
+                    where: [idf * (1 + math.log(entry[0])), entry[1], entry[2]]
+                    for where, entry in sections.items()
+                }
+            else:
+                found = {
+                    where: [
+                        found[where][0] + idf * (1 + math.log(entry[0])),
+                        found[where][1] + entry[1],
+                        found[where][2] | entry[2],
+                    ]
+                    for where, entry in sections.items()
+                    if where in found
+                }
+            if not found:
+                return []
+
+        hits = []
+        for (doc_id, section_number), (score, matches, kinds) in found.items():
+            document = self.documents[doc_id]
+            anchor, section_title = document["sections"][section_number][:2]
+            hits.append(
+                SearchHit(
+                    key=document["key"],
+                    title=document["title"],
+                    anchor=anchor,
+                    section=section_title or document["title"],
+                    score=round(score, 4),
+                    matches=matches,
+                    fields=[kind for kind in FIELDS if kind in kinds],
+                )
+            )
+        hits.sort(key=lambda hit: (-hit.score, hit.key, hit.anchor))
+        return hits[:limit]
+
+
+# -- building -----------------------------------------------------------------
+
+
+class SearchIndexWriter:
+    """Keeps an index file current as documents are (re)converted.
+
+    The existing index is loaded first, so documents that were not parsed
+    in this run (unchanged, or skipped by --incremental) keep their entries.
+    """
+
+    def __init__(self, path: Path = DEFAULT_INDEX):
+        self.path = Path(path)
+        self.documents: Dict[str, dict] = {}
+        self.changed: set = set()
+        self.dirty = False
+        self._lock = threading.Lock()
+        if self.path.exists():
+            try:
+                self.documents = SearchIndex.open(self.path).records()
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️  Rebuilding search index {self.path}: {e}")
+                self.dirty = True
+        else:
+            self.dirty = True
+
+    def has(self, key: str) -> bool:
+        return key in self.documents
+
+    def add_html(self, key: str, html_text: str) -> bool:
+        """Index (or re-index) one page; False if it is unchanged."""
+        digest = content_hash(html_text)
+        existing = self.documents.get(key)
+        if existing is not None and existing["hash"] == digest:
+            return False
+        record = extract_document(key, html_text)
+        record["hash"] = digest
+        with self._lock:
+            self.documents[key] = record
+            self.changed.add(key)
+            self.dirty = True
+        return True
+
+    def add_markdown(self, key: str, text: str) -> bool:
+        return self.add_html(key, markdown_to_html(text))
+
+    def changed_records(self, keys: Iterable[str]) -> Dict[str, dict]:
+        return {key: self.documents[key] for key in keys if key in self.documents}
+
+    def update(self, records: Dict[str, dict]) -> None:
+        """Take records indexed elsewhere (e.g. in a worker process)."""
+        with self._lock:
+            self.documents.update(records)
+            self.changed.update(records)
+            self.dirty = self.dirty or bool(records)
+
+    def retain(self, keys: Iterable[str]) -> List[str]:
+        """Drop documents not in ``keys`` (deleted lessons); returns the dropped keys."""
+        keep = set(keys)
+        with self._lock:
+            dropped = [key for key in self.documents if key not in keep]
+            for key in dropped:
+                del self.documents[key]
+            self.dirty = self.dirty or bool(dropped)
+        return dropped
+
+    def save(self) -> bool:
+        """Write the index if anything changed; True if written."""
+        with self._lock:
+            if not self.dirty:
+                return False
+            data = encode_index(self.documents)
+            self.dirty = False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_bytes(self.path, data)
+        return True
+
+
+def build_from_markdown(source_dir: Path, index_path: Path) -> SearchIndexWriter:
+    """Index every ``*.md`` under ``source_dir`` (keys relative to it)."""
+    writer = SearchIndexWriter(index_path)
+    keys = []
+    for md_file in sorted(source_dir.rglob("*.md")):
+        key = md_file.relative_to(source_dir).as_posix()
+        keys.append(key)
+        writer.add_markdown(key, md_file.read_text(encoding="utf-8"))
+    writer.retain(keys)
+    writer.save()
+    return writer
+
+
+# -- command line -------------------------------------------------------------
+
+
+def print_hits(hits: Sequence[SearchHit], seconds: float) -> None:
+    if not hits:
+        print(f"🔎 No matches ({seconds * 1000:.2f} ms)")
+        return
+    print(f"🔎 {len(hits)} section(s) ({seconds * 1000:.2f} ms)")
+    for hit in hits:
+        print(f"   {hit.location}")
+        print(
+            f"      {hit.section} - {hit.matches} match(es) in {', '.join(hit.fields)} "
+            f"(score {hit.score:.2f})"
+        )
+
+
+def print_stats(index: SearchIndex, path: Path) -> None:
+    size = len(index.data)
+    dictionary = index._postings - index._dictionary
+    postings = size - index._postings
+    print(f"📚 {path}: {len(index.documents)} document(s), {index.term_count} term(s)")
+    print(f"   {size:,} bytes (dictionary {dictionary:,}, postings {postings:,})")
+    terms = [term for term, _, _ in index.iter_terms()]
+    if terms:
+        sample = terms[:: max(1, len(terms) // 500)]
+        started = time.perf_counter()
+        for term in sample:
+            index.lookup(term)
+        elapsed = (time.perf_counter() - started) / len(sample)
+        print(
+            f"   Average lookup: {elapsed * 1_000_000:.1f} µs over {len(sample)} term(s)"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Build and query the lesson search index."
+    )
+    parser.add_argument(
+        "--index",
+        type=Path,
+        default=DEFAULT_INDEX,
+        help=f"Index file (default: {DEFAULT_INDEX.as_posix()})",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_cmd = commands.add_parser(
+        "build", help="Index every Markdown file in a directory"
+    )
+    build_cmd.add_argument(
+        "directory", type=Path, help="e.g. other_formats/markdown_lessons"
+    )
+
+    query_cmd = commands.add_parser("query", help="Search the index")
+    query_cmd.add_argument("query", help='Words, "quoted phrases" and prefix* terms')
+    query_cmd.add_argument(
+        "--in",
+        dest="fields",
+        action="append",
+        choices=FIELDS,
+        help="Only match in this part of a section (repeatable)",
+    )
+    query_cmd.add_argument(
+        "--limit", type=int, default=10, help="Sections to show (default: 10)"
+    )
+
+    prefix_cmd = commands.add_parser(
+        "prefix", help="List indexed terms starting with a prefix"
+    )
+    prefix_cmd.add_argument("prefix")
+
+    commands.add_parser("stats", help="Size of the index and lookup timings")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        if not args.directory.is_dir():
+            print(f"❌ Directory does not exist: {args.directory}")
+            sys.exit(1)
+        try:
+            writer = build_from_markdown(args.directory, args.index)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        print(
+            f"✅ Indexed {len(writer.documents)} document(s) "
+            f"({len(writer.changed)} updated) into {args.index}"
+        )
+        return
+
+    try:
+        index = SearchIndex.open(args.index)
+    except (OSError, ValueError) as e:
+        print(f"❌ Cannot read search index {args.index}: {e}")
+        sys.exit(1)
+
+    if args.command == "query":
+        started = time.perf_counter()
+        hits = index.search(args.query, args.fields, args.limit)
+        print_hits(hits, time.perf_counter() - started)
+        sys.exit(0 if hits else 1)
+    elif args.command == "prefix":
+        for term in index.terms_with_prefix(args.prefix, limit=1000):
+            print(term)
+    else:
+        print_stats(index, args.index)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Run conversion jobs in supervised worker processes with time and memory caps.
+
+Each job runs in its own forked child, so one pathological document (a
+giant table that keeps WeasyPrint busy, a diagram page that never settles)
+is killed on its own while the rest of the batch carries on:
+
+- wall-clock limit: the child's whole process group (including any
+  Chromium it started) is killed when the job overruns
+- memory limit: the child runs under ``resource.setrlimit`` (RLIMIT_DATA on
+  Linux, RLIMIT_AS elsewhere), so an oversized allocation raises
+  MemoryError in the child instead of swapping the machine
+- retries: jobs that time out or crash (or, if asked, run out of memory or
+  raise) go to the back of the queue and run again, up to a limit
+
+Usage:
+    from supervisor import Limits, Supervisor
+
+    supervisor = Supervisor(Limits(timeout=120, memory_mb=2048, retries=1), jobs=4)
+    for result in supervisor.run([(name, function, args), ...]):
+        print(result.name, result.status)
+
+Needs the ``fork`` start method (Linux, macOS); memory caps need the
+``resource`` module (not on Windows).
+
+Dependencies:
+    - None (stdlib only)
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass
+from multiprocessing.connection import wait
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+FAILURE_KINDS = ("timeout", "memory", "crash", "error")
+DEFAULT_RETRY_ON = ("timeout", "crash")
+
+Task = Tuple[str, Callable[..., Any], tuple]
+
+
+def supervision_available() -> bool:
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def parse_retry_on(text: str) -> Tuple[str, ...]:
+    """Parse a comma-separated list of failure kinds for argparse."""
+    kinds = tuple(part.strip() for part in text.split(",") if part.strip())
+    unknown = [kind for kind in kinds if kind not in FAILURE_KINDS]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown failure kind(s) {', '.join(unknown)} (use {', '.join(FAILURE_KINDS)})"
+        )
+    return kinds
+
+
+@dataclass
+class Limits:
+    """Per-job caps and retry policy."""
+
+    timeout: Optional[float] = None  # seconds of wall time per attempt
+    memory_mb: Optional[int] = None
+    retries: int = 0
+    retry_on: Tuple[str, ...] = DEFAULT_RETRY_ON
+
+
+@dataclass
+class TaskResult:
+    name: str
+    status: str = "ok"  # ok, or one of FAILURE_KINDS
+    value: Any = None
+    error: str = ""
+    attempts: int = 0
+    started: float = 0.0  # time.time() when the last attempt started
+    seconds: float = 0.0  # wall time of the last attempt
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+
+@dataclass
+class _Attempt:
+    index: int
+    number: int
+    process: Any
+    conn: Any
+    started: float
+    deadline: Optional[float]
+    reply: Optional[tuple] = None
+
+
+def _apply_memory_limit(memory_mb: int) -> None:
+    if resource is None:
+        return
+    limit = memory_mb * 1024 * 1024
+    kind = (
+        resource.RLIMIT_DATA if sys.platform.startswith("linux") else resource.RLIMIT_AS
+    )
+    resource.setrlimit(kind, (limit, limit))
+
+
+def _child(conn, function, args, memory_mb) -> None:
+    # Own process group, so a kill also takes down browsers this job started
+    os.setpgrp()
+    if memory_mb:
+        _apply_memory_limit(memory_mb)
+    try:
+        reply = ("ok", function(*args), "")
+    except MemoryError:
+        reply = ("memory", None, f"out of memory (cap {memory_mb} MB)")
+    except BaseException as e:
+        reply = ("error", None, f"{type(e).__name__}: {e}")
+    try:
+        conn.send(reply)
+    except MemoryError:
+        conn.send(("memory", None, f"out of memory (cap {memory_mb} MB)"))
+    conn.close()
+
+
+def _kill_group(process) -> None:
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        process.kill()
+
+
+class Supervisor:
+    """Runs tasks ``jobs`` at a time, each in a forked, capped child."""
+
+    def __init__(self, limits: Limits, jobs: int = 1):
+        self.limits = limits
+        self.jobs = max(1, jobs)
+        self._context = multiprocessing.get_context("fork")
+
+    def _start(self, tasks: Sequence[Task], index: int, number: int) -> _Attempt:
+        _, function, args = tasks[index]
+        receiver, sender = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=_child,
+            args=(sender, function, args, self.limits.memory_mb),
+            daemon=True,
+        )
+        started = time.time()
+        process.start()
+        sender.close()
+        deadline = started + self.limits.timeout if self.limits.timeout else None
+        return _Attempt(index, number, process, receiver, started, deadline)
+
+    def _outcome(self, attempt: _Attempt, timed_out: bool) -> Tuple[str, Any, str]:
+        if attempt.reply is not None:
+            return attempt.reply
+        if timed_out:
+            return "timeout", None, f"killed after {self.limits.timeout:g}s"
+        code = attempt.process.exitcode
+        if code is not None and code < 0:
+            try:
+                name = signal.Signals(-code).name
+            except ValueError:
+                name = f"signal {-code}"
+            # The kernel's OOM killer (or a cap hit in native code) also lands here
+            return "crash", None, f"worker killed by {name}"
+        return "crash", None, f"worker exited with code {code} without a result"
+
+    def run(self, tasks: Sequence[Task]) -> Iterator[TaskResult]:
+        """Yield a result per task as each finishes (not in task order)."""
+        pending = deque((index, 1) for index in range(len(tasks)))
+        running: List[_Attempt] = []
+        try:
+            while pending or running:
+                while pending and len(running) < self.jobs:
+                    running.append(self._start(tasks, *pending.popleft()))
+
+                deadlines = [a.deadline for a in running if a.deadline is not None]
+                timeout = max(0.0, min(deadlines) - time.time()) if deadlines else None
+                waitables = [a.conn for a in running if a.reply is None]
+                waitables += [a.process.sentinel for a in running]
+                ready = set(wait(waitables, timeout))
+
+                now = time.time()
+                still_running = []
+                for attempt in running:
+                    if attempt.conn in ready:
+                        try:
+                            attempt.reply = attempt.conn.recv()
+                        except EOFError:
+                            pass
+                    finished = (
+                        attempt.reply is not None or attempt.process.sentinel in ready
+                    )
+                    timed_out = (
+                        not finished
+                        and attempt.deadline is not None
+                        and now >= attempt.deadline
+                    )
+                    if not (finished or timed_out):
+                        still_running.append(attempt)
+                        continue
+                    if timed_out:
+                        _kill_group(attempt.process)
+                    attempt.process.join()
+                    attempt.conn.close()
+
+                    status, value, error = self._outcome(attempt, timed_out)
+                    if (
+                        status != "ok"
+                        and status in self.limits.retry_on
+                        and attempt.number <= self.limits.retries
+                    ):
+                        print(f"🔁 {tasks[attempt.index][0]}: {error} - retrying")
+                        pending.append((attempt.index, attempt.number + 1))
+                        continue
+                    yield TaskResult(
+                        name=tasks[attempt.index][0],
+                        status=status,
+                        value=value,
+                        error=error,
+                        attempts=attempt.number,
+                        started=attempt.started,
+                        seconds=now - attempt.started,
+                    )
+                running = still_running
+        finally:
+            for attempt in running:
+                _kill_group(attempt.process)
+                attempt.process.join()
+
+
+def print_failures(results: Sequence[TaskResult]) -> None:
+    """One line per job that did not finish, grouped by why."""
+    icons = {"timeout": "⏱️ ", "memory": "🧠", "crash": "💥", "error": "❌"}
+    for result in results:
+        if not result.ok:
+            tries = f" after {result.attempts} attempts" if result.attempts > 1 else ""
+            print(
+                f"{icons[result.status]} {result.name}: {result.status} - {result.error}{tries}"
+            )
@@ -0,0 +1,1123 @@
+#!/usr/bin/env python3
+"""
+Pure-Python rasteriser for the SVG that drawio_to_svg.py emits.
+
+Draws rects (with corner radii), polygons, ellipses and circles, paths
+(lines, quadratic/cubic curves and arcs), polylines with arrowhead markers,
+dashed strokes and text, then writes the pixels as a PNG with zlib. No
+browser is needed, so builders without Chromium still produce every
+``drawio_assets/diagram_*.png``.
+
+Shapes are filled by scanline: each pixel row is sampled on several
+sub-scanlines and span ends get exact fractional coverage, which gives
+anti-aliased edges. Text uses a bundled 5x7 bitmap font, spaced with the
+same Helvetica metrics drawio_to_svg.py lays labels out with.
+
+Only the SVG subset drawio_to_svg.py writes is supported: no transforms,
+gradients, clipping or external fonts.
+
+Usage:
+    from svg_raster import svg_to_png
+
+    png_bytes = svg_to_png(svg_string, scale=2.0)
+
+Command line:
+    python3 utils/svg_raster.py diagram.svg diagram.png --scale 2
+    python3 utils/svg_raster.py diagram.xml diagram.png   # draw.io XML
+
+Dependencies:
+    - None (stdlib only); numpy, when installed, speeds up compositing
+      without changing a single output byte
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import re
+import struct
+import unicodedata
+import xml.etree.ElementTree as ET
+import zlib
+from itertools import accumulate
+from operator import add
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from drawio_to_svg import mxgraph_xml_to_svg, text_width
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+Point = Tuple[float, float]
+Colour = Tuple[int, int, int]
+
+SUBSAMPLES = 5  # sub-scanlines per pixel row
+CURVE_TOLERANCE = 0.25  # max px a flattened curve may stray from the true one
+MITER_LIMIT = 4.0  # SVG's default stroke-miterlimit
+
+
+# ---------------------------------------------------------------------------
+# PNG writer
+# ---------------------------------------------------------------------------
+
+
+def _png_chunk(tag: bytes, data: bytes) -> bytes:
+    crc = zlib.crc32(tag + data) & 0xFFFFFFFF
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", crc)
+
+
+def write_png(width: int, height: int, rows: Iterable[bytes], level: int = 6) -> bytes:
+    """Encode 8-bit RGB rows (``width * 3`` bytes each) as a PNG file.
+
+    ``level`` is the zlib level; 9 saves about a tenth of the size at three
+    times the encode time, which dominates a render.
+    """
+    # Filter type 0 per row: diagrams are mostly flat colour, which deflate
+    # already compresses well without per-row filtering
+    raw = b"".join(b"\x00" + bytes(row) for row in rows)
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + _png_chunk(b"IHDR", header)
+        + _png_chunk(b"IDAT", zlib.compress(raw, level))
+        + _png_chunk(b"IEND", b"")
+    )
+
+
+# ---------------------------------------------------------------------------
+# Colours
+# ---------------------------------------------------------------------------
+
+_NAMED_COLOURS: Dict[str, Colour] = {
+    "black": (0, 0, 0),
+    "white": (255, 255, 255),
+    "red": (255, 0, 0),
+    "green": (0, 128, 0),
+    "blue": (0, 0, 255),
+    "yellow": (255, 255, 0),
+    "orange": (255, 165, 0),
+    "purple": (128, 0, 128),
+    "gray": (128, 128, 128),
+    "grey": (128, 128, 128),
+}
+
+
+def parse_colour(value: Optional[str]) -> Optional[Colour]:
+    """RGB tuple for an SVG colour, or None for ``none``/``transparent``."""
+    if value is None:
+        return None
+    value = value.strip().lower()
+    if value in ("", "none", "transparent"):
+        return None
+    if value.startswith("#"):
+        digits = value[1:]
+        if len(digits) == 3:
+            digits = "".join(d * 2 for d in digits)
+        if len(digits) >= 6:
+            return int(digits[0:2], 16), int(digits[2:4], 16), int(digits[4:6], 16)
+        return None
+    match = re.match(r"rgba?\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)", value)
+    if match:
+        return tuple(min(255, int(part)) for part in match.groups())
+    return _NAMED_COLOURS.get(value, (0, 0, 0))
+
+
+# ---------------------------------------------------------------------------
+# Canvas: coverage accumulation and compositing
+# ---------------------------------------------------------------------------
+
+
+def _signed_area(polygon: Sequence[Point]) -> float:
+    return (
+        sum(
+            x1 * y2 - x2 * y1
+            for (x1, y1), (x2, y2) in zip(polygon, list(polygon[1:]) + [polygon[0]])
+        )
+        / 2
+    )
+
+
+class Canvas:
+    """An RGB pixel buffer that polygons are filled onto with anti-aliasing."""
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        background: Colour = (255, 255, 255),
+        use_numpy: bool = NUMPY_AVAILABLE,
+    ):
+        self.width = width
+        self.height = height
+        self.use_numpy = use_numpy and NUMPY_AVAILABLE
+        if self.use_numpy:
+            self.pixels = np.empty((height, width, 3), dtype=np.uint8)
+            self.pixels[:] = background
+        else:
+            row = bytes(background) * width
+            self.rows = [bytearray(row) for _ in range(height)]
+
+    def fill(
+        self,
+        polygons: List[List[Point]],
+        colour: Colour,
+        alpha: float = 1.0,
+        union: bool = False,
+    ) -> None:
+        """Fill polygons (nonzero winding) with a colour.
+
+        With ``union`` every polygon counts as solid wherever it lies, which
+        is how stroke outlines made of overlapping pieces are painted.
+        """
+        if alpha <= 0:
+            return
+        polygons = [p for p in polygons if len(p) >= 3]
+        if union:
+            polygons = [p if _signed_area(p) >= 0 else p[::-1] for p in polygons]
+        if self.use_numpy:
+            self._composite_block(self._coverage_block(polygons), colour, alpha)
+        else:
+            self._composite(self._coverage(polygons), colour, alpha)
+
+    def _coverage(
+        self, polygons: List[List[Point]]
+    ) -> List[Tuple[int, int, List[float]]]:
+        """Per-pixel coverage (0-1) as ``(y, first x, values)`` for each row touched."""
+        edges = []
+        for polygon in polygons:
+            for (x0, y0), (x1, y1) in zip(polygon, polygon[1:] + polygon[:1]):
+                if y0 == y1:
+                    continue
+                direction = 1
+                if y0 > y1:
+                    x0, y0, x1, y1, direction = x1, y1, x0, y0, -1
+                edges.append((y0, y1, x0, (x1 - x0) / (y1 - y0), direction))
+        if not edges:
+            return []
+
+        min_x = max(0, int(math.floor(min(min(x for x, _ in p) for p in polygons))))
+        max_x = min(
+            self.width, int(math.ceil(max(max(x for x, _ in p) for p in polygons)))
+        )
+        min_y = max(0, int(math.floor(min(e[0] for e in edges))))
+        max_y = min(self.height, int(math.ceil(max(e[1] for e in edges))))
+        if min_x >= max_x or min_y >= max_y:
+            return []
+
+        weight = 1.0 / SUBSAMPLES
+        edges.sort()
+        active: list = []
+        next_edge = 0
+        rows = []
+        for y in range(min_y, max_y):
+            # Edges touching this row: add the new ones, drop the finished
+            while next_edge < len(edges) and edges[next_edge][0] < y + 1:
+                active.append(edges[next_edge])
+                next_edge += 1
+            active = [e for e in active if e[1] > y]
+
+            # Spans inside the shape on each sub-scanline
+            spans = []
+            for sub in range(SUBSAMPLES):
+                sy = min_y + ((y - min_y) * SUBSAMPLES + sub + 0.5) / SUBSAMPLES
+                crossings = sorted(
+                    (x0 + (sy - y0) * slope, direction)
+                    for y0, y1, x0, slope, direction in active
+                    if y0 <= sy < y1
+                )
+                winding = 0
+                start = 0.0
+                for x, direction in crossings:
+                    was_inside = winding != 0
+                    winding += direction
+                    if not was_inside and winding != 0:
+                        start = x
+                    elif was_inside and winding == 0:
+                        xa = min(max(start, min_x), max_x)
+                        xb = min(max(x, min_x), max_x)
+                        if xb > xa:
+                            spans.append((xa, xb))
+            if not spans:
+                continue
+
+            # Partial-pixel coverage at span ends, plus a difference array for
+            # the whole pixels between them, over just the columns touched
+            lo = int(min(xa for xa, _ in spans))
+            hi = min(max_x, int(max(xb for _, xb in spans)) + 1)
+            ends = [0.0] * (hi - lo + 1)
+            runs = [0.0] * (hi - lo + 1)
+            for xa, xb in spans:
+                xa -= lo
+                xb -= lo
+                ia, ib = int(xa), int(xb)
+                if ia == ib:
+                    ends[ia] += (xb - xa) * weight
+                    continue
+                ends[ia] += (ia + 1 - xa) * weight
+                ends[ib] += (xb - ib) * weight
+                runs[ia + 1] += weight
+                runs[ib] -= weight
+            width = hi - lo
+            rows.append((y, lo, list(map(add, ends[:width], accumulate(runs[:width])))))
+        return rows
+
+    def _coverage_block(self, polygons: List[List[Point]]):
+        """:meth:`_coverage` with NumPy: every edge/sub-scanline crossing at once.
+
+        Returns ``(x0, y0, coverage array)`` or None when nothing is covered.
+        """
+        corners = np.asarray(
+            [point for polygon in polygons for point in polygon], dtype=np.float64
+        )
+        if not len(corners):
+            return None
+        starts = np.concatenate([[0], np.cumsum([len(p) for p in polygons])[:-1]])
+        following = np.arange(len(corners)) + 1
+        following[np.cumsum([len(p) for p in polygons]) - 1] = starts
+        ax, ay = corners[:, 0], corners[:, 1]
+        bx, by = ax[following], ay[following]
+        keep = ay != by
+        ax, ay, bx, by = ax[keep], ay[keep], bx[keep], by[keep]
+        direction = np.where(ay < by, 1, -1)
+        top, bottom = np.minimum(ay, by), np.maximum(ay, by)
+        top_x = np.where(ay < by, ax, bx)
+        slope = (bx - ax) / (by - ay)
+
+        min_x = max(0, int(math.floor(corners[:, 0].min())))
+        max_x = min(self.width, int(math.ceil(corners[:, 0].max())))
+        min_y = max(0, int(math.floor(top.min()))) if len(top) else 0
+        max_y = min(self.height, int(math.ceil(bottom.max()))) if len(top) else 0
+        if min_x >= max_x or min_y >= max_y:
+            return None
+
+        # Sub-scanline k samples y = min_y + (k + 0.5) / SUBSAMPLES; each edge
+        # crosses the samples with top <= y < bottom
+        def first_sample_at_or_below(y):
+            k = np.ceil((y - min_y) * SUBSAMPLES - 0.5).astype(np.int64)
+            # Settle exact ties with the same comparison the pure-Python path uses
+            k -= (min_y + (k - 1 + 0.5) / SUBSAMPLES) >= y
+            k += (min_y + (k + 0.5) / SUBSAMPLES) < y
+            return k
+
+        first = first_sample_at_or_below(top)
+        last = first_sample_at_or_below(bottom)
+        counts = np.maximum(last - first, 0)
+        edge = np.repeat(np.arange(len(counts)), counts)
+        k = (
+            first[edge]
+            + np.arange(len(edge))
+            - np.repeat(np.cumsum(counts) - counts, counts)
+        )
+        sample_y = min_y + (k + 0.5) / SUBSAMPLES
+        x = top_x[edge] + (sample_y - top[edge]) * slope[edge]
+        order = np.lexsort((x, k))
+        k, x, winding_step = k[order], x[order], direction[edge][order]
+
+        # Closed outlines cross every sample line with a net winding of 0, so
+        # one running sum gives the winding number after each crossing
+        winding = np.cumsum(winding_step)
+        before = np.concatenate([[0], winding[:-1]])
+        enter = (before == 0) & (winding != 0)
+        leave = (before != 0) & (winding == 0)
+        rows_total = (max_y - min_y) * SUBSAMPLES
+        valid = (k[enter] >= 0) & (k[enter] < rows_total)
+        xa = np.clip(x[enter][valid], min_x, max_x) - min_x
+        xb = np.clip(x[leave][valid], min_x, max_x) - min_x
+        row = k[enter][valid] // SUBSAMPLES
+        wide = xb > xa
+        xa, xb, row = xa[wide], xb[wide], row[wide]
+
+        weight = 1.0 / SUBSAMPLES
+        span_w = max_x - min_x
+        cover = np.zeros((max_y - min_y, span_w + 2))
+        runs = np.zeros_like(cover)
+        ia, ib = xa.astype(np.int64), xb.astype(np.int64)
+        same = ia == ib
+        np.add.at(cover, (row[same], ia[same]), (xb[same] - xa[same]) * weight)
+        split = ~same
+        np.add.at(cover, (row[split], ia[split]), (ia[split] + 1 - xa[split]) * weight)
+        np.add.at(cover, (row[split], ib[split]), (xb[split] - ib[split]) * weight)
+        np.add.at(runs, (row[split], ia[split] + 1), weight)
+        np.add.at(runs, (row[split], ib[split]), -weight)
+        cover += np.cumsum(runs, axis=1)
+        return min_x, min_y, cover[:, :span_w]
+
+    def _composite_block(self, block, colour, alpha) -> None:
+        """:meth:`_composite` with NumPy, rounding to bytes the same way."""
+        if block is None:
+            return
+        x0, y0, cover = block
+        region = self.pixels[y0 : y0 + cover.shape[0], x0 : x0 + cover.shape[1]]
+        weights = np.minimum(cover, 1.0) * alpha
+        if alpha >= 1.0:
+            weights[cover >= 0.998] = 1.0
+        old = region.astype(np.float64)
+        new = np.floor(
+            old
+            + (np.asarray(colour, dtype=np.float64) - old) * weights[..., None]
+            + 0.5
+        )
+        painted = cover > 0.002
+        region[painted] = new[painted].astype(np.uint8)
+
+    def _composite(
+        self, rows: List[Tuple[int, int, List[float]]], colour, alpha
+    ) -> None:
+        r, g, b = colour
+        solid = bytes(colour)
+        opaque = alpha >= 1.0
+        for y, x0, cover in rows:
+            row = self.rows[y]
+            n = len(cover)
+            i = 0
+            while i < n:
+                c = cover[i]
+                if c <= 0.002:
+                    i += 1
+                    continue
+                if opaque and c >= 0.998:
+                    # Runs of fully covered pixels are copied in one slice
+                    j = i + 1
+                    while j < n and cover[j] >= 0.998:
+                        j += 1
+                    row[3 * (x0 + i) : 3 * (x0 + j)] = solid * (j - i)
+                    i = j
+                    continue
+                a = min(c, 1.0) * alpha
+                p = 3 * (x0 + i)
+                row[p] = int(row[p] + (r - row[p]) * a + 0.5)
+                row[p + 1] = int(row[p + 1] + (g - row[p + 1]) * a + 0.5)
+                row[p + 2] = int(row[p + 2] + (b - row[p + 2]) * a + 0.5)
+                i += 1
+
+    def to_png(self) -> bytes:
+        if self.use_numpy:
+            return write_png(
+                self.width, self.height, (row.tobytes() for row in self.pixels)
+            )
+        return write_png(self.width, self.height, self.rows)
+
+
+# ---------------------------------------------------------------------------
+# Geometry: outlines, curves and strokes
+# ---------------------------------------------------------------------------
+
+
+def _segments_for(length: float) -> int:
+    """Line segments needed to keep a curve of this length within tolerance."""
+    return max(4, min(256, int(math.sqrt(max(length, 0) / CURVE_TOLERANCE))))
+
+
+def ellipse_points(cx: float, cy: float, rx: float, ry: float) -> List[Point]:
+    n = _segments_for(math.pi * (rx + ry)) * 2
+    return [
+        (
+            cx + rx * math.cos(2 * math.pi * i / n),
+            cy + ry * math.sin(2 * math.pi * i / n),
+        )
+        for i in range(n)
+    ]
+
+
+def rounded_rect_points(
+    x: float, y: float, w: float, h: float, rx: float, ry: float
+) -> List[Point]:
+    rx, ry = min(rx, w / 2), min(ry, h / 2)
+    if rx <= 0 or ry <= 0:
+        return [(x, y), (x + w, y), (x + w, y + h), (x, y + h)]
+    points: List[Point] = []
+    n = _segments_for(math.pi * (rx + ry) / 4)
+    corners = [
+        (x + w - rx, y + ry, -math.pi / 2),
+        (x + w - rx, y + h - ry, 0.0),
+        (x + rx, y + h - ry, math.pi / 2),
+        (x + rx, y + ry, math.pi),
+    ]
+    for cx, cy, start in corners:
+        for i in range(n + 1):
+            angle = start + (math.pi / 2) * i / n
+            points.append((cx + rx * math.cos(angle), cy + ry * math.sin(angle)))
+    return points
+
+
+def _quadratic(p0: Point, p1: Point, p2: Point) -> List[Point]:
+    n = _segments_for(math.dist(p0, p1) + math.dist(p1, p2))
+    return [
+        (
+            (1 - t) ** 2 * p0[0] + 2 * (1 - t) * t * p1[0] + t * t * p2[0],
+            (1 - t) ** 2 * p0[1] + 2 * (1 - t) * t * p1[1] + t * t * p2[1],
+        )
+        for t in (i / n for i in range(1, n + 1))
+    ]
+
+
+def _cubic(p0: Point, p1: Point, p2: Point, p3: Point) -> List[Point]:
+    n = _segments_for(math.dist(p0, p1) + math.dist(p1, p2) + math.dist(p2, p3))
+    points = []
+    for i in range(1, n + 1):
+        t = i / n
+        u = 1 - t
+        points.append(
+            (
+                u**3 * p0[0]
+                + 3 * u * u * t * p1[0]
+                + 3 * u * t * t * p2[0]
+                + t**3 * p3[0],
+                u**3 * p0[1]
+                + 3 * u * u * t * p1[1]
+                + 3 * u * t * t * p2[1]
+                + t**3 * p3[1],
+            )
+        )
+    return points
+
+
+def _arc(
+    start: Point,
+    rx: float,
+    ry: float,
+    rotation: float,
+    large: bool,
+    sweep: bool,
+    end: Point,
+) -> List[Point]:
+    """Flatten an SVG elliptical arc (endpoint parameterisation, SVG spec F.6.5)."""
+    (x1, y1), (x2, y2) = start, end
+    rx, ry = abs(rx), abs(ry)
+    if rx == 0 or ry == 0 or start == end:
+        return [end]
+    phi = math.radians(rotation)
+    cos_phi, sin_phi = math.cos(phi), math.sin(phi)
+    dx, dy = (x1 - x2) / 2, (y1 - y2) / 2
+    x1p = cos_phi * dx + sin_phi * dy
+    y1p = -sin_phi * dx + cos_phi * dy
+    scale = (x1p / rx) ** 2 + (y1p / ry) ** 2
+    if scale > 1:
+        rx, ry = rx * math.sqrt(scale), ry * math.sqrt(scale)
+    numerator = rx * rx * ry * ry - rx * rx * y1p * y1p - ry * ry * x1p * x1p
+    denominator = rx * rx * y1p * y1p + ry * ry * x1p * x1p
+    coef = math.sqrt(max(0.0, numerator / denominator)) if denominator else 0.0
+    if large == sweep:
+        coef = -coef
+    cxp, cyp = coef * rx * y1p / ry, -coef * ry * x1p / rx
+    cx = cos_phi * cxp - sin_phi * cyp + (x1 + x2) / 2
+    cy = sin_phi * cxp + cos_phi * cyp + (y1 + y2) / 2
+    theta = math.atan2((y1p - cyp) / ry, (x1p - cxp) / rx)
+    delta = math.atan2((-y1p - cyp) / ry, (-x1p - cxp) / rx) - theta
+    if sweep and delta < 0:
+        delta += 2 * math.pi
+    elif not sweep and delta > 0:
+        delta -= 2 * math.pi
+    n = _segments_for(abs(delta) * (rx + ry) / 2)
+    points = []
+    for i in range(1, n + 1):
+        angle = theta + delta * i / n
+        ex, ey = rx * math.cos(angle), ry * math.sin(angle)
+        points.append(
+            (cx + cos_phi * ex - sin_phi * ey, cy + sin_phi * ex + cos_phi * ey)
+        )
+    return points
+
+
+_PATH_TOKEN = re.compile(
+    r"[MmLlHhVvCcQqAaZz]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?"
+)
+
+
+def parse_path(d: str) -> List[Tuple[List[Point], bool]]:
+    """Flatten SVG path data into ``[(points, closed)]`` subpaths."""
+    tokens = _PATH_TOKEN.findall(d)
+    subpaths: List[Tuple[List[Point], bool]] = []
+    points: List[Point] = []
+    current: Point = (0.0, 0.0)
+    command = ""
+    i = 0
+
+    def numbers(count: int) -> List[float]:
+        nonlocal i
+        values = [float(tok) for tok in tokens[i : i + count]]
+        i += count
+        return values
+
+    while i < len(tokens):
+        if tokens[i].isalpha():
+            command = tokens[i]
+            i += 1
+            if command in "Zz":
+                if points:
+                    subpaths.append((points, True))
+                    current = points[0]
+                    points = []
+                continue
+        elif not command:
+            break
+        relative = command.islower()
+        ox, oy = current if relative else (0.0, 0.0)
+        upper = command.upper()
+        if upper == "M":
+            x, y = numbers(2)
+            if points:
+                subpaths.append((points, False))
+            current = (ox + x, oy + y)
+            points = [current]
+            command = "l" if relative else "L"  # later pairs are line-tos
+            continue
+        if not points:
+            points = [current]
+        if upper == "L":
+            x, y = numbers(2)
+            new = [(ox + x, oy + y)]
+        elif upper == "H":
+            (x,) = numbers(1)
+            new = [(ox + x, current[1])]
+        elif upper == "V":
+            (y,) = numbers(1)
+            new = [(current[0], oy + y)]
+        elif upper == "Q":
+            x1, y1, x, y = numbers(4)
+            new = _quadratic(current, (ox + x1, oy + y1), (ox + x, oy + y))
+        elif upper == "C":
+            x1, y1, x2, y2, x, y = numbers(6)
+            new = _cubic(
+                current, (ox + x1, oy + y1), (ox + x2, oy + y2), (ox + x, oy + y)
+            )
+        elif upper == "A":
+            rx, ry, rotation, large, sweep, x, y = numbers(7)
+            new = _arc(
+                current, rx, ry, rotation, bool(large), bool(sweep), (ox + x, oy + y)
+            )
+        else:
+            i += 1  # unsupported command (S/T): skip its arguments one by one
+            continue
+        points.extend(new)
+        current = new[-1]
+    if points:
+        subpaths.append((points, False))
+    return subpaths
+
+
+def _dash(points: List[Point], pattern: List[float]) -> List[List[Point]]:
+    """Split a polyline into the visible dashes of a dash pattern."""
+    if len(pattern) % 2:
+        pattern = pattern * 2
+    if not pattern or sum(pattern) <= 0:
+        return [points]
+    dashes: List[List[Point]] = []
+    index, left, drawing = 0, pattern[0], True
+    current: List[Point] = [points[0]]
+    for start, end in zip(points, points[1:]):
+        length = math.dist(start, end)
+        travelled = 0.0
+        while length - travelled > left:
+            travelled += left
+            t = travelled / length
+            point = (
+                start[0] + (end[0] - start[0]) * t,
+                start[1] + (end[1] - start[1]) * t,
+            )
+            if drawing:
+                current.append(point)
+                dashes.append(current)
+            current = [point]
+            drawing = not drawing
+            index = (index + 1) % len(pattern)
+            left = pattern[index]
+        left -= length - travelled
+        if drawing:
+            current.append(end)
+        else:
+            current = [end]
+    if drawing and len(current) > 1:
+        dashes.append(current)
+    return dashes
+
+
+def stroke_polygons(
+    points: List[Point],
+    width: float,
+    closed: bool = False,
+    join: str = "miter",
+    dashes: Optional[List[float]] = None,
+) -> List[List[Point]]:
+    """Outline a polyline as polygons to fill with ``union=True``."""
+    points = [p for k, p in enumerate(points) if k == 0 or p != points[k - 1]]
+    if closed and len(points) > 1 and points[0] != points[-1]:
+        points = points + [points[0]]
+    if len(points) < 2 or width <= 0:
+        return []
+    if dashes:
+        pieces = [(dash, False) for dash in _dash(points, dashes)]
+    else:
+        pieces = [(points, closed)]
+
+    hw = width / 2
+    polygons: List[List[Point]] = []
+    for line, is_closed in pieces:
+        normals = []
+        for (x0, y0), (x1, y1) in zip(line, line[1:]):
+            length = math.hypot(x1 - x0, y1 - y0) or 1
+            nx, ny = -(y1 - y0) / length * hw, (x1 - x0) / length * hw
+            normals.append((nx, ny))
+            polygons.append(
+                [
+                    (x0 + nx, y0 + ny),
+                    (x1 + nx, y1 + ny),
+                    (x1 - nx, y1 - ny),
+                    (x0 - nx, y0 - ny),
+                ]
+            )
+
+        # Joins between consecutive segments (and around the closing vertex)
+        joins = list(zip(line[1:-1], normals, normals[1:]))
+        if is_closed and len(normals) > 1:
+            joins.append((line[0], normals[-1], normals[0]))
+        for (vx, vy), (ax, ay), (bx, by) in joins:
+            if join == "round":
+                polygons.append(ellipse_points(vx, vy, hw, hw))
+                continue
+            # Outer side of the turn: the side both offsets bulge towards
+            side = -1 if ax * by - ay * bx > 0 else 1
+            a = (vx + ax * side, vy + ay * side)
+            b = (vx + bx * side, vy + by * side)
+            # Miter tip: along the bisector, hw / cos(half the turn angle)
+            mx, my = ax + bx, ay + by
+            cos_half = math.hypot(mx, my) / (2 * hw)
+            if cos_half > 1e-6 and 1 / cos_half <= MITER_LIMIT:
+                scale = hw / (cos_half * math.hypot(mx, my))
+                tip = (vx + mx * scale * side, vy + my * scale * side)
+                polygons.append([(vx, vy), a, tip, b])
+            else:
+                polygons.append([(vx, vy), a, b])
+    return polygons
+
+
+# ---------------------------------------------------------------------------
+# Bitmap font
+# ---------------------------------------------------------------------------
+
+# 5x7 glyphs for printable ASCII, space to "~" in order. Each glyph is seven
+# rows of five pixels, one hex byte per row with the leftmost pixel in bit 4.
+_FONT_SOURCE = """
+    00000000000000 04040404040004 0A0A0A00000000 0A0A1F0A1F0A0A 040F140E051E04
+    18190204081303 0C12140815120D 0C040800000000 02040808080402 08040202020408
+    0004150E150400 0004041F040400 000000000C0408 0000001F000000 00000000000C0C
+    00010204081000 0E11131519110E 040C040404040E 0E11010204081F 1F02040201110E
+    02060A121F0202 1F101E0101110E 0608101E11110E 1F010204080808 0E11110E11110E
+    0E11110F01020C 000C0C000C0C00 000C0C000C0408 02040810080402 00001F001F0000
+    08040201020408 0E110102040004 0E11010D15150E 0E1111111F1111 1E11111E11111E
+    0E11101010110E 1C12111111121C 1F10101E10101F 1F10101E101010 0E11101711110F
+    1111111F111111 0E04040404040E 0702020202120C 11121418141211 1010101010101F
+    111B1515111111 11111915131111 0E11111111110E 1E11111E101010 0E11111115120D
+    1E11111E141211 0F10100E01011E 1F040404040404 1111111111110E 11111111110A04
+    1111111515150A 11110A040A1111 1111110A040404 1F01020408101F 0E08080808080E
+    00100804020100 0E02020202020E 040A1100000000 0000000000001F 08040200000000
+    00000E010F110F 1010161911111E 00000E1010110E 01010D1311110F 00000E111F100E
+    0609081C080808 000F11110F010E 10101619111111 04000C0404040E 0200060202120C
+    10101214181412 0C04040404040E 00001A15151111 00001619111111 00000E1111110E
+    00001E111E1010 00000D130F0101 00001619101010 00000E100E011E 08081C08080906
+    0000111111130D 00001111110A04 0000111115150A 0000110A040A11 000011110F010E
+    00001F0204081F 02040408040402 04040404040404 08040402040408 00000815020000"""
+FONT_5X7: Dict[str, Tuple[int, ...]] = {
+    chr(32 + index): tuple(int(glyph[i : i + 2], 16) for i in range(0, 14, 2))
+    for index, glyph in enumerate(_FONT_SOURCE.split())
+}
+_MISSING_GLYPH = (0x1F, 0x11, 0x11, 0x11, 0x11, 0x11, 0x1F)
+
+_CAP_HEIGHT = 0.72  # ems covered by the seven glyph rows (Helvetica's cap height)
+_ITALIC_SLANT = 0.2
+
+
+def _glyph(char: str) -> Tuple[int, ...]:
+    """Bitmap for a character; accented letters use their base letter."""
+    if char in FONT_5X7:
+        return FONT_5X7[char]
+    base = unicodedata.normalize("NFKD", char)[:1]
+    return FONT_5X7.get(base, _MISSING_GLYPH)
+
+
+def text_polygons(
+    text: str,
+    x: float,
+    y: float,
+    font_size: float,
+    anchor: str = "start",
+    baseline: str = "alphabetic",
+    bold: bool = False,
+    italic: bool = False,
+    underline: bool = False,
+) -> List[List[Point]]:
+    """Outline one line of text as pixel-run polygons.
+
+    Glyphs are placed on the Helvetica advance widths, so anchoring and
+    line lengths match the SVG as a browser would draw it.
+    """
+    row_h = font_size * _CAP_HEIGHT / 7
+    total = text_width(text, font_size, bold)
+    pen = {"middle": x - total / 2, "end": x - total}.get(anchor, x)
+    top = y - 3.5 * row_h if baseline in ("central", "middle") else y - 7 * row_h
+
+    polygons: List[List[Point]] = []
+    for char in text:
+        advance = text_width(char, font_size, bold)
+        rows = _glyph(char)
+        columns = [c for c in range(5) if any(row >> (4 - c) & 1 for row in rows)]
+        if columns and not char.isspace():
+            first = columns[0]
+            ink = columns[-1] - first + 1
+            px_w = min(row_h, advance * 0.85 / ink)
+            extra = px_w * 0.5 if bold else 0.0
+            left = pen + (advance - ink * px_w - extra) / 2
+            for r, bits in enumerate(rows):
+                shift = (3 - r) * row_h * _ITALIC_SLANT if italic else 0.0
+                c = 0
+                while c < 5:
+                    if not bits >> (4 - c) & 1:
+                        c += 1
+                        continue
+                    end = c
+                    while end < 5 and bits >> (4 - end) & 1:
+                        end += 1
+                    x0 = left + (c - first) * px_w + shift
+                    x1 = left + (end - first) * px_w + extra + shift
+                    y0, y1 = top + r * row_h, top + (r + 1) * row_h
+                    polygons.append([(x0, y0), (x1, y0), (x1, y1), (x0, y1)])
+                    c = end
+        pen += advance
+    if underline and total:
+        x0 = {"middle": x - total / 2, "end": x - total}.get(anchor, x)
+        y0 = top + 7.6 * row_h
+        thickness = max(font_size / 14, 0.5)
+        polygons.append(
+            [
+                (x0, y0),
+                (x0 + total, y0),
+                (x0 + total, y0 + thickness),
+                (x0, y0 + thickness),
+            ]
+        )
+    return polygons
+
+
+# ---------------------------------------------------------------------------
+# SVG walker
+# ---------------------------------------------------------------------------
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _number(value: Optional[str], default: float = 0.0) -> float:
+    if value is None:
+        return default
+    match = re.match(r"\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)", value)
+    return float(match.group(1)) if match else default
+
+
+def _numbers(value: Optional[str]) -> List[float]:
+    return [
+        float(tok)
+        for tok in re.findall(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?", value or "")
+    ]
+
+
+def _outlines(element: ET.Element) -> List[Tuple[List[Point], bool]]:
+    """Shape outlines of a drawable element, in its own user units."""
+    tag = _local(element.tag)
+    get = element.get
+    if tag == "rect":
+        rx, ry = get("rx"), get("ry")
+        rx_v = _number(rx if rx is not None else ry)
+        ry_v = _number(ry if ry is not None else rx)
+        return [
+            (
+                rounded_rect_points(
+                    _number(get("x")),
+                    _number(get("y")),
+                    _number(get("width")),
+                    _number(get("height")),
+                    rx_v,
+                    ry_v,
+                ),
+                True,
+            )
+        ]
+    if tag == "ellipse":
+        return [
+            (
+                ellipse_points(
+                    _number(get("cx")),
+                    _number(get("cy")),
+                    _number(get("rx")),
+                    _number(get("ry")),
+                ),
+                True,
+            )
+        ]
+    if tag == "circle":
+        r = _number(get("r"))
+        return [(ellipse_points(_number(get("cx")), _number(get("cy")), r, r), True)]
+    if tag in ("polygon", "polyline"):
+        values = _numbers(get("points"))
+        points = list(zip(values[0::2], values[1::2]))
+        return [(points, tag == "polygon")]
+    if tag == "line":
+        return [
+            (
+                [
+                    (_number(get("x1")), _number(get("y1"))),
+                    (_number(get("x2")), _number(get("y2"))),
+                ],
+                False,
+            )
+        ]
+    if tag == "path":
+        return parse_path(get("d", ""))
+    return []
+
+
+def _direction(points: List[Point], at_end: bool) -> Optional[float]:
+    """Direction of travel (radians) at one end of a polyline."""
+    ordered = points[::-1] if at_end else points
+    for other in ordered[1:]:
+        if other != ordered[0]:
+            dx, dy = ordered[0][0] - other[0], ordered[0][1] - other[1]
+            angle = math.atan2(dy, dx)
+            return angle if at_end else angle + math.pi
+    return None
+
+
+class SvgRasteriser:
+    """Paints an SVG document (the drawio_to_svg.py subset) onto a Canvas."""
+
+    def __init__(self, svg: str, scale: float = 1.0, use_numpy: bool = NUMPY_AVAILABLE):
+        self.root = ET.fromstring(svg.strip())
+        view_box = _numbers(self.root.get("viewBox"))
+        width = _number(self.root.get("width"), view_box[2] if view_box else 100)
+        height = _number(self.root.get("height"), view_box[3] if view_box else 100)
+        if len(view_box) != 4:
+            view_box = [0.0, 0.0, width, height]
+        self.origin = (view_box[0], view_box[1])
+        self.scale = scale * (width / view_box[2] if view_box[2] else 1.0)
+
+        background = re.search(
+            r"background(?:-color)?\s*:\s*([^;]+)", self.root.get("style", "")
+        )
+        self.canvas = Canvas(
+            max(1, math.ceil(width * scale)),
+            max(1, math.ceil(height * scale)),
+            (parse_colour(background.group(1)) if background else None)
+            or (255, 255, 255),
+            use_numpy,
+        )
+        self.markers = {
+            element.get("id"): element
+            for element in self.root.iter()
+            if _local(element.tag) == "marker" and element.get("id")
+        }
+
+    def to_canvas(self, point: Point) -> Point:
+        return (point[0] - self.origin[0]) * self.scale, (
+            point[1] - self.origin[1]
+        ) * self.scale
+
+    def render(self) -> Canvas:
+        self._draw_children(self.root)
+        return self.canvas
+
+    def _draw_children(self, parent: ET.Element) -> None:
+        for element in parent:
+            tag = _local(element.tag)
+            if tag in ("defs", "marker", "title", "desc", "style", "metadata"):
+                continue
+            if tag in ("g", "svg", "a"):
+                self._draw_children(element)
+            elif tag == "text":
+                self._draw_text(element)
+            else:
+                self._draw_shape(element, self.to_canvas, self.scale)
+
+    def _draw_shape(self, element: ET.Element, mapper, unit: float) -> None:
+        """Fill, stroke, then markers, with points mapped onto the canvas."""
+        outlines = _outlines(element)
+        if not outlines:
+            return
+        get = element.get
+        opacity = _number(get("opacity"), 1.0)
+
+        fill = parse_colour(get("fill", "black"))
+        if fill:
+            polygons = [[mapper(p) for p in points] for points, _ in outlines]
+            self.canvas.fill(
+                polygons, fill, opacity * _number(get("fill-opacity"), 1.0)
+            )
+
+        stroke = parse_colour(get("stroke"))
+        stroke_width = _number(get("stroke-width"), 1.0)
+        if stroke and stroke_width > 0:
+            dashes = [d * unit for d in _numbers(get("stroke-dasharray"))]
+            polygons = []
+            for points, closed in outlines:
+                polygons.extend(
+                    stroke_polygons(
+                        [mapper(p) for p in points],
+                        stroke_width * unit,
+                        closed,
+                        get("stroke-linejoin", "miter"),
+                        dashes or None,
+                    )
+                )
+            self.canvas.fill(
+                polygons,
+                stroke,
+                opacity * _number(get("stroke-opacity"), 1.0),
+                union=True,
+            )
+
+        for attribute, at_end in (("marker-start", False), ("marker-end", True)):
+            reference = re.match(r"url\(#([^)]+)\)", get(attribute, ""))
+            if reference and reference.group(1) in self.markers:
+                points = outlines[-1 if at_end else 0][0]
+                angle = _direction(points, at_end)
+                if angle is not None:
+                    vertex = points[-1] if at_end else points[0]
+                    self._draw_marker(
+                        self.markers[reference.group(1)],
+                        vertex,
+                        angle,
+                        stroke_width,
+                        at_end,
+                        mapper,
+                        unit,
+                    )
+
+    def _draw_marker(
+        self,
+        marker: ET.Element,
+        vertex: Point,
+        angle: float,
+        stroke_width: float,
+        at_end: bool,
+        mapper,
+        unit: float,
+    ) -> None:
+        orient = marker.get("orient", "0")
+        if orient == "auto-start-reverse" and not at_end:
+            angle += math.pi  # start markers point back, away from the path
+        elif orient not in ("auto", "auto-start-reverse"):
+            angle = math.radians(_number(orient))
+        size = (
+            stroke_width
+            if marker.get("markerUnits", "strokeWidth") == "strokeWidth"
+            else 1.0
+        )
+        ref_x, ref_y = _number(marker.get("refX")), _number(marker.get("refY"))
+        cos_a, sin_a = math.cos(angle), math.sin(angle)
+
+        def marker_mapper(point: Point) -> Point:
+            mx, my = (point[0] - ref_x) * size, (point[1] - ref_y) * size
+            return mapper(
+                (
+                    vertex[0] + mx * cos_a - my * sin_a,
+                    vertex[1] + mx * sin_a + my * cos_a,
+                )
+            )
+
+        for child in marker:
+            self._draw_shape(child, marker_mapper, unit * size)
+
+    def _draw_text(self, element: ET.Element) -> None:
+        lines = []
+        tspans = [child for child in element if _local(child.tag) == "tspan"]
+        if tspans:
+            for tspan in tspans:
+                lines.append((tspan, "".join(tspan.itertext())))
+        else:
+            lines.append((element, "".join(element.itertext())))
+
+        for source, text in lines:
+
+            def attr(name: str, default: Optional[str] = None) -> Optional[str]:
+                return source.get(name, element.get(name, default))
+
+            colour = parse_colour(attr("fill", "black"))
+            text = text.strip()
+            if not colour or not text:
+                continue
+            polygons = text_polygons(
+                text,
+                _number(attr("x")),
+                _number(attr("y")),
+                _number(attr("font-size"), 16.0),
+                attr("text-anchor", "start"),
+                attr("dominant-baseline", "alphabetic"),
+                bold=attr("font-weight", "normal")
+                in ("bold", "bolder", "600", "700", "800", "900"),
+                italic=attr("font-style", "normal") in ("italic", "oblique"),
+                underline="underline" in (attr("text-decoration") or ""),
+            )
+            self.canvas.fill(
+                [[self.to_canvas(p) for p in polygon] for polygon in polygons],
+                colour,
+                _number(attr("opacity"), 1.0),
+                union=True,
+            )
+
+
+def svg_to_png(
+    svg: str, scale: float = 1.0, use_numpy: bool = NUMPY_AVAILABLE
+) -> bytes:
+    """Rasterise an SVG string (as written by drawio_to_svg.py) to PNG bytes."""
+    return SvgRasteriser(svg, scale, use_numpy).render().to_png()
+
+
+def drawio_xml_to_png(xml: str, scale: float = 1.0) -> bytes:
+    """Render mxGraphModel XML to PNG bytes without a browser."""
+    return svg_to_png(mxgraph_xml_to_svg(xml), scale)
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Rasterise drawio_to_svg.py output (or draw.io XML) to PNG "
+        "without a browser."
+    )
+    parser.add_argument(
+        "input", type=Path, help="SVG file, or draw.io .xml/.drawio file"
+    )
+    parser.add_argument(
+        "output", type=Path, nargs="?", help="PNG file (default: input with .png)"
+    )
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="Pixels per SVG unit (default: 1)"
+    )
+    parser.add_argument(
+        "--no-numpy",
+        action="store_true",
+        help="Use the pure-Python compositor even if numpy is installed",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    source = args.input.read_text(encoding="utf-8")
+    if args.input.suffix in (".xml", ".drawio"):
+        source = mxgraph_xml_to_svg(source)
+    output = args.output or args.input.with_suffix(".png")
+    png = svg_to_png(source, args.scale, use_numpy=not args.no_numpy)
+    output.write_bytes(png)
+    print(f"✅ Wrote {output} ({len(png)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,708 @@
+#!/usr/bin/env python3
+"""
+Generate trace tables by running lesson code under a line tracer.
+
+Lessons 2 and 4 teach trace tables ("Trace Tables: Tracking Data Flow",
+"Loop Trace Tables") with tables written by hand. This tool runs a Python
+code cell, records every variable after each line executes, and writes the
+same kind of table in Markdown - one row per step, plus anything the step
+printed.
+
+Code cells tagged ``trace-table`` get their table inserted after them when
+``ipynb_to_md.py`` exports the notebook, so it lands in the Markdown and
+PDF editions. Options go in the cell metadata:
+
+    "metadata": {
+        "tags": ["trace-table"],
+        "trace_table": {"variables": ["i", "total"], "max_steps": 40, "inputs": ["4"]}
+    }
+
+Tables are cached under .build_cache/trace_tables/ by a hash of the source
+and options, so the cell only runs again when it changes.
+
+A line that calls a function is recorded once the call has returned, after
+the function's own rows, so its row shows the assigned result and what it
+printed.
+
+Tracing uses ``sys.monitoring`` on Python 3.12+, with line, jump and return
+events switched on only for the cell's own code objects, so library calls and the rest of
+the interpreter run at full speed. Older versions fall back to
+``sys.settrace`` with a tracer that ignores every frame outside the cell.
+
+Usage:
+    # Code cells of a notebook, numbered for --cell
+    python3 utils/trace_tables.py lessons/lesson4_for_loops.ipynb --list
+
+    # Trace one cell (notebook cell index) or a snippet
+    python3 utils/trace_tables.py lessons/lesson4_for_loops.ipynb --cell 39
+    python3 utils/trace_tables.py --code $'total = 0\\nfor i in range(1, 5):\\n    total = total + i'
+
+    # Only some variables, a step cap and answers for input()
+    python3 utils/trace_tables.py --code "$(cat sum.py)" --variables i,total --max-steps 20 --input 4
+
+    # Regression checks under every available tracer (exit code 1 on failure)
+    python3 utils/trace_tables.py --check
+
+Dependencies:
+    - None (stdlib only)
+"""
+
+from __future__ import annotations
+
+import argparse
+import builtins
+import io
+import json
+import reprlib
+import sys
+import time
+import types
+from contextlib import redirect_stdout
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from build_cache import DEFAULT_CACHE_DIR, JsonCache, content_hash
+
+TRACE_TAG = "trace-table"
+METADATA_KEY = "trace_table"
+CACHE_NAMESPACE = "trace_tables"
+# Bump when the recorded rows or their rendering change
+TRACE_FORMAT_VERSION = 3
+
+DEFAULT_MAX_STEPS = 200
+DEFAULT_VALUE_WIDTH = 30
+UNSET = "—"
+
+CELL_FILENAME = "<trace-table cell>"
+
+MONITORING_AVAILABLE = hasattr(sys, "monitoring")
+
+
+class StepLimitReached(Exception):
+    """Raised inside the traced code once the step cap is hit."""
+
+
+@dataclass
+class TraceOptions:
+    """What to record; also read from a cell's ``trace_table`` metadata."""
+
+    variables: Optional[List[str]] = None  # None: every variable the cell creates
+    exclude: List[str] = field(default_factory=list)
+    max_steps: int = DEFAULT_MAX_STEPS
+    inputs: List[str] = field(default_factory=list)  # answers for input(), in order
+    changes_only: bool = False  # drop steps that change nothing and print nothing
+    value_width: int = DEFAULT_VALUE_WIDTH
+
+    @classmethod
+    def from_metadata(cls, metadata: dict) -> "TraceOptions":
+        known = {
+            name: metadata[name]
+            for name in cls.__dataclass_fields__
+            if name in metadata
+        }
+        unknown = sorted(set(metadata) - set(known))
+        if unknown:
+            raise ValueError(f"unknown trace_table option(s): {', '.join(unknown)}")
+        return cls(**known)
+
+
+@dataclass
+class TraceResult:
+    columns: List[str]
+    # Each row: {"step", "line", "code", "values": {name: text}, "output"}
+    rows: List[dict]
+    stopped: bool = False  # hit max_steps
+    error: str = ""
+    tracer: str = ""
+
+    def markdown(self) -> str:
+        """The trace table in the style of the hand-written lesson tables."""
+        show_output = any(row["output"] for row in self.rows)
+        header = ["Step", "Line"] + [f"`{name}`" for name in self.columns]
+        if show_output:
+            header.append("Output")
+        lines = [
+            "| " + " | ".join(header) + " |",
+            "|" + "|".join("---" for _ in header) + "|",
+        ]
+        for row in self.rows:
+            cells = [str(row["step"]), f"`{_cell_text(row['code'])}`"]
+            cells += [
+                _cell_text(row["values"].get(name, UNSET)) for name in self.columns
+            ]
+            if show_output:
+                cells.append(
+                    _cell_text(row["output"].rstrip("\n").replace("\n", " / "))
+                )
+            lines.append("| " + " | ".join(cells) + " |")
+
+        notes = []
+        if self.stopped:
+            notes.append(f"_Stopped after {len(self.rows)} steps._")
+        if self.error:
+            notes.append(f"_The code raised {self.error}._")
+        return "\n".join(lines + ([""] + notes if notes else [])) + "\n"
+
+
+def _cell_text(text: str) -> str:
+    return text.replace("|", "\\|") if text else ""
+
+
+def _is_variable(name: str, value) -> bool:
+    return not (
+        name.startswith("_")
+        or isinstance(value, (types.ModuleType, types.FunctionType, type))
+    )
+
+
+class _Recorder:
+    """Turns line events into rows: the state after each line has run.
+
+    Each frame has its own pending line, closed by that frame's next line or
+    by its return, so a line that calls a function is recorded once the call
+    has returned - after the callee's rows and with the assigned result.
+    """
+
+    def __init__(self, source: str, options: TraceOptions, stdout: io.StringIO):
+        self.lines = source.splitlines()
+        self.options = options
+        self.stdout = stdout
+        self.repr = reprlib.Repr()
+        self.repr.maxstring = self.repr.maxother = options.value_width
+        self.rows: List[dict] = []
+        self.seen: Dict[str, None] = {}  # variable names in order of first appearance
+        self.pending: Dict[types.FrameType, int] = {}  # frame -> line still running
+        self.output_mark = 0
+        self.previous: Dict[str, str] = {}
+
+    def snapshot(self, namespace: dict) -> Dict[str, str]:
+        wanted = self.options.variables
+        values = {}
+        for name, value in list(namespace.items()):
+            if name in self.options.exclude:
+                continue
+            if wanted is not None and name not in wanted:
+                continue
+            if wanted is None and not _is_variable(name, value):
+                continue
+            self.seen.setdefault(name)
+            values[name] = self.repr.repr(value)
+        return values
+
+    def finish_line(self, frame: Optional[types.FrameType] = None) -> None:
+        """Record the row for the line that has just run in ``frame``.
+
+        Without a frame, every pending line is recorded, innermost first.
+        """
+        if frame is None:
+            for pending in reversed(list(self.pending)):
+                self.finish_line(pending)
+            return
+        line = self.pending.pop(frame, None)
+        if line is None:
+            return
+        # Module-level code sees its globals; inside a function, its locals too
+        if frame.f_code.co_name == "<module>":
+            namespace = frame.f_globals
+        else:
+            namespace = {**frame.f_globals, **frame.f_locals}
+        values = self.snapshot(namespace)
+        output = ""
+        if self.stdout.tell() != self.output_mark:
+            output = self.stdout.getvalue()[self.output_mark :]
+            self.output_mark = self.stdout.tell()
+        if self.options.changes_only and values == self.previous and not output:
+            return
+        self.previous = values
+        code = self.lines[line - 1].strip() if 0 < line <= len(self.lines) else ""
+        self.rows.append(
+            {
+                "step": len(self.rows) + 1,
+                "line": line,
+                "code": code,
+                "values": values,
+                "output": output,
+            }
+        )
+
+    def finish_exited(self, frame: types.FrameType) -> None:
+        """Record the lines of frames no longer on ``frame``'s stack.
+
+        A frame left by an exception gets no return event under
+        sys.monitoring; its last line is recorded here instead.
+        """
+        if not self.pending or list(self.pending) == [frame]:
+            return
+        live = set()
+        while frame is not None:
+            live.add(frame)
+            frame = frame.f_back
+        for pending in reversed(list(self.pending)):
+            if pending not in live:
+                self.finish_line(pending)
+
+    def on_line(self, frame, line: int) -> None:
+        self.finish_exited(frame)
+        self.finish_line(frame)
+        if len(self.rows) >= self.options.max_steps:
+            raise StepLimitReached()
+        self.pending[frame] = line
+
+    def on_return(self, frame) -> None:
+        self.finish_line(frame)
+        if len(self.rows) >= self.options.max_steps and self.pending:
+            raise StepLimitReached()
+
+
+def _code_objects(code: types.CodeType) -> Iterator[types.CodeType]:
+    yield code
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            yield from _code_objects(const)
+
+
+def _line_table(code: types.CodeType) -> Dict[int, int]:
+    """Bytecode offset -> line number for every instruction of ``code``."""
+    table = {}
+    for start, end, line in code.co_lines():
+        if line is not None:
+            for offset in range(start, end, 2):
+                table[offset] = line
+    return table
+
+
+def _run_monitored(code: types.CodeType, namespace: dict, recorder: _Recorder) -> None:
+    """Run ``code`` with line, jump and return events for its own code objects only.
+
+    LINE events do not fire when a loop jumps back to the line it is already
+    on (``for i in range(3): t += i``), so backward jumps within one line
+    are reported as a line step too - the same rule CPython's own
+    ``sys.settrace`` uses on top of sys.monitoring. Returns and yields close
+    the frame's last line, as the settrace "return" event does.
+    """
+    monitoring = sys.monitoring
+    tool = monitoring.DEBUGGER_ID
+    leave = monitoring.events.PY_RETURN | monitoring.events.PY_YIELD
+    events = monitoring.events.LINE | monitoring.events.JUMP | leave
+    line_tables = {
+        code_object: _line_table(code_object) for code_object in _code_objects(code)
+    }
+    monitoring.use_tool_id(tool, "trace_tables")
+    try:
+
+        def line_event(code_object, line_number):
+            recorder.on_line(sys._getframe(1), line_number)
+
+        def leave_event(code_object, offset, value):
+            recorder.on_return(sys._getframe(1))
+
+        def jump_event(code_object, offset, destination):
+            if destination > offset:
+                return monitoring.DISABLE  # forward jumps never repeat a line
+            lines = line_tables.get(code_object, {})
+            line = lines.get(destination)
+            if line is not None and line == lines.get(offset):
+                recorder.on_line(sys._getframe(1), line)
+            # Jumps back to another line raise a LINE event of their own
+            return None
+
+        monitoring.register_callback(tool, monitoring.events.LINE, line_event)
+        monitoring.register_callback(tool, monitoring.events.JUMP, jump_event)
+        monitoring.register_callback(tool, monitoring.events.PY_RETURN, leave_event)
+        monitoring.register_callback(tool, monitoring.events.PY_YIELD, leave_event)
+        for code_object in line_tables:
+            monitoring.set_local_events(tool, code_object, events)
+        exec(code, namespace)
+    finally:
+        for code_object in line_tables:
+            monitoring.set_local_events(tool, code_object, 0)
+        monitoring.register_callback(tool, monitoring.events.LINE, None)
+        monitoring.register_callback(tool, monitoring.events.JUMP, None)
+        monitoring.register_callback(tool, monitoring.events.PY_RETURN, None)
+        monitoring.register_callback(tool, monitoring.events.PY_YIELD, None)
+        monitoring.free_tool_id(tool)
+
+
+def _run_settrace(code: types.CodeType, namespace: dict, recorder: _Recorder) -> None:
+    """Run ``code`` under sys.settrace, tracing lines of the cell's frames only."""
+
+    def tracer(frame, event, arg):
+        if frame.f_code.co_filename != CELL_FILENAME:
+            return None  # no line events for library frames
+        if event == "line":
+            recorder.on_line(frame, frame.f_lineno)
+        elif event == "return":
+            recorder.on_return(frame)
+        return tracer
+
+    previous = sys.gettrace()
+    sys.settrace(tracer)
+    try:
+        exec(code, namespace)
+    finally:
+        sys.settrace(previous)
+
+
+def choose_tracer() -> str:
+    if (
+        MONITORING_AVAILABLE
+        and sys.monitoring.get_tool(sys.monitoring.DEBUGGER_ID) is None
+    ):
+        return "sys.monitoring"
+    return "sys.settrace"
+
+
+def trace_source(
+    source: str, options: Optional[TraceOptions] = None, tracer: Optional[str] = None
+) -> TraceResult:
+    """Run ``source`` and record a trace table row per executed line.
+
+    ``tracer`` forces "sys.monitoring" or "sys.settrace" (default: the best
+    one available).
+    """
+    options = options or TraceOptions()
+    code = compile(source, CELL_FILENAME, "exec")
+    stdout = io.StringIO()
+    recorder = _Recorder(source, options, stdout)
+    answers = list(options.inputs)
+
+    def fake_input(prompt=""):
+        print(prompt, end="")
+        if not answers:
+            raise EOFError("input() called but no --input answers are left")
+        answer = answers.pop(0)
+        print(answer)
+        return answer
+
+    cell_builtins = dict(vars(builtins), input=fake_input)
+    namespace = {"__name__": "__main__", "__builtins__": cell_builtins}
+
+    tracer = tracer or choose_tracer()
+    run = _run_monitored if tracer == "sys.monitoring" else _run_settrace
+    stopped, error = False, ""
+    with redirect_stdout(stdout):
+        try:
+            run(code, namespace, recorder)
+        except StepLimitReached:
+            stopped = True
+        except KeyboardInterrupt:
+            raise
+        except BaseException as e:
+            # SystemExit too: a cell calling exit() must not end the export
+            error = f"{type(e).__name__}: {e}"
+        if not stopped:
+            recorder.finish_line()
+
+    columns = [
+        name for name in (options.variables or recorder.seen) if name in recorder.seen
+    ]
+    return TraceResult(columns, recorder.rows, stopped, error, tracer)
+
+
+def cache_key(source: str, options: TraceOptions) -> str:
+    return content_hash(
+        str(TRACE_FORMAT_VERSION),
+        f"{sys.version_info[0]}.{sys.version_info[1]}",
+        source,
+        json.dumps(asdict(options), sort_keys=True),
+    )
+
+
+def trace_cached(
+    source: str,
+    options: Optional[TraceOptions] = None,
+    cache: Optional[JsonCache] = None,
+) -> TraceResult:
+    """:func:`trace_source`, reusing a cached table for unchanged source and options."""
+    options = options or TraceOptions()
+    if cache is None:
+        return trace_source(source, options)
+    key = cache_key(source, options)
+    record = cache.get(key)
+    if record is not None:
+        return TraceResult(**record)
+    result = trace_source(source, options)
+    cache.put(key, asdict(result))
+    return result
+
+
+def is_traced_cell(cell) -> bool:
+    return cell.get("cell_type") == "code" and TRACE_TAG in cell.get(
+        "metadata", {}
+    ).get("tags", [])
+
+
+def cell_options(cell) -> TraceOptions:
+    return TraceOptions.from_metadata(cell.get("metadata", {}).get(METADATA_KEY, {}))
+
+
+def trace_table_markdown(result: TraceResult) -> str:
+    """Markdown cell content for a traced cell's table."""
+    return (
+        "**Trace table** (generated by running the cell above)\n\n" + result.markdown()
+    )
+
+
+# -- regression checks --------------------------------------------------------
+
+# (name, source, max_steps, check of the result -> problem or "")
+REGRESSION_CASES = [
+    (
+        "one-line loop records every pass",
+        "t = 0\nfor i in range(3): t += i",
+        DEFAULT_MAX_STEPS,
+        lambda r: (
+            ""
+            if [row["values"].get("i") for row in r.rows][1:4] == ["0", "1", "2"]
+            else f"rows for i were {[row['values'].get('i') for row in r.rows]}"
+        ),
+    ),
+    (
+        "one-line runaway loop stops at max_steps",
+        "x = 0\nwhile x >= 0: x += 1",
+        20,
+        lambda r: (
+            ""
+            if r.stopped and len(r.rows) == 20
+            else f"{len(r.rows)} rows, stopped={r.stopped}"
+        ),
+    ),
+    (
+        "a call's result lands on the calling line",
+        "def f(n):\n    return n * 2\nx = f(2)\ny = x",
+        DEFAULT_MAX_STEPS,
+        lambda r: (
+            ""
+            if [
+                (row["code"], row["values"].get("n"), row["values"].get("x"))
+                for row in r.rows[1:]
+            ]
+            == [
+                ("return n * 2", "2", None),
+                ("x = f(2)", None, "4"),
+                ("y = x", None, "4"),
+            ]
+            else f"rows were {[(row['code'], row['values']) for row in r.rows]}"
+        ),
+    ),
+    (
+        "output goes to the line that printed it",
+        "def f(n):\n    s = n + 1\n    return s\nprint(f(3))",
+        DEFAULT_MAX_STEPS,
+        lambda r: (
+            ""
+            if [(row["code"], row["output"]) for row in r.rows[1:]]
+            == [("s = n + 1", ""), ("return s", ""), ("print(f(3))", "4\n")]
+            else f"rows were {[(row['code'], row['output']) for row in r.rows]}"
+        ),
+    ),
+    (
+        "a call that raises closes its line before the handler runs",
+        "def g():\n    raise ValueError('no')\ntry:\n    g()\nexcept ValueError:\n    y = 1",
+        DEFAULT_MAX_STEPS,
+        lambda r: (
+            ""
+            if [row["code"] for row in r.rows][2:]
+            == ["raise ValueError('no')", "g()", "except ValueError:", "y = 1"]
+            else f"rows were {[row['code'] for row in r.rows]}"
+        ),
+    ),
+    (
+        "sys.exit() is reported, not raised",
+        "import sys\nx = 1\nsys.exit(2)",
+        DEFAULT_MAX_STEPS,
+        lambda r: (
+            ""
+            if r.error == "SystemExit: 2" and len(r.rows) == 3
+            else f"error={r.error!r}"
+        ),
+    ),
+]
+
+
+def check_all() -> Dict[str, List[str]]:
+    """Run the regression cases under every available tracer.
+
+    Each tracer must pass every case, and on Python 3.12+ both tracers must
+    record identical rows.
+    """
+    tracers = ["sys.settrace"] + (
+        ["sys.monitoring"] if choose_tracer() == "sys.monitoring" else []
+    )
+    results: Dict[str, List[str]] = {}
+    for name, source, max_steps, check in REGRESSION_CASES:
+        problems = []
+        traced = {}
+        for tracer in tracers:
+            traced[tracer] = trace_source(
+                source, TraceOptions(max_steps=max_steps), tracer
+            )
+            problem = check(traced[tracer])
+            if problem:
+                problems.append(f"{tracer}: {problem}")
+        rows = [
+            (result.rows, result.stopped, result.error) for result in traced.values()
+        ]
+        if any(other != rows[0] for other in rows[1:]):
+            problems.append("sys.monitoring and sys.settrace recorded different rows")
+        results[name] = problems
+    return results
+
+
+# -- command line -------------------------------------------------------------
+
+
+def _cell_source(cell) -> str:
+    source = cell.get("source", "")
+    return "".join(source) if isinstance(source, list) else source
+
+
+def parse_list(text: str) -> List[str]:
+    return [part.strip() for part in text.split(",") if part.strip()]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Generate a trace table by running Python code."
+    )
+    parser.add_argument(
+        "notebook", nargs="?", type=Path, help="Notebook holding the code cell"
+    )
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument(
+        "--cell", type=int, help="Index of the code cell to trace (see --list)"
+    )
+    source.add_argument(
+        "--code", help="Trace this Python source instead of a notebook cell"
+    )
+    source.add_argument(
+        "--list", action="store_true", help="List the notebook's code cells"
+    )
+    source.add_argument(
+        "--check",
+        action="store_true",
+        help="Run the regression checks under every available tracer",
+    )
+    parser.add_argument(
+        "--variables",
+        type=parse_list,
+        metavar="NAMES",
+        help="Comma-separated columns (default: every variable)",
+    )
+    parser.add_argument(
+        "--exclude",
+        type=parse_list,
+        default=[],
+        metavar="NAMES",
+        help="Comma-separated variables to leave out",
+    )
+    parser.add_argument(
+        "--max-steps",
+        type=int,
+        default=DEFAULT_MAX_STEPS,
+        help=f"Stop after this many rows (default: {DEFAULT_MAX_STEPS})",
+    )
+    parser.add_argument(
+        "--input",
+        dest="inputs",
+        action="append",
+        default=[],
+        help="Answer for input() (repeatable)",
+    )
+    parser.add_argument(
+        "--changes-only",
+        action="store_true",
+        help="Leave out steps that change nothing and print nothing",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Run the code even if a table is cached"
+    )
+    args = parser.parse_args()
+    if args.check:
+        return args
+    if args.code is None and args.notebook is None:
+        parser.error("give a notebook (with --cell or --list) or --code")
+    if (
+        args.notebook is not None
+        and args.code is None
+        and args.cell is None
+        and not args.list
+    ):
+        parser.error("give --cell INDEX or --list with a notebook")
+    return args
+
+
+def main() -> None:
+    args = parse_args()
+
+    if args.check:
+        failed = False
+        for label, problems in check_all().items():
+            print(f"{'✅' if not problems else '❌'} {label}")
+            for problem in problems:
+                print(f"   ⚠️  {problem}")
+            failed = failed or bool(problems)
+        if failed:
+            sys.exit(1)
+        return
+
+    source = args.code
+    metadata_options: dict = {}
+    if args.notebook is not None and args.code is None:
+        try:
+            cells = json.loads(args.notebook.read_text(encoding="utf-8"))["cells"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"❌ Cannot read notebook {args.notebook}: {e}")
+            sys.exit(1)
+        if args.list:
+            for index, cell in enumerate(cells):
+                if cell.get("cell_type") == "code":
+                    first = next(
+                        (
+                            line
+                            for line in _cell_source(cell).splitlines()
+                            if line.strip()
+                        ),
+                        "",
+                    )
+                    tag = " 🏷️ " if is_traced_cell(cell) else "   "
+                    print(f"{index:>4}{tag}{first[:70]}")
+            return
+        if (
+            not 0 <= args.cell < len(cells)
+            or cells[args.cell].get("cell_type") != "code"
+        ):
+            print(f"❌ Cell {args.cell} is not a code cell (see --list)")
+            sys.exit(1)
+        source = _cell_source(cells[args.cell])
+        metadata_options = cells[args.cell].get("metadata", {}).get(METADATA_KEY, {})
+
+    # Command-line options override the cell's own metadata
+    options = TraceOptions.from_metadata(metadata_options)
+    if args.variables is not None:
+        options.variables = args.variables
+    options.exclude = args.exclude or options.exclude
+    options.inputs = args.inputs or options.inputs
+    options.changes_only = args.changes_only or options.changes_only
+    if args.max_steps != DEFAULT_MAX_STEPS or "max_steps" not in metadata_options:
+        options.max_steps = args.max_steps
+
+    try:
+        compile(source, CELL_FILENAME, "exec")
+    except SyntaxError as e:
+        print(f"❌ Cannot trace: {e}")
+        sys.exit(1)
+
+    cache = None if args.no_cache else JsonCache(CACHE_NAMESPACE, DEFAULT_CACHE_DIR)
+    started = time.perf_counter()
+    result = trace_cached(source, options, cache)
+    elapsed = time.perf_counter() - started
+    print(result.markdown())
+    print(
+        f"🔍 {len(result.rows)} step(s) traced with {result.tracer} in {elapsed * 1000:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+Split one course build across several machines (or processes).
+
+Two ways to share out the documents of a build:
+
+- ``--shard i/N``: node i of N builds every N-th document of the sorted list.
+  No coordination at all, but a crashed node's share is simply missing.
+- ``--queue DIR``: every node works through the same list, claiming one
+  document at a time with a lock file in DIR on the shared filesystem. A
+  claim is a lease that a heartbeat thread keeps renewing; when a node
+  crashes or hangs its lease runs out and another node takes the document
+  over. Nodes keep polling until every document is built or has failed.
+
+Outputs go straight into the shared output tree. Once every node has
+finished, ``merge`` checks each document was built and that its outputs
+exist, and writes ``DIR/report.json``.
+
+Usage:
+    # On every node (or in several terminals on one host)
+    python3 utils/ipynb_to_md.py --queue /mnt/course/queues/notebooks
+    python3 utils/md_to_pdf.py --directory other_formats/markdown_lessons \\
+        --queue /mnt/course/queues/pdf
+
+    # Afterwards, from the same working directory (exit code 1 if incomplete)
+    python3 utils/work_queue.py merge /mnt/course/queues/pdf
+
+Claims are created with an exclusive hard link, renewed by rename over the
+live claim and broken by rename once stale. All three are atomic on local
+filesystems and on NFSv3 and later.
+Leases compare wall clock times, so keep the nodes' clocks in sync (NTP).
+
+Dependencies:
+    - None (stdlib only)
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple, TypeVar
+
+from build_cache import atomic_write_bytes
+
+DEFAULT_LEASE_SECONDS = 120
+POLL_SECONDS = 2.0
+
+ITEMS_FILE = "items.json"
+REPORT_FILE = "report.json"
+
+T = TypeVar("T")
+
+
+def parse_shard(text: str) -> Tuple[int, int]:
+    """Parse ``i/N`` (1-based) for argparse."""
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"expected i/N, e.g. 2/4, got {text!r}") from e
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard {text} is out of range (1 <= i <= N)")
+    return index, count
+
+
+def shard_items(items: Sequence[T], shard: Tuple[int, int]) -> List[T]:
+    """Node i's share of ``items``; every node must pass the same sorted list."""
+    index, count = shard
+    return list(items)[index - 1 :: count]
+
+
+def node_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _item_name(key: str) -> str:
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+
+
+def _read_json(path: Path) -> Optional[dict]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _create_exclusive(path: Path, data: bytes) -> bool:
+    """Create ``path`` with ``data`` unless it exists, atomically.
+
+    The content is written to a temporary file first and hard-linked into
+    place, so other nodes never read a half-written claim.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.parent / f".{path.name}.{uuid.uuid4().hex}"
+    tmp.write_bytes(data)
+    try:
+        os.link(tmp, path)
+        return True
+    except FileExistsError:
+        return False
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+@dataclass
+class QueueSummary:
+    """What this node did in one :meth:`WorkQueue.run`."""
+
+    built: List[str] = field(default_factory=list)
+    failed: List[str] = field(default_factory=list)
+    lost: List[str] = field(default_factory=list)
+
+
+class WorkQueue:
+    """Lock-file work queue in a directory shared by every node."""
+
+    def __init__(
+        self,
+        directory: Path,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        node: Optional[str] = None,
+    ):
+        self.directory = Path(directory)
+        self.lease_seconds = lease_seconds
+        self.node = node or node_id()
+        self._held: Dict[str, Path] = {}
+        self._lost: Set[str] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    # -- files --------------------------------------------------------------
+
+    def claim_path(self, key: str) -> Path:
+        return self.directory / "claims" / f"{_item_name(key)}.lock"
+
+    def done_path(self, key: str) -> Path:
+        return self.directory / "done" / f"{_item_name(key)}.json"
+
+    def is_done(self, key: str) -> bool:
+        return self.done_path(key).exists()
+
+    def _claim_bytes(self, key: str) -> bytes:
+        record = {
+            "key": key,
+            "node": self.node,
+            "expires": time.time() + self.lease_seconds,
+        }
+        return json.dumps(record).encode("utf-8")
+
+    def register(self, keys: Sequence[str]) -> None:
+        """Record the document list; every node must bring the same one."""
+        path = self.directory / ITEMS_FILE
+        payload = json.dumps(sorted(keys), indent=1).encode("utf-8")
+        if not _create_exclusive(path, payload):
+            existing = _read_json(path)
+            if existing is None or set(existing) != set(keys):
+                raise ValueError(
+                    f"{self.directory} holds a queue for a different document list; "
+                    "use a fresh queue directory per build"
+                )
+
+    # -- claims -------------------------------------------------------------
+
+    def try_claim(self, key: str) -> bool:
+        """Claim ``key`` for this node, taking over an expired claim."""
+        claim = self.claim_path(key)
+        if self.is_done(key):
+            return False
+        if not _create_exclusive(claim, self._claim_bytes(key)):
+            if not self._break_stale(claim):
+                return False
+            if not _create_exclusive(claim, self._claim_bytes(key)):
+                return False
+        if self.is_done(key):
+            # Finished elsewhere between the check and the claim
+            claim.unlink(missing_ok=True)
+            return False
+        with self._lock:
+            self._held[key] = claim
+        return True
+
+    def _break_stale(self, claim: Path) -> bool:
+        """Remove ``claim`` if its lease has run out; True if removed."""
+        seen = _read_json(claim)
+        if seen is None or seen.get("expires", 0) > time.time():
+            return False
+        # Only one node's rename can succeed
+        stale = claim.parent / f".{claim.name}.stale.{uuid.uuid4().hex}"
+        try:
+            os.rename(claim, stale)
+        except FileNotFoundError:
+            return False
+        if _read_json(stale) != seen:
+            # Another node re-claimed it in between: put its claim back
+            try:
+                os.link(stale, claim)
+            except FileExistsError:
+                pass
+            stale.unlink(missing_ok=True)
+            return False
+        stale.unlink(missing_ok=True)
+        print(
+            f"♻️  Took over {seen.get('key')} from {seen.get('node')} (lease expired)"
+        )
+        return True
+
+    def _renew(self, key: str, claim: Path) -> bool:
+        """Extend this node's lease on ``claim``; False if it is no longer ours.
+
+        The renewed claim is written to a temporary file and swapped in with
+        ``os.replace``, so the claim file never goes missing and no other node
+        can create one in the meantime. Only a claim that is ours and still
+        well inside its lease is renewed: other nodes break claims only once
+        they have expired, so nobody can have taken it over between the check
+        and the swap. A lease that has (nearly) run out counts as lost.
+        """
+        current = _read_json(claim)
+        if current is None or current.get("node") != self.node:
+            return False
+        if current.get("expires", 0) - time.time() < self.lease_seconds / 8:
+            return False
+        tmp = claim.parent / f".{claim.name}.renew.{uuid.uuid4().hex}"
+        tmp.write_bytes(self._claim_bytes(key))
+        try:
+            os.replace(tmp, claim)
+        finally:
+            tmp.unlink(missing_ok=True)
+        return True
+
+    def _heartbeat(self) -> None:
+        """Renew every held lease a few times per lease period."""
+        while not self._stop.wait(self.lease_seconds / 4):
+            with self._lock:
+                held = list(self._held.items())
+            for key, claim in held:
+                if not self._renew(key, claim):
+                    with self._lock:
+                        self._lost.add(key)
+
+    def complete(
+        self, key: str, outputs: Optional[List[Path]], error: str = ""
+    ) -> None:
+        """Record ``key`` as built (or failed) and drop its claim."""
+        record = {
+            "key": key,
+            "node": self.node,
+            "status": "built" if outputs is not None else "failed",
+            "error": error,
+            "finished": time.time(),
+            "outputs": [
+                {"path": str(path), "size": path.stat().st_size}
+                for path in outputs or []
+                if path.exists()
+            ],
+        }
+        atomic_write_bytes(
+            self.done_path(key), json.dumps(record, indent=1).encode("utf-8")
+        )
+        with self._lock:
+            claim = self._held.pop(key, None)
+        if claim is not None and key not in self._lost:
+            claim.unlink(missing_ok=True)
+
+    # -- driving a build ----------------------------------------------------
+
+    def run(
+        self, keys: Sequence[str], work: Callable[[str], List[Path]]
+    ) -> QueueSummary:
+        """Claim and build documents until none is left anywhere.
+
+        ``work(key)`` builds one document and returns its output files; an
+        exception marks the document failed (failures are not retried).
+        """
+        self.register(keys)
+        summary = QueueSummary()
+        heartbeat = threading.Thread(target=self._heartbeat, daemon=True)
+        heartbeat.start()
+        try:
+            pending = list(keys)
+            while pending:
+                waiting = []
+                for key in pending:
+                    if self.is_done(key):
+                        continue
+                    if not self.try_claim(key):
+                        waiting.append(key)
+                        continue
+                    try:
+                        outputs, error = work(key), ""
+                    except Exception as e:
+                        outputs, error = None, str(e)
+                    if key in self._lost:
+                        summary.lost.append(key)
+                    self.complete(key, outputs, error)
+                    (summary.built if outputs is not None else summary.failed).append(
+                        key
+                    )
+                # Claimed elsewhere: wait for those nodes, or for their leases to lapse
+                pending = [key for key in waiting if not self.is_done(key)]
+                if pending:
+                    time.sleep(POLL_SECONDS)
+        finally:
+            self._stop.set()
+            with self._lock:
+                for claim in self._held.values():
+                    claim.unlink(missing_ok=True)
+                self._held.clear()
+        return summary
+
+
+def print_summary(queue: WorkQueue, summary: QueueSummary) -> None:
+    print(
+        f"🔒 Queue {queue.directory}: this node built {len(summary.built)}, "
+        f"failed {len(summary.failed)}"
+    )
+    for key in summary.lost:
+        print(
+            f"⚠️  Lease on {key} expired while building (another node may have rebuilt it)"
+        )
+
+
+def merge(directory: Path) -> dict:
+    """Check a finished queue and write ``report.json``; returns the report."""
+    directory = Path(directory)
+    keys = _read_json(directory / ITEMS_FILE)
+    if keys is None:
+        raise ValueError(f"{directory} is not a work queue (no {ITEMS_FILE})")
+    queue = WorkQueue(directory)
+
+    report = {
+        "documents": len(keys),
+        "built": [],
+        "failed": [],
+        "missing": [],
+        "missing_outputs": [],
+    }
+    nodes: Dict[str, int] = {}
+    for key in keys:
+        record = _read_json(queue.done_path(key))
+        if record is None:
+            report["missing"].append(key)
+            continue
+        if record["status"] != "built":
+            report["failed"].append(
+                {"key": key, "node": record["node"], "error": record["error"]}
+            )
+            continue
+        report["built"].append(key)
+        nodes[record["node"]] = nodes.get(record["node"], 0) + 1
+        for output in record["outputs"]:
+            path = Path(output["path"])
+            if not path.exists() or path.stat().st_size != output["size"]:
+                report["missing_outputs"].append(output["path"])
+    report["nodes"] = nodes
+    report["complete"] = not (
+        report["failed"] or report["missing"] or report["missing_outputs"]
+    )
+    atomic_write_bytes(
+        directory / REPORT_FILE, json.dumps(report, indent=1).encode("utf-8")
+    )
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Inspect a shared build work queue.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    merge_cmd = commands.add_parser(
+        "merge", help="Verify every document was built and write report.json"
+    )
+    merge_cmd.add_argument("queue", type=Path, help="Queue directory given to --queue")
+    args = parser.parse_args()
+
+    try:
+        report = merge(args.queue)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print(f"📋 {len(report['built'])}/{report['documents']} document(s) built")
+    for node, count in sorted(report["nodes"].items()):
+        print(f"   {node}: {count}")
+    for failure in report["failed"]:
+        print(f"❌ {failure['key']} failed on {failure['node']}: {failure['error']}")
+    for key in report["missing"]:
+        print(f"❌ {key} was never built")
+    for path in report["missing_outputs"]:
+        print(f"❌ Output missing or changed: {path}")
+    print(f"📁 Report: {args.queue / REPORT_FILE}")
+    sys.exit(0 if report["complete"] else 1)
+
+
+if __name__ == "__main__":
+    main()